@@ -0,0 +1,264 @@
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+MERCHANTS = [
+    ("Starbucks", "FOOD_AND_DRINK", "FOOD_AND_DRINK_COFFEE", 3.0, 9.0),
+    ("Chipotle", "FOOD_AND_DRINK", "FOOD_AND_DRINK_FAST_FOOD", 9.0, 25.0),
+    ("Whole Foods", "FOOD_AND_DRINK", "FOOD_AND_DRINK_GROCERIES", 20.0, 180.0),
+    ("Trader Joe's", "FOOD_AND_DRINK", "FOOD_AND_DRINK_GROCERIES", 15.0, 120.0),
+    ("Amazon", "GENERAL_MERCHANDISE", "GENERAL_MERCHANDISE_ONLINE_MARKETPLACES", 8.0, 250.0),
+    ("Target", "GENERAL_MERCHANDISE", "GENERAL_MERCHANDISE_SUPERSTORES", 10.0, 200.0),
+    ("Shell", "TRANSPORTATION", "TRANSPORTATION_GAS", 25.0, 80.0),
+    ("Uber", "TRANSPORTATION", "TRANSPORTATION_TAXIS_AND_RIDE_SHARES", 8.0, 60.0),
+    ("Netflix", "ENTERTAINMENT", "ENTERTAINMENT_TV_AND_MOVIES", 15.49, 15.49),
+    ("Spotify", "ENTERTAINMENT", "ENTERTAINMENT_MUSIC_AND_AUDIO", 10.99, 10.99),
+    ("Comcast", "RENT_AND_UTILITIES", "RENT_AND_UTILITIES_INTERNET_AND_CABLE", 60.0, 90.0),
+    ("CVS", "MEDICAL", "MEDICAL_PHARMACIES_AND_SUPPLEMENTS", 5.0, 60.0),
+    ("Delta", "TRAVEL", "TRAVEL_FLIGHTS", 150.0, 900.0),
+    ("Planet Fitness", "PERSONAL_CARE", "PERSONAL_CARE_GYMS_AND_FITNESS_CENTERS", 24.99, 24.99),
+]
+
+INCOME = ("Payroll Deposit", "INCOME", "INCOME_WAGES", 1500.0, 4000.0)
+
+PAYMENT_CHANNELS = ["in store", "online", "other"]
+
+
+@dataclass
+class FakePlaidConfig:
+    """Scale and fault-injection settings for the fake Plaid server."""
+
+    items: int = 1
+    accounts_per_item: int = 2
+    transactions_per_account: int = 100
+    page_size: int = 100
+    history_days: int = 365
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 42
+    end_date: Optional[date] = None
+
+
+class FakePlaidData:
+    """
+    Deterministic synthetic Plaid data.
+
+    Transactions are generated on demand from (item, index) so paging through
+    millions of rows does not require holding them in memory. The same seed
+    always produces the same items, accounts and transactions.
+    """
+
+    def __init__(self, config: FakePlaidConfig = None):
+        self.config = config or FakePlaidConfig()
+        self.end_date = self.config.end_date or date.today()
+        self.removed_tokens = set()
+        self._fixture = None
+
+    @classmethod
+    def from_fixture(cls, path: str):
+        """
+        Replay recorded responses instead of generating synthetic ones.
+
+        The fixture is a JSON document as written by `record_fixture`, keyed by
+        access token.
+        """
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        data = cls(FakePlaidConfig(**fixture.get("config", {})))
+        data._fixture = fixture["items"]
+        return data
+
+    # Items
+    def access_tokens(self) -> list[str]:
+        if self._fixture is not None:
+            return list(self._fixture.keys())
+        return [f"access-fake-{i}" for i in range(self.config.items)]
+
+    def item_index(self, access_token: str) -> Optional[int]:
+        if access_token in self.removed_tokens:
+            return None
+        tokens = self.access_tokens()
+        return tokens.index(access_token) if access_token in tokens else None
+
+    def item(self, index: int) -> dict:
+        if self._fixture is not None:
+            return self._fixture[self.access_tokens()[index]]["item"]
+        return {
+            "item_id": f"item-fake-{index}",
+            "institution_id": f"ins_fake_{index}",
+            "institution_name": f"Fake Bank {index}",
+            "webhook": "",
+            "error": None,
+            "available_products": [],
+            "billed_products": ["transactions"],
+            "products": ["transactions"],
+            "consented_products": ["transactions"],
+            "consent_expiration_time": None,
+            "update_type": "background",
+        }
+
+    def institution(self, institution_id: str) -> Optional[dict]:
+        if self._fixture is not None:
+            for recorded in self._fixture.values():
+                if recorded["institution"]["institution_id"] == institution_id:
+                    return recorded["institution"]
+            return None
+        if not institution_id.startswith("ins_fake_"):
+            return None
+        index = institution_id[len("ins_fake_") :]
+        return {
+            "institution_id": institution_id,
+            "name": f"Fake Bank {index}",
+            "products": ["transactions"],
+            "country_codes": ["US"],
+            "routing_numbers": [],
+            "oauth": False,
+            "logo": None,
+        }
+
+    # Accounts
+    def accounts(self, index: int) -> list[dict]:
+        if self._fixture is not None:
+            return self._fixture[self.access_tokens()[index]]["accounts"]
+        accounts = []
+        for a in range(self.config.accounts_per_item):
+            checking = a % 2 == 0
+            accounts.append(
+                {
+                    "account_id": f"acc-fake-{index}-{a}",
+                    "name": f"Fake {'Checking' if checking else 'Credit'} {index}-{a}",
+                    "official_name": None,
+                    "mask": f"{(index * 100 + a) % 10000:04d}",
+                    "type": "depository" if checking else "credit",
+                    "subtype": "checking" if checking else "credit card",
+                    "balances": {
+                        "available": 1000.0 + a,
+                        "current": 1000.0 + a,
+                        "limit": None if checking else 5000.0,
+                        "iso_currency_code": "USD",
+                        "unofficial_currency_code": None,
+                    },
+                }
+            )
+        return accounts
+
+    # Transactions
+    def transaction_count(self, index: int) -> int:
+        if self._fixture is not None:
+            return len(self._fixture[self.access_tokens()[index]]["transactions"])
+        return self.config.accounts_per_item * self.config.transactions_per_account
+
+    def transaction(self, index: int, n: int) -> dict:
+        """Build the n-th transaction of an item."""
+        if self._fixture is not None:
+            return self._fixture[self.access_tokens()[index]]["transactions"][n]
+
+        rng = random.Random(f"{self.config.seed}-{index}-{n}")
+        account = n % self.config.accounts_per_item
+
+        # Older transactions first, with a bit of jitter so dates interleave
+        per_account = max(self.config.transactions_per_account, 1)
+        position = (n // self.config.accounts_per_item) / per_account
+        days_ago = int((1 - position) * self.config.history_days)
+        days_ago = max(0, min(self.config.history_days, days_ago + rng.randint(-3, 3)))
+        txn_date = self.end_date - timedelta(days=days_ago)
+
+        if rng.random() < 0.04:
+            name, primary, detailed, low, high = INCOME
+            amount = -round(rng.uniform(low, high), 2)
+        else:
+            name, primary, detailed, low, high = rng.choice(MERCHANTS)
+            # Skew towards the low end of each merchant's range
+            amount = round(low + (high - low) * rng.random() ** 2, 2)
+
+        timestamp = datetime.combine(txn_date, datetime.min.time()).isoformat() + "Z"
+        return {
+            "transaction_id": f"txn-fake-{index}-{n}",
+            "account_id": f"acc-fake-{index}-{account}",
+            "amount": amount,
+            "iso_currency_code": "USD",
+            "unofficial_currency_code": None,
+            "date": txn_date.isoformat(),
+            "datetime": timestamp,
+            "authorized_date": txn_date.isoformat(),
+            "authorized_datetime": timestamp,
+            "transaction_code": None,
+            "name": name.upper(),
+            "merchant_name": name,
+            "logo_url": None,
+            "pending": False,
+            "pending_transaction_id": None,
+            "payment_channel": rng.choice(PAYMENT_CHANNELS),
+            "personal_finance_category": {
+                "primary": primary,
+                "detailed": detailed,
+                "confidence_level": "VERY_HIGH",
+            },
+        }
+
+    def sync_page(self, index: int, cursor: str, count: int) -> dict:
+        """Return one transactions/sync page starting at the given cursor."""
+        offset = int(cursor.split("-")[-1]) if cursor else 0
+        total = self.transaction_count(index)
+        end = min(offset + count, total)
+        return {
+            "added": [self.transaction(index, n) for n in range(offset, end)],
+            "modified": [],
+            "removed": [],
+            "next_cursor": f"cursor-fake-{end}",
+            "has_more": end < total,
+        }
+
+
+def record_fixture(plaid_client, access_tokens: list[str], path: str):
+    """
+    Record item, accounts, institution and transactions for each access token
+    from a real (e.g. sandbox) Plaid client into a replayable fixture file.
+    """
+    from plaid.model.accounts_get_request import AccountsGetRequest
+    from plaid.model.country_code import CountryCode
+    from plaid.model.institutions_get_by_id_request import (
+        InstitutionsGetByIdRequest,
+    )
+    from plaid.model.item_get_request import ItemGetRequest
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+    items = {}
+    for access_token in access_tokens:
+        item = plaid_client.item_get(ItemGetRequest(access_token=access_token))[
+            "item"
+        ].to_dict()
+        institution = plaid_client.institutions_get_by_id(
+            InstitutionsGetByIdRequest(
+                institution_id=item["institution_id"],
+                country_codes=[CountryCode("US")],
+            )
+        )["institution"].to_dict()
+        accounts = [
+            account.to_dict()
+            for account in plaid_client.accounts_get(
+                AccountsGetRequest(access_token=access_token)
+            )["accounts"]
+        ]
+
+        transactions = []
+        cursor, has_more = "", True
+        while has_more:
+            page = plaid_client.transactions_sync(
+                TransactionsSyncRequest(access_token=access_token, cursor=cursor)
+            ).to_dict()
+            transactions.extend(page["added"])
+            cursor, has_more = page["next_cursor"], page["has_more"]
+
+        items[access_token] = {
+            "item": item,
+            "institution": institution,
+            "accounts": accounts,
+            "transactions": transactions,
+        }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"items": items}, f, indent=2, default=str)
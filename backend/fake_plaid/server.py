@@ -0,0 +1,196 @@
+"""
+Local stand-in for the Plaid API.
+
+Run it with `python -m fake_plaid.server` and start the backend with
+`PLAID_ENV=fake` (and optionally `PLAID_FAKE_HOST`) to sync against
+deterministic synthetic data instead of the Plaid sandbox.
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from http import HTTPStatus
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData
+
+MAX_SYNC_COUNT = 500
+
+
+def plaid_error(status_code: int, error_type: str, error_code: str, message: str):
+    return (
+        jsonify(
+            {
+                "error_type": error_type,
+                "error_code": error_code,
+                "error_message": message,
+                "display_message": None,
+                "request_id": uuid.uuid4().hex,
+            }
+        ),
+        status_code,
+    )
+
+
+def create_fake_plaid_app(data: FakePlaidData = None) -> Flask:
+    data = data or FakePlaidData()
+    config = data.config
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+
+    app = Flask(__name__)
+    app.config["fake_plaid_data"] = data
+    app.config["fake_plaid_calls"] = {}
+
+    @app.before_request
+    def inject_latency_and_errors():
+        calls = app.config["fake_plaid_calls"]
+        calls[request.path] = calls.get(request.path, 0) + 1
+
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+
+        with rng_lock:
+            fail = config.error_rate and rng.random() < config.error_rate
+        if fail:
+            if config.error_status == HTTPStatus.TOO_MANY_REQUESTS:
+                return plaid_error(
+                    config.error_status,
+                    "RATE_LIMIT_EXCEEDED",
+                    "RATE_LIMIT",
+                    "injected rate limit error",
+                )
+            return plaid_error(
+                config.error_status,
+                "API_ERROR",
+                "INTERNAL_SERVER_ERROR",
+                "injected server error",
+            )
+
+    def item_index_or_error():
+        access_token = (request.get_json(silent=True) or {}).get("access_token")
+        index = data.item_index(access_token)
+        if index is None:
+            return None, plaid_error(
+                HTTPStatus.BAD_REQUEST,
+                "INVALID_INPUT",
+                "INVALID_ACCESS_TOKEN",
+                "provided access token is in an invalid format or does not exist",
+            )
+        return index, None
+
+    @app.route("/item/get", methods=["POST"])
+    def item_get():
+        index, error = item_index_or_error()
+        if error:
+            return error
+        return jsonify({"item": data.item(index), "request_id": uuid.uuid4().hex})
+
+    @app.route("/accounts/get", methods=["POST"])
+    def accounts_get():
+        index, error = item_index_or_error()
+        if error:
+            return error
+        return jsonify(
+            {
+                "accounts": data.accounts(index),
+                "item": data.item(index),
+                "request_id": uuid.uuid4().hex,
+            }
+        )
+
+    @app.route("/institutions/get_by_id", methods=["POST"])
+    def institutions_get_by_id():
+        institution_id = (request.get_json(silent=True) or {}).get("institution_id")
+        institution = data.institution(institution_id or "")
+        if institution is None:
+            return plaid_error(
+                HTTPStatus.BAD_REQUEST,
+                "INVALID_INPUT",
+                "INVALID_INSTITUTION",
+                "invalid institution_id provided",
+            )
+        return jsonify({"institution": institution, "request_id": uuid.uuid4().hex})
+
+    @app.route("/transactions/sync", methods=["POST"])
+    def transactions_sync():
+        index, error = item_index_or_error()
+        if error:
+            return error
+        body = request.get_json(silent=True) or {}
+        count = min(int(body.get("count") or config.page_size), MAX_SYNC_COUNT)
+        page = data.sync_page(index, body.get("cursor") or "", count)
+        page.update(
+            {
+                "accounts": [],
+                "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE",
+                "request_id": uuid.uuid4().hex,
+            }
+        )
+        return jsonify(page)
+
+    @app.route("/item/remove", methods=["POST"])
+    def item_remove():
+        index, error = item_index_or_error()
+        if error:
+            return error
+        data.removed_tokens.add(request.get_json()["access_token"])
+        return jsonify({"request_id": uuid.uuid4().hex})
+
+    return app
+
+
+def start_fake_plaid_server(data: FakePlaidData = None, port: int = 0):
+    """
+    Serve the fake Plaid API from a background thread.
+
+    Returns:
+        tuple: (server, host) - call server.shutdown() to stop it
+    """
+    server = make_server(
+        "127.0.0.1", port, create_fake_plaid_app(data), threaded=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Plaid server.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--items", type=int, default=1)
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--transactions", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixture", help="Replay a recorded fixture file")
+    args = parser.parse_args()
+
+    if args.fixture:
+        data = FakePlaidData.from_fixture(args.fixture)
+    else:
+        data = FakePlaidData(
+            FakePlaidConfig(
+                items=args.items,
+                accounts_per_item=args.accounts,
+                transactions_per_account=args.transactions,
+                page_size=args.page_size,
+                latency_ms=args.latency_ms,
+                error_rate=args.error_rate,
+                error_status=args.error_status,
+                seed=args.seed,
+            )
+        )
+
+    print(f"Fake Plaid access tokens: {', '.join(data.access_tokens())}")
+    create_fake_plaid_app(data).run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Local stand-in for Plaid webhook delivery.
+
+Webhooks are signed like Plaid's (a JWT in the Plaid-Verification header
+carrying the body's SHA-256), but with HS256 and a shared secret instead of
+Plaid's ES256 keys. Start the backend with the same PLAID_WEBHOOK_SECRET and
+fire a webhook with:
+
+    python -m fake_plaid.webhooks --url http://localhost:8000/api/webhook/plaid \\
+        --item item-fake-0 --secret dev-webhook-secret
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_SECRET = "dev-webhook-secret"
+
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_webhook(
+    body: bytes, secret: str, key_id: str = "fake-webhook-key", issued_at: float = None
+) -> str:
+    """Build a Plaid-Verification JWT for a webhook body."""
+    header = {"alg": "HS256", "kid": key_id, "typ": "JWT"}
+    claims = {
+        "iat": int(time.time() if issued_at is None else issued_at),
+        "request_body_sha256": hashlib.sha256(body).hexdigest(),
+    }
+    signing_input = (
+        f"{_b64url_encode(json.dumps(header).encode())}."
+        f"{_b64url_encode(json.dumps(claims).encode())}"
+    )
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256)
+    return f"{signing_input}.{_b64url_encode(signature.digest())}"
+
+
+def sync_updates_available(
+    item_id: str, initial_update_complete: bool = True, historical_update_complete: bool = True
+) -> dict:
+    """Payload of a TRANSACTIONS / SYNC_UPDATES_AVAILABLE webhook."""
+    return {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": "SYNC_UPDATES_AVAILABLE",
+        "item_id": item_id,
+        "initial_update_complete": initial_update_complete,
+        "historical_update_complete": historical_update_complete,
+        "environment": "sandbox",
+    }
+
+
+class WebhookSimulator:
+    """Signs and POSTs webhooks to a receiver URL."""
+
+    def __init__(self, url: str, secret: str = DEFAULT_SECRET):
+        self.url = url
+        self.secret = secret
+
+    def build(self, payload: dict, issued_at: float = None) -> tuple[bytes, dict]:
+        """
+        Returns:
+            tuple: (body, headers) of the signed webhook request
+        """
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Plaid-Verification": sign_webhook(body, self.secret, issued_at=issued_at),
+        }
+        return body, headers
+
+    def send(self, payload: dict, issued_at: float = None) -> tuple[int, dict]:
+        """
+        Deliver a webhook.
+
+        Returns:
+            tuple: (status_code, parsed JSON response)
+        """
+        body, headers = self.build(payload, issued_at)
+        http_request = urllib.request.Request(
+            self.url, data=body, headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=10) as response:
+                return response.status, json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a fake Plaid webhook.")
+    parser.add_argument("--url", default="http://localhost:8000/api/webhook/plaid")
+    parser.add_argument("--item", required=True, help="Item ID to notify")
+    parser.add_argument("--secret", default=DEFAULT_SECRET)
+    parser.add_argument("--count", type=int, default=1, help="Deliveries to send")
+    args = parser.parse_args()
+
+    simulator = WebhookSimulator(args.url, args.secret)
+    for _ in range(args.count):
+        status, response = simulator.send(sync_updates_available(args.item))
+        print(f"{status} {response}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Import a CSV or OFX bank statement from the command line:
+
+    python import_statement.py statement.csv --account-id <id>
+    python import_statement.py export.ofx --account-id <id>
+
+Columns are found by their header names unless mapped with --date-column,
+--amount-column and friends. Transactions already stored are skipped, so
+a statement can be imported again safely.
+"""
+
+import argparse
+import os
+
+from server import app
+from utils.statement_import import (
+    FORMATS,
+    IMPORT_BATCH_SIZE,
+    CsvMapping,
+    import_statement,
+)
+
+
+def print_progress(totals: dict):
+    print(
+        f"{totals['rows']} rows read, {totals['imported']} imported, "
+        f"{totals['duplicates']} duplicates, {totals['failed']} failed",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a bank statement.")
+    parser.add_argument("path")
+    parser.add_argument("--account-id", required=True)
+    parser.add_argument("--format", choices=FORMATS)
+    for field in ("date", "amount", "debit", "credit", "name", "merchant", "category"):
+        parser.add_argument(f"--{field}-column")
+    parser.add_argument("--date-format", help="strptime format, e.g. %%d/%%m/%%Y")
+    parser.add_argument(
+        "--debits-positive",
+        action="store_true",
+        help="The statement shows money going out as positive amounts",
+    )
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.format
+    if file_format is None:
+        extension = os.path.splitext(args.path)[1].lstrip(".").lower()
+        file_format = "ofx" if extension in ("ofx", "qfx") else "csv"
+    mapping = CsvMapping(
+        date=args.date_column,
+        amount=args.amount_column,
+        debit=args.debit_column,
+        credit=args.credit_column,
+        name=args.name_column,
+        merchant=args.merchant_column,
+        category=args.category_column,
+        date_format=args.date_format,
+        debits_positive=args.debits_positive,
+    )
+
+    with app.app_context(), open(args.path, encoding="utf-8-sig", newline="") as stream:
+        totals = import_statement(
+            stream,
+            args.account_id,
+            file_format,
+            mapping,
+            batch_size=args.batch_size,
+            progress=print_progress,
+        )
+    for error in totals["errors"]:
+        print(f"Row {error['row']}: {error['error']}")
+    print_progress(totals)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
+from bisect import bisect_right
 from datetime import datetime, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, or_
 from models import db
 from models.transaction.txn import Txn
 from models.budget.budget import Budget
@@ -41,6 +42,48 @@ def get_frequency_period_end_date(
         raise ValueError(f"Unsupported frequency: {frequency}")
 
 
+def get_period_window(
+    frequency: BudgetFrequency,
+    end: datetime,
+    start: datetime = None,
+    limit: int = None,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Period boundaries ending with the period that contains `end`.
+
+    Walks backward from `end` until the period containing `start` or until
+    `limit` periods have been collected, whichever comes first, so the cost
+    depends on the window and not on how much history is stored.
+
+    Args:
+        frequency: The budget frequency
+        end: A date inside the newest period
+        start: A date inside the oldest period (unbounded if None)
+        limit: Maximum number of periods (unbounded if None)
+
+    Returns:
+        list: (start_date, end_date) tuples, oldest first
+    """
+    if start is None and limit is None:
+        raise ValueError("A period window needs a start date or a limit")
+
+    window = []
+    period_start = get_frequency_period_start_date(
+        frequency, end.replace(hour=0, minute=0, second=0, microsecond=0)
+    )
+    while limit is None or len(window) < limit:
+        period_end = get_frequency_period_end_date(frequency, period_start)
+        if start is not None and period_end < start:
+            break
+        window.append((period_start, period_end))
+        period_start = get_frequency_period_start_date(
+            frequency, period_start - timedelta(days=1)
+        )
+
+    window.reverse()
+    return window
+
+
 def calculate_spent_amount_for_period(
     budget: Budget, start: datetime, end: datetime
 ) -> float:
@@ -53,40 +96,171 @@ def calculate_spent_amount_for_period(
 def calculate_spent_amount_for_period_for_budget(
     budget: Budget, start: datetime, end: datetime
 ) -> float:
-    query = Txn.query.filter(
+    query = db.session.query(func.sum(Txn.amount)).filter(
         Txn.date >= start, Txn.date <= end, Txn.category_id == budget.category_id
     )
     if budget.subcategory_id:
         query = query.filter(Txn.subcategory_id == budget.subcategory_id)
 
-    return float(sum(txn.amount for txn in query.all()))
+    return float(query.scalar() or 0)
 
 
-def generate_budget_periods_for_budget(budget: Budget, start_date: datetime) -> list:
-    periods = []
-    today = datetime.today()
+def bucket_by_period(rows, window: list[tuple[datetime, datetime]]) -> list[float]:
+    """
+    Sum (date, amount) rows into one value per period of `window`.
 
-    current_start = get_frequency_period_start_date(budget.frequency, start_date)
-    current_end = get_frequency_period_end_date(budget.frequency, current_start)
+    Returns:
+        list: Totals aligned with `window`, 0.0 for periods without rows
+    """
+    starts = [period_start for period_start, _ in window]
+    totals = [0.0] * len(window)
+    for day, amount in rows:
+        index = bisect_right(starts, day) - 1
+        if index >= 0 and day <= window[index][1]:
+            totals[index] += float(amount)
+    return [round(total, 2) for total in totals]
 
-    while current_start <= today:
-        spent_amount = calculate_spent_amount_for_period_for_budget(
-            budget, current_start, current_end
-        )
 
-        period = BudgetPeriod(
-            start_date=current_start,
-            end_date=current_end,
+def get_daily_spent(
+    budget: Budget, start: datetime, end: datetime, account_id: str = None
+) -> list:
+    """
+    (date, amount) rows of spending against `budget`, summed per date,
+    optionally from one account only.
+    """
+    query = db.session.query(Txn.date, func.sum(Txn.amount)).filter(
+        Txn.date >= start,
+        Txn.date <= end,
+        Txn.category_id == budget.category_id,
+    )
+    if budget.subcategory_id:
+        query = query.filter(Txn.subcategory_id == budget.subcategory_id)
+    if account_id:
+        query = query.filter(Txn.account_id == account_id)
+
+    return query.group_by(Txn.date).all()
+
+
+def get_spent_by_period(
+    budget: Budget, window: list[tuple[datetime, datetime]]
+) -> list[float]:
+    """
+    Spending against `budget` for every period of `window`.
+
+    One query sums the window's transactions per day, which are then
+    bucketed into periods, instead of one query per period.
+    """
+    return bucket_by_period(
+        get_daily_spent(budget, window[0][0], window[-1][1]), window
+    )
+
+
+def generate_budget_periods_for_window(
+    budget: Budget, window: list[tuple[datetime, datetime]]
+) -> list[BudgetPeriod]:
+    if not window:
+        return []
+    return [
+        BudgetPeriod(
+            start_date=period_start,
+            end_date=period_end,
             budget=budget,
-            spent_amount=spent_amount,
+            spent_amount=spent,
         )
-        periods.append(period)
+        for (period_start, period_end), spent in zip(
+            window, get_spent_by_period(budget, window)
+        )
+    ]
+
+
+def generate_budget_periods_for_budget(
+    budget: Budget, start_date: datetime, end_date: datetime = None
+) -> list:
+    window = get_period_window(
+        budget.frequency, end_date or datetime.today(), start=start_date
+    )
+    return generate_budget_periods_for_window(budget, window)
+
+
+def get_budget_status(today: datetime) -> list[dict]:
+    """
+    Spending against every budget in the period containing `today`.
 
-        # Advance to next period
-        next_start = get_frequency_period_end_date(
-            budget.frequency, current_start
-        ) + timedelta(days=1)
-        current_start = get_frequency_period_start_date(budget.frequency, next_start)
-        current_end = get_frequency_period_end_date(budget.frequency, current_start)
+    All budgets are answered by one grouped query: each budget is joined to
+    the transactions of its category (and subcategory, if set) inside its
+    own current week, month or year.
 
-    return periods
+    Returns:
+        list: One dict per budget with spent, limit, remaining, percent_used
+        and projected_spent (spent extrapolated to the end of the period)
+    """
+    today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+    windows = {}
+    for frequency in BudgetFrequency:
+        start = get_frequency_period_start_date(frequency, today)
+        end = get_frequency_period_end_date(frequency, start)
+        windows[frequency] = (start, end)
+
+    period_start = case(
+        *[
+            (Budget.frequency == frequency, start)
+            for frequency, (start, _) in windows.items()
+        ]
+    )
+    period_next_start = case(
+        *[
+            (Budget.frequency == frequency, end + timedelta(days=1))
+            for frequency, (_, end) in windows.items()
+        ]
+    )
+    spent_by_budget = (
+        db.session.query(
+            Budget.id.label("budget_id"),
+            func.coalesce(func.sum(Txn.amount), 0).label("spent"),
+        )
+        .outerjoin(
+            Txn,
+            and_(
+                Txn.category_id == Budget.category_id,
+                or_(
+                    Budget.subcategory_id.is_(None),
+                    Txn.subcategory_id == Budget.subcategory_id,
+                ),
+                Txn.date >= period_start,
+                Txn.date < period_next_start,
+            ),
+        )
+        .group_by(Budget.id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Budget, spent_by_budget.c.spent)
+        .join(spent_by_budget, spent_by_budget.c.budget_id == Budget.id)
+        .all()
+    )
+
+    statuses = []
+    for budget, spent in rows:
+        start, end = windows[budget.frequency]
+        spent = float(spent)
+        limit = float(budget.amount)
+        elapsed_days = (today - start).days + 1
+        total_days = (end - start).days + 1
+        statuses.append(
+            {
+                "budget_id": budget.id,
+                "frequency": budget.frequency.value,
+                "category_name": budget.category.name,
+                "subcategory_name": (
+                    budget.subcategory.name if budget.subcategory else None
+                ),
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "spent_amount": round(spent, 2),
+                "limit_amount": round(limit, 2),
+                "remaining_amount": round(limit - spent, 2),
+                "percent_used": round(spent / limit * 100, 1) if limit else None,
+                "projected_spent_amount": round(spent / elapsed_days * total_days, 2),
+            }
+        )
+    return statuses
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from models import db
+
+
+class CacheEntry(db.Model):
+    """
+    A cached result shared between server and worker processes.
+
+    `version` is the data version the value was computed from, so entries
+    for older versions can be pruned in one statement.
+    """
+
+    key = db.Column(db.String(255), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, index=True)
+    value = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
@@ -0,0 +1,12 @@
+from models import db
+
+
+class DataVersion(db.Model):
+    """
+    Counter bumped in the same transaction as every write to the data it
+    names, so cached results can be keyed by it and are invalidated by any
+    process that writes, not just the one holding the cache.
+    """
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from models import db
+
+
+class TextEmbedding(db.Model):
+    """
+    A cached sentence embedding of normalized transaction text.
+
+    `key` hashes the model name with the text, so switching models never
+    reuses vectors from another one. `vector` holds float32 values.
+    """
+
+    key = db.Column(db.String(40), primary_key=True)
+    model = db.Column(db.String(120), nullable=False)
+    text = db.Column(db.String(255), nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
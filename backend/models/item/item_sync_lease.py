@@ -0,0 +1,28 @@
+from models import db
+
+
+class ItemSyncLease(db.Model):
+    """
+    Per-item lease that lets only one process sync an item at a time.
+
+    `owner` and `expires_at` are set while a sync runs. Releasing the lease
+    bumps `generation` and stores the outcome, so requests that waited on the
+    lease can return the result of the sync they joined.
+    """
+
+    item_id = db.Column(db.String(120), primary_key=True)
+    owner = db.Column(db.String(120), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)  # JSON sync summary
+    error = db.Column(db.Text, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "item_id": self.item_id,
+            "owner": self.owner,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "generation": self.generation,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,51 @@
+import json
+import uuid
+from datetime import datetime
+
+from models import db
+from models.job.job_state import JobState
+
+
+class Job(db.Model):
+    """A unit of background work, persisted so it survives restarts."""
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(60), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")  # JSON arguments
+    state = db.Column(
+        db.Enum(JobState), nullable=False, default=JobState.QUEUED, index=True
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    next_run_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    # Set while a worker runs the job; an expired lease can be reclaimed
+    lease_owner = db.Column(db.String(120), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+
+    # Enqueuing twice with the same key returns the existing job
+    idempotency_key = db.Column(db.String(200), nullable=True, unique=True)
+
+    result = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "payload": json.loads(self.payload),
+            "state": self.state.value,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "next_run_at": self.next_run_at.isoformat(),
+            "idempotency_key": self.idempotency_key,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, state={self.state.value})>"
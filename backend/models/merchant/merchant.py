@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from models import db
+from models.merchant.merchant_alias import MerchantAlias  # noqa: F401
+
+
+class Merchant(db.Model):
+    """
+    A canonical merchant that transactions point to through `merchant_id`.
+
+    The spellings banks use for it ("AMZN Mktp", "Amazon.com") are rows in
+    `merchant_alias`, and its logo is stored here once instead of on every
+    transaction.
+    """
+
+    __tablename__ = "merchant"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+    logo_url = db.Column(db.String(2000), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    aliases = db.relationship(
+        "MerchantAlias", back_populates="merchant", cascade="all, delete-orphan"
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "logo_url": self.logo_url,
+            "aliases": sorted(alias.alias for alias in self.aliases),
+        }
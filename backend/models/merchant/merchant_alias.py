@@ -0,0 +1,17 @@
+from models import db
+
+
+class MerchantAlias(db.Model):
+    """
+    A normalized merchant spelling (see `merchant_key`) and the merchant it
+    resolves to. The primary key doubles as the alias index.
+    """
+
+    __tablename__ = "merchant_alias"
+
+    alias = db.Column(db.String(120), primary_key=True)
+    merchant_id = db.Column(
+        db.Integer, db.ForeignKey("merchant.id"), nullable=False, index=True
+    )
+
+    merchant = db.relationship("Merchant", back_populates="aliases")
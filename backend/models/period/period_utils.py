@@ -1,12 +1,9 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import case, func
 from models.period.period import Period
 from models.budget.budget_frequency import BudgetFrequency
-from models.budget.budget_utils import (
-    get_frequency_period_end_date,
-    get_frequency_period_start_date,
-)
+from models.budget.budget_utils import bucket_by_period, get_period_window
 from models.transaction.txn import Txn
 from models import db
 
@@ -20,53 +17,49 @@ def get_oldest_transaction_date() -> datetime:
         raise ValueError("No transactions found in the database.")
 
 
-def get_totals_by_frequency(frequency: BudgetFrequency) -> list[dict]:
-    try:
-        start_date = get_oldest_transaction_date()
-    except ValueError:
-        return []  # No transactions found
+def get_totals_by_frequency(
+    frequency: BudgetFrequency, window: list[tuple[datetime, datetime]] = None
+) -> list[dict]:
+    if window is None:
+        try:
+            start_date = get_oldest_transaction_date()
+        except ValueError:
+            return []  # No transactions found
+        window = get_period_window(frequency, datetime.today(), start=start_date)
 
-    today = datetime.today()
-    current_start = get_frequency_period_start_date(frequency, start_date)
-    periods = []
-
-    while current_start <= today:
-        current_end = get_frequency_period_end_date(frequency, current_start)
-
-        # Sum all transactions in this period
-        total_spent = (
-            db.session.query(func.sum(Txn.amount))
-            .filter(
-                Txn.date >= current_start,
-                Txn.date <= current_end,
-                Txn.amount > 0,  # Only expenses
-            )
-            .scalar()
-            or 0.0
+    if not window:
+        return []
+    spent, income = get_totals_by_period(window)
+    return [
+        Period(
+            start_date=period_start,
+            end_date=period_end,
+            spent_amount=period_spent,
+            income_amount=period_income,
         )
-
-        total_income = (
-            db.session.query(func.sum(Txn.amount))
-            .filter(
-                Txn.date >= current_start,
-                Txn.date <= current_end,
-                Txn.amount < 0,  # Only income
-            )
-            .scalar()
-            or 0.0
+        for (period_start, period_end), period_spent, period_income in zip(
+            window, spent, income
         )
+    ]
 
-        periods.append(
-            Period(
-                start_date=current_start,
-                end_date=current_end,
-                spent_amount=total_spent,
-                income_amount=-1*total_income, # Income = negative expenses
-            )
-        )
 
-        # Move to next period
-        current_start = current_end + timedelta(days=1)
-        current_start = get_frequency_period_start_date(frequency, current_start)
+def get_totals_by_period(window: list[tuple[datetime, datetime]]) -> tuple:
+    """
+    Spending and income for every period of `window` from one query.
 
-    return periods
+    Returns:
+        tuple: (spent, income) lists aligned with `window`
+    """
+    rows = (
+        db.session.query(
+            Txn.date,
+            func.sum(case((Txn.amount > 0, Txn.amount), else_=0)),
+            func.sum(case((Txn.amount < 0, -Txn.amount), else_=0)),
+        )
+        .filter(Txn.date >= window[0][0], Txn.date <= window[-1][1])
+        .group_by(Txn.date)
+        .all()
+    )
+    spent = bucket_by_period(((day, amount) for day, amount, _ in rows), window)
+    income = bucket_by_period(((day, amount) for day, _, amount in rows), window)
+    return spent, income
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from models import db
+
+
+class RecurringSeries(db.Model):
+    """
+    The transactions of one account at one merchant, reduced to running
+    statistics of their amounts and of the days between them. A series
+    whose intervals match a cadence is a detected subscription or bill.
+    """
+
+    __tablename__ = "recurring_series"
+    __table_args__ = (db.UniqueConstraint("account_id", "key"),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    account_id = db.Column(db.String, db.ForeignKey("account.id"), nullable=False)
+    # "m:<merchant id>", or "n:<merchant key of the name>" without a merchant
+    key = db.Column(db.String(130), nullable=False)
+    merchant_id = db.Column(db.Integer, db.ForeignKey("merchant.id"), nullable=True)
+    name = db.Column(db.String(120), nullable=False)
+
+    # Running mean and sum of squared deviations (Welford), so new
+    # transactions are folded in without reading older ones
+    occurrences = db.Column(db.Integer, nullable=False, default=0)
+    amount_mean = db.Column(db.Float, nullable=False, default=0.0)
+    amount_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    interval_mean = db.Column(db.Float, nullable=False, default=0.0)
+    interval_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    first_date = db.Column(db.Date, nullable=False)
+    last_date = db.Column(db.Date, nullable=False)
+    last_amount = db.Column(db.Numeric(10, 2), nullable=False)
+
+    # Set while the series is detected as recurring
+    cadence = db.Column(db.String(20), nullable=True, index=True)
+    next_date = db.Column(db.Date, nullable=True)
+    expected_amount = db.Column(db.Numeric(10, 2), nullable=True)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now
+    )
+
+    merchant = db.relationship("Merchant", lazy="joined")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "account_id": self.account_id,
+            "merchant_id": self.merchant_id,
+            "name": self.merchant.name if self.merchant else self.name,
+            "logo_url": self.merchant.logo_url if self.merchant else None,
+            "cadence": self.cadence,
+            "interval_days": round(self.interval_mean, 1),
+            "occurrences": self.occurrences,
+            "first_date": self.first_date.isoformat(),
+            "last_date": self.last_date.isoformat(),
+            "last_amount": float(self.last_amount),
+            "next_date": self.next_date.isoformat() if self.next_date else None,
+            "expected_amount": (
+                float(self.expected_amount) if self.expected_amount is not None else None
+            ),
+        }
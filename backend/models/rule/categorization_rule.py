@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+
+from models import db
+
+
+class CategorizationRule(db.Model):
+    """
+    A user-defined rule that assigns a category to matching transactions.
+
+    Every predicate that is set must match. Text predicates are case
+    insensitive: `merchant` is an exact merchant name, `name_contains` a
+    substring of the transaction name and `name_pattern` a regular
+    expression searched in it. When several rules match, the lowest
+    `priority` wins, then the oldest rule.
+    """
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    priority = db.Column(db.Integer, nullable=False, default=100)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+
+    merchant = db.Column(db.String(120), nullable=True)
+    name_contains = db.Column(db.String(120), nullable=True)
+    name_pattern = db.Column(db.String(500), nullable=True)
+    account_id = db.Column(db.String, db.ForeignKey("account.id"), nullable=True)
+    min_amount = db.Column(db.Numeric(10, 2), nullable=True)
+    max_amount = db.Column(db.Numeric(10, 2), nullable=True)
+
+    category_id = db.Column(db.String, db.ForeignKey("txn_category.id"), nullable=False)
+    subcategory_id = db.Column(
+        db.String, db.ForeignKey("txn_subcategory.id"), nullable=True
+    )
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "priority": self.priority,
+            "active": self.active,
+            "merchant": self.merchant,
+            "name_contains": self.name_contains,
+            "name_pattern": self.name_pattern,
+            "account_id": self.account_id,
+            "min_amount": str(self.min_amount) if self.min_amount is not None else None,
+            "max_amount": str(self.max_amount) if self.max_amount is not None else None,
+            "category_id": self.category_id,
+            "subcategory_id": self.subcategory_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -2,6 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 from models import db
+from models.merchant.merchant import Merchant  # noqa: F401
 from models.transaction.payment_channel import PaymentChannel
 
 
@@ -11,11 +12,12 @@ class Txn(db.Model):
     id = db.Column(db.String(120), primary_key=True, unique=True)
     name = db.Column(db.String(120), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
-    date = db.Column(db.DateTime, nullable=True)
+    # Date windows (budget periods, analytics) are range scans on this index
+    date = db.Column(db.DateTime, nullable=True, index=True)
     date_time = db.Column(db.DateTime, nullable=True)
 
+    # Plaid's merchant_name as received; merchant_id is its canonical merchant
     merchant = db.Column(db.String(120))
-    logo_url = db.Column(db.String(2000))
     channel = db.Column(db.Enum(PaymentChannel))
 
     # Foreign Keys
@@ -24,10 +26,18 @@ class Txn(db.Model):
     subcategory_id = db.Column(
         db.String, db.ForeignKey("txn_subcategory.id"), nullable=True
     )
+    merchant_id = db.Column(
+        db.Integer, db.ForeignKey("merchant.id"), nullable=True, index=True
+    )
+    # Hash of account, day, amount and normalized name; statement imports
+    # look it up to skip transactions that are already stored
+    fingerprint = db.Column(db.String(32), nullable=True, index=True)
 
     # Relationships
     category = db.relationship("TxnCategory", back_populates="txns")
     subcategory = db.relationship("TxnSubcategory", back_populates="txns")
+    # Many-to-one, so joining it costs one row per transaction, not a query
+    canonical_merchant = db.relationship("Merchant", lazy="joined")
 
     def __init__(
         self,
@@ -39,9 +49,9 @@ class Txn(db.Model):
         date: Optional[datetime] = None,
         date_time: Optional[datetime] = None,
         merchant: Optional[str] = None,
-        logo_url: Optional[str] = None,
         channel: Optional[PaymentChannel] = None,
         account_id: str = None,
+        merchant_id: Optional[int] = None,
     ):
         self.id = id
         self.name = name
@@ -51,9 +61,9 @@ class Txn(db.Model):
         self.date = date
         self.date_time = date_time
         self.merchant = merchant
-        self.logo_url = logo_url
         self.channel = channel
         self.account_id = account_id
+        self.merchant_id = merchant_id
 
     def to_dict(self):
         """Convert Transaction object to a dictionary."""
@@ -68,7 +78,10 @@ class Txn(db.Model):
                 self.subcategory.to_incl_dict() if self.subcategory else None
             ),
             "merchant": self.merchant,
-            "logo_url": self.logo_url,
+            "merchant_id": self.merchant_id,
+            "logo_url": (
+                self.canonical_merchant.logo_url if self.canonical_merchant else None
+            ),
             "channel": (
                 self.channel.value if self.channel else None
             ),  # Convert Enum to string
@@ -85,7 +98,7 @@ class Txn(db.Model):
             f"category={self.category.name if self.category else 'Unknown'}, "
             f"subcategory={self.subcategory.name if self.subcategory else 'Unknown'}, "
             f"merchant={self.merchant if self.merchant else 'N/A'}, "
-            f"logo_url={'Set' if self.logo_url else 'None'}, "
+            f"merchant_id={self.merchant_id}, "
             f"channel={self.channel.name if self.channel else 'Unknown'}, "
             f"account={self.account_id})>"
         )
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+
+from utils.analytics import DEFAULT_TOP, GROUPINGS, MAX_TOP, get_spend_breakdown
+from utils.analytics_engine import (
+    GROUP_COLUMNS,
+    amount_percentiles,
+    get_snapshot,
+    monthly_spend,
+    rolling_spend,
+)
+from utils.error_utils import error_response
+from utils.route_utils import parse_date_arg, safe_route
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/api/analytics")
+
+# Series endpoints cover the last year unless `start` is given
+DEFAULT_SERIES_DAYS = 365
+MAX_SERIES_DAYS = 3660
+DEFAULT_ROLLING_WINDOW = 30
+MAX_ROLLING_WINDOW = 366
+DEFAULT_PERCENTILES = "50,90,99"
+
+
+def parse_series_args() -> tuple:
+    """
+    Read `start`, `end` and the category_id, subcategory_id, account_id
+    and merchant_id filters of the snapshot endpoints.
+
+    Returns:
+        tuple: start date, end date and the filters by snapshot column
+    """
+    end = parse_date_arg("end") or datetime.today()
+    start = parse_date_arg("start") or end - timedelta(days=DEFAULT_SERIES_DAYS - 1)
+    if end < start:
+        raise ValueError("end must not be before start.")
+    if (end - start).days >= MAX_SERIES_DAYS:
+        raise ValueError(f"The window must not exceed {MAX_SERIES_DAYS} days.")
+
+    filters = {}
+    for name in GROUP_COLUMNS:
+        value = request.args.get(f"{name}_id")
+        if value:
+            filters[name] = value
+    if "merchant" in filters:
+        try:
+            filters["merchant"] = int(filters["merchant"])
+        except ValueError:
+            raise ValueError(f"Invalid merchant_id '{filters['merchant']}'.")
+    return start.date(), end.date(), filters
+
+
+@analytics_bp.route("/breakdown", methods=["GET"])
+@safe_route
+def get_breakdown():
+    """
+    Where the money went: totals, counts and averages per `group_by`
+    (category, subcategory, merchant, account or channel) between the
+    inclusive `start` and `end` dates, which default to the current month.
+    The `top` groups by total are returned and the rest summed as "other".
+    """
+    group_by = request.args.get("group_by", "category")
+    if group_by not in GROUPINGS:
+        return error_response(
+            HTTPStatus.BAD_REQUEST.value,
+            f"group_by must be one of: {', '.join(GROUPINGS)}.",
+        )
+    try:
+        today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = parse_date_arg("start") or today.replace(day=1)
+        end = parse_date_arg("end") or today
+        top = int(request.args.get("top", DEFAULT_TOP))
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    if end < start:
+        return error_response(HTTPStatus.BAD_REQUEST.value, "end must not be before start.")
+    if not 1 <= top <= MAX_TOP:
+        return error_response(
+            HTTPStatus.BAD_REQUEST.value, f"top must be between 1 and {MAX_TOP}."
+        )
+
+    return jsonify(get_spend_breakdown(group_by, start, end, top))
+
+
+@analytics_bp.route("/rolling", methods=["GET"])
+@safe_route
+def get_rolling():
+    """
+    Daily totals and trailing `window`-day sums (default 30) between
+    `start` and `end`, as parallel arrays.
+    """
+    try:
+        start, end, filters = parse_series_args()
+        window = int(request.args.get("window", DEFAULT_ROLLING_WINDOW))
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    if not 1 <= window <= MAX_ROLLING_WINDOW:
+        return error_response(
+            HTTPStatus.BAD_REQUEST.value,
+            f"window must be between 1 and {MAX_ROLLING_WINDOW} days.",
+        )
+    return jsonify(rolling_spend(get_snapshot(), start, end, window, filters))
+
+
+@analytics_bp.route("/monthly", methods=["GET"])
+@safe_route
+def get_monthly():
+    """Calendar month totals with month-over-month changes."""
+    try:
+        start, end, filters = parse_series_args()
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    return jsonify(monthly_spend(get_snapshot(), start, end, filters))
+
+
+@analytics_bp.route("/percentiles", methods=["GET"])
+@safe_route
+def get_percentiles():
+    """
+    Percentiles of transaction amounts per `group_by` (category,
+    subcategory, account or merchant), e.g. `percentiles=50,90,99`.
+    """
+    group_by = request.args.get("group_by", "category")
+    if group_by not in GROUP_COLUMNS:
+        return error_response(
+            HTTPStatus.BAD_REQUEST.value,
+            f"group_by must be one of: {', '.join(GROUP_COLUMNS)}.",
+        )
+    try:
+        start, end, filters = parse_series_args()
+        percentiles = [
+            float(value)
+            for value in request.args.get("percentiles", DEFAULT_PERCENTILES).split(",")
+        ]
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    if not percentiles or not all(0 <= value <= 100 for value in percentiles):
+        return error_response(
+            HTTPStatus.BAD_REQUEST.value, "percentiles must be between 0 and 100."
+        )
+    return jsonify(
+        amount_percentiles(get_snapshot(), group_by, start, end, percentiles, filters)
+    )
@@ -1,18 +1,39 @@
+import os
+from datetime import datetime, timedelta
+from functools import wraps
+from http import HTTPStatus
+from urllib.parse import urlencode
+
 from flask import Blueprint, request, jsonify
 
 from sqlalchemy import func
 
-from models.period.period_utils import get_totals_by_frequency
+from models.period.period_utils import get_totals_by_frequency, get_totals_by_period
 from models.budget.budget import Budget
 from models.budget.budget_frequency import BudgetFrequency
 from models.budget.budget_utils import (
-    generate_budget_periods_for_budget,
+    generate_budget_periods_for_window,
+    get_period_window,
+    get_spent_by_period,
 )
-from utils.route_utils import safe_route
+from utils.budget_forecast import forecast_budget
+from utils.cache import VersionedCache, shared_backend
+from utils.error_utils import error_response
+from utils.route_utils import parse_date_arg, safe_route
 from models.transaction.txn import Txn
 from models import db
 
 
+# Periods returned when neither `start` nor `limit` is given
+BUDGET_PERIOD_DEFAULT_LIMIT = int(os.getenv("BUDGET_PERIOD_DEFAULT_LIMIT", "12"))
+MAX_BUDGET_PERIODS = 520
+# `format` values: per-period dicts, or parallel arrays for charting
+RESPONSE_FORMATS = ("rows", "columnar")
+
+# Period lists per (budget, window) and totals per (frequency, window)
+budget_period_cache = VersionedCache("budget_period", shared=shared_backend())
+period_total_cache = VersionedCache("period_total", shared=shared_backend())
+
 budget_period_routes = Blueprint(
     "budget_period", __name__, url_prefix="/api/budget_period"
 )
@@ -25,29 +46,199 @@ def parse_frequency(frequency_str):
         raise ValueError(f"Frequency {frequency_str} not supported")
 
 
+def parse_period_window(frequency: BudgetFrequency) -> tuple:
+    """
+    Read the `start`, `end` and `limit` query parameters.
+
+    `end` defaults to today. Without `start`, the last `limit` periods
+    (BUDGET_PERIOD_DEFAULT_LIMIT by default) up to `end` are returned.
+    Periods before the first transaction are never generated.
+
+    Returns:
+        tuple: (window, limit, first_txn_date), window is empty when there
+        are no transactions
+    """
+    start = parse_date_arg("start")
+    end = parse_date_arg("end") or datetime.today()
+    limit = request.args.get("limit", type=int)
+    if limit is None and start is None:
+        limit = BUDGET_PERIOD_DEFAULT_LIMIT
+    if limit is not None and not 0 < limit <= MAX_BUDGET_PERIODS:
+        raise ValueError(f"limit must be between 1 and {MAX_BUDGET_PERIODS}")
+    if start is not None and start > end:
+        raise ValueError("start must not be after end")
+
+    first_txn_date = db.session.query(func.min(Txn.date)).scalar()
+    if not first_txn_date or first_txn_date > end:
+        return [], limit, first_txn_date
+
+    start = max(start, first_txn_date) if start else first_txn_date
+    # One period past the maximum is enough to tell the window is too wide
+    window = get_period_window(
+        frequency, end, start=start, limit=limit or MAX_BUDGET_PERIODS + 1
+    )
+    if len(window) > MAX_BUDGET_PERIODS:
+        raise ValueError(f"Window covers more than {MAX_BUDGET_PERIODS} periods")
+    return window, limit, first_txn_date
+
+
+def window_key(window: list) -> tuple:
+    return (window[0][0].date().isoformat(), window[-1][0].date().isoformat())
+
+
+def budget_period_dicts(budget: Budget, window: list) -> list[dict]:
+    return [p.to_dict() for p in generate_budget_periods_for_window(budget, window)]
+
+
+def period_columns(window: list) -> dict:
+    return {
+        "start_date": [start.date().isoformat() for start, _ in window],
+        "end_date": [end.date().isoformat() for _, end in window],
+    }
+
+
+def budget_series(budget: Budget, window: list) -> dict:
+    """One budget's metadata once, with its spending per period as an array."""
+    return {
+        "budget_id": budget.id,
+        "category_name": budget.category.name,
+        "subcategory_name": budget.subcategory.name if budget.subcategory else None,
+        "limit_amount": str(budget.amount),
+        "spent_amount": get_spent_by_period(budget, window),
+    }
+
+
+def wants_forecast() -> bool:
+    """True when the client asked for current-period forecasts (?forecast=true)."""
+    return request.args.get("forecast", "false").lower() == "true"
+
+
+def current_period_index(window: list, today: datetime):
+    """Index of the period of `window` containing `today`, None if outside it."""
+    for index, (start, end) in enumerate(window):
+        if start <= today <= end:
+            return index
+    return None
+
+
+def windowed_response(body: list, window: list, limit: int, first_txn_date: datetime):
+    """
+    JSON list response with a `Link: rel="next"` header pointing at the
+    previous (older) page of periods while older transactions exist.
+    """
+    response = jsonify(body)
+    if window and first_txn_date < window[0][0]:
+        older_end = (window[0][0] - timedelta(days=1)).strftime("%Y-%m-%d")
+        args = request.args.to_dict()
+        args.pop("start", None)
+        args.update(end=older_end, limit=limit or len(window))
+        response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def with_window(handler):
+    """Parse frequency and window parameters, reporting bad values as 400."""
+
+    @wraps(handler)
+    def wrapper():
+        response_format = request.args.get("format", "rows")
+        try:
+            if response_format not in RESPONSE_FORMATS:
+                raise ValueError(
+                    f"format must be one of {', '.join(RESPONSE_FORMATS)}"
+                )
+            frequency = parse_frequency(request.args.get("frequency", ""))
+            window, limit, first_txn_date = parse_period_window(frequency)
+        except ValueError as e:
+            return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+        body = handler(frequency, window, response_format == "columnar")
+        return windowed_response(body, window, limit, first_txn_date)
+
+    return wrapper
+
+
 @budget_period_routes.route("", methods=["GET"])
 @safe_route
-def get_budget_period():
-    budget_freq = parse_frequency(request.args.get("frequency", ""))
+@with_window
+def get_budget_period(budget_freq, window, columnar):
+    budgets = Budget.query.filter_by(frequency=budget_freq).all() if window else []
+    # Forecasts are opt-in and only cover the period containing today
+    forecast = wants_forecast()
+    today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+    current = current_period_index(window, today) if forecast else None
 
-    # Get earliest transaction date
-    first_txn_date = db.session.query(func.min(Txn.date)).scalar()
-    if not first_txn_date:
-        return jsonify([])  # No transactions to build periods from
+    if columnar:
+        series = [
+            budget_period_cache.get_or_compute(
+                ("columnar", budget.id, budget_freq.value, window_key(window)),
+                lambda: budget_series(budget, window),
+            )
+            for budget in budgets
+        ]
+        if forecast:
+            # Cached results are shared, so add the field to copies
+            series = [
+                {
+                    **budget_data,
+                    "forecast": (
+                        forecast_budget(
+                            budget, budget_data["spent_amount"][current], today
+                        )
+                        if current is not None
+                        else None
+                    ),
+                }
+                for budget, budget_data in zip(budgets, series)
+            ]
+        return {**period_columns(window), "series": series}
+
+    if not window:
+        return []  # No transactions to build periods from
 
-    budgets = Budget.query.filter_by(frequency=budget_freq).all()
     all_periods = []
 
     for budget in budgets:
-        periods = generate_budget_periods_for_budget(budget, first_txn_date)
-        all_periods.extend([p.to_dict() for p in periods])
+        periods = budget_period_cache.get_or_compute(
+            (budget.id, budget_freq.value, window_key(window)),
+            lambda: budget_period_dicts(budget, window),
+        )
+        if forecast:
+            periods = [
+                {
+                    **period,
+                    "forecast": (
+                        forecast_budget(budget, period["spent_amount"], today)
+                        if index == current
+                        else None
+                    ),
+                }
+                for index, period in enumerate(periods)
+            ]
+        all_periods.extend(periods)
 
-    return jsonify(all_periods)
+    return all_periods
 
 
 @budget_period_routes.route("/total", methods=["GET"])
 @safe_route
-def get_total():
-    freq = parse_frequency(request.args.get("frequency", ""))
-    periods = get_totals_by_frequency(freq)
-    return jsonify([period.to_dict() for period in periods])
+@with_window
+def get_total(freq, window, columnar):
+    if columnar:
+        spent, income = [], []
+        if window:
+            spent, income = period_total_cache.get_or_compute(
+                ("columnar", freq.value, window_key(window)),
+                lambda: get_totals_by_period(window),
+            )
+        return {
+            **period_columns(window),
+            "spent_amount": spent,
+            "income_amount": income,
+        }
+
+    if not window:
+        return []
+    return period_total_cache.get_or_compute(
+        (freq.value, window_key(window)),
+        lambda: [period.to_dict() for period in get_totals_by_frequency(freq, window)],
+    )
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 
 from utils.route_utils import (
@@ -9,11 +11,18 @@ from utils.route_utils import (
 from utils.model_utils import (
     list_instances_of_model,
 )
+from utils.cache import VersionedCache, shared_backend
 from models.budget.budget import Budget
+from models.budget.budget_utils import get_budget_status
 
 
 budget_bp = Blueprint("budget", __name__, url_prefix="/api/budget")
 
+# Status per day, recomputed after any transaction or budget write
+budget_status_cache = VersionedCache(
+    "budget_status", max_entries=4, shared=shared_backend()
+)
+
 
 @budget_bp.route("", methods=["POST"])
 @safe_route
@@ -37,3 +46,13 @@ def get_budgets():
 @safe_route
 def delete_budget(budget_id: str):
     return delete_model_request(Budget, budget_id)
+
+
+@budget_bp.route("/status", methods=["GET"])
+@safe_route
+def get_status():
+    today = datetime.today()
+    status = budget_status_cache.get_or_compute(
+        (today.date().isoformat(),), lambda: get_budget_status(today)
+    )
+    return jsonify(status)
@@ -0,0 +1,15 @@
+from flask import Blueprint, request, jsonify
+
+from utils.request_metrics import get_recent_requests
+from utils.route_utils import safe_route
+
+
+debug_bp = Blueprint("debug", __name__, url_prefix="/api/debug")
+
+
+@debug_bp.route("/requests", methods=["GET"])
+@safe_route
+def get_requests():
+    limit = request.args.get("limit", 20, type=int)
+    slowest = request.args.get("order", "slowest") != "recent"
+    return jsonify(get_recent_requests(limit=limit, slowest=slowest))
@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+from flask import Blueprint, Response, request, stream_with_context
+
+from models.budget.budget_frequency import BudgetFrequency
+from utils.error_utils import error_response
+from utils.export import (
+    BUDGET_PERIOD_COLUMNS,
+    COMPRESSIONS,
+    FORMATS,
+    MEDIA_TYPES,
+    TXN_COLUMNS,
+    budget_period_batches,
+    export_chunks,
+    pa,
+    transaction_batches,
+)
+from utils.route_utils import parse_date_arg, safe_route
+
+export_bp = Blueprint("export", __name__, url_prefix="/api/export")
+
+
+def parse_export_args() -> tuple:
+    """
+    Read `format` (csv or parquet), `compression` (gzip, CSV only) and the
+    inclusive `start` and `end` dates.
+
+    Returns:
+        tuple: format, compression, start, end
+    """
+    file_format = request.args.get("format", "csv")
+    compression = request.args.get("compression") or None
+    if file_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}.")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"compression must be one of: {', '.join(COMPRESSIONS)}.")
+    if file_format == "parquet":
+        if pa is None:
+            raise ValueError("Parquet export requires pyarrow, which is not installed.")
+        if compression:
+            raise ValueError("Parquet files are compressed internally.")
+    start = parse_date_arg("start")
+    end = parse_date_arg("end")
+    if start and end and end < start:
+        raise ValueError("end must not be before start.")
+    return file_format, compression, start, end
+
+
+def export_response(name: str, columns: list, batches, file_format: str, compression):
+    """A streamed file download; rows are fetched while the body is sent."""
+    filename = f"{name}.{file_format}" + (".gz" if compression else "")
+    return Response(
+        stream_with_context(export_chunks(columns, batches, file_format, compression)),
+        mimetype=MEDIA_TYPES[compression or file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@export_bp.route("/transactions", methods=["GET"])
+@safe_route
+def export_transactions():
+    """
+    Transactions, oldest first, filtered by `start`, `end`, `account_id`,
+    `category_id` and `subcategory_id`.
+    """
+    try:
+        file_format, compression, start, end = parse_export_args()
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    batches = transaction_batches(
+        start=start,
+        end=end,
+        account_id=request.args.get("account_id"),
+        category_id=request.args.get("category_id"),
+        subcategory_id=request.args.get("subcategory_id"),
+    )
+    return export_response("transactions", TXN_COLUMNS, batches, file_format, compression)
+
+
+@export_bp.route("/budget_periods", methods=["GET"])
+@safe_route
+def export_budget_periods():
+    """
+    Every period of every budget from `start` (default: the first
+    transaction) to `end` (default: today), optionally for one `frequency`
+    or `category_id`. With `account_id`, only that account's spending
+    counts.
+    """
+    try:
+        file_format, compression, start, end = parse_export_args()
+        frequency = request.args.get("frequency")
+        frequency = BudgetFrequency(frequency) if frequency else None
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    batches = budget_period_batches(
+        frequency=frequency,
+        start=start,
+        end=end,
+        account_id=request.args.get("account_id"),
+        category_id=request.args.get("category_id"),
+    )
+    return export_response(
+        "budget_periods", BUDGET_PERIOD_COLUMNS, batches, file_format, compression
+    )
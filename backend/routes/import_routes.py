@@ -0,0 +1,96 @@
+import io
+import os
+import uuid
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+
+from utils.error_utils import error_response
+from utils.job_queue import enqueue_job
+from utils.route_utils import job_accepted_response, safe_route, wants_background_job
+from utils.statement_import import (
+    FORMATS,
+    IMPORT_UPLOAD_DIR,
+    CsvMapping,
+    import_statement,
+)
+
+import_bp = Blueprint("import", __name__, url_prefix="/api/import")
+
+MAPPING_FIELDS = ("date", "amount", "debit", "credit", "name", "merchant", "category")
+
+
+def parse_import_form(upload) -> tuple:
+    """
+    Read `account_id`, `format` (csv or ofx, by default from the file
+    extension) and the CSV column mapping: `<field>_column` for each of
+    MAPPING_FIELDS, `date_format` and `debits_positive`.
+
+    Returns:
+        tuple: account_id, format, mapping as a dict of CsvMapping fields
+    """
+    account_id = request.form.get("account_id")
+    if not account_id:
+        raise ValueError("account_id is required.")
+    file_format = request.form.get("format")
+    if not file_format:
+        extension = os.path.splitext(upload.filename or "")[1].lstrip(".").lower()
+        file_format = "ofx" if extension in ("ofx", "qfx") else "csv"
+    if file_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}.")
+
+    mapping = {
+        field: request.form[f"{field}_column"]
+        for field in MAPPING_FIELDS
+        if request.form.get(f"{field}_column")
+    }
+    if request.form.get("date_format"):
+        mapping["date_format"] = request.form["date_format"]
+    mapping["debits_positive"] = (
+        request.form.get("debits_positive", "false").lower() == "true"
+    )
+    return account_id, file_format, mapping
+
+
+@import_bp.route("/statement", methods=["POST"])
+@safe_route
+def import_statement_upload():
+    """
+    Import a CSV or OFX statement uploaded as the multipart `file` field.
+    Already stored transactions are skipped. With `?async=true` the file
+    is saved and imported by a background job, whose result shows the
+    progress so far while it runs.
+    """
+    upload = request.files.get("file")
+    if upload is None:
+        return error_response(HTTPStatus.BAD_REQUEST.value, "A statement file is required.")
+    try:
+        account_id, file_format, mapping = parse_import_form(upload)
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+
+    if wants_background_job():
+        os.makedirs(IMPORT_UPLOAD_DIR, exist_ok=True)
+        path = os.path.abspath(
+            os.path.join(IMPORT_UPLOAD_DIR, f"{uuid.uuid4().hex}.{file_format}")
+        )
+        upload.save(path)
+        job = enqueue_job(
+            "import_statement",
+            payload={
+                "path": path,
+                "account_id": account_id,
+                "file_format": file_format,
+                "mapping": mapping,
+                "remove": True,
+            },
+            idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+        return job_accepted_response(job)
+
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    try:
+        totals = import_statement(stream, account_id, file_format, CsvMapping(**mapping))
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+    return jsonify(totals), HTTPStatus.OK.value
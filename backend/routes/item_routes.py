@@ -1,10 +1,9 @@
 from datetime import datetime
-from decimal import Decimal
 import os
-import time
 from flask import Blueprint, request, jsonify, current_app
 from http import HTTPStatus
 
+import plaid
 from plaid.model.country_code import CountryCode
 from models.account.account import Account
 from models.institution.institution import Institution
@@ -12,25 +11,24 @@ from models.institution.institution import Institution
 from models import db
 from utils.model_utils import (
     create_model_instance_from_dict,
-    delete_model_instance,
     list_instances_of_model,
     update_model_instance_from_dict,
 )
 from utils.error_utils import (
     error_response,
 )
-from utils.txn_utils import resolve_category_and_subcategory
+from utils.item_utils import bulk_delete_item
 from plaid.model.item_get_request import ItemGetRequest
 from plaid.model.item_remove_request import ItemRemoveRequest
 from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.institutions_get_by_id_request import InstitutionsGetByIdRequest
-from models.transaction.payment_channel import PaymentChannel
 from models.account.account import Account
 from models.item.item import Item
-from models.transaction.txn import Txn
-from plaid.model.transactions_sync_request import TransactionsSyncRequest
 from utils.logger import get_logger
+from utils.plaid_client import CircuitOpenError, plaid_error_code
 from utils.token_backup import get_token_backup
+from utils.job_queue import enqueue_job
+from utils.sync_utils import sync_item_by_id
 
 item_bp = Blueprint("item", __name__, url_prefix="/api/item")
 logger = get_logger(__name__)
@@ -51,10 +49,31 @@ from utils.error_utils import (
     error_response,
 )
 from plaid.model.item_get_request import ItemGetRequest
-from utils.route_utils import safe_route
+from utils.route_utils import (
+    job_accepted_response,
+    safe_route,
+    wants_background_job,
+)
 
 item_bp = Blueprint("item", __name__, url_prefix="/api/item")
 
+# item_remove errors meaning the access token no longer refers to an item
+ALREADY_REMOVED_ERRORS = {"ITEM_NOT_FOUND", "INVALID_ACCESS_TOKEN"}
+
+# Back up access tokens from a background job instead of inside the request
+TOKEN_BACKUP_IN_BACKGROUND = (
+    os.getenv("TOKEN_BACKUP_IN_BACKGROUND", "false").lower() == "true"
+)
+
+
+def backup_access_token(item_id: str, access_token: str):
+    plaid_env = os.getenv("PLAID_ENV", "sandbox")
+    if TOKEN_BACKUP_IN_BACKGROUND:
+        enqueue_job("backup_token", {"item_id": item_id, "environment": plaid_env})
+        return
+    token_backup = get_token_backup()
+    token_backup.backup_token(item_id, access_token, plaid_env)
+
 
 @item_bp.route("", methods=["POST"])
 @safe_route
@@ -85,9 +104,7 @@ def create_item():
 
         # Backup updated access token to S3 (after successful reactivation)
         try:
-            plaid_env = os.getenv("PLAID_ENV", "sandbox")
-            token_backup = get_token_backup()
-            token_backup.backup_token(item_id, access_token, plaid_env)
+            backup_access_token(item_id, access_token)
         except Exception as e:
             logger.error(f"❌ Failed to backup token for item {item_id}: {e}")
             raise
@@ -260,9 +277,7 @@ def create_item():
 
     # Backup access token to S3 (after successful item and account creation)
     try:
-        plaid_env = os.getenv("PLAID_ENV", "sandbox")
-        token_backup = get_token_backup()
-        token_backup.backup_token(item_id, access_token, plaid_env)
+        backup_access_token(item_id, access_token)
     except Exception as e:
         logger.error(f"❌ Failed to backup token for item {item_id}: {e}")
         raise
@@ -287,30 +302,30 @@ def delete_item(item_id: str):
     if not item:
         return error_response(HTTPStatus.NOT_FOUND, f"Item {item_id} not found.")
 
+    access_token = item.access_token
+    # End the read transaction so the Plaid call below doesn't hold it open
+    db.session.commit()
+
     try:
         # Call Plaid API to remove the item (stops billing)
         logger.info(f"🗑️ Removing item {item_id} from Plaid")
-        logger.info(f"🔍 Using access_token: {item.access_token[:20]}...")
-        remove_request = ItemRemoveRequest(access_token=item.access_token)
+        logger.info(f"🔍 Using access_token: {access_token[:20]}...")
+        remove_request = ItemRemoveRequest(access_token=access_token)
 
         try:
             plaid_client.item_remove(remove_request)
             logger.info(f"✅ Successfully removed item {item_id} from Plaid")
-        except Exception as plaid_error:
-            logger.error(f"❌ Plaid API error: {plaid_error}")
-            raise
-
-        # Get all accounts associated with this item
-        accounts_to_delete = Account.query.filter_by(item_id=item_id).all()
-        account_count = len(accounts_to_delete)
-
-        # Delete all accounts from database
-        for account in accounts_to_delete:
-            db.session.delete(account)
+        except plaid.ApiException as plaid_error:
+            # A retried delete whose first remove reached Plaid finds the
+            # item gone; finish removing it from the database
+            if plaid_error_code(plaid_error) not in ALREADY_REMOVED_ERRORS:
+                logger.error(f"❌ Plaid API error: {plaid_error}")
+                raise
+            logger.info(f"ℹ️ Item {item_id} was already removed from Plaid")
 
-        # Delete the item from database
-        db.session.delete(item)
-        db.session.commit()
+        # Delete transactions, accounts and the item with set-based statements
+        deleted = bulk_delete_item(item_id)
+        account_count = deleted["accounts"]
 
         logger.info(
             f"✅ Deleted item {item_id} and {account_count} associated accounts from database"
@@ -321,12 +336,16 @@ def delete_item(item_id: str):
                 {
                     "message": f"Successfully removed bank connection and {account_count} accounts",
                     "deleted_accounts": account_count,
+                    "deleted_transactions": deleted["transactions"],
                     "item_id": item_id,
                 }
             ),
             HTTPStatus.OK,
         )
 
+    except CircuitOpenError:
+        # safe_route answers 503 so the client knows to retry later
+        raise
     except Exception as e:
         import traceback
 
@@ -350,192 +369,33 @@ def sync_item_transactions(item_id: str):
             f"Could not find item with id {item_id}.",
         )
 
-    plaid_client = current_app.config["plaid_client"]
-    try:
-        requested_retries = min(int(request.get_json().get("retries", 1)), 10)
-    except ValueError:
-        requested_retries = 3
-    retries = min(requested_retries, 10)
-    delay_seconds = 2
-    attempt = 0
-    added = []
-    modified = []
-    removed = []
-    cursor = item.cursor
-
-    while attempt < retries:
-        current_cursor = cursor
-        has_more = True
-
-        while has_more:
-            sync_request = TransactionsSyncRequest(
-                access_token=item.access_token,
-                cursor=current_cursor,
-            )
-            response = plaid_client.transactions_sync(sync_request).to_dict()
-
-            added.extend(response["added"])
-            modified.extend(response["modified"])
-            removed.extend(response["removed"])
-
-            has_more = response["has_more"]
-            current_cursor = response["next_cursor"]
-
-            if current_cursor == "":
-                time.sleep(delay_seconds)
-                continue
-
-        # Break retry loop if any transactions were found
-        if added or modified or removed:
-            cursor = current_cursor  # save the updated cursor
-            break
-
-        attempt += 1
-        logger.info(f"No transactions found. Retry attempt {attempt}...")
-        time.sleep(delay_seconds)
+    if wants_background_job():
+        job = enqueue_job(
+            "sync_item",
+            {"item_id": item.id},
+            idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+        return job_accepted_response(job)
 
-    handle_added_transactions(added)
-    handle_modified_transactions(modified)
-    handle_removed_transactions(removed)
-
-    # Update item cursor only if it changed
-    if cursor and cursor != item.cursor:
-        item.cursor = cursor
-        db.session.commit()
+    # Concurrent syncs of the same item join the one already running
+    sync_item_by_id(item.id, current_app.config["plaid_client"])
 
     accounts = Account.query.all()
     return jsonify([account.get_transactions() for account in accounts])
 
 
-def handle_added_transactions(transactions: list):
-    logger.info(f"Handling {len(transactions)} new transactions")
-
-    for i, transaction in enumerate(transactions):
-        txn_id = transaction.get("transaction_id")
-        logger.debug(
-            f"\nProcessing transaction {i + 1}/{len(transactions)}: ID {txn_id}"
-        )
-
-        # Skip if txn already exists
-        if db.session.get(Txn, txn_id):
-            logger.debug(f"Transaction {txn_id} already exists, skipping.")
-            continue
-
-        # Ensure account exists
-        account = db.session.get(Account, transaction.get("account_id"))
-        if not account:
-            logger.warning(
-                f"Account {transaction['account_id']} not found, skipping transaction."
-            )
-            continue
-
-        # Resolve category + subcategory
-        # If category doesn't exist, default to OTHER/OTHER (don't auto-create deleted categories)
-        personal_finance = transaction.get("personal_finance_category", {})
-        primary_category = personal_finance.get("primary", "OTHER")
-        detailed_category = personal_finance.get("detailed", "OTHER")
-
-        category, subcategory = resolve_category_and_subcategory(
-            primary_category, detailed_category
-        )
-
-        # Safe payment channel enum parsing
-        try:
-            payment_channel = PaymentChannel(str(transaction.get("payment_channel")))
-        except ValueError:
-            logger.warning(
-                f"Invalid payment channel '{transaction.get('payment_channel')}', defaulting to OTHER"
-            )
-            payment_channel = PaymentChannel.OTHER
-
-        # Build txn dict and persist
-        txn_dict = {
-            "id": txn_id,
-            "name": transaction.get("name"),
-            "amount": Decimal(transaction.get("amount") or 0.0),
-            "category_id": category.id,
-            "subcategory_id": subcategory.id,
-            "date": transaction.get("date"),
-            "date_time": transaction.get("datetime"),
-            "merchant": transaction.get("merchant_name"),
-            "logo_url": transaction.get("logo_url"),
-            "channel": payment_channel,
-            "account_id": account.id,
-        }
-
-        create_model_instance_from_dict(Txn, txn_dict, fail_on_duplicate=False)
-
-    logger.info("All new transactions have been processed.")
-
-
-def handle_modified_transactions(transactions: list):
-    logger.info(f"Handling {len(transactions)} modified transactions")
-
-    for i, transaction in enumerate(transactions):
-        txn_id = transaction.get("transaction_id")
-        logger.debug(
-            f"Processing modified transaction {i + 1}/{len(transactions)}: ID {txn_id}"
-        )
-
-        txn = db.session.get(Txn, txn_id)
-        if not txn:
-            logger.warning(f"Modified transaction {txn_id} not found, skipping.")
-            continue
-
-        # Handle category/subcategory updates if present
-        personal_finance = transaction.get("personal_finance_category", {})
-        primary_category = personal_finance.get("primary")
-        detailed_category = personal_finance.get("detailed")
-
-        update_data = {
-            "name": transaction.get("name"),
-            "amount": Decimal(transaction.get("amount") or txn.amount),
-            "date": transaction.get("date"),
-            "date_time": transaction.get("datetime"),
-            "merchant": transaction.get("merchant_name"),
-            "logo_url": transaction.get("logo_url"),
-        }
-
-        # Ensure category exists if updated
-        # If category doesn't exist, default to OTHER (don't auto-create deleted categories)
-        if primary_category:
-            category, subcategory = resolve_category_and_subcategory(
-                primary_category, detailed_category or "OTHER"
-            )
-            update_data["category_id"] = category.id
-            update_data["subcategory_id"] = subcategory.id
-
-        # Safe payment channel update
-        if transaction.get("payment_channel"):
-            try:
-                update_data["channel"] = PaymentChannel(
-                    str(transaction.get("payment_channel"))
-                )
-            except ValueError:
-                logger.warning(
-                    f"Invalid payment channel '{transaction.get('payment_channel')}', keeping existing."
-                )
-
-        # Apply updates
-        update_model_instance_from_dict(txn, update_data)
-
-    logger.info("All modified transactions have been processed.")
-
-
-def handle_removed_transactions(transactions: list):
-    logger.info(f"Handling {len(transactions)} removed transactions")
-
-    for i, transaction in enumerate(transactions):
-        txn_id = transaction.get("transaction_id")
-        logger.debug(
-            f"Processing removed transaction {i + 1}/{len(transactions)}: ID {txn_id}"
+@item_bp.route("/<item_id>/backup", methods=["POST"])
+@safe_route
+def backup_item_token(item_id: str):
+    if not db.session.get(Item, item_id):
+        return error_response(
+            HTTPStatus.NOT_FOUND.value,
+            f"Could not find item with id {item_id}.",
         )
 
-        if delete_model_instance(Txn, txn_id):
-            logger.info(f"Transaction {txn_id} successfully removed.")
-        else:
-            logger.warning(
-                f"Transaction {txn_id} could not be removed (already gone or error)."
-            )
-
-    logger.info("All removed transactions have been processed.")
+    job = enqueue_job(
+        "backup_token",
+        {"item_id": item_id, "environment": os.getenv("PLAID_ENV", "sandbox")},
+        idempotency_key=request.headers.get("Idempotency-Key"),
+    )
+    return job_accepted_response(job)
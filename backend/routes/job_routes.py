@@ -0,0 +1,37 @@
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+
+from models import db
+from models.job.job import Job
+from models.job.job_state import JobState
+from utils.error_utils import error_response
+from utils.route_utils import safe_route
+
+
+job_bp = Blueprint("job", __name__, url_prefix="/api/job")
+
+
+@job_bp.route("", methods=["GET"])
+@safe_route
+def get_jobs():
+    query = Job.query.order_by(Job.created_at.desc())
+    state = request.args.get("state")
+    if state:
+        try:
+            query = query.filter(Job.state == JobState(state))
+        except ValueError:
+            return error_response(
+                HTTPStatus.BAD_REQUEST.value, f"Invalid job state '{state}'."
+            )
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify([job.to_dict() for job in query.limit(limit)])
+
+
+@job_bp.route("/<job_id>", methods=["GET"])
+@safe_route
+def get_job(job_id: str):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return error_response(HTTPStatus.NOT_FOUND.value, f"Job {job_id} not found.")
+    return jsonify(job.to_dict()), HTTPStatus.OK
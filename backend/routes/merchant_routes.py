@@ -0,0 +1,122 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from models import db
+from models.merchant.merchant import Merchant
+from models.transaction.txn import Txn
+from utils.error_utils import error_response
+from utils.job_queue import enqueue_job
+from utils.merchant_utils import backfill_merchants, merge_merchants
+from utils.model_utils import update_model_instance_from_dict
+from utils.route_utils import (
+    job_accepted_response,
+    parse_date_arg,
+    safe_route,
+    wants_background_job,
+)
+
+merchant_bp = Blueprint("merchant", __name__, url_prefix="/api/merchant")
+
+
+@merchant_bp.route("", methods=["GET"])
+@safe_route
+def get_merchants():
+    """
+    Merchants with their transaction count and total amount, optionally
+    between the inclusive `start` and `end` dates (YYYY-MM-DD).
+    """
+    try:
+        start = parse_date_arg("start")
+        end = parse_date_arg("end")
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+
+    filters = [Txn.merchant_id.is_not(None)]
+    if start:
+        filters.append(Txn.date >= start)
+    if end:
+        filters.append(Txn.date < end + timedelta(days=1))
+    totals = (
+        select(
+            Txn.merchant_id,
+            func.count(Txn.id).label("txn_count"),
+            func.sum(Txn.amount).label("total"),
+        )
+        .where(*filters)
+        .group_by(Txn.merchant_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(Merchant, totals.c.txn_count, totals.c.total)
+        .outerjoin(totals, totals.c.merchant_id == Merchant.id)
+        .options(selectinload(Merchant.aliases))
+        .order_by(Merchant.name)
+    ).all()
+    return jsonify(
+        [
+            {
+                **merchant.to_dict(),
+                "txn_count": txn_count or 0,
+                "total": float(total or 0),
+            }
+            for merchant, txn_count, total in rows
+        ]
+    )
+
+
+@merchant_bp.route("", methods=["PUT"])
+@safe_route
+def update_merchant():
+    """Rename a merchant or change its logo."""
+    data = request.get_json()
+    merchant = db.session.get(Merchant, data.get("id"))
+    if not merchant:
+        return error_response(
+            HTTPStatus.NOT_FOUND.value, f"Merchant {data.get('id')} not found."
+        )
+    if "name" in data and not data["name"]:
+        return error_response(HTTPStatus.BAD_REQUEST.value, "name must not be empty.")
+    update_model_instance_from_dict(
+        merchant, {key: data[key] for key in ("name", "logo_url") if key in data}
+    )
+    return jsonify(merchant.to_dict()), HTTPStatus.OK.value
+
+
+@merchant_bp.route("/<int:merchant_id>/merge", methods=["POST"])
+@safe_route
+def merge_merchant(merchant_id: int):
+    """
+    Merge the merchants in `merchant_ids` into this one, e.g. "AMZN Mktp"
+    into "Amazon". Their spellings resolve to this merchant from then on.
+    """
+    merchant = db.session.get(Merchant, merchant_id)
+    if not merchant:
+        return error_response(
+            HTTPStatus.NOT_FOUND.value, f"Merchant {merchant_id} not found."
+        )
+    other_ids = (request.get_json() or {}).get("merchant_ids") or []
+    others = [db.session.get(Merchant, other_id) for other_id in other_ids]
+    missing = [other_id for other_id, other in zip(other_ids, others) if other is None]
+    if missing:
+        return error_response(
+            HTTPStatus.NOT_FOUND.value, f"Merchants {missing} not found."
+        )
+    moved = merge_merchants(merchant, others)
+    return jsonify({**merchant.to_dict(), "txns_moved": moved}), HTTPStatus.OK.value
+
+
+@merchant_bp.route("/backfill", methods=["POST"])
+@safe_route
+def backfill():
+    """Resolve merchants for stored transactions that have none yet."""
+    if wants_background_job():
+        job = enqueue_job(
+            "backfill_merchants",
+            idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+        return job_accepted_response(job)
+    return jsonify(backfill_merchants()), HTTPStatus.OK.value
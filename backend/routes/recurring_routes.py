@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select
+
+from models import db
+from models.recurring.recurring_series import RecurringSeries
+from utils.job_queue import enqueue_job
+from utils.recurring import rebuild_recurring_series
+from utils.route_utils import job_accepted_response, safe_route, wants_background_job
+
+recurring_bp = Blueprint("recurring", __name__, url_prefix="/api/recurring")
+
+
+@recurring_bp.route("", methods=["GET"])
+@safe_route
+def get_recurring():
+    """
+    Detected subscriptions and bills, soonest next charge first, optionally
+    for one `account_id`. Series that missed a whole cycle are left out
+    unless `include_lapsed=true`.
+    """
+    statement = select(RecurringSeries).where(RecurringSeries.cadence.is_not(None))
+    account_id = request.args.get("account_id")
+    if account_id:
+        statement = statement.where(RecurringSeries.account_id == account_id)
+    series = db.session.execute(
+        statement.order_by(RecurringSeries.next_date, RecurringSeries.id)
+    ).scalars()
+
+    include_lapsed = request.args.get("include_lapsed", "false").lower() == "true"
+    today = datetime.today().date()
+    results = []
+    for item in series:
+        lapsed = today - item.next_date > timedelta(days=item.interval_mean)
+        if lapsed and not include_lapsed:
+            continue
+        results.append({**item.to_dict(), "lapsed": lapsed})
+    return jsonify(results), HTTPStatus.OK.value
+
+
+@recurring_bp.route("/rebuild", methods=["POST"])
+@safe_route
+def rebuild():
+    """Recompute every series from the stored transactions."""
+    if wants_background_job():
+        job = enqueue_job(
+            "rebuild_recurring",
+            idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+        return job_accepted_response(job)
+    return jsonify(rebuild_recurring_series()), HTTPStatus.OK.value
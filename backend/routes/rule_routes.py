@@ -0,0 +1,124 @@
+import re
+from decimal import Decimal, InvalidOperation
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+
+from models import db
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.error_utils import error_response
+from utils.job_queue import enqueue_job
+from utils.model_utils import (
+    create_model_instance_from_dict,
+    update_model_instance_from_dict,
+)
+from utils.route_utils import (
+    delete_model_request,
+    job_accepted_response,
+    safe_route,
+    wants_background_job,
+)
+from utils.rule_engine import reapply_categorization_rules
+
+rule_bp = Blueprint("rule", __name__, url_prefix="/api/rule")
+
+RULE_PREDICATES = (
+    "merchant",
+    "name_contains",
+    "name_pattern",
+    "account_id",
+    "min_amount",
+    "max_amount",
+)
+
+
+def validate_rule(data: dict) -> str:
+    """
+    Check a rule before it is saved.
+
+    Returns:
+        str: What is wrong with the rule, or None if it is valid
+    """
+    if not any(data.get(key) not in (None, "") for key in RULE_PREDICATES):
+        return f"A rule needs at least one of: {', '.join(RULE_PREDICATES)}."
+
+    if data.get("name_pattern"):
+        try:
+            re.compile(data["name_pattern"])
+        except re.error as e:
+            return f"Invalid name_pattern: {e}."
+
+    amounts = {}
+    for key in ("min_amount", "max_amount"):
+        if data.get(key) is not None:
+            try:
+                amounts[key] = Decimal(str(data[key]))
+            except InvalidOperation:
+                return f"Invalid {key} '{data[key]}'."
+    if len(amounts) == 2 and amounts["min_amount"] > amounts["max_amount"]:
+        return "min_amount must not be greater than max_amount."
+
+    if not db.session.get(TxnCategory, data.get("category_id")):
+        return f"Category {data.get('category_id')} not found."
+    if data.get("subcategory_id") and not db.session.get(
+        TxnSubcategory, data["subcategory_id"]
+    ):
+        return f"Subcategory {data['subcategory_id']} not found."
+    return None
+
+
+@rule_bp.route("", methods=["GET"])
+@safe_route
+def get_rules():
+    rules = CategorizationRule.query.order_by(
+        CategorizationRule.priority, CategorizationRule.created_at
+    )
+    return jsonify([rule.to_dict() for rule in rules])
+
+
+@rule_bp.route("", methods=["POST"])
+@safe_route
+def create_rule():
+    data = request.get_json()
+    data.pop("id", None)
+    problem = validate_rule(data)
+    if problem:
+        return error_response(HTTPStatus.BAD_REQUEST.value, problem)
+    rule = create_model_instance_from_dict(CategorizationRule, data)
+    return jsonify(rule.to_dict()), HTTPStatus.CREATED.value
+
+
+@rule_bp.route("", methods=["PUT"])
+@safe_route
+def update_rule():
+    data = request.get_json()
+    rule = db.session.get(CategorizationRule, data.get("id"))
+    if not rule:
+        return error_response(
+            HTTPStatus.NOT_FOUND.value, f"Rule {data.get('id')} not found."
+        )
+    problem = validate_rule({**rule.to_dict(), **data})
+    if problem:
+        return error_response(HTTPStatus.BAD_REQUEST.value, problem)
+    update_model_instance_from_dict(rule, data)
+    return jsonify(rule.to_dict()), HTTPStatus.OK.value
+
+
+@rule_bp.route("/<string:rule_id>", methods=["DELETE"])
+@safe_route
+def delete_rule(rule_id: str):
+    return delete_model_request(CategorizationRule, rule_id)
+
+
+@rule_bp.route("/apply", methods=["POST"])
+@safe_route
+def apply_rules():
+    """Re-categorize every stored transaction with the current rules."""
+    if wants_background_job():
+        job = enqueue_job(
+            "apply_rules", idempotency_key=request.headers.get("Idempotency-Key")
+        )
+        return job_accepted_response(job)
+    return jsonify(reapply_categorization_rules()), HTTPStatus.OK.value
@@ -1,11 +1,17 @@
+from http import HTTPStatus
+from urllib.parse import urlencode
+
 from flask import Blueprint, request, jsonify
 
+from utils.error_utils import error_response
 from utils.route_utils import (
     create_model_request,
     delete_model_request,
+    parse_date_arg,
     update_model_request,
     safe_route,
 )
+from utils.txn_search import search_transactions
 from utils.model_utils import (
     list_instances_of_model,
 )
@@ -15,6 +21,9 @@ from models import db
 
 txn_bp = Blueprint("txn", __name__, url_prefix="/api/transaction")
 
+SEARCH_DEFAULT_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+
 
 @txn_bp.route("", methods=["POST"])
 @safe_route
@@ -38,3 +47,47 @@ def get_transactions():
 @safe_route
 def delete_transaction(txn_id: str):
     return delete_model_request(Txn, txn_id)
+
+
+@txn_bp.route("/search", methods=["GET"])
+@safe_route
+def search_transactions_route():
+    """
+    Ranked full-text search over transaction names and merchants.
+
+    Query parameters: `q` (required), `account_id`, `category_id`,
+    `subcategory_id`, `start` and `end` (YYYY-MM-DD, inclusive), `limit` and
+    `offset`. A `Link: rel="next"` header points at the next page.
+    """
+    query = request.args.get("q", "").strip()
+    limit = request.args.get("limit", SEARCH_DEFAULT_LIMIT, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    try:
+        if not query:
+            raise ValueError("q is required")
+        if not 0 < limit <= MAX_SEARCH_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        start = parse_date_arg("start")
+        end = parse_date_arg("end")
+    except ValueError as e:
+        return error_response(HTTPStatus.BAD_REQUEST.value, str(e))
+
+    # One extra row tells whether there is a next page
+    txns = search_transactions(
+        query,
+        account_id=request.args.get("account_id"),
+        category_id=request.args.get("category_id"),
+        subcategory_id=request.args.get("subcategory_id"),
+        start=start,
+        end=end,
+        limit=limit + 1,
+        offset=offset,
+    )
+    response = jsonify([txn.to_dict() for txn in txns[:limit]])
+    if len(txns) > limit:
+        args = request.args.to_dict()
+        args.update(limit=limit, offset=offset + limit)
+        response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+from flask import Blueprint, current_app, jsonify, request
+
+from models import db
+from models.item.item import Item
+from utils.error_utils import error_response
+from utils.logger import get_logger
+from utils.metrics import WEBHOOKS_RECEIVED
+from utils.route_utils import safe_route
+from utils.sync_utils import enqueue_webhook_sync
+from utils.webhook_utils import VERIFICATION_HEADER, verify_webhook
+
+webhook_bp = Blueprint("webhook", __name__, url_prefix="/api/webhook")
+logger = get_logger(__name__)
+
+
+@webhook_bp.route("/plaid", methods=["POST"])
+@safe_route
+def plaid_webhook():
+    if not verify_webhook(
+        request.get_data(),
+        request.headers.get(VERIFICATION_HEADER),
+        current_app.config["plaid_client"],
+        secret=current_app.config.get("PLAID_WEBHOOK_SECRET"),
+    ):
+        return error_response(HTTPStatus.UNAUTHORIZED.value, "Invalid webhook signature.")
+
+    payload = request.get_json(silent=True) or {}
+    webhook_type = payload.get("webhook_type", "")
+    webhook_code = payload.get("webhook_code", "")
+    item_id = payload.get("item_id")
+    WEBHOOKS_RECEIVED.inc(webhook_type=webhook_type, webhook_code=webhook_code)
+    logger.info(f"📬 Webhook {webhook_type}/{webhook_code} for item {item_id}")
+
+    # Plaid retries non-2xx responses, so webhooks we do not act on still
+    # return 200
+    if (webhook_type, webhook_code) != ("TRANSACTIONS", "SYNC_UPDATES_AVAILABLE"):
+        return jsonify({"status": "ignored"}), HTTPStatus.OK
+    if not item_id or not db.session.get(Item, item_id):
+        logger.warning(f"⚠️ Webhook for unknown item {item_id}, ignoring")
+        return jsonify({"status": "ignored"}), HTTPStatus.OK
+
+    # A durable job, so an acknowledged webhook survives a restart; Plaid
+    # does not send it again
+    job, coalesced = enqueue_webhook_sync(item_id)
+    return (
+        jsonify(
+            {
+                "status": "coalesced" if coalesced else "scheduled",
+                "item_id": item_id,
+                "job_id": job.id,
+            }
+        ),
+        HTTPStatus.ACCEPTED,
+    )
@@ -46,13 +46,28 @@ else
             echo ""
             echo "📁 Coverage report generated in htmlcov/index.html"
             ;;
+        "benchmark")
+            echo "⏱️ Running Benchmarks"
+            echo "----------------------------------------"
+            python -m tests.benchmarks.run_benchmarks "${@:2}"
+            ;;
+        "benchmark-plaid")
+            echo "🔌 Running Plaid Concurrency Benchmark"
+            echo "----------------------------------------"
+            python -m tests.benchmarks.plaid_concurrency "${@:2}"
+            ;;
+        "benchmark-categorizer")
+            echo "🧠 Running Categorizer Benchmark"
+            echo "----------------------------------------"
+            python -m tests.benchmarks.categorization "${@:2}"
+            ;;
         "fast")
             echo "⚡ Running Fast Tests Only"
             echo "----------------------------------------"
             pytest -m "not slow" -v
             ;;
         *)
-            echo "Usage: $0 [unit|integration|e2e|slow|coverage|fast]"
+            echo "Usage: $0 [unit|integration|e2e|slow|coverage|benchmark|benchmark-plaid|benchmark-categorizer|fast]"
             echo ""
             echo "Available options:"
             echo "  unit        - Run unit tests with mocked dependencies"
@@ -60,6 +75,9 @@ else
             echo "  e2e         - Run end-to-end tests"
             echo "  slow        - Run slow tests"
             echo "  coverage    - Run all tests with coverage report"
+            echo "  benchmark   - Run performance benchmarks (extra args are passed through)"
+            echo "  benchmark-plaid - Benchmark concurrent syncs against the fake Plaid server"
+            echo "  benchmark-categorizer - Benchmark the embedding categorizer on the CPU"
             echo "  fast        - Run fast tests only (exclude slow tests)"
             echo ""
             echo "No arguments: Run all tests"
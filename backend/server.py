@@ -27,7 +27,25 @@ from routes.budget_period_routes import budget_period_routes
 from routes.txn_routes import txn_bp
 from routes.txn_category_routes import txn_category_bp
 from routes.txn_subcategory_routes import txn_subcategory_bp
+from routes.debug_routes import debug_bp
+from routes.metrics_routes import metrics_bp
+from routes.webhook_routes import webhook_bp
+from routes.job_routes import job_bp
+from routes.rule_routes import rule_bp
+from routes.merchant_routes import merchant_bp
+from routes.analytics_routes import analytics_bp
+from routes.recurring_routes import recurring_bp
+from routes.export_routes import export_bp
+from routes.import_routes import import_bp
 from utils.logger import get_logger
+from utils.request_metrics import init_request_metrics
+from utils.plaid_client import ResilientPlaidClient, create_plaid_api_client
+from utils.job_queue import init_job_queue
+from utils.txn_search import ensure_search_index
+from utils.merchant_utils import ensure_merchant_schema
+from utils.analytics import ensure_txn_indexes
+from utils.analytics_engine import ensure_txn_journal
+from utils.statement_import import ensure_fingerprint_schema
 
 # Read env vars from .env file
 load_dotenv()
@@ -42,6 +60,18 @@ app.register_blueprint(txn_bp)
 app.register_blueprint(txn_category_bp)
 app.register_blueprint(txn_subcategory_bp)
 app.register_blueprint(budget_period_routes)
+app.register_blueprint(debug_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(webhook_bp)
+app.register_blueprint(job_bp)
+app.register_blueprint(rule_bp)
+app.register_blueprint(merchant_bp)
+app.register_blueprint(analytics_bp)
+app.register_blueprint(recurring_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(import_bp)
+init_request_metrics(app)
+init_job_queue(app)
 
 PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
 PLAID_SECRET = os.getenv("PLAID_SECRET")
@@ -51,12 +81,17 @@ PLAID_COUNTRY_CODES = os.getenv("PLAID_COUNTRY_CODES", "US").split(",")
 
 
 # SQLite database configuration
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///database.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 db.init_app(app)  # 🔥 Fix: Bind the existing db instance to the app
 migrate = Migrate(app, db)  # Bind Flask-Migrate to Flask app and SQLAlchemy
 with app.app_context():
     db.create_all()
+    ensure_merchant_schema()
+    ensure_fingerprint_schema()
+    ensure_txn_indexes()
+    ensure_txn_journal()
+    ensure_search_index()
     seed_transaction_categories()
 
 
@@ -67,9 +102,14 @@ def empty_to_none(field):
     return value
 
 
+# PLAID_ENV=fake points the client at the local fake Plaid server
+# (python -m fake_plaid.server) for offline development and load testing
+PLAID_FAKE_HOST = os.getenv("PLAID_FAKE_HOST", "http://localhost:8001")
+
 host = {
     "sandbox": plaid.Environment.Sandbox,
     "production": plaid.Environment.Production,
+    "fake": PLAID_FAKE_HOST,
 }.get(PLAID_ENV, plaid.Environment.Sandbox)
 
 
@@ -82,6 +122,13 @@ host = {
 # at https://dashboard.plaid.com/team/api.
 PLAID_REDIRECT_URI = empty_to_none("PLAID_REDIRECT_URI")
 
+# Public URL of /api/webhook/plaid. When set, Link registers it for new items
+# and transactions are synced when Plaid sends SYNC_UPDATES_AVAILABLE.
+PLAID_WEBHOOK_URL = empty_to_none("PLAID_WEBHOOK_URL")
+# Shared secret accepted for webhooks signed by the local simulator
+# (python -m fake_plaid.webhooks). Leave unset outside development.
+app.config["PLAID_WEBHOOK_SECRET"] = empty_to_none("PLAID_WEBHOOK_SECRET")
+
 configuration = plaid.Configuration(
     host=host,
     api_key={
@@ -91,8 +138,10 @@ configuration = plaid.Configuration(
     },
 )
 
-api_client = plaid.ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
+api_client = create_plaid_api_client(configuration)
+# All Plaid calls share one pooled ApiClient and go through timeouts,
+# retries and per-operation circuit breakers
+client = ResilientPlaidClient(plaid_api.PlaidApi(api_client))
 app.config["plaid_client"] = client
 
 products = []
@@ -133,6 +182,8 @@ def create_link_token():
         )
         if PLAID_REDIRECT_URI != None:
             request["redirect_uri"] = PLAID_REDIRECT_URI
+        if PLAID_WEBHOOK_URL != None:
+            request["webhook"] = PLAID_WEBHOOK_URL
         response = client.link_token_create(request)
         logger.info(f"✅ Link token created successfully")
         return jsonify(response.to_dict())
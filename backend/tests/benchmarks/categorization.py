@@ -0,0 +1,189 @@
+"""
+CPU throughput and memory of the embedding categorizer.
+
+Usage (from backend/):
+    python -m tests.benchmarks.categorization --transactions 10000
+    python -m tests.benchmarks.categorization --model hashing --page-size 250
+
+Sync pages are generated from the fake Plaid merchants with varying store
+numbers, plus a long tail of one-off merchants. Each run reports
+transactions/sec, how many texts reached the encoder and the peak traced
+Python memory per 1,000 transactions for:
+
+- per transaction: one encoder call and one scoring pass per transaction,
+  with no normalization or cache (a sample of the pages only)
+- batched (cold): the pipeline with an empty embedding cache, including
+  building the label matrix
+- batched (warm): the same pages again, as when a sync is retried or the
+  same merchants come back next month
+
+CUDA is hidden, so sentence-transformers always runs on the CPU.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from fake_plaid.data import MERCHANTS
+from models import db
+from models.embedding.text_embedding import TextEmbedding
+from tests.benchmarks.data_generator import DatasetSpec, generate_dataset
+from tests.benchmarks.run_benchmarks import peak_memory
+from utils.budget_categorizer import (
+    AI_CATEGORIZATION_MODEL,
+    BudgetCategorizer,
+    best_matches,
+    create_encoder,
+)
+
+DEFAULT_TRANSACTIONS = 10_000
+DEFAULT_PAGE_SIZE = 500
+# Share of transactions at merchants seen nowhere else
+DEFAULT_UNIQUE_SHARE = 0.05
+
+
+def synthetic_pages(
+    count: int, page_size: int, unique_share: float = DEFAULT_UNIQUE_SHARE, seed: int = 42
+) -> list[list[dict]]:
+    """Plaid-like pages of transaction name/merchant dicts."""
+    rng = random.Random(seed)
+    txns = []
+    for _ in range(count):
+        if rng.random() < unique_share:
+            merchant = "".join(rng.choice(string.ascii_lowercase) for _ in range(10))
+        else:
+            merchant = rng.choice(MERCHANTS)[0]
+        txns.append(
+            {"name": f"{merchant.upper()} #{rng.randint(1, 9999)}", "merchant": merchant}
+        )
+    return [txns[start : start + page_size] for start in range(0, count, page_size)]
+
+
+def per_1k(value: float, count: int) -> float:
+    return round(value / count * 1000, 3) if count else 0.0
+
+
+def measure_run(fn, count: int) -> dict:
+    start = time.perf_counter()
+    with peak_memory() as memory:
+        texts_encoded = fn()
+    seconds = time.perf_counter() - start
+    return {
+        "transactions": count,
+        "seconds": round(seconds, 4),
+        "transactions_per_second": round(count / seconds, 1) if seconds else None,
+        "texts_encoded": texts_encoded,
+        "peak_memory_mb_per_1k": per_1k(memory["peak_mb"], count),
+    }
+
+
+def run_categorization_benchmark(
+    app,
+    transactions: int = DEFAULT_TRANSACTIONS,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    model: str = AI_CATEGORIZATION_MODEL,
+    history: int = 2_000,
+    naive_sample: int = 500,
+    seed: int = 42,
+) -> dict:
+    """
+    Benchmark the naive and batched categorizers against a fresh dataset.
+
+    Returns:
+        dict: Run settings and results keyed by variant
+    """
+    pages = synthetic_pages(transactions, page_size, seed=seed)
+    results = {}
+
+    with app.app_context():
+        generate_dataset(DatasetSpec(transactions=history, seed=seed))
+        encoder = create_encoder(model)
+
+        # The naive variant scores against the same label matrix
+        row_targets, matrix = BudgetCategorizer(encoder).labels()
+        db.session.query(TextEmbedding).delete()
+        db.session.commit()
+
+        sample = [txn for page in pages for txn in page][:naive_sample]
+
+        def per_transaction():
+            for txn in sample:
+                vector = encoder.encode([f"{txn['merchant']} {txn['name']}"])[0]
+                best_matches([vector], matrix)
+            return len(sample)
+
+        results["per transaction"] = measure_run(per_transaction, len(sample))
+
+        # Cold includes building the label matrix from an empty cache
+        categorizer = BudgetCategorizer(encoder)
+
+        def batched():
+            encoded_before = categorizer.encoded
+            for page in pages:
+                categorizer.categorize(page)
+            return categorizer.encoded - encoded_before
+
+        results["batched (cold)"] = measure_run(batched, transactions)
+        results["batched (warm)"] = measure_run(batched, transactions)
+
+    for name, result in results.items():
+        print(
+            f"{name:>16} {result['transactions_per_second']:>10.1f} txn/s "
+            f"{result['texts_encoded']:>7} encoded "
+            f"{result['peak_memory_mb_per_1k']:>8.3f} MB/1k txns"
+        )
+
+    return {
+        "model": encoder.name,
+        "page_size": page_size,
+        "labels": len(row_targets),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the embedding categorizer on the CPU."
+    )
+    parser.add_argument("--transactions", type=int, default=DEFAULT_TRANSACTIONS)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--model", default=AI_CATEGORIZATION_MODEL)
+    parser.add_argument("--naive-sample", type=int, default=500)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from server import app
+
+    try:
+        results = run_categorization_benchmark(
+            app,
+            args.transactions,
+            args.page_size,
+            args.model,
+            naive_sample=args.naive_sample,
+        )
+    finally:
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import random
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData
+from models import db
+from models.account.account import Account
+from models.account.account_subtype import AccountSubtype
+from models.account.account_type import AccountType
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.institution.institution import Institution
+from models.item.item import Item
+from models.transaction.payment_channel import PaymentChannel
+from models.transaction.transaction_categories import seed_transaction_categories
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.merchant_utils import resolve_merchants
+
+INSERT_BATCH_SIZE = 10_000
+
+
+@dataclass
+class DatasetSpec:
+    """Shape of a synthetic dataset."""
+
+    transactions: int = 10_000
+    items: int = 2
+    accounts_per_item: int = 3
+    budgets: int = 12
+    history_days: int = 730
+    seed: int = 42
+
+    @property
+    def transactions_per_account(self) -> int:
+        return max(1, self.transactions // (self.items * self.accounts_per_item))
+
+
+def fake_plaid_data_for(spec: DatasetSpec) -> FakePlaidData:
+    """
+    Fake Plaid data matching the dataset. One extra item is generated whose
+    accounts exist but whose transactions are left for ingestion benchmarks.
+    """
+    return FakePlaidData(
+        FakePlaidConfig(
+            items=spec.items + 1,
+            accounts_per_item=spec.accounts_per_item,
+            transactions_per_account=spec.transactions_per_account,
+            history_days=spec.history_days,
+            seed=spec.seed,
+        )
+    )
+
+
+def category_lookup() -> dict:
+    """Map (primary, detailed) names to (category_id, subcategory_id)."""
+    rows = (
+        db.session.query(TxnCategory.name, TxnSubcategory.name, TxnCategory.id, TxnSubcategory.id)
+        .join(TxnSubcategory, TxnSubcategory.category_id == TxnCategory.id)
+        .all()
+    )
+    return {(primary, detailed): (cat_id, sub_id) for primary, detailed, cat_id, sub_id in rows}
+
+
+def generate_items_and_accounts(data: FakePlaidData):
+    for index, access_token in enumerate(data.access_tokens()):
+        item = data.item(index)
+        db.session.add(
+            Institution(id=item["institution_id"], name=item["institution_name"])
+        )
+        db.session.add(
+            Item(
+                id=item["item_id"],
+                access_token=access_token,
+                institution_id=item["institution_id"],
+                cursor="",
+            )
+        )
+        for account in data.accounts(index):
+            db.session.add(
+                Account(
+                    id=account["account_id"],
+                    name=f"{account['name']}-{account['mask']}",
+                    original_name=f"{account['name']}-{account['mask']}",
+                    balance=Decimal(str(account["balances"]["available"])),
+                    limit=Decimal("0.00"),
+                    last_updated=datetime.now(),
+                    institution_id=item["institution_id"],
+                    item_id=item["item_id"],
+                    account_type=AccountType(account["type"]),
+                    account_subtype=AccountSubtype(account["subtype"]),
+                )
+            )
+    db.session.commit()
+
+
+def generate_transactions(data: FakePlaidData, spec: DatasetSpec):
+    categories = category_lookup()
+    per_item = data.transaction_count(0)
+    rows = []
+
+    for index in range(spec.items):
+        for n in range(per_item):
+            txn = data.transaction(index, n)
+            personal_finance = txn["personal_finance_category"]
+            category_id, subcategory_id = categories[
+                (personal_finance["primary"], personal_finance["detailed"])
+            ]
+            txn_date = datetime.combine(
+                date.fromisoformat(txn["date"]), datetime.min.time()
+            )
+            rows.append(
+                {
+                    "id": txn["transaction_id"],
+                    "name": txn["name"],
+                    "amount": Decimal(str(txn["amount"])),
+                    "date": txn_date,
+                    "date_time": txn_date,
+                    "merchant": txn["merchant_name"],
+                    "logo_url": txn["logo_url"],
+                    "channel": PaymentChannel(txn["payment_channel"]),
+                    "account_id": txn["account_id"],
+                    "category_id": category_id,
+                    "subcategory_id": subcategory_id,
+                }
+            )
+            if len(rows) >= INSERT_BATCH_SIZE:
+                resolve_merchants(rows)
+                db.session.execute(insert(Txn), rows)
+                rows = []
+
+    if rows:
+        resolve_merchants(rows)
+        db.session.execute(insert(Txn), rows)
+    db.session.commit()
+
+
+def generate_budgets(spec: DatasetSpec):
+    rng = random.Random(spec.seed)
+    categories = TxnCategory.query.order_by(TxnCategory.name).all()
+    frequencies = list(BudgetFrequency)
+
+    for i in range(spec.budgets):
+        category = categories[i % len(categories)]
+        subcategory = None
+        if i % 3 == 2:
+            subcategory = category.subcategories.order_by(TxnSubcategory.name).first()
+        db.session.add(
+            Budget(
+                amount=Decimal(str(round(rng.uniform(50, 2000), 2))),
+                frequency=frequencies[i % len(frequencies)],
+                category_id=category.id,
+                subcategory_id=subcategory.id if subcategory else None,
+            )
+        )
+    db.session.commit()
+
+
+def generate_dataset(spec: DatasetSpec) -> FakePlaidData:
+    """
+    Reset the database and fill it with a synthetic dataset.
+
+    Must be called inside an app context.
+    """
+    db.drop_all()
+    db.create_all()
+    seed_transaction_categories()
+
+    data = fake_plaid_data_for(spec)
+    generate_items_and_accounts(data)
+    generate_transactions(data, spec)
+    generate_budgets(spec)
+    return data
+
+
+def ingestion_batch(data: FakePlaidData, spec: DatasetSpec, count: int) -> list:
+    """Plaid-shaped transactions for the extra item, not yet in the database."""
+    index = spec.items
+    count = min(count, data.transaction_count(index))
+    return [data.transaction(index, n) for n in range(count)]
@@ -0,0 +1,167 @@
+"""
+Throughput of concurrent Plaid syncs against the fake Plaid server.
+
+Usage (from backend/):
+    python -m tests.benchmarks.plaid_concurrency --concurrency 1 8 32
+    python -m tests.benchmarks.plaid_concurrency --latency-ms 50 --pool-sizes 1 4 10
+
+Each run pages through transactions/sync for N items at once, one thread per
+item, and reports requests/sec and how many TCP connections the client
+opened. Pages are kept small so the run is bound by network round trips
+rather than JSON decoding. The generated client's default pool is compared
+with pools built by create_plaid_api_client, so the effect of
+PLAID_POOL_MAXSIZE and blocking connection reuse can be measured before
+changing them in production.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import plaid
+from plaid.api import plaid_api
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData
+from fake_plaid.server import start_fake_plaid_server
+from utils.plaid_client import (
+    ResilientPlaidClient,
+    create_plaid_api_client,
+    pool_connection_count,
+)
+from utils.sync_utils import fetch_sync_pages
+
+DEFAULT_CONCURRENCY = [1, 8, 32]
+DEFAULT_POOL_SIZES = [1, 10]
+
+
+def plaid_configuration(host: str) -> plaid.Configuration:
+    return plaid.Configuration(
+        host=host,
+        api_key={"clientId": "fake", "secret": "fake", "plaidVersion": "2020-09-14"},
+    )
+
+
+def client_variants(host: str, pool_sizes: list[int]) -> dict:
+    """The generated client's default pool plus one pooled client per size."""
+    variants = {"default": plaid.ApiClient(plaid_configuration(host))}
+    for size in pool_sizes:
+        variants[f"pooled (maxsize {size})"] = create_plaid_api_client(
+            plaid_configuration(host), pool_maxsize=size
+        )
+    return variants
+
+
+def run_concurrent_syncs(api_client, access_tokens: list[str], concurrency: int) -> dict:
+    """
+    Sync `concurrency` items at once through one shared client.
+
+    Returns:
+        dict: seconds, requests, requests_per_second and connections opened
+    """
+    plaid_client = ResilientPlaidClient(plaid_api.PlaidApi(api_client))
+    tokens = [access_tokens[i % len(access_tokens)] for i in range(concurrency)]
+    connections_before = pool_connection_count(api_client)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pages = list(
+            executor.map(
+                lambda token: fetch_sync_pages(plaid_client, token, "")["pages"], tokens
+            )
+        )
+    seconds = time.perf_counter() - start
+
+    requests = sum(pages)
+    return {
+        "seconds": round(seconds, 4),
+        "requests": requests,
+        "requests_per_second": round(requests / seconds, 1),
+        "connections": pool_connection_count(api_client) - connections_before,
+    }
+
+
+def run_plaid_concurrency(
+    concurrency: list[int] = None,
+    pool_sizes: list[int] = None,
+    latency_ms: float = 50.0,
+    transactions_per_account: int = 20,
+    page_size: int = 5,
+) -> dict:
+    """
+    Benchmark every client variant at every concurrency level.
+
+    Returns:
+        dict: Run settings and results keyed by "<variant> x<concurrency>"
+    """
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    pool_sizes = pool_sizes or DEFAULT_POOL_SIZES
+    data = FakePlaidData(
+        FakePlaidConfig(
+            items=max(concurrency),
+            accounts_per_item=1,
+            transactions_per_account=transactions_per_account,
+            page_size=page_size,
+            latency_ms=latency_ms,
+        )
+    )
+    # Keep the fake server's per-request access log out of the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server, host = start_fake_plaid_server(data)
+
+    results = {}
+    try:
+        for level in concurrency:
+            # Fresh clients per level so connection counts start from zero
+            for name, api_client in client_variants(host, pool_sizes).items():
+                result = run_concurrent_syncs(api_client, data.access_tokens(), level)
+                results[f"{name} x{level}"] = result
+                print(
+                    f"{name:>20} x{level:<4} {result['requests_per_second']:>9.1f} req/s "
+                    f"{result['seconds']:>8.3f}s {result['connections']:>4} connections"
+                )
+    finally:
+        server.shutdown()
+
+    return {
+        "latency_ms": latency_ms,
+        "transactions_per_item": transactions_per_account,
+        "page_size": page_size,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark concurrent Plaid syncs against the fake Plaid server."
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=DEFAULT_POOL_SIZES)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--transactions", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=5)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_plaid_concurrency(
+        args.concurrency,
+        args.pool_sizes,
+        args.latency_ms,
+        args.transactions,
+        args.page_size,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Benchmarks for the sync ingestion path and the hot read endpoints.
+
+Usage (from backend/):
+    python -m tests.benchmarks.run_benchmarks --sizes 10000 100000 1000000
+    python -m tests.benchmarks.run_benchmarks --compare previous.json
+
+Each size gets a fresh synthetic database. Results (median wall time, SQL
+statement count and peak Python memory per benchmark) are written to a JSON
+file so runs can be compared. Endpoints are timed with result caches cleared,
+so the numbers reflect computing each response. Ingestion is also repeated at
+WARNING, INFO and DEBUG to show the per-transaction cost of logging.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from sqlalchemy import event
+
+from models import db
+from utils.cache import clear_caches
+from utils.logger import flush_logs, set_log_stream
+from tests.benchmarks.data_generator import (
+    DatasetSpec,
+    generate_dataset,
+    ingestion_batch,
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_INGEST_COUNT = 2_000
+LOG_LEVELS = ["WARNING", "INFO", "DEBUG"]
+# Loggers on the per-transaction write path
+INGESTION_LOGGERS = ["utils.sync_utils", "utils.model_utils"]
+
+ENDPOINTS = {
+    "GET /api/transaction": "/api/transaction",
+    "GET /api/account": "/api/account",
+    "GET /api/budget_period?frequency=Weekly": "/api/budget_period?frequency=Weekly",
+    "GET /api/budget_period?frequency=Monthly": "/api/budget_period?frequency=Monthly",
+    "GET /api/budget_period?frequency=Monthly&forecast=true": "/api/budget_period?frequency=Monthly&forecast=true",
+    "GET /api/budget_period/total?frequency=Weekly": "/api/budget_period/total?frequency=Weekly",
+    "GET /api/budget_period/total?frequency=Monthly": "/api/budget_period/total?frequency=Monthly",
+    # Full weekly history, per-period rows vs parallel arrays
+    "GET /api/budget_period?frequency=Weekly&start=2000-01-01": "/api/budget_period?frequency=Weekly&start=2000-01-01",
+    "GET /api/budget_period?frequency=Weekly&start=2000-01-01&format=columnar": "/api/budget_period?frequency=Weekly&start=2000-01-01&format=columnar",
+    # Full-text search: a rare term, and a merchant on ~7% of rows
+    "GET /api/transaction/search?q=payroll&limit=20": "/api/transaction/search?q=payroll&limit=20",
+    "GET /api/transaction/search?q=starbucks&limit=20": "/api/transaction/search?q=starbucks&limit=20",
+    # Spend breakdown: this month, and the whole history
+    "GET /api/analytics/breakdown?group_by=category": "/api/analytics/breakdown?group_by=category",
+    "GET /api/analytics/breakdown?group_by=merchant&start=2000-01-01": "/api/analytics/breakdown?group_by=merchant&start=2000-01-01",
+    # Spending series over the in-memory snapshot, last year
+    "GET /api/analytics/rolling": "/api/analytics/rolling",
+    "GET /api/analytics/percentiles": "/api/analytics/percentiles",
+}
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+@contextmanager
+def peak_memory():
+    """Yield a dict that holds the peak traced allocation in MB on exit."""
+    result = {}
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+
+def measure(fn, repeat: int = 3) -> dict:
+    """
+    Time fn over `repeat` untraced runs, then run it once more under
+    tracemalloc and the query counter for memory and statement counts.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    with QueryCounter(db.engine) as queries, peak_memory() as memory:
+        fn()
+
+    return {
+        "seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "queries": queries.count,
+        "peak_memory_mb": round(memory["peak_mb"], 3),
+    }
+
+
+def as_plaid_client_output(transaction: dict) -> dict:
+    """Mirror the types the Plaid client's to_dict() returns for dates."""
+    transaction = dict(transaction)
+    transaction["date"] = date.fromisoformat(transaction["date"])
+    transaction["datetime"] = datetime.fromisoformat(
+        transaction["datetime"].replace("Z", "+00:00")
+    )
+    return transaction
+
+
+def benchmark_ingestion(app, data, spec: DatasetSpec, count: int) -> dict:
+    from utils.sync_utils import handle_added_transactions
+    from models.transaction.txn import Txn
+
+    batch = [as_plaid_client_output(t) for t in ingestion_batch(data, spec, count)]
+    ids = [t["transaction_id"] for t in batch]
+
+    def ingest():
+        Txn.query.filter(Txn.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        handle_added_transactions(batch)
+
+    result = measure(ingest, repeat=1)
+    result["rows"] = len(batch)
+    result["rows_per_second"] = (
+        round(len(batch) / result["seconds"], 1) if result["seconds"] else None
+    )
+    return result
+
+
+def benchmark_logging_overhead(app, data, spec: DatasetSpec, count: int) -> dict:
+    """
+    Ingest the same batch at each log level with output sent to /dev/null,
+    so the cost of formatting and queueing records is all that is measured.
+    """
+    loggers = [logging.getLogger(name) for name in INGESTION_LOGGERS]
+    previous_levels = [logger.level for logger in loggers]
+    results = {}
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        set_log_stream(devnull)
+        try:
+            for level in LOG_LEVELS:
+                for logger in loggers:
+                    logger.setLevel(level)
+                result = benchmark_ingestion(app, data, spec, count)
+                flush_logs()
+                result["us_per_transaction"] = round(
+                    result["seconds"] / result["rows"] * 1_000_000, 1
+                )
+                results[f"sync ingestion (log level {level})"] = result
+        finally:
+            for logger, level in zip(loggers, previous_levels):
+                logger.setLevel(level)
+            set_log_stream(sys.stdout)
+
+    return results
+
+
+def benchmark_endpoints(app, repeat: int) -> dict:
+    client = app.test_client()
+    results = {}
+    for name, url in ENDPOINTS.items():
+
+        def call():
+            # Measure computing the response, not serving it from the cache
+            clear_caches()
+            response = client.get(url)
+            assert response.status_code == 200, response.data
+            return response
+
+        result = measure(call, repeat=repeat)
+        result["response_bytes"] = len(call().data)
+        results[name] = result
+    return results
+
+
+def run_benchmarks(
+    app,
+    sizes: list[int],
+    ingest_count: int = DEFAULT_INGEST_COUNT,
+    repeat: int = 3,
+    seed: int = 42,
+) -> dict:
+    """Run every benchmark for each dataset size and return the results."""
+    results = {
+        "meta": {
+            "started_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": [],
+    }
+
+    with app.app_context():
+        for size in sizes:
+            spec = DatasetSpec(transactions=size, seed=seed)
+            start = time.perf_counter()
+            data = generate_dataset(spec)
+            print(f"Generated {size} transactions in {time.perf_counter() - start:.1f}s")
+
+            entry = {"size": size, "benchmarks": {}}
+            entry["benchmarks"]["sync ingestion"] = benchmark_ingestion(
+                app, data, spec, ingest_count
+            )
+            entry["benchmarks"].update(
+                benchmark_logging_overhead(app, data, spec, ingest_count)
+            )
+            entry["benchmarks"].update(benchmark_endpoints(app, repeat))
+            results["results"].append(entry)
+
+            for name, result in entry["benchmarks"].items():
+                print(
+                    f"  {name:<50} {result['seconds'] * 1000:>10.1f} ms "
+                    f"{result['queries']:>8} queries {result['peak_memory_mb']:>9.1f} MB"
+                )
+
+    return results
+
+
+def compare(previous: dict, current: dict):
+    """Print the relative change in wall time against a previous run."""
+    previous_by_size = {entry["size"]: entry for entry in previous["results"]}
+    for entry in current["results"]:
+        before = previous_by_size.get(entry["size"])
+        if not before:
+            continue
+        print(f"\nSize {entry['size']} vs previous run:")
+        for name, result in entry["benchmarks"].items():
+            old = before["benchmarks"].get(name)
+            if not old or not old["seconds"]:
+                continue
+            change = (result["seconds"] - old["seconds"]) / old["seconds"] * 100
+            print(
+                f"  {name:<50} {change:>+8.1f}% time "
+                f"{result['queries'] - old['queries']:>+8} queries"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run backend benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ingest", type=int, default=DEFAULT_INGEST_COUNT)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    # Benchmarks always run against a throwaway database
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from server import app
+
+    try:
+        results = run_benchmarks(app, args.sizes, args.ingest, args.repeat, args.seed)
+    finally:
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
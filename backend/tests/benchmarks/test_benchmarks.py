@@ -0,0 +1,76 @@
+import json
+import pytest
+
+from models.budget.budget import Budget
+from models.transaction.txn import Txn
+from tests.benchmarks.categorization import run_categorization_benchmark
+from tests.benchmarks.data_generator import DatasetSpec, generate_dataset
+from tests.benchmarks.plaid_concurrency import run_plaid_concurrency
+from tests.benchmarks.run_benchmarks import (
+    ENDPOINTS,
+    LOG_LEVELS,
+    compare,
+    run_benchmarks,
+)
+
+
+@pytest.mark.benchmark
+@pytest.mark.slow
+class TestBenchmarks:
+    """Smoke tests for the benchmark harness at a tiny scale."""
+
+    def test_generate_dataset(self, test_app):
+        """Test the generator produces the requested shape of data."""
+        with test_app.app_context():
+            spec = DatasetSpec(transactions=600, items=2, accounts_per_item=3, budgets=6)
+            generate_dataset(spec)
+
+            assert Txn.query.count() == 600
+            assert Budget.query.count() == 6
+            assert Txn.query.filter(Txn.amount < 0).count() > 0
+
+    def test_run_benchmarks_results(self, test_app, capsys):
+        """Test every benchmark reports time, query count and memory."""
+        results = run_benchmarks(test_app, sizes=[300], ingest_count=20, repeat=1)
+
+        assert len(results["results"]) == 1
+        benchmarks = results["results"][0]["benchmarks"]
+        log_benchmarks = {f"sync ingestion (log level {level})" for level in LOG_LEVELS}
+        assert set(benchmarks) == {"sync ingestion", *log_benchmarks, *ENDPOINTS}
+        for result in benchmarks.values():
+            assert result["seconds"] >= 0
+            assert result["queries"] > 0
+            assert "peak_memory_mb" in result
+        assert benchmarks["sync ingestion"]["rows"] == 20
+        for name in log_benchmarks:
+            assert benchmarks[name]["us_per_transaction"] > 0
+
+        # Results are plain JSON and comparable between runs
+        compare(json.loads(json.dumps(results)), results)
+        assert "vs previous run" in capsys.readouterr().out
+
+    def test_plaid_concurrency_results(self):
+        """Test the pooled client never opens more connections than its pool size."""
+        results = run_plaid_concurrency(
+            concurrency=[4], pool_sizes=[2], latency_ms=5, transactions_per_account=4, page_size=2
+        )["results"]
+
+        assert set(results) == {"default x4", "pooled (maxsize 2) x4"}
+        for result in results.values():
+            assert result["requests"] == 8
+            assert result["requests_per_second"] > 0
+        assert 1 <= results["pooled (maxsize 2) x4"]["connections"] <= 2
+
+    def test_categorization_results(self, test_app):
+        """Test the batched categorizer encodes each distinct text only once."""
+        results = run_categorization_benchmark(
+            test_app, transactions=200, page_size=50, model="hashing", history=300, naive_sample=20
+        )["results"]
+
+        assert set(results) == {"per transaction", "batched (cold)", "batched (warm)"}
+        assert results["per transaction"]["texts_encoded"] == 20
+        assert 0 < results["batched (cold)"]["texts_encoded"] < 200
+        assert results["batched (warm)"]["texts_encoded"] == 0
+        for result in results.values():
+            assert result["transactions_per_second"] > 0
+            assert "peak_memory_mb_per_1k" in result
@@ -763,7 +763,7 @@ class TestItemRoutesIntegration:
                 }
 
                 # Import the handler function
-                from routes.item_routes import handle_added_transactions
+                from utils.sync_utils import handle_added_transactions
 
                 # Test the handler
                 handle_added_transactions([mock_transaction])
@@ -853,7 +853,7 @@ class TestItemRoutesIntegration:
                 }
 
                 # Import the handler function
-                from routes.item_routes import handle_modified_transactions
+                from utils.sync_utils import handle_modified_transactions
 
                 # Test the handler
                 handle_modified_transactions([mock_modified_transaction])
@@ -930,7 +930,7 @@ class TestItemRoutesIntegration:
                 mock_removed_transaction = {"transaction_id": "test_txn_removed_123"}
 
                 # Import the handler function
-                from routes.item_routes import handle_removed_transactions
+                from utils.sync_utils import handle_removed_transactions
 
                 # Test the handler
                 handle_removed_transactions([mock_removed_transaction])
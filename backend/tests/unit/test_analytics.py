@@ -0,0 +1,123 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from models import db
+from models.transaction.payment_channel import PaymentChannel
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from utils.analytics import spend_breakdown
+
+WINDOW = (datetime(2024, 3, 1), datetime(2024, 3, 31))
+
+
+@pytest.mark.unit
+class TestSpendBreakdown:
+    """Test the SQL spend breakdown and its endpoint."""
+
+    @pytest.fixture
+    def spending(self, test_app, sample_accounts):
+        """Four categories in March 2024, plus income and rows outside the window."""
+        with test_app.app_context():
+            categories = {}
+            for name in ["Rent", "Groceries", "Coffee", "Books"]:
+                category = TxnCategory(name=f"Breakdown {name}")
+                db.session.add(category)
+                db.session.flush()
+                categories[name] = category.id
+
+            rows = [
+                ("Rent", "1500.00", datetime(2024, 3, 1), PaymentChannel.ONLINE),
+                ("Groceries", "80.00", datetime(2024, 3, 5), PaymentChannel.IN_STORE),
+                ("Groceries", "40.00", datetime(2024, 3, 31, 18), PaymentChannel.IN_STORE),
+                ("Coffee", "5.00", datetime(2024, 3, 10), PaymentChannel.IN_STORE),
+                ("Coffee", "4.00", datetime(2024, 3, 11), PaymentChannel.IN_STORE),
+                ("Books", "12.00", datetime(2024, 3, 20), PaymentChannel.ONLINE),
+                ("Rent", "1500.00", datetime(2024, 2, 29), PaymentChannel.ONLINE),
+                ("Books", "30.00", datetime(2024, 4, 1), PaymentChannel.ONLINE),
+                # Income is not spending
+                ("Books", "-2000.00", datetime(2024, 3, 15), PaymentChannel.ONLINE),
+            ]
+            for index, (category, amount, day, channel) in enumerate(rows):
+                db.session.add(
+                    Txn(
+                        id=f"txn_breakdown_{index}",
+                        name=category.upper(),
+                        amount=Decimal(amount),
+                        date=day,
+                        channel=channel,
+                        account_id=sample_accounts[index % 2].id,
+                        category_id=categories[category],
+                    )
+                )
+            db.session.commit()
+            return categories
+
+    def test_top_groups_and_other(self, test_app, spending):
+        """Test groups are ordered by total and the tail folds into other."""
+        with test_app.app_context():
+            breakdown = spend_breakdown("category", *WINDOW, top=2)
+
+        assert [(g["label"], g["total"], g["count"]) for g in breakdown["groups"]] == [
+            ("Breakdown Rent", 1500.0, 1),
+            ("Breakdown Groceries", 120.0, 2),
+        ]
+        assert breakdown["groups"][1]["average"] == 60.0
+        assert breakdown["other"] == {
+            "key": None,
+            "label": "Other",
+            "total": 21.0,
+            "count": 3,
+            "average": 7.0,
+            "groups": 2,
+        }
+        assert breakdown["total"]["total"] == 1641.0
+        assert breakdown["total"]["count"] == 6
+
+    def test_other_groupings(self, test_app, spending, sample_accounts):
+        """Test channel and account groupings over the same window."""
+        with test_app.app_context():
+            channels = spend_breakdown("channel", *WINDOW)
+            accounts = spend_breakdown("account", *WINDOW)
+
+        assert [(g["key"], g["total"]) for g in channels["groups"]] == [
+            ("online", 1512.0),
+            ("in store", 129.0),
+        ]
+        assert channels["other"] is None
+        assert {g["key"] for g in accounts["groups"]} == {
+            sample_accounts[0].id,
+            sample_accounts[1].id,
+        }
+        assert sum(g["count"] for g in accounts["groups"]) == 6
+
+    def test_breakdown_endpoint(self, client, test_app, spending):
+        """Test the endpoint reflects new transactions and validates input."""
+        url = "/api/analytics/breakdown?group_by=category&start=2024-03-01&end=2024-03-31"
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.get_json()["total"]["count"] == 6
+
+        with test_app.app_context():
+            db.session.add(
+                Txn(
+                    id="txn_breakdown_new",
+                    name="MORE BOOKS",
+                    amount=Decimal("8.00"),
+                    date=datetime(2024, 3, 25),
+                    account_id="test_account_1",
+                    category_id=spending["Books"],
+                )
+            )
+            db.session.commit()
+        assert client.get(url).get_json()["total"]["count"] == 7
+
+        assert client.get("/api/analytics/breakdown?group_by=color").status_code == 400
+        assert client.get("/api/analytics/breakdown?top=0").status_code == 400
+        assert (
+            client.get(
+                "/api/analytics/breakdown?start=2024-03-02&end=2024-03-01"
+            ).status_code
+            == 400
+        )
@@ -0,0 +1,223 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, text, update
+
+import utils.analytics_engine as analytics_engine
+from models import db
+from models.transaction.txn import Txn
+from utils.analytics_engine import (
+    amount_percentiles,
+    ensure_txn_journal,
+    get_snapshot,
+    load_snapshot,
+    monthly_spend,
+    percentile,
+    rolling_spend,
+)
+
+# (day, amount, category, account index)
+SPENDING = [
+    (date(2024, 1, 10), "100.00", "1", 0),
+    (date(2024, 1, 20), "50.00", "2", 1),
+    (date(2024, 2, 1), "30.00", "1", 0),
+    (date(2024, 2, 2), "10.00", "1", 0),
+    (date(2024, 2, 2), "20.00", "2", 0),
+    (date(2024, 3, 15), "40.00", "1", 1),
+]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine_mode(request, monkeypatch):
+    """Run each test with NumPy, if installed, and with the pure Python path."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics_engine, "np", None)
+    return request.param
+
+
+@pytest.mark.unit
+class TestAnalyticsEngine:
+    """Test the columnar snapshot, its refresh and the series over it."""
+
+    @pytest.fixture
+    def spending(self, test_app, sample_accounts):
+        with test_app.app_context():
+            for index, (day, amount, category_id, account) in enumerate(SPENDING):
+                db.session.add(
+                    Txn(
+                        id=f"txn_series_{index}",
+                        name="SPEND",
+                        amount=Decimal(amount),
+                        date=datetime.combine(day, datetime.min.time()),
+                        account_id=sample_accounts[account].id,
+                        category_id=category_id,
+                    )
+                )
+            db.session.commit()
+        return sample_accounts
+
+    @pytest.fixture
+    def income(self, test_app, spending):
+        """A paycheck, which the spending series leave out."""
+        with test_app.app_context():
+            db.session.add(
+                Txn(
+                    id="txn_series_income",
+                    name="PAYROLL",
+                    amount=Decimal("-500.00"),
+                    date=datetime(2024, 2, 2),
+                    account_id=spending[0].id,
+                    category_id="1",
+                )
+            )
+            db.session.commit()
+        return spending
+
+    def test_percentile_matches_linear_interpolation(self):
+        """Test the pure Python percentile interpolates like numpy."""
+        assert percentile([10.0], 90) == 10.0
+        assert percentile([10.0, 20.0, 30.0, 40.0], 50) == 25.0
+        assert percentile([10.0, 20.0, 30.0, 40.0], 90) == pytest.approx(37.0)
+
+    def test_rolling_spend(self, test_app, spending, income, engine_mode):
+        """Test trailing sums include days before the window start."""
+        with test_app.app_context():
+            series = rolling_spend(
+                load_snapshot(), date(2024, 2, 1), date(2024, 2, 3), 30, {}
+            )
+            by_account = rolling_spend(
+                load_snapshot(),
+                date(2024, 2, 1),
+                date(2024, 2, 1),
+                7,
+                {"account": spending[1].id},
+            )
+
+        assert series["dates"] == ["2024-02-01", "2024-02-02", "2024-02-03"]
+        assert series["daily"] == [30.0, 30.0, 0.0]
+        # Jan 10 has left the 30-day window by Feb 9, Jan 20 has not
+        assert series["rolling"] == [180.0, 210.0, 210.0]
+        assert by_account["rolling"] == [0.0]
+
+    def test_monthly_spend(self, test_app, spending, income, engine_mode):
+        """Test month totals and month-over-month changes."""
+        with test_app.app_context():
+            months = monthly_spend(
+                load_snapshot(), date(2023, 12, 15), date(2024, 3, 31), {}
+            )
+            unknown = monthly_spend(
+                load_snapshot(), date(2024, 1, 1), date(2024, 1, 31), {"category": "x"}
+            )
+
+        assert months == {
+            "months": ["2023-12", "2024-01", "2024-02", "2024-03"],
+            "totals": [0.0, 150.0, 60.0, 40.0],
+            "deltas": [None, 150.0, -90.0, -20.0],
+            "percent_changes": [None, None, -60.0, -33.3],
+        }
+        assert unknown["totals"] == [0.0]
+
+    def test_amount_percentiles(self, test_app, spending, engine_mode):
+        """Test percentiles per category, largest group first."""
+        with test_app.app_context():
+            groups = amount_percentiles(
+                load_snapshot(),
+                "category",
+                date(2024, 1, 1),
+                date(2024, 12, 31),
+                [50, 100],
+                {},
+            )
+
+        assert groups == [
+            {"key": "1", "count": 4, "percentiles": {"50": 35.0, "100": 100.0}},
+            {"key": "2", "count": 2, "percentiles": {"50": 35.0, "100": 50.0}},
+        ]
+
+    def test_snapshot_refreshes_from_journal(
+        self, test_app, spending, engine_mode, monkeypatch
+    ):
+        """Test inserts, updates and deletes reach the snapshot incrementally."""
+        with test_app.app_context():
+            first = get_snapshot()
+            assert len(first) == len(SPENDING)
+            assert get_snapshot() is first
+
+            def no_reload():
+                raise AssertionError("expected an incremental refresh")
+
+            monkeypatch.setattr(analytics_engine, "load_snapshot", no_reload)
+            db.session.add(
+                Txn(
+                    id="txn_series_new",
+                    name="SPEND",
+                    amount=Decimal("5.00"),
+                    date=datetime(2024, 3, 16),
+                    account_id=spending[0].id,
+                    category_id="2",
+                )
+            )
+            db.session.execute(
+                update(Txn).where(Txn.id == "txn_series_5").values(amount=Decimal("45.00"))
+            )
+            db.session.execute(delete(Txn).where(Txn.id == "txn_series_0"))
+            db.session.commit()
+
+            refreshed = get_snapshot()
+            assert refreshed is not first
+            assert len(refreshed) == len(SPENDING)
+            march = monthly_spend(refreshed, date(2024, 1, 1), date(2024, 3, 31), {})
+            assert march["totals"] == [50.0, 60.0, 50.0]
+            # The published snapshot was not modified
+            assert len(first) == len(SPENDING)
+
+    def test_snapshot_reloaded_after_vacuum(self, test_app, spending, engine_mode):
+        """Test a schema change, as VACUUM makes, forces a full reload."""
+        with test_app.app_context():
+            first = get_snapshot()
+            # Renumber rowids unjournaled, as VACUUM may
+            db.session.execute(text("DROP TRIGGER txn_journal_update"))
+            db.session.execute(text("UPDATE txn SET rowid = rowid + 1000"))
+            db.session.commit()
+            ensure_txn_journal()
+            db.session.execute(
+                update(Txn).where(Txn.id == "txn_series_5").values(amount=Decimal("45.00"))
+            )
+            db.session.commit()
+
+            refreshed = get_snapshot()
+            assert refreshed is not first
+            assert len(refreshed) == len(SPENDING)
+            months = monthly_spend(refreshed, date(2024, 1, 1), date(2024, 3, 31), {})
+            assert months["totals"] == [150.0, 60.0, 45.0]
+
+    def test_series_endpoints(self, client, spending):
+        """Test the endpoints and their validation."""
+        rolling = client.get(
+            "/api/analytics/rolling?start=2024-02-01&end=2024-02-03&window=30"
+        )
+        assert rolling.status_code == 200
+        assert rolling.get_json()["rolling"] == [180.0, 210.0, 210.0]
+
+        monthly = client.get(
+            "/api/analytics/monthly?start=2024-01-01&end=2024-03-31&category_id=1"
+        )
+        assert monthly.get_json()["totals"] == [100.0, 40.0, 40.0]
+
+        percentiles = client.get(
+            "/api/analytics/percentiles?group_by=account&start=2024-01-01"
+            "&end=2024-12-31&percentiles=50"
+        )
+        assert {group["count"] for group in percentiles.get_json()} == {2, 4}
+
+        for url in [
+            "/api/analytics/rolling?window=0",
+            "/api/analytics/rolling?start=2024-02-01&end=2024-01-01",
+            "/api/analytics/monthly?merchant_id=abc",
+            "/api/analytics/percentiles?group_by=channel",
+            "/api/analytics/percentiles?percentiles=50,101",
+        ]:
+            assert client.get(url).status_code == 400, url
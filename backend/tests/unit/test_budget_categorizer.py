@@ -0,0 +1,163 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from models import db
+from models.embedding.text_embedding import TextEmbedding
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.budget_categorizer import (
+    BudgetCategorizer,
+    HashingEncoder,
+    apply_ai_categorization,
+    normalize_text,
+)
+
+
+class CountingEncoder(HashingEncoder):
+    """Records the size of every encode call."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        return super().encode(texts)
+
+
+@pytest.mark.unit
+class TestBudgetCategorizer:
+    """Test the batched embedding categorizer."""
+
+    @pytest.fixture
+    def categories(self, test_app, sample_accounts):
+        """Coffee, groceries and OTHER, with some categorized history."""
+        with test_app.app_context():
+            ids = {}
+            for primary, detailed, description in [
+                ("FOOD_AND_DRINK", "FOOD_AND_DRINK_COFFEE", "Coffee shops"),
+                ("FOOD_AND_DRINK", "FOOD_AND_DRINK_GROCERIES", "Grocery stores"),
+                ("OTHER", "OTHER", "Other"),
+            ]:
+                category = TxnCategory.query.filter_by(name=primary).one_or_none()
+                if not category:
+                    category = TxnCategory(name=primary)
+                    db.session.add(category)
+                    db.session.flush()
+                subcategory = TxnSubcategory(detailed, description, category.id)
+                db.session.add(subcategory)
+                db.session.flush()
+                ids[detailed] = (category.id, subcategory.id)
+
+            for index, (merchant, detailed) in enumerate(
+                [
+                    ("Starbucks", "FOOD_AND_DRINK_COFFEE"),
+                    ("Blue Bottle Coffee", "FOOD_AND_DRINK_COFFEE"),
+                    ("Whole Foods", "FOOD_AND_DRINK_GROCERIES"),
+                    ("Trader Joe's", "FOOD_AND_DRINK_GROCERIES"),
+                ]
+            ):
+                category_id, subcategory_id = ids[detailed]
+                db.session.add(
+                    Txn(
+                        id=f"txn_history_{index}",
+                        account_id=sample_accounts[0].id,
+                        amount=Decimal("5.00"),
+                        date=datetime(2024, 1, 1),
+                        name=merchant.upper(),
+                        merchant=merchant,
+                        category_id=category_id,
+                        subcategory_id=subcategory_id,
+                    )
+                )
+            db.session.commit()
+            return ids
+
+    def test_normalize_text(self):
+        """Test store numbers, punctuation and repeated merchants are dropped."""
+        assert normalize_text("STARBUCKS #1234", "Starbucks") == "starbucks"
+        assert normalize_text("SQ *BLUE BOTTLE 0042") == "sq blue bottle"
+        assert normalize_text("Trader Joe's 552", "Trader Joe's") == "trader joe's"
+        assert normalize_text(None, None) == ""
+
+    def test_embeddings_batched_and_cached(self, test_app):
+        """Test each distinct text is encoded once, in batches, and persisted."""
+        with test_app.app_context():
+            encoder = CountingEncoder()
+            categorizer = BudgetCategorizer(encoder, batch_size=2)
+            texts = ["starbucks", "whole foods", "starbucks", "shell", "uber"]
+
+            vectors = categorizer.embed(texts)
+            assert set(vectors) == {"starbucks", "whole foods", "shell", "uber"}
+            assert encoder.calls == [2, 2]
+            assert TextEmbedding.query.count() == 4
+
+            categorizer.embed(texts)
+            assert encoder.calls == [2, 2]
+
+            # A new process finds the vectors in the table
+            restarted = BudgetCategorizer(encoder, batch_size=2)
+            assert list(restarted.embed(["uber"])["uber"]) == list(vectors["uber"])
+            assert encoder.calls == [2, 2]
+
+    def test_categorize_page(self, test_app, categories):
+        """Test a page is matched against categories learned from history."""
+        with test_app.app_context():
+            categorizer = BudgetCategorizer(CountingEncoder())
+            matches = categorizer.categorize(
+                [
+                    {"name": "STARBUCKS #881", "merchant": "Starbucks"},
+                    {"name": "WHOLE FOODS MKT 10234", "merchant": "Whole Foods"},
+                    {"name": "STARBUCKS #112", "merchant": "Starbucks"},
+                    {"name": None, "merchant": None},
+                ]
+            )
+
+        coffee, groceries = (
+            categories["FOOD_AND_DRINK_COFFEE"],
+            categories["FOOD_AND_DRINK_GROCERIES"],
+        )
+        assert (matches[0][0].category_id, matches[0][0].subcategory_id) == coffee
+        assert (matches[1][0].category_id, matches[1][0].subcategory_id) == groceries
+        assert matches[0] == matches[2]
+        assert matches[3] is None
+        # OTHER is never suggested
+        assert all(
+            match[0].subcategory_id != categories["OTHER"][1] for match in matches[:3]
+        )
+
+    def test_apply_only_overrides_uncategorized(self, test_app, categories):
+        """Test only OTHER transactions above the threshold are re-categorized."""
+        other_category, other_subcategory = categories["OTHER"]
+        coffee = categories["FOOD_AND_DRINK_COFFEE"]
+        txns = [
+            {
+                "name": "STARBUCKS #5",
+                "merchant": "Starbucks",
+                "category_id": other_category,
+                "subcategory_id": other_subcategory,
+            },
+            {
+                "name": "STARBUCKS #6",
+                "merchant": "Starbucks",
+                "category_id": categories["FOOD_AND_DRINK_GROCERIES"][0],
+                "subcategory_id": categories["FOOD_AND_DRINK_GROCERIES"][1],
+            },
+            {
+                "name": "ZZZ QQQ",
+                "merchant": None,
+                "category_id": other_category,
+                "subcategory_id": other_subcategory,
+            },
+        ]
+
+        with test_app.app_context():
+            categorizer = BudgetCategorizer(HashingEncoder())
+            assert apply_ai_categorization(txns, categorizer=categorizer) == 1
+
+        assert (txns[0]["category_id"], txns[0]["subcategory_id"]) == coffee
+        assert txns[1]["subcategory_id"] == categories["FOOD_AND_DRINK_GROCERIES"][1]
+        assert txns[2]["category_id"] == other_category
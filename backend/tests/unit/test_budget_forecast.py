@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.budget.budget_utils import get_frequency_period_start_date
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from utils.budget_forecast import forecast_budget, remaining_curve
+
+
+@pytest.mark.unit
+class TestBudgetForecast:
+    """Test spend curves, forecasts and the opt-in budget period field."""
+
+    def add_budget(self, amount="100.00", frequency=BudgetFrequency.MONTHLY):
+        category = TxnCategory(name="Forecast Category")
+        db.session.add(category)
+        db.session.flush()
+        budget = Budget(
+            amount=Decimal(amount), frequency=frequency, category_id=category.id
+        )
+        db.session.add(budget)
+        db.session.flush()
+        return budget
+
+    def add_spending(self, budget, account_id, rows):
+        for index, (day, amount) in enumerate(rows):
+            db.session.add(
+                Txn(
+                    id=f"txn_forecast_{index}",
+                    name="FORECAST",
+                    amount=Decimal(amount),
+                    date=day,
+                    account_id=account_id,
+                    category_id=budget.category_id,
+                )
+            )
+        db.session.commit()
+
+    def test_remaining_curve(self):
+        """Test the remainder steps down as each day of the period ends."""
+        assert remaining_curve([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0], 7) == [
+            28.0, 27.0, 25.0, 22.0, 18.0, 13.0, 7.0, 0.0
+        ]
+        # A 30-day month on the 31-point grid
+        curve = remaining_curve([10.0] + [0.0] * 28 + [5.0], 31)
+        assert (len(curve), curve[0], curve[1], curve[30], curve[31]) == (
+            32, 15.0, 5.0, 5.0, 0.0
+        )
+
+    def test_forecast_from_history(self, test_app, sample_accounts):
+        """Test outcomes combine spending so far with each month's remainder."""
+        with test_app.app_context():
+            budget = self.add_budget()
+            rows = []
+            # Early spending every month, then 40 late in Jan-Mar, 10 in Apr-Jun
+            for month in range(1, 7):
+                rows.append((datetime(2024, month, 1), "10.00"))
+                rows.append((datetime(2024, month, 25), "40.00" if month <= 3 else "10.00"))
+            self.add_spending(budget, sample_accounts[0].id, rows)
+
+            on_pace = forecast_budget(budget, 55.0, datetime(2024, 7, 10))
+            at_risk = forecast_budget(budget, 65.0, datetime(2024, 7, 10))
+            no_history = forecast_budget(budget, 31.0, datetime(2024, 1, 10))
+
+        assert on_pace == {
+            "projected_spent_amount": 80.0,
+            "overrun_probability": 0.0,
+            "history_periods": 6,
+        }
+        assert at_risk["projected_spent_amount"] == 90.0
+        assert at_risk["overrun_probability"] == 0.5
+        # Nothing before January: extrapolate 10 days of spending to 31
+        assert no_history == {
+            "projected_spent_amount": 96.1,
+            "overrun_probability": None,
+            "history_periods": 0,
+        }
+
+    def test_budget_period_forecast_field(self, client, test_app, sample_accounts):
+        """Test ?forecast=true adds a forecast to the current period only."""
+        today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = get_frequency_period_start_date(BudgetFrequency.WEEKLY, today)
+        with test_app.app_context():
+            budget = self.add_budget(frequency=BudgetFrequency.WEEKLY)
+            self.add_spending(
+                budget,
+                sample_accounts[0].id,
+                [(week_start - timedelta(weeks=weeks), "30.00") for weeks in range(4)],
+            )
+
+        url = "/api/budget_period?frequency=Weekly&limit=4"
+        assert "forecast" not in client.get(url).get_json()[0]
+
+        periods = client.get(f"{url}&forecast=true").get_json()
+        assert [p["forecast"] is None for p in periods] == [True, True, True, False]
+        assert periods[-1]["forecast"]["history_periods"] == 3
+        # Every past week spent 30 on its first day, as this one did
+        assert periods[-1]["forecast"]["projected_spent_amount"] == 30.0
+
+        columnar = client.get(f"{url}&forecast=true&format=columnar").get_json()
+        assert columnar["series"][0]["forecast"] == periods[-1]["forecast"]
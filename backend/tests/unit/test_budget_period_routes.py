@@ -1,5 +1,6 @@
 import pytest
 import json
+from datetime import datetime
 from decimal import Decimal
 from models.budget.budget import Budget
 from models.budget.budget_frequency import BudgetFrequency
@@ -113,3 +114,85 @@ class TestBudgetPeriodRoutes:
         response = client.get("/api/budget_period/total")
         # Should return an error without frequency
         assert response.status_code in [400, 500]
+
+    @pytest.fixture
+    def history(self, test_app, sample_accounts, sample_budget, sample_category):
+        """Monthly spending from January to June 2024."""
+        with test_app.app_context():
+            Txn.query.delete()
+            for month in range(1, 7):
+                db.session.add(
+                    Txn(
+                        id=f"txn_history_{month}",
+                        account_id=sample_accounts[0].id,
+                        amount=Decimal(month * 10),
+                        date=datetime(2024, month, 15),
+                        name="History",
+                        category_id=sample_category,
+                    )
+                )
+            db.session.commit()
+
+    def test_get_budget_period_last_n(self, client, history):
+        """Test limit returns the last N periods ending at end."""
+        response = client.get(
+            "/api/budget_period?frequency=Monthly&end=2024-06-30&limit=2"
+        )
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert [p["spent_amount"] for p in data] == [50.0, 60.0]
+        assert response.headers["Link"] == (
+            '</api/budget_period?frequency=Monthly&end=2024-04-30&limit=2>; rel="next"'
+        )
+
+    def test_get_budget_period_pages_backward(self, client, history):
+        """Test following the next links walks back to the first transaction."""
+        url = "/api/budget_period?frequency=Monthly&end=2024-06-30&limit=4"
+        spent = []
+        while url:
+            response = client.get(url)
+            spent = [p["spent_amount"] for p in json.loads(response.data)] + spent
+            link = response.headers.get("Link")
+            url = link[1 : link.index(">")] if link else None
+
+        assert spent == [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+
+    def test_get_budget_period_start_end(self, client, history):
+        """Test start and end bound the window and match the totals endpoint."""
+        query = "frequency=Monthly&start=2024-02-01&end=2024-03-31"
+        periods = json.loads(client.get(f"/api/budget_period?{query}").data)
+        totals = json.loads(client.get(f"/api/budget_period/total?{query}").data)
+
+        assert [p["spent_amount"] for p in periods] == [20.0, 30.0]
+        assert [t["start_date"] for t in totals] == [p["start_date"] for p in periods]
+
+    def test_get_budget_period_invalid_window(self, client, history):
+        """Test bad window parameters are rejected with 400."""
+        for query in ["end=2024-13-01", "limit=0", "start=2024-05-01&end=2024-01-01"]:
+            response = client.get(f"/api/budget_period?frequency=Monthly&{query}")
+            assert response.status_code == 400
+
+    def test_get_budget_period_columnar(self, client, history):
+        """Test the columnar format matches the per-period rows."""
+        query = "frequency=Monthly&end=2024-06-30&limit=3"
+        rows = json.loads(client.get(f"/api/budget_period?{query}").data)
+        data = json.loads(client.get(f"/api/budget_period?{query}&format=columnar").data)
+
+        assert data["start_date"] == ["2024-04-01", "2024-05-01", "2024-06-01"]
+        assert data["end_date"][0] == "2024-04-30"
+        [series] = data["series"]
+        assert series["category_name"] == "Test Budget Category"
+        assert series["spent_amount"] == [p["spent_amount"] for p in rows]
+
+    def test_get_total_columnar(self, client, history):
+        """Test totals come back as parallel spent and income arrays."""
+        query = "frequency=Monthly&start=2024-01-01&end=2024-03-31&format=columnar"
+        data = json.loads(client.get(f"/api/budget_period/total?{query}").data)
+
+        assert data["start_date"] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+        assert data["spent_amount"] == [10.0, 20.0, 30.0]
+        assert data["income_amount"] == [0.0, 0.0, 0.0]
+        assert client.get(
+            "/api/budget_period/total?frequency=Monthly&format=csv"
+        ).status_code == 400
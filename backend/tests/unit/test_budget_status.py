@@ -0,0 +1,114 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import delete
+
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.budget.budget_utils import get_budget_status
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from utils.data_version import get_data_version
+
+TODAY = datetime(2024, 3, 10)
+
+
+@pytest.mark.unit
+class TestBudgetStatus:
+    """Test the current-period budget status and its cache invalidation."""
+
+    @pytest.fixture
+    def budgets(self, test_app, sample_accounts):
+        """A monthly and a weekly budget on one category, with some spending."""
+        with test_app.app_context():
+            category = TxnCategory(name="Status Category")
+            db.session.add(category)
+            db.session.flush()
+            monthly = Budget(
+                amount=Decimal("300.00"),
+                frequency=BudgetFrequency.MONTHLY,
+                category_id=category.id,
+            )
+            weekly = Budget(
+                amount=Decimal("50.00"),
+                frequency=BudgetFrequency.WEEKLY,
+                category_id=category.id,
+            )
+            db.session.add_all([monthly, weekly])
+            for index, (day, amount) in enumerate(
+                [(datetime(2024, 2, 28), 99), (datetime(2024, 3, 2), 40), (TODAY, 20)]
+            ):
+                db.session.add(
+                    Txn(
+                        id=f"txn_status_{index}",
+                        account_id=sample_accounts[0].id,
+                        amount=Decimal(amount),
+                        date=day,
+                        name="Status",
+                        category_id=category.id,
+                    )
+                )
+            db.session.commit()
+            return {"monthly": monthly.id, "weekly": weekly.id}
+
+    def test_current_period_status(self, test_app, budgets):
+        """Test each budget only counts spending in its own current period."""
+        with test_app.app_context():
+            status = {s["budget_id"]: s for s in get_budget_status(TODAY)}
+
+        monthly = status[budgets["monthly"]]
+        assert monthly["start_date"] == "2024-03-01T00:00:00"
+        assert monthly["spent_amount"] == 60.0
+        assert monthly["remaining_amount"] == 240.0
+        assert monthly["percent_used"] == 20.0
+        # 60 spent in 10 of 31 days
+        assert monthly["projected_spent_amount"] == 186.0
+
+        weekly = status[budgets["weekly"]]
+        assert weekly["start_date"] == "2024-03-04T00:00:00"
+        assert weekly["spent_amount"] == 20.0
+
+    def test_status_cached_until_transaction_write(self, client, test_app, budgets):
+        """Test the status is reused until a transaction is written."""
+        with patch(
+            "routes.budget_routes.get_budget_status", wraps=get_budget_status
+        ) as compute:
+            first = json.loads(client.get("/api/budget/status").data)
+            assert json.loads(client.get("/api/budget/status").data) == first
+            assert compute.call_count == 1
+
+            with test_app.app_context():
+                txn = db.session.get(Txn, "txn_status_2")
+                txn.amount = Decimal("25")
+                db.session.commit()
+
+            client.get("/api/budget/status")
+            assert compute.call_count == 2
+
+    def test_bulk_writes_bump_data_version(self, test_app, budgets):
+        """Test set-based deletes bump the version and rollbacks do not."""
+        with test_app.app_context():
+            version = get_data_version()
+
+            db.session.execute(delete(Txn).where(Txn.id == "txn_status_0"))
+            db.session.rollback()
+            assert get_data_version() == version
+
+            db.session.execute(delete(Txn).where(Txn.id == "txn_status_0"))
+            db.session.commit()
+            assert get_data_version() == version + 1
+
+            budget = db.session.get(Budget, budgets["weekly"])
+            budget.amount = Decimal("75.00")
+            db.session.commit()
+            assert get_data_version() == version + 2
+
+            # Assigning an unchanged value is not a write
+            txn = db.session.get(Txn, "txn_status_1")
+            txn.date = txn.date + timedelta(days=0)
+            db.session.commit()
+            assert get_data_version() == version + 2
@@ -7,6 +7,8 @@ from models.budget.budget_utils import (
     calculate_spent_amount_for_period,
     calculate_spent_amount_for_period_for_budget,
     generate_budget_periods_for_budget,
+    generate_budget_periods_for_window,
+    get_period_window,
 )
 from models.budget.budget import Budget
 from models.budget.budget_frequency import BudgetFrequency
@@ -118,6 +120,22 @@ class TestBudgetUtils:
         assert end_date.month == 12
         assert end_date.year == 2024
 
+    def test_get_period_window(self):
+        """Test windows walk back from end and stop at start or limit."""
+        end = datetime(2024, 3, 10, 18, 30)
+
+        window = get_period_window(BudgetFrequency.MONTHLY, end, limit=3)
+        assert window == [
+            (datetime(2024, 1, 1), datetime(2024, 1, 31)),
+            (datetime(2024, 2, 1), datetime(2024, 2, 29)),
+            (datetime(2024, 3, 1), datetime(2024, 3, 31)),
+        ]
+        assert get_period_window(
+            BudgetFrequency.WEEKLY, end, start=datetime(2024, 3, 1)
+        )[0] == (datetime(2024, 2, 26), datetime(2024, 3, 3))
+        with pytest.raises(ValueError):
+            get_period_window(BudgetFrequency.YEARLY, end)
+
     def test_calculate_spent_amount_for_period(self, test_app, sample_category):
         """Test calculating spent amount for a period."""
         with test_app.app_context():
@@ -247,6 +265,38 @@ class TestBudgetUtils:
                     hasattr(p, "start_date") and hasattr(p, "end_date") for p in periods
                 )
 
+    def test_generate_budget_periods_for_window(
+        self, test_app, sample_category, sample_budget, sample_accounts
+    ):
+        """Test each period's spending matches summing that period alone."""
+        with test_app.app_context():
+            budget = db.session.merge(sample_budget)
+            for index, (day, amount) in enumerate(
+                [(datetime(2024, 1, 31), "20.00"), (datetime(2024, 3, 1), "7.50")]
+            ):
+                db.session.add(
+                    Txn(
+                        id=f"txn_window_{index}",
+                        name="Window",
+                        amount=Decimal(amount),
+                        category_id=sample_category,
+                        date=day,
+                        account_id=sample_accounts[0].id,
+                    )
+                )
+            db.session.commit()
+
+            window = get_period_window(
+                BudgetFrequency.MONTHLY, datetime(2024, 3, 15), start=datetime(2024, 1, 1)
+            )
+            periods = generate_budget_periods_for_window(budget, window)
+            assert [period.to_dict()["spent_amount"] for period in periods] == [
+                calculate_spent_amount_for_period_for_budget(budget, start, end)
+                for start, end in window
+            ]
+            assert [period.to_dict()["spent_amount"] for period in periods] == [20.0, 0.0, 7.5]
+            assert generate_budget_periods_for_window(budget, []) == []
+
     def test_generate_budget_periods_for_budget_weekly(self, test_app, sample_category):
         """Test generating budget periods for weekly frequency."""
         with test_app.app_context():
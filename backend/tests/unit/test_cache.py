@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+import pytest
+
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.cache.cache_entry import CacheEntry
+from utils.cache import DatabaseCacheBackend, LRUCache, VersionedCache
+from utils.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+def write_budget():
+    db.session.add(
+        Budget(amount=Decimal("10.00"), frequency=BudgetFrequency.MONTHLY, category_id="1")
+    )
+    db.session.commit()
+
+
+@pytest.mark.unit
+class TestVersionedCache:
+    """Test the LRU and data-versioned result caches."""
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted and counted."""
+        cache = LRUCache("test_lru", max_entries=2)
+        evictions_before = CACHE_EVICTIONS.get(cache="test_lru")
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+        assert CACHE_EVICTIONS.get(cache="test_lru") - evictions_before == 1
+
+    def test_recomputes_after_write(self, test_app):
+        """Test results are reused until the data version changes."""
+        cache = VersionedCache("test_versioned")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        with test_app.app_context():
+            write_budget()
+            assert cache.get_or_compute(("x",), compute) == 1
+            assert cache.get_or_compute(("x",), compute) == 1
+            assert cache.get_or_compute(("y",), compute) == 2
+
+            write_budget()
+            assert cache.get_or_compute(("x",), compute) == 3
+
+        assert CACHE_HITS.get(cache="test_versioned", backend="memory") == 1
+        assert CACHE_MISSES.get(cache="test_versioned") == 3
+
+    def test_database_backend_shared_between_caches(self, test_app):
+        """Test a result computed by one process is reused by another."""
+        with test_app.app_context():
+            write_budget()
+            first = VersionedCache("test_shared", shared=DatabaseCacheBackend())
+            second = VersionedCache("test_shared", shared=DatabaseCacheBackend())
+
+            assert first.get_or_compute(("k",), lambda: {"total": "1.50"}) == {
+                "total": "1.50"
+            }
+            assert second.get_or_compute(("k",), lambda: pytest.fail("recomputed")) == {
+                "total": "1.50"
+            }
+            assert CACHE_HITS.get(cache="test_shared", backend="database") == 1
+
+            # Entries of older versions are pruned on the next write
+            write_budget()
+            second.get_or_compute(("k",), lambda: {"total": "2.00"})
+            assert CacheEntry.query.count() == 1
+
+    def test_database_backend_bounded(self, test_app):
+        """Test the shared table keeps at most max_entries rows."""
+        with test_app.app_context():
+            write_budget()
+            cache = VersionedCache("test_bounded", shared=DatabaseCacheBackend(max_entries=3))
+            for index in range(5):
+                cache.get_or_compute((index,), lambda: index)
+
+            assert CacheEntry.query.count() == 3
+
+    def test_budget_period_routes_cached(self, client, sample_transactions):
+        """Test repeated dashboard requests are served from the cache."""
+        hits_before = CACHE_HITS.get(cache="period_total", backend="memory")
+
+        first = client.get("/api/budget_period/total?frequency=Monthly").get_json()
+        second = client.get("/api/budget_period/total?frequency=Monthly").get_json()
+
+        assert first == second
+        assert CACHE_HITS.get(cache="period_total", backend="memory") - hits_before == 1
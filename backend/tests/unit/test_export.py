@@ -0,0 +1,134 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import routes.export_routes as export_routes
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.transaction.payment_channel import PaymentChannel
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from utils.export import transaction_batches
+
+
+def read_csv(data: bytes) -> list[dict]:
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+
+@pytest.mark.unit
+class TestExport:
+    """Test the streaming transaction and budget period exports."""
+
+    @pytest.fixture
+    def spending(self, test_app, sample_accounts):
+        """Five groceries transactions over two months and a monthly budget."""
+        with test_app.app_context():
+            category = TxnCategory(name="Export Groceries")
+            db.session.add(category)
+            db.session.flush()
+            for index, (day, amount, account) in enumerate(
+                [
+                    (datetime(2024, 1, 5), "12.50", 0),
+                    (datetime(2024, 1, 20), "30.00", 1),
+                    (datetime(2024, 2, 2), "8.25", 0),
+                    (datetime(2024, 2, 14), "41.00", 0),
+                    (datetime(2024, 2, 28), "5.00", 1),
+                ]
+            ):
+                db.session.add(
+                    Txn(
+                        id=f"txn_export_{index}",
+                        name=f"GROCER {index}",
+                        amount=Decimal(amount),
+                        date=day,
+                        channel=PaymentChannel.IN_STORE,
+                        account_id=sample_accounts[account].id,
+                        category_id=category.id,
+                    )
+                )
+            db.session.add(
+                Budget(
+                    amount=Decimal("50.00"),
+                    frequency=BudgetFrequency.MONTHLY,
+                    category_id=category.id,
+                )
+            )
+            db.session.commit()
+            return category.id
+
+    def test_transactions_csv(self, client, spending, sample_accounts):
+        """Test rows come oldest first with filters and names resolved."""
+        response = client.get(
+            f"/api/export/transactions?start=2024-01-10&end=2024-02-20"
+            f"&account_id={sample_accounts[0].id}"
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert 'filename="transactions.csv"' in response.headers["Content-Disposition"]
+
+        rows = read_csv(response.data)
+        assert [(row["id"], row["date"], row["amount"]) for row in rows] == [
+            ("txn_export_2", "2024-02-02", "8.25"),
+            ("txn_export_3", "2024-02-14", "41.00"),
+        ]
+        assert rows[0]["category"] == "Export Groceries"
+        assert rows[0]["channel"] == "in store"
+
+    def test_batches_and_gzip(self, client, test_app, spending):
+        """Test rows are fetched in batches and gzip matches the plain file."""
+        with test_app.app_context():
+            batches = list(transaction_batches(category_id=spending, batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+        plain = client.get("/api/export/transactions").data
+        response = client.get("/api/export/transactions?compression=gzip")
+        assert response.mimetype == "application/gzip"
+        assert gzip.decompress(response.data) == plain
+        assert len(read_csv(plain)) == 5
+
+    def test_budget_periods_csv(self, client, spending, sample_accounts):
+        """Test each budget period with its spending, optionally per account."""
+        url = "/api/export/budget_periods?frequency=Monthly&end=2024-02-29"
+        rows = read_csv(client.get(url).data)
+        assert [
+            (row["start_date"], row["spent_amount"], row["limit_amount"])
+            for row in rows
+        ] == [("2024-01-01", "42.50", "50.00"), ("2024-02-01", "54.25", "50.00")]
+
+        by_account = read_csv(
+            client.get(f"{url}&account_id={sample_accounts[1].id}").data
+        )
+        assert [row["spent_amount"] for row in by_account] == ["30.00", "5.00"]
+        assert read_csv(client.get(f"{url}&category_id=none").data) == []
+
+    def test_parquet(self, client, spending):
+        """Test the Parquet file reads back with typed columns."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        response = client.get("/api/export/transactions?format=parquet")
+        assert response.status_code == 200
+
+        table = pq.read_table(io.BytesIO(response.data))
+        assert table.num_rows == 5
+        assert str(table.schema.field("amount").type) == "decimal128(10, 2)"
+        assert table.column("id").to_pylist()[0] == "txn_export_0"
+
+    def test_invalid_arguments(self, client, spending, monkeypatch):
+        """Test bad formats, dates and frequencies are rejected with 400."""
+        for url in [
+            "/api/export/transactions?format=xml",
+            "/api/export/transactions?compression=zip",
+            "/api/export/transactions?format=parquet&compression=gzip",
+            "/api/export/transactions?start=2024-02-01&end=2024-01-01",
+            "/api/export/budget_periods?frequency=Daily",
+        ]:
+            assert client.get(url).status_code == 400, url
+
+        monkeypatch.setattr(export_routes, "pa", None)
+        response = client.get("/api/export/transactions?format=parquet")
+        assert response.status_code == 400
+        assert "pyarrow" in response.get_json()["display_message"]
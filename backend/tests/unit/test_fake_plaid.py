@@ -0,0 +1,134 @@
+import json
+import pytest
+import plaid
+from unittest.mock import patch
+from plaid.api import plaid_api
+from plaid.model.item_get_request import ItemGetRequest
+from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData, record_fixture
+from fake_plaid.server import start_fake_plaid_server
+from models.account.account import Account
+from models.item.item import Item
+from models.transaction.txn import Txn
+from models.transaction.transaction_categories import seed_transaction_categories
+from models import db
+
+
+def plaid_client_for(host):
+    configuration = plaid.Configuration(
+        host=host,
+        api_key={"clientId": "fake", "secret": "fake", "plaidVersion": "2020-09-14"},
+    )
+    return plaid_api.PlaidApi(plaid.ApiClient(configuration))
+
+
+@pytest.mark.unit
+class TestFakePlaid:
+    """Test the local fake Plaid server against the real Plaid client."""
+
+    @pytest.fixture
+    def fake_plaid(self, test_app):
+        """Start a fake Plaid server and point the app at it."""
+        data = FakePlaidData(
+            FakePlaidConfig(accounts_per_item=2, transactions_per_account=120)
+        )
+        server, host = start_fake_plaid_server(data)
+        test_app.config["plaid_client"] = plaid_client_for(host)
+        with test_app.app_context():
+            seed_transaction_categories()
+        yield data
+        server.shutdown()
+
+    def test_data_is_deterministic(self):
+        """Test the same seed always produces the same transactions."""
+        first = FakePlaidData(FakePlaidConfig(seed=7))
+        second = FakePlaidData(FakePlaidConfig(seed=7))
+        other = FakePlaidData(FakePlaidConfig(seed=8))
+
+        assert first.transaction(0, 5) == second.transaction(0, 5)
+        assert first.transaction(0, 5) != other.transaction(0, 5)
+
+    def test_sync_pages_with_has_more(self):
+        """Test transactions/sync pages through all transactions of an item."""
+        data = FakePlaidData(
+            FakePlaidConfig(accounts_per_item=1, transactions_per_account=250)
+        )
+        cursor, has_more, seen = "", True, []
+        while has_more:
+            page = data.sync_page(0, cursor, 100)
+            seen.extend(txn["transaction_id"] for txn in page["added"])
+            cursor, has_more = page["next_cursor"], page["has_more"]
+
+        assert len(seen) == 250
+        assert len(set(seen)) == 250
+
+    def test_create_and_sync_item(self, client, fake_plaid):
+        """Test item creation and sync ingest the synthetic data end to end."""
+        with patch("routes.item_routes.get_token_backup"):
+            response = client.post("/api/item", json={"access_token": "access-fake-0"})
+        assert response.status_code == 200
+        assert len(json.loads(response.data)) == 2
+
+        response = client.post("/api/item/item-fake-0/sync", json={"retries": 1})
+        assert response.status_code == 200
+
+        with client.application.app_context():
+            assert Txn.query.count() == 240
+            assert db.session.get(Item, "item-fake-0").cursor == "cursor-fake-240"
+
+    def test_item_remove(self, client, fake_plaid):
+        """Test DELETE /api/item/<id> calls item_remove on the fake server."""
+        with patch("routes.item_routes.get_token_backup"):
+            client.post("/api/item", json={"access_token": "access-fake-0"})
+
+        response = client.delete("/api/item/item-fake-0")
+        assert response.status_code == 200
+        assert "access-fake-0" in fake_plaid.removed_tokens
+
+        with client.application.app_context():
+            assert Account.query.count() == 0
+
+    def test_invalid_access_token(self, test_app, fake_plaid):
+        """Test unknown access tokens return a Plaid-style error."""
+        plaid_client = test_app.config["plaid_client"]
+        with pytest.raises(plaid.ApiException) as exc_info:
+            plaid_client.item_get(ItemGetRequest(access_token="access-unknown"))
+
+        assert exc_info.value.status == 400
+        assert "INVALID_ACCESS_TOKEN" in exc_info.value.body
+
+    def test_injected_errors(self):
+        """Test error injection returns the configured status code."""
+        data = FakePlaidData(FakePlaidConfig(error_rate=1.0, error_status=429))
+        server, host = start_fake_plaid_server(data)
+        try:
+            with pytest.raises(plaid.ApiException) as exc_info:
+                plaid_client_for(host).transactions_sync(
+                    TransactionsSyncRequest(access_token="access-fake-0", cursor="")
+                )
+            assert exc_info.value.status == 429
+        finally:
+            server.shutdown()
+
+    def test_record_and_replay_fixture(self, test_app, fake_plaid, tmp_path):
+        """Test recorded fixtures replay the same responses."""
+        fixture_path = tmp_path / "fixture.json"
+        record_fixture(
+            test_app.config["plaid_client"], ["access-fake-0"], str(fixture_path)
+        )
+
+        replay = FakePlaidData.from_fixture(str(fixture_path))
+        server, host = start_fake_plaid_server(replay)
+        try:
+            page = (
+                plaid_client_for(host)
+                .transactions_sync(
+                    TransactionsSyncRequest(access_token="access-fake-0", cursor="")
+                )
+                .to_dict()
+            )
+            assert replay.transaction_count(0) == 240
+            assert page["added"][0]["transaction_id"] == "txn-fake-0-0"
+        finally:
+            server.shutdown()
@@ -1,14 +1,30 @@
 import pytest
 import json
+from decimal import Decimal
+from datetime import date
+from unittest.mock import Mock
+import plaid
 from models.item.item import Item
 from models.account.account import Account
+from models.recurring.recurring_series import RecurringSeries
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn import Txn
 from models import db
+from utils.plaid_client import CircuitOpenError
 
 
 @pytest.mark.unit
 class TestItemRoutes:
     """Test item route endpoints."""
 
+    @pytest.fixture
+    def plaid_remove_mock(self, test_app):
+        """Plaid client mock that only needs to answer item_remove."""
+        plaid_client = Mock()
+        plaid_client.item_remove.return_value = {"request_id": "test_request_id"}
+        test_app.config["plaid_client"] = plaid_client
+        return plaid_client
+
     def test_get_items(self, client, sample_item):
         """Test GET /api/item returns all items."""
         response = client.get("/api/item")
@@ -64,3 +80,154 @@ class TestItemRoutes:
 
         data = json.loads(response.data)
         assert data == []
+
+    def test_delete_item_bulk_removes_accounts_and_transactions(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test DELETE /api/item/<id> removes the item, its accounts and transactions."""
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert data["deleted_accounts"] == 2
+        assert data["deleted_transactions"] == 2
+
+        with client.application.app_context():
+            assert db.session.get(Item, "test_item_id") is None
+            assert Account.query.filter_by(item_id="test_item_id").count() == 0
+            assert Txn.query.count() == 0
+
+    def test_delete_item_removes_recurring_series(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test the deleted accounts' recurring series go with them."""
+        with client.application.app_context():
+            db.session.add(
+                RecurringSeries(
+                    account_id="test_account_1",
+                    key="n:netflix",
+                    name="NETFLIX",
+                    occurrences=3,
+                    interval_mean=30.0,
+                    first_date=date(2024, 1, 15),
+                    last_date=date(2024, 3, 15),
+                    last_amount=Decimal("15.49"),
+                    cadence="monthly",
+                    next_date=date(2024, 4, 15),
+                    expected_amount=Decimal("15.49"),
+                )
+            )
+            db.session.commit()
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 200
+
+        with client.application.app_context():
+            assert RecurringSeries.query.count() == 0
+        assert client.get("/api/recurring?include_lapsed=true").get_json() == []
+
+    def test_delete_item_removes_account_rules(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test rules scoped to the deleted accounts go with them."""
+        with client.application.app_context():
+            db.session.add_all(
+                [
+                    CategorizationRule(
+                        name_contains="coffee", account_id="test_account_1", category_id="1"
+                    ),
+                    CategorizationRule(name_contains="coffee", category_id="1"),
+                ]
+            )
+            db.session.commit()
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 200
+
+        with client.application.app_context():
+            assert [rule.account_id for rule in CategorizationRule.query.all()] == [None]
+
+    def test_delete_item_keeps_other_items(
+        self, client, plaid_remove_mock, sample_transactions, sample_institution
+    ):
+        """Test bulk deletion only touches rows belonging to the deleted item."""
+        with client.application.app_context():
+            db.session.add(
+                Item(
+                    id="other_item",
+                    access_token="other_access_token",
+                    institution_id=sample_institution,
+                )
+            )
+            db.session.add(
+                Account(
+                    id="other_account",
+                    name="Other Account",
+                    institution_id=sample_institution,
+                    item_id="other_item",
+                )
+            )
+            db.session.add(
+                Txn(
+                    id="other_txn",
+                    name="Other Transaction",
+                    amount=Decimal("10.00"),
+                    category_id="1",
+                    account_id="other_account",
+                )
+            )
+            db.session.commit()
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 200
+
+        with client.application.app_context():
+            assert db.session.get(Item, "other_item") is not None
+            assert db.session.get(Account, "other_account") is not None
+            assert db.session.get(Txn, "other_txn") is not None
+
+    def test_delete_item_plaid_error_keeps_data(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test a failed Plaid item_remove call leaves the database untouched."""
+        plaid_remove_mock.item_remove.side_effect = Exception("Plaid unavailable")
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 500
+        assert "Failed to remove bank connection" in json.loads(response.data)[
+            "display_message"
+        ]
+
+        with client.application.app_context():
+            assert db.session.get(Item, "test_item_id") is not None
+            assert Txn.query.count() == 2
+
+    def test_delete_item_already_removed_from_plaid(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test a retried delete whose item Plaid already removed completes."""
+        plaid_remove_mock.item_remove.side_effect = plaid.ApiException(
+            status=400, reason="Bad Request"
+        )
+        plaid_remove_mock.item_remove.side_effect.body = json.dumps(
+            {"error_code": "ITEM_NOT_FOUND"}
+        )
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 200
+        assert json.loads(response.data)["deleted_transactions"] == 2
+
+        with client.application.app_context():
+            assert db.session.get(Item, "test_item_id") is None
+
+    def test_delete_item_circuit_open(
+        self, client, plaid_remove_mock, sample_transactions
+    ):
+        """Test an open Plaid circuit is reported as unavailable, data kept."""
+        plaid_remove_mock.item_remove.side_effect = CircuitOpenError("item_remove", 20)
+
+        response = client.delete("/api/item/test_item_id")
+        assert response.status_code == 503
+
+        with client.application.app_context():
+            assert db.session.get(Item, "test_item_id") is not None
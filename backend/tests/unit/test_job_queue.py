@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from models import db
+from models.job.job import Job
+from models.job.job_state import JobState
+from utils.job_queue import (
+    claim_job,
+    enqueue_job,
+    job_handler,
+    run_job,
+    run_pending_jobs,
+)
+
+calls = []
+
+
+@job_handler("test_echo")
+def echo_job(value):
+    calls.append(value)
+    return {"value": value}
+
+
+@job_handler("test_fail")
+def failing_job():
+    raise RuntimeError("boom")
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Test the database-backed background job queue."""
+
+    @pytest.fixture(autouse=True)
+    def reset_calls(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self, test_app):
+        """Test a queued job runs once and stores its result."""
+        with test_app.app_context():
+            job = enqueue_job("test_echo", {"value": 7})
+            assert job.state == JobState.QUEUED
+
+            assert run_pending_jobs() == 1
+            assert run_pending_jobs() == 0
+
+            db.session.refresh(job)
+            assert job.state == JobState.SUCCEEDED
+            assert job.attempts == 1
+            assert json.loads(job.result) == {"value": 7}
+            assert calls == [7]
+
+    def test_idempotency_key_returns_existing_job(self, test_app):
+        """Test enqueuing twice with one key creates a single job."""
+        with test_app.app_context():
+            first = enqueue_job("test_echo", {"value": 1}, idempotency_key="key-1")
+            second = enqueue_job("test_echo", {"value": 1}, idempotency_key="key-1")
+
+            assert first.id == second.id
+            assert Job.query.count() == 1
+
+    def test_unknown_kind_rejected(self, test_app):
+        """Test jobs can only be enqueued for registered handlers."""
+        with test_app.app_context():
+            with pytest.raises(ValueError):
+                enqueue_job("does_not_exist")
+
+    def test_failed_job_retries_with_backoff(self, test_app):
+        """Test failures are retried later and fail after max_attempts."""
+        with test_app.app_context():
+            job = enqueue_job("test_fail", max_attempts=2)
+
+            assert run_pending_jobs() == 1
+            db.session.refresh(job)
+            assert job.state == JobState.QUEUED
+            assert job.error == "boom"
+            assert job.next_run_at > datetime.now()
+            # Not due again until the backoff has passed
+            assert run_pending_jobs() == 0
+
+            job.next_run_at = datetime.now() - timedelta(seconds=1)
+            db.session.commit()
+            assert run_pending_jobs() == 1
+
+            db.session.refresh(job)
+            assert job.state == JobState.FAILED
+            assert job.attempts == 2
+            assert job.finished_at is not None
+
+    def test_claim_is_exclusive(self, test_app):
+        """Test a leased job cannot be claimed by another worker."""
+        with test_app.app_context():
+            enqueue_job("test_echo", {"value": 1})
+
+            assert claim_job("worker-a") is not None
+            assert claim_job("worker-b") is None
+
+    def test_expired_lease_is_reclaimed(self, test_app):
+        """Test a job whose worker died is picked up again."""
+        with test_app.app_context():
+            job = enqueue_job("test_echo", {"value": 3})
+            claim_job("dead-worker")
+
+            job.lease_expires_at = datetime.now() - timedelta(seconds=1)
+            db.session.commit()
+
+            reclaimed = claim_job("worker-b")
+            assert reclaimed.id == job.id
+            assert reclaimed.attempts == 2
+            assert run_job(reclaimed, "worker-b")
+            assert calls == [3]
+
+    def test_async_sync_returns_202(self, client, test_app, sample_item):
+        """Test ?async=true queues the sync and reports it via /api/job."""
+        response = client.post(f"/api/item/{sample_item}/sync?async=true")
+
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+        assert response.headers["Location"] == f"/api/job/{job_id}"
+        assert client.get(f"/api/job/{job_id}").get_json()["state"] == "queued"
+
+        summary = {"added": 0, "modified": 0, "removed": 0, "pages": 1}
+        with test_app.app_context(), patch(
+            "utils.sync_utils.sync_item_by_id", return_value=summary
+        ) as sync_item_by_id:
+            assert run_pending_jobs() == 1
+
+        assert sync_item_by_id.call_args[0][0] == sample_item
+        job = client.get(f"/api/job/{job_id}").get_json()
+        assert job["state"] == "succeeded"
+        assert job["result"] == summary
+
+    def test_backup_job_retries_failed_backup(self, client, test_app, sample_item):
+        """Test a backup that reports failure is retried."""
+        response = client.post(f"/api/item/{sample_item}/backup")
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+
+        with test_app.app_context(), patch(
+            "utils.item_utils.get_token_backup"
+        ) as get_token_backup:
+            get_token_backup.return_value.backup_token.return_value = False
+            run_pending_jobs()
+
+        job = client.get(f"/api/job/{job_id}").get_json()
+        assert job["state"] == "queued"
+        assert "failed" in job["error"]
+
+    def test_list_jobs_by_state(self, client, test_app):
+        """Test GET /api/job filters by state."""
+        with test_app.app_context():
+            enqueue_job("test_echo", {"value": 1})
+
+        assert len(client.get("/api/job?state=queued").get_json()) == 1
+        assert client.get("/api/job?state=succeeded").get_json() == []
+        assert client.get("/api/job?state=bogus").status_code == 400
@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+from utils.logger import (
+    SampledLogger,
+    StructuredFormatter,
+    flush_logs,
+    get_logger,
+    get_sampled_logger,
+    lazy,
+    set_log_stream,
+)
+
+
+def make_record(msg, *args, fields=None):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    if fields:
+        record.fields = fields
+    return record
+
+
+@pytest.mark.unit
+class TestLogger:
+    """Test the structured, queued and sampled logging helpers."""
+
+    def test_lazy_argument_not_evaluated_when_disabled(self):
+        """Test lazy arguments are only rendered for enabled levels."""
+        calls = []
+
+        def expensive(value):
+            calls.append(value)
+            return value
+
+        logger = logging.getLogger("test_logger.lazy")
+        logger.setLevel(logging.INFO)
+        logger.debug("data: %s", lazy(expensive, "payload"))
+        assert calls == []
+
+        assert str(lazy(expensive, "payload")) == "payload"
+        assert calls == ["payload"]
+
+    def test_sampled_logger_logs_every_nth_call(self, caplog):
+        """Test a 0.25 sample rate passes one call in four."""
+        logger = logging.getLogger("test_logger.sampled")
+        logger.setLevel(logging.DEBUG)
+        sampled = SampledLogger(logger, 0.25)
+
+        with caplog.at_level(logging.DEBUG, logger="test_logger.sampled"):
+            for i in range(8):
+                sampled.debug("row %d", i)
+
+        assert [r.getMessage() for r in caplog.records] == ["row 0", "row 4"]
+
+    def test_sampled_logger_disabled(self, caplog):
+        """Test a zero sample rate and disabled levels log nothing."""
+        logger = logging.getLogger("test_logger.disabled")
+        logger.setLevel(logging.INFO)
+
+        with caplog.at_level(logging.INFO, logger="test_logger.disabled"):
+            SampledLogger(logger, 0).info("never")
+            SampledLogger(logger, 1.0).debug("below level")
+
+        assert caplog.records == []
+
+    def test_sample_rate_from_env(self, monkeypatch):
+        """Test LOG_SAMPLE_RATE sets the default rate."""
+        monkeypatch.setenv("LOG_SAMPLE_RATE", "0.1")
+        assert get_sampled_logger("test_logger.env").every == 10
+
+    def test_text_format_appends_fields(self):
+        """Test structured fields are appended as key=value pairs."""
+        line = StructuredFormatter().format(
+            make_record("synced %s", "item-1", fields={"rows": 3})
+        )
+        assert "[INFO] [test] - synced item-1 rows=3" in line
+
+    def test_json_format(self):
+        """Test JSON lines carry the message and structured fields."""
+        line = StructuredFormatter(json_lines=True).format(
+            make_record("synced %s", "item-1", fields={"rows": 3})
+        )
+        payload = json.loads(line)
+        assert payload["level"] == "INFO"
+        assert payload["message"] == "synced item-1"
+        assert payload["rows"] == 3
+
+    def test_queued_records_written_after_flush(self, monkeypatch):
+        """Test records pass through the queue to the configured stream."""
+        # pytest's capture handlers on the root logger would otherwise stop
+        # get_logger from attaching the queue handler
+        monkeypatch.setattr(
+            logging.getLogger("test_logger.queue"), "hasHandlers", lambda: False
+        )
+        stream = io.StringIO()
+        set_log_stream(stream)
+        try:
+            get_logger("test_logger.queue").warning("queued %s", "record")
+            flush_logs()
+        finally:
+            set_log_stream(sys.stdout)
+
+        assert "queued record" in stream.getvalue()
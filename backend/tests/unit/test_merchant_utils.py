@@ -0,0 +1,149 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from models import db
+from models.merchant.merchant import Merchant
+from models.transaction.txn import Txn
+from utils.merchant_utils import (
+    backfill_merchants,
+    ensure_merchant_schema,
+    merchant_key,
+    resolve_merchants,
+)
+from utils.sync_utils import handle_added_transactions
+
+
+def plaid_txn(txn_id, account_id, merchant_name, logo_url=None):
+    return {
+        "transaction_id": txn_id,
+        "account_id": account_id,
+        "name": f"{(merchant_name or 'UNKNOWN').upper()} #42",
+        "amount": 12.5,
+        "date": datetime(2024, 3, 1),
+        "merchant_name": merchant_name,
+        "logo_url": logo_url,
+        "payment_channel": "in store",
+        "personal_finance_category": {"primary": "OTHER", "detailed": "OTHER"},
+    }
+
+
+@pytest.mark.unit
+class TestMerchantUtils:
+    """Test canonical merchant resolution, backfill and merging."""
+
+    def test_merchant_key(self):
+        """Test case and punctuation variants share one key."""
+        assert merchant_key("Trader Joe's") == merchant_key("TRADER JOE'S")
+        assert merchant_key("  Amazon.com ") == "amazon com"
+        assert merchant_key("7-Eleven") == "7 eleven"
+        assert merchant_key("") is None
+        assert merchant_key("***") is None
+
+    def test_resolve_batch(self, test_app):
+        """Test a page creates each merchant once and moves logos to it."""
+        with test_app.app_context():
+            txns = [
+                {"merchant": "Starbucks", "logo_url": None},
+                {"merchant": "STARBUCKS", "logo_url": "https://logo/sbux.png"},
+                {"merchant": "Whole Foods", "logo_url": "https://logo/wf.png"},
+                {"merchant": None, "logo_url": "https://logo/none.png"},
+            ]
+            assert resolve_merchants(txns) == 2
+            db.session.commit()
+
+            assert txns[0]["merchant_id"] == txns[1]["merchant_id"]
+            assert txns[3]["merchant_id"] is None
+            assert all("logo_url" not in txn for txn in txns)
+
+            # The next page finds them in the alias map and fills the logo
+            again = [{"merchant": "starbucks", "logo_url": "https://logo/sbux.png"}]
+            assert resolve_merchants(again) == 0
+            db.session.commit()
+            assert again[0]["merchant_id"] == txns[0]["merchant_id"]
+            starbucks = db.session.get(Merchant, txns[0]["merchant_id"])
+            assert starbucks.logo_url == "https://logo/sbux.png"
+            assert Merchant.query.count() == 2
+
+    def test_sync_sets_merchant(self, test_app, sample_accounts):
+        """Test synced transactions point at a merchant that holds the logo."""
+        with test_app.app_context():
+            handle_added_transactions(
+                [
+                    plaid_txn("txn_m_1", sample_accounts[0].id, "Uber", "https://logo/uber.png"),
+                    plaid_txn("txn_m_2", sample_accounts[0].id, "UBER"),
+                ]
+            )
+            first, second = db.session.get(Txn, "txn_m_1"), db.session.get(Txn, "txn_m_2")
+            assert first.merchant_id is not None
+            assert first.merchant_id == second.merchant_id
+            assert second.merchant == "UBER"
+            assert second.to_dict()["logo_url"] == "https://logo/uber.png"
+
+    def test_backfill_and_merge(self, client, test_app, sample_accounts):
+        """Test existing rows are backfilled and duplicates merged."""
+        with test_app.app_context():
+            for index, merchant in enumerate(["AMZN Mktp", "Amazon", "Amazon", None]):
+                db.session.add(
+                    Txn(
+                        id=f"txn_backfill_{index}",
+                        name=f"PURCHASE {index}",
+                        amount=Decimal("10.00"),
+                        date=datetime(2024, 1, 1 + index),
+                        merchant=merchant,
+                        account_id=sample_accounts[0].id,
+                        category_id="1",
+                    )
+                )
+            db.session.commit()
+
+            assert backfill_merchants() == {
+                "scanned": 3,
+                "updated": 3,
+                "merchants_created": 2,
+            }
+            assert backfill_merchants()["scanned"] == 0
+            amazon = Merchant.query.filter_by(name="Amazon").one().id
+            amzn = Merchant.query.filter_by(name="AMZN Mktp").one().id
+
+        listed = {m["name"]: m for m in client.get("/api/merchant").get_json()}
+        assert listed["Amazon"]["txn_count"] == 2
+        assert listed["Amazon"]["total"] == 20.0
+
+        response = client.post(
+            f"/api/merchant/{amazon}/merge", json={"merchant_ids": [amzn]}
+        )
+        assert response.status_code == 200
+        assert response.get_json()["txns_moved"] == 1
+        assert response.get_json()["aliases"] == ["amazon", "amzn mktp"]
+
+        with test_app.app_context():
+            assert db.session.get(Merchant, amzn) is None
+            txns = [{"merchant": "AMZN MKTP"}]
+            resolve_merchants(txns)
+            assert txns[0]["merchant_id"] == amazon
+
+        listed = client.get("/api/merchant?start=2024-01-02").get_json()
+        assert [(m["name"], m["txn_count"]) for m in listed] == [("Amazon", 2)]
+        assert (
+            client.post("/api/merchant/999/merge", json={"merchant_ids": []}).status_code
+            == 404
+        )
+
+    def test_ensure_schema_upgrades_old_database(self, tmp_path):
+        """Test txn.merchant_id is added to a database created without it."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as connection:
+            connection.execute(
+                text("CREATE TABLE txn (id VARCHAR PRIMARY KEY, logo_url VARCHAR)")
+            )
+            ensure_merchant_schema(connection)
+            ensure_merchant_schema(connection)
+
+            columns = {column["name"] for column in inspect(connection).get_columns("txn")}
+            indexes = {index["name"] for index in inspect(connection).get_indexes("txn")}
+        assert "merchant_id" in columns
+        assert "ix_txn_merchant_id" in indexes
+        engine.dispose()
@@ -0,0 +1,78 @@
+import pytest
+
+from utils.metrics import (
+    Counter,
+    Histogram,
+    REGISTRY,
+    SYNC_ROWS,
+    observe_sync,
+    statement_table_and_operation,
+)
+
+
+@pytest.mark.unit
+class TestMetrics:
+    """Test the in-process Prometheus metrics."""
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        REGISTRY.clear()
+        yield
+        REGISTRY.clear()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram samples are rendered with cumulative buckets."""
+        histogram = Histogram("test_latency_seconds", "Test.", ("route",), (0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5.0, route="/a")
+
+        lines = histogram.render()
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_count{route="/a"} 3' in lines
+        assert 'test_latency_seconds_sum{route="/a"} 5.55' in lines
+
+    def test_counter_label_escaping(self):
+        """Test label values are escaped in the text format."""
+        counter = Counter("test_total", "Test.", ("operation",))
+        counter.inc(operation='say "hi"')
+
+        assert 'test_total{operation="say \\"hi\\""} 1' in counter.render()
+
+    def test_statement_table_and_operation(self):
+        """Test SQL statements are labelled by table and operation."""
+        assert statement_table_and_operation(
+            "SELECT txn.id FROM txn WHERE txn.id = ?"
+        ) == ("txn", "SELECT")
+        assert statement_table_and_operation(
+            "INSERT INTO account (id) VALUES (?)"
+        ) == ("account", "INSERT")
+        assert statement_table_and_operation(
+            'UPDATE "item" SET cursor=?'
+        ) == ("item", "UPDATE")
+
+    def test_observe_sync(self):
+        """Test sync throughput counters."""
+        observe_sync(2.0, pages=3, added=10, modified=2, removed=1)
+
+        assert SYNC_ROWS.get(change="added") == 10
+        assert SYNC_ROWS.get(change="modified") == 2
+        assert SYNC_ROWS.get(change="removed") == 1
+
+    def test_metrics_endpoint(self, client, sample_accounts):
+        """Test GET /metrics exposes route and SQL histograms."""
+        client.get("/api/account")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+
+        body = response.data.decode()
+        assert "# TYPE nett_http_request_duration_seconds histogram" in body
+        assert (
+            'nett_http_request_duration_seconds_count{blueprint="account",'
+            'route="/api/account",method="GET",status="200"} 1'
+        ) in body
+        assert 'nett_sql_statement_duration_seconds_count{table="account",operation="SELECT"}' in body
@@ -10,6 +10,7 @@ from models.period.period_utils import (
     get_totals_by_frequency,
 )
 from models.budget.budget_frequency import BudgetFrequency
+from models.budget.budget_utils import get_period_window
 from models import db
 
 
@@ -176,3 +177,32 @@ class TestPeriodUtils:
 
             periods = get_totals_by_frequency(BudgetFrequency.MONTHLY)
             assert periods == []
+
+    def test_get_totals_by_frequency_window(self, test_app, sample_transactions):
+        """Test spending and income are summed into each period of a window."""
+        window = get_period_window(
+            BudgetFrequency.MONTHLY, datetime(2024, 3, 1), start=datetime(2024, 1, 1)
+        )
+        with test_app.app_context():
+            periods = get_totals_by_frequency(BudgetFrequency.MONTHLY, window)
+
+        assert [period.to_dict() for period in periods] == [
+            {
+                "start_date": "2024-01-01T00:00:00",
+                "end_date": "2024-01-31T00:00:00",
+                "spent_amount": 0.0,
+                "income_amount": 125.0,
+            },
+            {
+                "start_date": "2024-02-01T00:00:00",
+                "end_date": "2024-02-29T00:00:00",
+                "spent_amount": 100.0,
+                "income_amount": 25.0,
+            },
+            {
+                "start_date": "2024-03-01T00:00:00",
+                "end_date": "2024-03-31T00:00:00",
+                "spent_amount": 0.0,
+                "income_amount": 0.0,
+            },
+        ]
@@ -0,0 +1,182 @@
+from unittest.mock import Mock
+
+import plaid
+import pytest
+from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData
+from fake_plaid.server import start_fake_plaid_server
+from tests.unit.test_fake_plaid import plaid_client_for
+from utils.metrics import PLAID_RETRIES
+from utils.plaid_client import (
+    CircuitOpenError,
+    ResilientPlaidClient,
+    RetryBudget,
+)
+
+
+def api_error(status):
+    return plaid.ApiException(status=status, reason="error")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def resilient(client, **kwargs):
+    sleeps = []
+    kwargs.setdefault("sleep", sleeps.append)
+    return ResilientPlaidClient(client, **kwargs), sleeps
+
+
+@pytest.mark.unit
+class TestResilientPlaidClient:
+    """Test timeouts, retries and circuit breaking around the Plaid client."""
+
+    def test_retries_transient_errors(self):
+        """Test 5xx and 429 responses are retried with jittered backoff."""
+        client = Mock()
+        client.item_get.side_effect = [api_error(500), api_error(429), "item"]
+        wrapper, sleeps = resilient(client, base_delay=0.1, max_delay=2.0)
+
+        assert wrapper.item_get("request") == "item"
+        assert client.item_get.call_count == 3
+        assert len(sleeps) == 2
+        assert all(0.1 <= delay <= 2.0 for delay in sleeps)
+
+    def test_client_errors_not_retried(self):
+        """Test 4xx errors are raised immediately."""
+        client = Mock()
+        client.item_get.side_effect = api_error(400)
+        wrapper, sleeps = resilient(client)
+
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_get("request")
+        assert client.item_get.call_count == 1
+        assert sleeps == []
+
+    def test_gives_up_after_max_retries(self):
+        """Test the last error is raised once retries are used up."""
+        client = Mock()
+        client.item_get.side_effect = api_error(503)
+        wrapper, _ = resilient(client, max_retries=2)
+
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_get("request")
+        assert client.item_get.call_count == 3
+
+    def test_non_idempotent_only_retried_on_rate_limit(self):
+        """Test a public token exchange is not repeated after a 5xx."""
+        client = Mock()
+        client.item_public_token_exchange.side_effect = [api_error(500)]
+        wrapper, _ = resilient(client)
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_public_token_exchange("request")
+        assert client.item_public_token_exchange.call_count == 1
+
+        client.item_public_token_exchange.side_effect = [api_error(429), "token"]
+        assert wrapper.item_public_token_exchange("request") == "token"
+
+        client.item_remove.side_effect = [api_error(500)]
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_remove("request")
+        assert client.item_remove.call_count == 1
+
+    def test_retry_budget_limits_retries(self):
+        """Test retries stop once the budget is spent."""
+        client = Mock()
+        client.item_get.side_effect = api_error(500)
+        wrapper, sleeps = resilient(
+            client, retry_budget=RetryBudget(ratio=0, min_retries=2), breaker_failures=100
+        )
+
+        for _ in range(3):
+            with pytest.raises(plaid.ApiException):
+                wrapper.item_get("request")
+        assert len(sleeps) == 2
+
+    def test_applies_per_operation_timeouts(self):
+        """Test each call gets a request timeout unless one is passed."""
+        client = Mock()
+        wrapper, _ = resilient(client, timeout=7, connect_timeout=2)
+
+        wrapper.item_get("request")
+        wrapper.transactions_sync("request")
+        wrapper.item_get("request", _request_timeout=1)
+
+        assert client.item_get.call_args_list[0].kwargs["_request_timeout"] == (2, 7)
+        assert client.transactions_sync.call_args.kwargs["_request_timeout"] == (2, 30.0)
+        assert client.item_get.call_args_list[1].kwargs["_request_timeout"] == 1
+
+    def test_circuit_opens_and_recovers(self):
+        """Test the breaker rejects calls while open and closes after a good trial."""
+        client = Mock()
+        client.item_get.side_effect = api_error(500)
+        clock = FakeClock()
+        wrapper, _ = resilient(
+            client, max_retries=0, breaker_failures=3, breaker_reset_seconds=30, clock=clock
+        )
+
+        for _ in range(3):
+            with pytest.raises(plaid.ApiException):
+                wrapper.item_get("request")
+        with pytest.raises(CircuitOpenError):
+            wrapper.item_get("request")
+        assert client.item_get.call_count == 3
+
+        # Other operations have their own breaker
+        client.accounts_get.return_value = "accounts"
+        assert wrapper.accounts_get("request") == "accounts"
+
+        clock.now = 31
+        client.item_get.side_effect = None
+        client.item_get.return_value = "item"
+        assert wrapper.item_get("request") == "item"
+        assert not wrapper.breaker("item_get").is_open
+
+    def test_failed_trial_reopens_circuit(self):
+        """Test a failing half-open trial opens the circuit again."""
+        client = Mock()
+        client.item_get.side_effect = api_error(500)
+        clock = FakeClock()
+        wrapper, _ = resilient(client, max_retries=0, breaker_failures=1, clock=clock)
+
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_get("request")
+        clock.now = 100
+        with pytest.raises(plaid.ApiException):
+            wrapper.item_get("request")
+        with pytest.raises(CircuitOpenError):
+            wrapper.item_get("request")
+
+    def test_retries_against_fake_plaid(self):
+        """Test injected server errors are retried over real HTTP."""
+        data = FakePlaidData(FakePlaidConfig(error_rate=1.0, error_status=500))
+        server, host = start_fake_plaid_server(data)
+        retries_before = PLAID_RETRIES.get(operation="transactions_sync")
+        try:
+            wrapper, sleeps = resilient(plaid_client_for(host), max_retries=2)
+            with pytest.raises(plaid.ApiException) as exc_info:
+                wrapper.transactions_sync(
+                    TransactionsSyncRequest(access_token="access-fake-0", cursor="")
+                )
+        finally:
+            server.shutdown()
+
+        assert exc_info.value.status == 500
+        assert len(sleeps) == 2
+        assert PLAID_RETRIES.get(operation="transactions_sync") - retries_before == 2
+
+    def test_open_circuit_returns_503(self, client, test_app, sample_item):
+        """Test routes report an open circuit as service unavailable."""
+        plaid_client = Mock()
+        plaid_client.transactions_sync.side_effect = api_error(500)
+        wrapper, _ = resilient(plaid_client, max_retries=0, breaker_failures=1)
+        test_app.config["plaid_client"] = wrapper
+
+        assert client.post(f"/api/item/{sample_item}/sync").status_code == 500
+        assert client.post(f"/api/item/{sample_item}/sync").status_code == 503
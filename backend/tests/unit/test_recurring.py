@@ -0,0 +1,158 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from models import db
+from models.recurring.recurring_series import RecurringSeries
+from models.transaction.txn import Txn
+from utils.merchant_utils import resolve_merchants
+from utils.recurring import (
+    add_months,
+    rebuild_recurring_series,
+    update_recurring_series,
+)
+from utils.sync_utils import handle_removed_transactions
+
+NETFLIX = [(datetime(2024, month, 15), "15.49") for month in range(1, 5)]
+GYM = [(datetime(2024, 1, day), "20.00") for day in (1, 8, 15, 22)]
+COFFEE = [
+    (datetime(2024, 1, 3), "4.50"),
+    (datetime(2024, 1, 4), "6.25"),
+    (datetime(2024, 1, 19), "3.10"),
+    (datetime(2024, 2, 27), "5.00"),
+]
+
+
+@pytest.mark.unit
+class TestRecurring:
+    """Test incremental recurring series detection and its endpoint."""
+
+    def add(self, account_id, rows, merchant=None, name="CHARGE", prefix="txn"):
+        """Insert transactions the way a sync does and fold them in."""
+        txn_dicts = [
+            {
+                "id": f"{prefix}_{name}_{index}",
+                "name": name,
+                "amount": Decimal(amount),
+                "category_id": "1",
+                "date": day,
+                "merchant": merchant,
+                "logo_url": None,
+                "account_id": account_id,
+            }
+            for index, (day, amount) in enumerate(rows)
+        ]
+        resolve_merchants(txn_dicts)
+        for txn_dict in txn_dicts:
+            db.session.add(Txn(**txn_dict))
+        db.session.commit()
+        return update_recurring_series(txn_dicts)
+
+    def detected(self):
+        return {
+            series.name: series
+            for series in RecurringSeries.query.all()
+            if series.cadence is not None
+        }
+
+    def test_add_months_clamps(self):
+        """Test month steps keep the day where the month allows it."""
+        assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+        assert add_months(date(2024, 11, 15), 3) == date(2025, 2, 15)
+
+    def test_detects_cadences(self, test_app, sample_accounts):
+        """Test monthly and weekly series are found and irregular ones are not."""
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            self.add(account_id, NETFLIX, merchant="Netflix")
+            self.add(account_id, GYM, name="CITY GYM #42")
+            self.add(account_id, COFFEE, merchant="Blue Bottle", prefix="coffee")
+
+            detected = self.detected()
+            assert set(detected) == {"Netflix", "CITY GYM #42"}
+            netflix = detected["Netflix"].to_dict()
+            assert netflix["cadence"] == "monthly"
+            assert netflix["next_date"] == "2024-05-15"
+            assert netflix["expected_amount"] == 15.49
+            assert netflix["merchant_id"] is not None
+            assert detected["CITY GYM #42"].cadence == "weekly"
+            assert detected["CITY GYM #42"].next_date == date(2024, 1, 29)
+
+    def test_incremental_matches_rebuild(self, test_app, sample_accounts):
+        """Test folding syncs one at a time, in or out of order, equals a rebuild."""
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            self.add(account_id, NETFLIX[:2], merchant="Netflix")
+            assert self.detected() == {}
+
+            # One new charge: only it is folded into the stored series
+            self.add(account_id, NETFLIX[2:3], merchant="Netflix", prefix="sync2")
+            assert self.detected()["Netflix"].next_date == date(2024, 4, 15)
+
+            # Later, then an older charge arriving late
+            may = [(datetime(2024, 5, 15), "17.99")]
+            self.add(account_id, may, merchant="Netflix", prefix="sync3")
+            self.add(account_id, NETFLIX[3:], merchant="Netflix", prefix="sync4")
+            incremental = self.detected()["Netflix"].to_dict()
+
+            assert rebuild_recurring_series() == {"scanned": 5, "series": 1, "recurring": 1}
+            rebuilt = self.detected()["Netflix"].to_dict()
+            for key in ("occurrences", "first_date", "next_date", "expected_amount"):
+                assert incremental[key] == rebuilt[key]
+            assert incremental["interval_days"] == pytest.approx(rebuilt["interval_days"])
+            assert rebuilt["expected_amount"] == 17.99
+            assert rebuilt["next_date"] == "2024-06-15"
+
+    def test_removed_transactions_rescan(self, test_app, sample_accounts):
+        """Test removing a charge rebuilds its series from what is left."""
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            self.add(account_id, NETFLIX, merchant="Netflix")
+            handle_removed_transactions([{"transaction_id": "txn_CHARGE_3"}])
+            assert self.detected()["Netflix"].next_date == date(2024, 4, 15)
+
+            handle_removed_transactions(
+                [{"transaction_id": f"txn_CHARGE_{index}"} for index in range(3)]
+            )
+            assert RecurringSeries.query.count() == 0
+
+    def test_merge_merchants_joins_series(self, client, test_app, sample_accounts):
+        """Test merging merchants leaves one series holding both their charges."""
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            self.add(account_id, NETFLIX[:3], merchant="Netflix")
+            later = [(datetime(2024, month, 15), "15.49") for month in range(4, 7)]
+            self.add(account_id, later, merchant="Netflix.com", prefix="renamed")
+            ids = sorted(series.merchant_id for series in RecurringSeries.query.all())
+            assert len(ids) == 2
+
+        response = client.post(
+            f"/api/merchant/{ids[0]}/merge", json={"merchant_ids": [ids[1]]}
+        )
+        assert response.status_code == 200
+
+        [series] = client.get("/api/recurring?include_lapsed=true").get_json()
+        assert series["merchant_id"] == ids[0]
+        assert series["occurrences"] == 6
+        assert series["next_date"] == "2024-07-15"
+
+    def test_recurring_endpoint(self, client, test_app, sample_accounts):
+        """Test lapsed series are hidden unless asked for, and rebuild runs."""
+        with test_app.app_context():
+            self.add(sample_accounts[0].id, NETFLIX, merchant="Netflix")
+
+        assert client.get("/api/recurring").get_json() == []
+        [netflix] = client.get("/api/recurring?include_lapsed=true").get_json()
+        assert netflix["lapsed"] is True
+        assert netflix["cadence"] == "monthly"
+        assert (
+            client.get(
+                f"/api/recurring?include_lapsed=true&account_id={sample_accounts[1].id}"
+            ).get_json()
+            == []
+        )
+
+        response = client.post("/api/recurring/rebuild")
+        assert response.status_code == 200
+        assert response.get_json()["recurring"] == 1
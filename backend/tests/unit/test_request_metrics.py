@@ -0,0 +1,67 @@
+import json
+import pytest
+
+from utils.request_metrics import (
+    RequestStats,
+    clear_recent_requests,
+    get_recent_requests,
+)
+
+
+@pytest.mark.unit
+class TestRequestMetrics:
+    """Test per-request SQL, Plaid and wall time instrumentation."""
+
+    @pytest.fixture(autouse=True)
+    def empty_request_log(self):
+        clear_recent_requests()
+        yield
+        clear_recent_requests()
+
+    def test_server_timing_header(self, client, sample_accounts):
+        """Test responses carry a Server-Timing header with SQL counts."""
+        response = client.get("/api/account")
+        assert response.status_code == 200
+
+        server_timing = response.headers["Server-Timing"]
+        for metric in ("db;dur=", "plaid;dur=", "json;dur=", "app;dur=", "total;dur="):
+            assert metric in server_timing
+        assert '0 queries"' not in server_timing
+
+    def test_request_is_recorded(self, client, sample_accounts):
+        """Test handled requests appear in the ring buffer."""
+        client.get("/api/account")
+
+        entries = get_recent_requests()
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["path"] == "/api/account"
+        assert entry["endpoint"] == "account.get_accounts"
+        assert entry["status_code"] == 200
+        assert entry["sql_count"] > 0
+        assert entry["response_bytes"] > 0
+        assert entry["top_statements"][0]["statement"].startswith("SELECT")
+
+    def test_debug_requests_endpoint(self, client, sample_accounts):
+        """Test GET /api/debug/requests lists the slowest requests first."""
+        client.get("/api/account")
+        client.get("/api/item")
+
+        response = client.get("/api/debug/requests?limit=5")
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert len(data) == 2
+        assert data[0]["wall_ms"] >= data[1]["wall_ms"]
+
+    def test_top_statements_aggregates_repeats(self):
+        """Test identical statements are aggregated and ranked by total time."""
+        stats = RequestStats()
+        stats.record_statement("SELECT 1", 0.001)
+        stats.record_statement("SELECT 1", 0.001)
+        stats.record_statement("SELECT 2", 0.0015)
+
+        top = stats.top_statements()
+        assert stats.sql_count == 3
+        assert top[0] == {"statement": "SELECT 1", "count": 2, "total_ms": 2.0}
+
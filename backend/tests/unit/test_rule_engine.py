@@ -0,0 +1,236 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from models import db
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.rule_engine import (
+    AhoCorasick,
+    CompiledRule,
+    RuleMatcher,
+    get_rule_matcher,
+    required_literal,
+)
+from utils.sync_utils import handle_added_transactions
+
+
+def rule(**fields):
+    return CategorizationRule(
+        id=fields.pop("id", None),
+        priority=fields.pop("priority", 100),
+        category_id=fields.pop("category_id", "groceries"),
+        created_at=datetime(2024, 1, 1),
+        **fields,
+    )
+
+
+@pytest.mark.unit
+class TestRuleEngine:
+    """Test compiling and applying categorization rules."""
+
+    @pytest.fixture
+    def categories(self, test_app):
+        with test_app.app_context():
+            groceries = TxnCategory(name="Rule Groceries")
+            coffee = TxnCategory(name="Rule Coffee")
+            db.session.add_all([groceries, coffee])
+            db.session.flush()
+            subcategory = TxnSubcategory(
+                name="Rule Beans", description="Beans", category_id=coffee.id
+            )
+            db.session.add(subcategory)
+            db.session.commit()
+            return {
+                "groceries": groceries.id,
+                "coffee": coffee.id,
+                "beans": subcategory.id,
+            }
+
+    def test_aho_corasick_finds_overlapping_patterns(self):
+        """Test every pattern is found, including ones inside other matches."""
+        automaton = AhoCorasick(["he", "she", "hers", "his"])
+
+        assert automaton.find("ushers") == {0, 1, 2}
+        assert automaton.find("this") == {3}
+        assert automaton.find("nothing") == set()
+
+    def test_matcher_predicates_and_priority(self):
+        """Test each predicate kind and that the lowest priority rule wins."""
+        matcher = RuleMatcher(
+            [
+                rule(id="market", name_contains="market", category_id="groceries"),
+                rule(id="pattern", name_pattern=r"^sq \*", category_id="square"),
+                rule(id="merchant", merchant="Starbucks", category_id="coffee"),
+                rule(
+                    id="big",
+                    name_contains="market",
+                    min_amount=Decimal("100"),
+                    priority=10,
+                    category_id="bulk",
+                ),
+                rule(id="savings", account_id="acc_2", category_id="transfer"),
+            ]
+        )
+
+        def match(name, merchant=None, account_id="acc_1", amount=5):
+            found = matcher.match(name, merchant, account_id, amount)
+            return found.id if found else None
+
+        assert match("FARMERS MARKET") == "market"
+        assert match("Farmers Market", amount=250) == "big"
+        assert match("SQ *BAKERY") == "pattern"
+        assert match("Coffee", merchant="starbucks") == "merchant"
+        assert match("Payroll", account_id="acc_2") == "savings"
+        assert match("Payroll") is None
+
+    def test_matcher_scales_with_rules(self):
+        """Test thousands of substring rules still match the right one."""
+        rules = [
+            rule(id=f"r{index}", name_contains=f"store {index:04d}")
+            for index in range(5000)
+        ]
+        matcher = RuleMatcher(rules)
+
+        assert matcher.match("POS STORE 4321 NYC", None, "acc", 1).id == "r4321"
+        assert matcher.match("POS STORE", None, "acc", 1) is None
+
+    def test_only_matching_patterns_evaluated(self):
+        """Test only pattern rules whose required literal occurs are evaluated."""
+        rules = [
+            rule(id=f"p{index:03d}", name_pattern=rf"^pos {index:03d}\b")
+            for index in range(300)
+        ]
+        # Indexed by "pos 000" and so on, "uber", "uber" and "eats"
+        rules += [
+            rule(id="uber", name_pattern=r"uber", account_id="acc_2", priority=1),
+            rule(id="uber eats", name_pattern=r"(?i)UBER\s+eats", priority=2),
+            rule(id="eats", name_pattern=r"eats$", account_id="acc_3", priority=0),
+        ]
+        matcher = RuleMatcher(rules)
+        evaluated = []
+        original = CompiledRule.matches
+
+        def record(compiled, *args):
+            evaluated.append(compiled.id)
+            return original(compiled, *args)
+
+        with patch.object(CompiledRule, "matches", record):
+            assert matcher.match("POS 042 GROCER", None, "acc_1", 1).id == "p042"
+            assert evaluated == ["p042"]
+
+            evaluated.clear()
+            assert matcher.match("UBER EATS", None, "acc_1", 1).id == "uber eats"
+            assert evaluated == ["eats", "uber", "uber eats"]
+
+            # Names that are not ASCII are checked against every pattern
+            evaluated.clear()
+            assert matcher.match("ÜBER EATS", None, "acc_1", 1) is None
+            assert len(evaluated) == 303
+
+    def test_patterns_unfiltered_without_regex_parser(self):
+        """Test pattern rules still match when the private regex parser is missing."""
+        assert required_literal(r"^pos 042\b") == "pos 042"
+        with patch("utils.rule_engine.sre_parse", None):
+            assert required_literal(r"^pos 042\b") == ""
+            matcher = RuleMatcher(
+                [
+                    rule(id="pos", name_pattern=r"^pos 042\b"),
+                    rule(id="uber", name_pattern=r"uber\s+eats"),
+                ]
+            )
+
+        assert matcher.match("POS 042 GROCER", None, "acc_1", 1).id == "pos"
+        assert matcher.match("UBER EATS", None, "acc_1", 1).id == "uber"
+        assert matcher.match("PAYROLL", None, "acc_1", 1) is None
+
+    def test_ingestion_applies_rules(self, test_app, sample_accounts, categories):
+        """Test new transactions are categorized by rules as they are synced."""
+        with test_app.app_context():
+            db.session.add(
+                CategorizationRule(
+                    name_contains="blue bottle",
+                    category_id=categories["coffee"],
+                    subcategory_id=categories["beans"],
+                )
+            )
+            db.session.commit()
+
+            handle_added_transactions(
+                [
+                    {
+                        "transaction_id": f"txn_rule_{index}",
+                        "account_id": sample_accounts[0].id,
+                        "name": name,
+                        "amount": 4.5,
+                        "date": datetime(2024, 1, 2).date(),
+                        "payment_channel": "in store",
+                        "personal_finance_category": {
+                            "primary": "FOOD_AND_DRINK",
+                            "detailed": "FOOD_AND_DRINK_COFFEE",
+                        },
+                    }
+                    for index, name in enumerate(["BLUE BOTTLE #12", "Corner Deli"])
+                ]
+            )
+
+            matched = db.session.get(Txn, "txn_rule_0")
+            unmatched = db.session.get(Txn, "txn_rule_1")
+            assert matched.category_id == categories["coffee"]
+            assert matched.subcategory_id == categories["beans"]
+            assert unmatched.category_id != categories["coffee"]
+
+    def test_matcher_recompiled_after_rule_write(self, test_app, categories):
+        """Test the compiled matcher is reused until a rule changes."""
+        with test_app.app_context():
+            first = get_rule_matcher()
+            assert get_rule_matcher() is first
+
+            db.session.add(
+                CategorizationRule(merchant="Costco", category_id=categories["groceries"])
+            )
+            db.session.commit()
+
+            assert len(get_rule_matcher()) == 1
+
+    def test_apply_endpoint_recategorizes_existing(
+        self, client, test_app, sample_transactions, categories
+    ):
+        """Test rules are applied retroactively with set-based updates."""
+        response = client.post(
+            "/api/rule",
+            json={"name_contains": "transaction 1", "category_id": categories["groceries"]},
+        )
+        assert response.status_code == 201
+
+        result = client.post("/api/rule/apply").get_json()
+
+        assert result == {"scanned": 2, "matched": 1, "updated": 1}
+        with test_app.app_context():
+            assert db.session.get(Txn, "txn_1").category_id == categories["groceries"]
+            assert db.session.get(Txn, "txn_2").category_id == "2"
+
+        # Already categorized transactions are not rewritten
+        assert client.post("/api/rule/apply").get_json()["updated"] == 0
+
+    def test_invalid_rules_rejected(self, client, categories):
+        """Test bad regexes, unknown categories and empty rules return 400."""
+        invalid = [
+            {"name_pattern": "([a-z", "category_id": categories["groceries"]},
+            {"merchant": "Costco", "category_id": "missing"},
+            {"category_id": categories["groceries"]},
+            {
+                "merchant": "Costco",
+                "min_amount": 10,
+                "max_amount": 5,
+                "category_id": categories["groceries"],
+            },
+        ]
+        for body in invalid:
+            assert client.post("/api/rule", json=body).status_code == 400
+
+        assert client.get("/api/rule").get_json() == []
@@ -0,0 +1,225 @@
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from models import db
+from models.job.job import Job
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from utils.job_queue import run_pending_jobs
+from utils.statement_import import (
+    CsvMapping,
+    import_statement,
+    ofx_transactions,
+    txn_fingerprint,
+)
+
+STATEMENT = """Posted Date,Description,Amount,Category
+01/05/2024,TRADER JOE'S #123,-54.20,Import Groceries
+01/05/2024,BLUE BOTTLE,-4.50,
+01/05/2024,BLUE BOTTLE,-4.50,
+01/07/2024,PAYROLL,2500.00,
+not a date,BROKEN,-1.00,
+"""
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>-54.20
+<FITID>1
+<NAME>Trader Joe&apos;s #123
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240107<TRNAMT>2500.00<FITID>2<NAME>PAYROLL</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.mark.unit
+class TestStatementImport:
+    """Test streaming statement imports and their duplicate detection."""
+
+    @pytest.fixture
+    def groceries(self, test_app):
+        with test_app.app_context():
+            category = TxnCategory(name="Import Groceries")
+            db.session.add(category)
+            db.session.commit()
+            return category.id
+
+    def stored(self):
+        return sorted(
+            (txn.date.date().isoformat(), str(txn.amount), txn.name, txn.category.name)
+            for txn in Txn.query.all()
+        )
+
+    def test_csv_import_and_reimport(self, test_app, sample_accounts, groceries):
+        """Test rows are signed, categorized and imported once, bad rows reported."""
+        # Batches of two split the repeated BLUE BOTTLE rows
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            totals = import_statement(io.StringIO(STATEMENT), account_id, batch_size=2)
+            assert totals == {
+                "rows": 5,
+                "imported": 4,
+                "duplicates": 0,
+                "failed": 1,
+                "errors": [{"row": 6, "error": "Invalid date 'not a date'"}],
+            }
+            assert self.stored() == [
+                ("2024-01-05", "4.50", "BLUE BOTTLE", "OTHER"),
+                ("2024-01-05", "4.50", "BLUE BOTTLE", "OTHER"),
+                ("2024-01-05", "54.20", "TRADER JOE'S #123", "Import Groceries"),
+                ("2024-01-07", "-2500.00", "PAYROLL", "OTHER"),
+            ]
+
+            again = import_statement(io.StringIO(STATEMENT), account_id)
+            assert (again["imported"], again["duplicates"]) == (0, 4)
+            assert Txn.query.count() == 4
+
+    def test_repeats_apart_in_unsorted_statement(self, test_app, sample_accounts):
+        """Test a row repeated batches apart is counted against the whole file."""
+        statement = (
+            "Date,Description,Amount\n"
+            "2024-01-05,BLUE BOTTLE,-4.50\n"
+            "2024-01-06,PAYROLL,2500.00\n"
+            "2024-01-07,RENT,-1800.00\n"
+            "2024-01-05,BLUE BOTTLE,-4.50\n"
+        )
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            first = import_statement(io.StringIO(statement), account_id, batch_size=1)
+            assert (first["imported"], first["duplicates"]) == (4, 0)
+
+            # The second BLUE BOTTLE is three batches after the first
+            again = import_statement(io.StringIO(statement), account_id, batch_size=1)
+            assert (again["imported"], again["duplicates"]) == (0, 4)
+            assert Txn.query.count() == 4
+
+    def test_non_finite_amounts_fail(self, test_app, sample_accounts):
+        """Test NaN and infinite amounts are reported, not imported."""
+        statement = (
+            "Date,Description,Amount\n"
+            "2024-01-05,A,NaN\n"
+            "2024-01-05,B,Infinity\n"
+            "2024-01-05,C,-4.50\n"
+        )
+        with test_app.app_context():
+            totals = import_statement(io.StringIO(statement), sample_accounts[0].id)
+            assert (totals["imported"], totals["failed"]) == (1, 2)
+            assert totals["errors"] == [
+                {"row": 2, "error": "Invalid amount 'NaN'"},
+                {"row": 3, "error": "Invalid amount 'Infinity'"},
+            ]
+
+    def test_dedup_against_synced(self, test_app, sample_accounts):
+        """Test stored rows, fingerprinted by the ORM or a backfill, are skipped."""
+        with test_app.app_context():
+            account_id = sample_accounts[0].id
+            db.session.add(
+                Txn(
+                    id="plaid_1",
+                    name="Trader Joe's #123",
+                    amount=Decimal("54.20"),
+                    category_id="1",
+                    date=datetime(2024, 1, 5),
+                    account_id=account_id,
+                )
+            )
+            # Bulk inserts skip the ORM listener and are fingerprinted on import
+            db.session.execute(
+                insert(Txn),
+                [
+                    {
+                        "id": "plaid_2",
+                        "name": "PAYROLL",
+                        "amount": Decimal("-2500.00"),
+                        "category_id": "1",
+                        "date": datetime(2024, 1, 7),
+                        "account_id": account_id,
+                    }
+                ],
+            )
+            db.session.commit()
+            assert db.session.get(Txn, "plaid_1").fingerprint == txn_fingerprint(
+                account_id, datetime(2024, 1, 5), "54.2", "TRADER JOE'S 123"
+            )
+
+            totals = import_statement(io.StringIO(OFX), account_id, "ofx")
+            assert (totals["rows"], totals["imported"], totals["duplicates"]) == (2, 0, 2)
+
+            # The same statement for another account is not a duplicate
+            other = import_statement(io.StringIO(OFX), sample_accounts[1].id, "ofx")
+            assert other["imported"] == 2
+
+    def test_ofx_across_chunks(self):
+        """Test SGML fields split over read boundaries parse whole."""
+        for chunk_size in (7, 64, 4096):
+            fields = list(ofx_transactions(io.StringIO(OFX), chunk_size=chunk_size))
+            assert [(f["DTPOSTED"][:8], f["TRNAMT"], f["NAME"]) for f in fields] == [
+                ("20240105", "-54.20", "Trader Joe's #123"),
+                ("20240107", "2500.00", "PAYROLL"),
+            ]
+
+    def test_csv_mapping(self, test_app, sample_accounts):
+        """Test mapped debit and credit columns and a custom date format."""
+        statement = "When,What,Out,In\n05/01/2024,RENT,1200.00,\n07/01/2024,REFUND,,15.00\n"
+        mapping = CsvMapping(
+            date="When", name="What", debit="Out", credit="In", date_format="%d/%m/%Y"
+        )
+        with test_app.app_context():
+            import_statement(io.StringIO(statement), sample_accounts[0].id, mapping=mapping)
+            assert [row[:3] for row in self.stored()] == [
+                ("2024-01-05", "1200.00", "RENT"),
+                ("2024-01-07", "-15.00", "REFUND"),
+            ]
+
+            with pytest.raises(ValueError, match="Missing"):
+                import_statement(
+                    io.StringIO("a,b\n1,2\n"),
+                    sample_accounts[0].id,
+                    mapping=CsvMapping(date="Missing"),
+                )
+
+    def test_upload_endpoint(self, client, test_app, sample_accounts, groceries):
+        """Test synchronous and background uploads, and missing fields."""
+        account_id = sample_accounts[0].id
+        response = client.post(
+            "/api/import/statement",
+            data={"account_id": account_id, "file": (io.BytesIO(STATEMENT.encode()), "jan.csv")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        assert response.get_json()["imported"] == 4
+
+        response = client.post(
+            "/api/import/statement?async=true",
+            data={"account_id": account_id, "file": (io.BytesIO(OFX.encode()), "jan.ofx")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 202
+        with test_app.app_context():
+            assert run_pending_jobs() == 1
+            job = db.session.get(Job, response.get_json()["job_id"])
+            result = json.loads(job.result)
+            # Both OFX transactions were in the CSV under other spellings
+            assert (result["imported"], result["duplicates"]) == (0, 2)
+            assert Txn.query.count() == 4
+
+        for data in (
+            {"file": (io.BytesIO(STATEMENT.encode()), "jan.csv")},
+            {"account_id": account_id},
+            {"account_id": "missing", "file": (io.BytesIO(STATEMENT.encode()), "jan.csv")},
+            {"account_id": account_id, "format": "qif", "file": (io.BytesIO(b""), "x.qif")},
+        ):
+            response = client.post(
+                "/api/import/statement", data=data, content_type="multipart/form-data"
+            )
+            assert response.status_code == 400, data
@@ -0,0 +1,129 @@
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from models import db
+from models.item.item_sync_lease import ItemSyncLease
+from utils.item_utils import bulk_delete_item
+from utils.metrics import SYNC_COALESCED
+from utils.sync_utils import (
+    _release_lease,
+    _try_acquire_lease,
+    sync_item_by_id,
+)
+
+SUMMARY = {"added": 3, "modified": 0, "removed": 0, "pages": 1}
+
+
+def run_in_app_thread(app, fn, results, index):
+    def target():
+        with app.app_context():
+            results[index] = fn()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+@pytest.mark.unit
+class TestSingleFlightSync:
+    """Test concurrent syncs of one item are coalesced."""
+
+    def test_concurrent_syncs_share_one_run(self, test_app, sample_item):
+        """Test a second concurrent sync joins the first and gets its result."""
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_sync(item, plaid_client):
+            calls.append(item.id)
+            started.set()
+            release.wait(5)
+            return SUMMARY
+
+        coalesced_before = SYNC_COALESCED.get(source="request")
+        results = [None, None]
+        with patch("utils.sync_utils.sync_item", side_effect=slow_sync):
+            first = run_in_app_thread(
+                test_app, lambda: sync_item_by_id(sample_item, None), results, 0
+            )
+            assert started.wait(5)
+            second = run_in_app_thread(
+                test_app, lambda: sync_item_by_id(sample_item, None), results, 1
+            )
+            second.join(0.2)
+            release.set()
+            first.join(5)
+            second.join(5)
+
+        assert calls == [sample_item]
+        assert results == [SUMMARY, SUMMARY]
+        assert SYNC_COALESCED.get(source="request") - coalesced_before == 1
+
+    def test_waits_for_lease_held_by_other_process(self, test_app, sample_item):
+        """Test a sync waits on another process's lease and returns its result."""
+        with test_app.app_context():
+            assert _try_acquire_lease(sample_item, "other-process")
+
+        results = [None]
+        with patch("utils.sync_utils.sync_item") as sync_item:
+            waiter = run_in_app_thread(
+                test_app, lambda: sync_item_by_id(sample_item, None), results, 0
+            )
+            waiter.join(0.3)
+            assert waiter.is_alive()
+
+            with test_app.app_context():
+                _release_lease(sample_item, "other-process", result=SUMMARY)
+            waiter.join(5)
+
+        sync_item.assert_not_called()
+        assert results == [SUMMARY]
+
+    def test_item_deleted_while_waiting(self, test_app, sample_item):
+        """Test a waiter returns None once the item and its lease are deleted."""
+        with test_app.app_context():
+            assert _try_acquire_lease(sample_item, "other-process")
+
+            # Delete the item while the waiter polls the other process's lease
+            with patch(
+                "utils.sync_utils.time.sleep",
+                side_effect=lambda _: bulk_delete_item(sample_item),
+            ), patch("utils.sync_utils.sync_item") as sync_item:
+                assert sync_item_by_id(sample_item, None) is None
+
+            sync_item.assert_not_called()
+            assert db.session.get(ItemSyncLease, sample_item) is None
+
+    def test_expired_lease_is_taken_over(self, test_app, sample_item):
+        """Test a lease left behind by a crashed process can be reclaimed."""
+        with test_app.app_context():
+            assert _try_acquire_lease(sample_item, "crashed-process")
+            assert not _try_acquire_lease(sample_item, "other-process")
+
+            lease = db.session.get(ItemSyncLease, sample_item)
+            lease.expires_at = datetime.now() - timedelta(seconds=1)
+            db.session.commit()
+
+            with patch("utils.sync_utils.sync_item", return_value=SUMMARY):
+                assert sync_item_by_id(sample_item, None) == SUMMARY
+
+            db.session.refresh(lease)
+            assert lease.owner is None
+            assert lease.generation == 1
+
+    def test_failed_sync_releases_lease(self, test_app, sample_item):
+        """Test the lease is released with the error when a sync fails."""
+        with test_app.app_context():
+            with patch(
+                "utils.sync_utils.sync_item", side_effect=RuntimeError("plaid down")
+            ):
+                with pytest.raises(RuntimeError):
+                    sync_item_by_id(sample_item, None)
+
+            lease = db.session.get(ItemSyncLease, sample_item)
+            assert lease.owner is None
+            assert lease.error == "plaid down"
+            assert _try_acquire_lease(sample_item, "next-process")
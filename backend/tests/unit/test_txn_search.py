@@ -0,0 +1,178 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, insert, text, update
+
+from models import db
+from models.transaction.txn import Txn
+from utils.txn_search import (
+    ensure_search_index,
+    index_tokenizer,
+    match_expression,
+    search_transactions,
+)
+
+SEARCH_TXNS = [
+    ("txn_search_1", "STARBUCKS #1234", "Starbucks", datetime(2024, 1, 5), 0, "1"),
+    ("txn_search_2", "SQ *STARBUCKS RESERVE", None, datetime(2024, 2, 5), 1, "1"),
+    ("txn_search_3", "WHOLE FOODS MARKET", "Whole Foods", datetime(2024, 2, 7), 0, "2"),
+    ("txn_search_4", "Starbucks card reload", "Starbucks", datetime(2024, 3, 1), 0, "2"),
+]
+
+
+@pytest.mark.unit
+class TestTxnSearch:
+    """Test FTS5 transaction search and its sync triggers."""
+
+    @pytest.fixture
+    def search_txns(self, test_app, sample_accounts):
+        with test_app.app_context():
+            for txn_id, name, merchant, day, account, category_id in SEARCH_TXNS:
+                db.session.add(
+                    Txn(
+                        id=txn_id,
+                        name=name,
+                        merchant=merchant,
+                        amount=Decimal("5.00"),
+                        date=day,
+                        account_id=sample_accounts[account].id,
+                        category_id=category_id,
+                    )
+                )
+            db.session.commit()
+        return sample_accounts
+
+    def search_ids(self, query, **filters):
+        return [txn.id for txn in search_transactions(query, **filters)]
+
+    def test_match_expression_quotes_syntax(self):
+        """Test user input cannot inject FTS5 query syntax."""
+        assert match_expression('star" OR -bucks', "unicode61") == '"star"* "OR"* "bucks"*'
+        assert match_expression('ab joe"s', "trigram") == '"joe""s"'
+
+    def test_ranked_prefix_search(self, test_app, search_txns):
+        """Test prefix matches on name and merchant, merchant hits ranked first."""
+        with test_app.app_context():
+            ids = self.search_ids("starb")
+            assert set(ids) == {"txn_search_1", "txn_search_2", "txn_search_4"}
+            assert ids[-1] == "txn_search_2"
+
+            assert self.search_ids("whole market") == ["txn_search_3"]
+            assert self.search_ids("bucks") == []
+
+    def test_filters_combine_with_search(self, test_app, search_txns):
+        """Test account, category and date filters narrow the matches."""
+        with test_app.app_context():
+            assert self.search_ids("starbucks", account_id=search_txns[1].id) == [
+                "txn_search_2"
+            ]
+            assert self.search_ids("starbucks", category_id="2") == ["txn_search_4"]
+            assert set(
+                self.search_ids(
+                    "starbucks", start=datetime(2024, 1, 5), end=datetime(2024, 2, 5)
+                )
+            ) == {"txn_search_1", "txn_search_2"}
+
+    def test_index_follows_writes(self, test_app, search_txns):
+        """Test ORM and bulk inserts, updates and deletes reach the index."""
+        with test_app.app_context():
+            db.session.execute(
+                insert(Txn),
+                [
+                    {
+                        "id": "txn_search_bulk",
+                        "name": "TRADER JOE'S #552",
+                        "merchant": "Trader Joe's",
+                        "amount": Decimal("20.00"),
+                        "account_id": search_txns[0].id,
+                        "category_id": "1",
+                    }
+                ],
+            )
+            db.session.commit()
+            assert self.search_ids("trader") == ["txn_search_bulk"]
+
+            txn = db.session.get(Txn, "txn_search_3")
+            txn.name = "WHOLE FOODS GROCERY"
+            db.session.commit()
+            assert self.search_ids("grocery") == ["txn_search_3"]
+            assert self.search_ids("market") == []
+
+            db.session.execute(
+                update(Txn).where(Txn.id == "txn_search_bulk").values(merchant=None)
+            )
+            db.session.execute(delete(Txn).where(Txn.id == "txn_search_1"))
+            db.session.commit()
+            assert self.search_ids("trader") == ["txn_search_bulk"]
+            assert "txn_search_1" not in self.search_ids("starbucks")
+
+    def test_index_rebuilt_after_rowids_change(self, test_app, search_txns):
+        """Test renumbered txn rowids, as VACUUM may leave them, are reindexed."""
+        with test_app.app_context():
+            # Changing only the rowid bypasses the sync triggers
+            db.session.execute(text("UPDATE txn SET rowid = rowid + 1000"))
+            db.session.commit()
+            assert self.search_ids("whole") == []
+
+            ensure_search_index()
+            assert self.search_ids("whole") == ["txn_search_3"]
+
+    def test_trigram_substring_search(self, test_app, search_txns):
+        """Test switching to the trigram tokenizer rebuilds the index."""
+        with test_app.app_context():
+            ensure_search_index(tokenizer="trigram")
+            assert index_tokenizer(db.session.connection()) == "trigram"
+
+            assert set(self.search_ids("bucks")) == {
+                "txn_search_1",
+                "txn_search_2",
+                "txn_search_4",
+            }
+            assert self.search_ids("ole foo") == ["txn_search_3"]
+            assert self.search_ids("fo") == []
+
+            ensure_search_index(tokenizer="unicode61")
+            assert self.search_ids("bucks") == []
+
+    def test_pages_split_one_ranking(self, test_app, search_txns):
+        """Test paging walks one bm25 ordering of every match."""
+        with test_app.app_context():
+            db.session.execute(
+                insert(Txn),
+                [
+                    {
+                        "id": f"txn_page_{index:02d}",
+                        "name": "COFFEE " + "SHOP " * (index % 5),
+                        "amount": Decimal("3.00"),
+                        "date": datetime(2024, 4, 1 + index % 28),
+                        "account_id": search_txns[0].id,
+                        "category_id": "1",
+                    }
+                    for index in range(30)
+                ],
+            )
+            db.session.commit()
+
+            ranked = self.search_ids("coffee", limit=100)
+            pages = [
+                self.search_ids("coffee", limit=7, offset=offset)
+                for offset in range(0, 35, 7)
+            ]
+            assert len(ranked) == 30
+            assert sum(pages, []) == ranked
+
+    def test_search_endpoint_pages(self, client, search_txns):
+        """Test the endpoint pages with a Link header and validates input."""
+        first = client.get("/api/transaction/search?q=starbucks&limit=2")
+        assert first.status_code == 200
+        assert len(first.get_json()) == 2
+        assert "offset=2" in first.headers["Link"]
+
+        second = client.get("/api/transaction/search?q=starbucks&limit=2&offset=2")
+        assert [txn["id"] for txn in second.get_json()] == ["txn_search_2"]
+        assert "Link" not in second.headers
+
+        assert client.get("/api/transaction/search").status_code == 400
+        assert client.get("/api/transaction/search?q=x&limit=0").status_code == 400
+        assert client.get("/api/transaction/search?q=x&start=2024-13-01").status_code == 400
@@ -191,7 +191,7 @@ class TestModelUtils:
                 "active": True,
             }
 
-            with caplog.at_level("INFO"):
+            with caplog.at_level("DEBUG", logger="utils.model_utils"):
                 create_model_instance_from_dict(Account, account_data)
 
             # Check that appropriate log messages were generated
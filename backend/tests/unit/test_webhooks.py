@@ -0,0 +1,176 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from werkzeug.serving import make_server
+
+from fake_plaid.data import FakePlaidConfig, FakePlaidData
+from fake_plaid.server import start_fake_plaid_server
+from fake_plaid.webhooks import WebhookSimulator, sync_updates_available
+from models import db
+from models.item.item import Item
+from models.job.job import Job
+from models.transaction.transaction_categories import seed_transaction_categories
+from models.transaction.txn import Txn
+from tests.unit.test_fake_plaid import plaid_client_for
+from utils.job_queue import run_pending_jobs
+from utils.metrics import SYNC_COALESCED
+from utils.sync_utils import (
+    _release_lease,
+    _try_acquire_lease,
+    enqueue_webhook_sync,
+)
+from utils.webhook_utils import verify_webhook
+
+SECRET = "test-webhook-secret"
+
+
+@pytest.mark.unit
+class TestWebhooks:
+    """Test webhook-driven sync against the local webhook simulator."""
+
+    @pytest.fixture
+    def simulator(self, test_app):
+        """Serve the app over HTTP with a fake Plaid backend behind it."""
+        data = FakePlaidData(
+            FakePlaidConfig(accounts_per_item=2, transactions_per_account=50)
+        )
+        plaid_server, host = start_fake_plaid_server(data)
+        test_app.config["plaid_client"] = plaid_client_for(host)
+        test_app.config["PLAID_WEBHOOK_SECRET"] = SECRET
+        with test_app.app_context():
+            seed_transaction_categories()
+
+        server = make_server("127.0.0.1", 0, test_app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/api/webhook/plaid"
+        yield WebhookSimulator(url, SECRET)
+
+        server.shutdown()
+        plaid_server.shutdown()
+        test_app.config["PLAID_WEBHOOK_SECRET"] = None
+
+    @pytest.fixture
+    def linked_item(self, client, simulator):
+        with patch("routes.item_routes.get_token_backup"):
+            response = client.post("/api/item", json={"access_token": "access-fake-0"})
+        assert response.status_code == 200
+        return "item-fake-0"
+
+    def test_sync_updates_available_triggers_sync(self, test_app, simulator, linked_item):
+        """Test a verified webhook syncs the item in the background."""
+        status, body = simulator.send(sync_updates_available(linked_item))
+
+        assert status == 202
+        assert body["status"] == "scheduled"
+        assert body["item_id"] == linked_item
+        with test_app.app_context():
+            assert Job.query.count() == 1
+            assert run_pending_jobs() == 1
+            assert Txn.query.count() == 100
+            assert db.session.get(Item, linked_item).cursor == "cursor-fake-100"
+
+    def test_rejects_bad_signature(self, simulator, linked_item):
+        """Test webhooks signed with another secret are rejected."""
+        forged = WebhookSimulator(simulator.url, "wrong-secret")
+        status, _ = forged.send(sync_updates_available(linked_item))
+        assert status == 401
+
+    def test_rejects_stale_webhook(self, simulator, linked_item):
+        """Test webhooks signed more than five minutes ago are rejected."""
+        status, _ = simulator.send(
+            sync_updates_available(linked_item), issued_at=time.time() - 600
+        )
+        assert status == 401
+
+    @pytest.mark.parametrize("issued_at", ["now", None, True, float("nan")])
+    def test_rejects_non_numeric_issued_at(self, issued_at):
+        """Test tokens whose iat is not a finite number are rejected."""
+        body = b'{"webhook_code": "SYNC_UPDATES_AVAILABLE"}'
+        claims = {
+            "iat": issued_at,
+            "request_body_sha256": hashlib.sha256(body).hexdigest(),
+        }
+        segments = [
+            base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+            for part in ({"alg": "HS256", "typ": "JWT"}, claims)
+        ]
+        signing_input = ".".join(segments).encode()
+        signature = hmac.new(SECRET.encode(), signing_input, hashlib.sha256).digest()
+        token = ".".join(
+            segments + [base64.urlsafe_b64encode(signature).rstrip(b"=").decode()]
+        )
+
+        assert verify_webhook(body, token, None, secret=SECRET) is False
+
+    def test_rejects_tampered_body(self, client, simulator, linked_item):
+        """Test the body must match the hash in the signed token."""
+        _, headers = simulator.build(sync_updates_available(linked_item))
+        tampered = sync_updates_available("item-other")
+        response = client.post("/api/webhook/plaid", json=tampered, headers=headers)
+        assert response.status_code == 401
+
+    def test_ignores_other_webhooks(self, simulator, linked_item):
+        """Test webhooks other than SYNC_UPDATES_AVAILABLE are acknowledged."""
+        payload = {
+            "webhook_type": "ITEM",
+            "webhook_code": "WEBHOOK_UPDATE_ACKNOWLEDGED",
+            "item_id": linked_item,
+        }
+        status, body = simulator.send(payload)
+        assert status == 200
+        assert body["status"] == "ignored"
+
+    def test_ignores_unknown_item(self, simulator):
+        """Test webhooks for items we do not have are acknowledged."""
+        status, body = simulator.send(sync_updates_available("item-unknown"))
+        assert status == 200
+        assert body["status"] == "ignored"
+
+    def test_link_token_registers_webhook(self, client):
+        """Test Link is created with the webhook URL when configured."""
+        plaid_client = Mock()
+        plaid_client.link_token_create.return_value.to_dict.return_value = {
+            "link_token": "link-test"
+        }
+        with patch("server.client", plaid_client), patch(
+            "server.PLAID_WEBHOOK_URL", "https://example.com/api/webhook/plaid"
+        ):
+            response = client.post("/api/create_link_token")
+
+        assert response.status_code == 200
+        link_request = plaid_client.link_token_create.call_args[0][0]
+        assert link_request["webhook"] == "https://example.com/api/webhook/plaid"
+
+
+@pytest.mark.unit
+class TestWebhookSyncJobs:
+    """Test coalescing of webhook-driven sync jobs."""
+
+    def test_notifications_coalesce(self, test_app):
+        """Test a burst queues one job, and one during a sync one follow-up."""
+        coalesced_before = SYNC_COALESCED.get(source="webhook")
+        with test_app.app_context():
+            burst = [enqueue_webhook_sync("item-1") for _ in range(3)]
+            assert [coalesced for _, coalesced in burst] == [False, True, True]
+            assert len({job.id for job, _ in burst}) == 1
+
+            # The queued job is picked up and its sync takes the lease
+            assert _try_acquire_lease("item-1", "worker-1")
+            during = [enqueue_webhook_sync("item-1") for _ in range(3)]
+            assert [coalesced for _, coalesced in during] == [False, True, True]
+            follow_up = during[0][0]
+            assert follow_up.id != burst[0][0].id
+
+            # Once the sync ends, notifications join the queued follow-up
+            _release_lease("item-1", "worker-1")
+            job, coalesced = enqueue_webhook_sync("item-1")
+            assert (job.id, coalesced) == (follow_up.id, True)
+            assert Job.query.count() == 2
+
+        assert SYNC_COALESCED.get(source="webhook") - coalesced_before == 5
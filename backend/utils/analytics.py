@@ -0,0 +1,153 @@
+"""
+Spending analytics computed in SQL.
+
+A breakdown groups the transactions of a date window by one dimension in a
+single GROUP BY over the `ix_txn_date` range, so its cost follows the
+number of transactions in the window rather than the whole history. Labels
+are joined onto the grouped rows, not onto every transaction, and the long
+tail beyond the top N groups is folded into one "other" bucket from the
+grouped rows.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal, select
+
+from models import db
+from models.account.account import Account
+from models.merchant.merchant import Merchant
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.cache import VersionedCache, shared_backend
+from utils.data_version import MERCHANTS, get_data_version
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+
+@dataclass(frozen=True)
+class Grouping:
+    """A breakdown dimension: the txn column grouped on and its label."""
+
+    column: object
+    label_model: object = None
+
+
+GROUPINGS = {
+    "category": Grouping(Txn.category_id, TxnCategory),
+    "subcategory": Grouping(Txn.subcategory_id, TxnSubcategory),
+    "merchant": Grouping(Txn.merchant_id, Merchant),
+    "account": Grouping(Txn.account_id, Account),
+    "channel": Grouping(Txn.channel),
+}
+
+# Breakdowns per window, recomputed after any transaction write
+breakdown_cache = VersionedCache("breakdown", shared=shared_backend())
+
+
+def _bucket(key, label, total, count) -> dict:
+    total = float(total or 0)
+    return {
+        "key": key,
+        "label": label,
+        "total": round(total, 2),
+        "count": count,
+        "average": round(total / count, 2) if count else 0.0,
+    }
+
+
+def spend_breakdown(
+    group_by: str, start: datetime, end: datetime, top: int = DEFAULT_TOP
+) -> dict:
+    """
+    Sum, count and average of spending per group. Only positive amounts
+    count; income (negative amounts) would offset the spending it shares a
+    group with.
+
+    Args:
+        group_by: One of GROUPINGS
+        start, end: Inclusive date window
+        top: Number of groups returned by total; the rest form "other"
+
+    Returns:
+        dict: The window, the top groups, the "other" bucket (None if
+        every group fits) and the overall total
+    """
+    grouping = GROUPINGS[group_by]
+    totals = (
+        select(
+            grouping.column.label("key"),
+            func.sum(Txn.amount).label("total"),
+            func.count().label("count"),
+        )
+        .where(Txn.date >= start, Txn.date < end + timedelta(days=1), Txn.amount > 0)
+        .group_by(grouping.column)
+        .subquery()
+    )
+    if grouping.label_model is not None:
+        label_model = grouping.label_model
+        statement = select(
+            totals.c.key, label_model.name, totals.c.total, totals.c.count
+        ).outerjoin(label_model, label_model.id == totals.c.key)
+    else:
+        statement = select(totals.c.key, literal(None), totals.c.total, totals.c.count)
+    rows = db.session.execute(
+        statement.order_by(totals.c.total.desc(), totals.c.key)
+    ).all()
+
+    if group_by == "channel":
+        # Enum members are not JSON: key and label both become the value
+        rows = [
+            (key and key.value, key and key.value, total, count)
+            for key, _, total, count in rows
+        ]
+    groups = [_bucket(*row) for row in rows[:top]]
+    other = None
+    if len(rows) > top:
+        tail = rows[top:]
+        other = _bucket(
+            None,
+            "Other",
+            sum(float(total or 0) for _, _, total, _ in tail),
+            sum(count for _, _, _, count in tail),
+        )
+        other["groups"] = len(tail)
+
+    return {
+        "group_by": group_by,
+        "start": start.date().isoformat(),
+        "end": end.date().isoformat(),
+        "groups": groups,
+        "other": other,
+        "total": _bucket(
+            None,
+            "Total",
+            sum(float(total or 0) for _, _, total, _ in rows),
+            sum(count for _, _, _, count in rows),
+        ),
+    }
+
+
+def get_spend_breakdown(
+    group_by: str, start: datetime, end: datetime, top: int = DEFAULT_TOP
+) -> dict:
+    """spend_breakdown, cached until transactions (or merchant names) change."""
+    labels = get_data_version(MERCHANTS) if group_by == "merchant" else None
+    return breakdown_cache.get_or_compute(
+        (group_by, start.date().isoformat(), end.date().isoformat(), top, labels),
+        lambda: spend_breakdown(group_by, start, end, top),
+    )
+
+
+def ensure_txn_indexes(connection=None):
+    """
+    Create the txn indexes analytics rely on in databases created before
+    they were declared; create_all only adds them to new tables.
+    """
+    if connection is None:
+        with db.engine.begin() as connection:
+            return ensure_txn_indexes(connection)
+    for index in Txn.__table__.indexes:
+        index.create(connection, checkfirst=True)
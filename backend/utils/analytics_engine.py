@@ -0,0 +1,615 @@
+"""
+Vectorized analytics over an in-memory columnar snapshot of transactions.
+
+The snapshot holds one fixed-width array per column: rowid, day (days since
+1970-01-01), amount and integer codes for category, subcategory, account and
+merchant. That is 36 bytes per transaction, about 34 MB per million, plus one
+dictionary entry per distinct category, subcategory and account id. Series
+such as rolling spend, month-over-month deltas and per-group percentiles are
+computed over whole columns at once instead of one query per period.
+
+The snapshot is loaded once per process and refreshed when the
+`budget_data` version changes. On SQLite, triggers record the rowid of
+every inserted, updated or deleted transaction in `txn_journal`, so a
+refresh reloads only the rows changed since the snapshot was taken. The
+journal keeps the last TXN_JOURNAL_MAX_ROWS changes; a snapshot older than
+that, a change touching a large share of the rows, or another database
+triggers a full reload. So does a schema change: txn has no INTEGER PRIMARY
+KEY, so VACUUM (which bumps the schema version) may renumber its rowids.
+
+NumPy is optional. With it, the arrays are read zero-copy as ndarrays;
+without it, the same arrays are scanned in pure Python.
+"""
+
+import math
+import os
+import threading
+from array import array
+from datetime import date, timedelta
+
+from sqlalchemy import (
+    Float,
+    Integer,
+    cast,
+    column,
+    event,
+    func,
+    literal,
+    literal_column,
+    select,
+    table,
+    text,
+)
+
+from models import db
+from models.transaction.txn import Txn
+from utils.data_version import BUDGET_DATA, get_data_version
+from utils.logger import get_logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = get_logger(__name__)
+
+TXN_JOURNAL_MAX_ROWS = int(os.getenv("TXN_JOURNAL_MAX_ROWS", "100000"))
+LOAD_BATCH_SIZE = 10_000
+# Past this share of changed rows, reloading everything is cheaper
+FULL_RELOAD_SHARE = 0.25
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# Column name -> array typecode
+COLUMNS = {
+    "rowid": "q",
+    "day": "i",
+    "amount": "d",
+    "category": "i",
+    "subcategory": "i",
+    "account": "i",
+    "merchant": "i",
+}
+NUMPY_TYPES = {"q": "int64", "i": "int32", "d": "float64"}
+# Columns that hold codes of string ids
+VOCABULARY_COLUMNS = ("category", "subcategory", "account")
+GROUP_COLUMNS = ("category", "subcategory", "account", "merchant")
+MISSING = -1
+
+txn_journal = table("txn_journal", column("seq"), column("txn_rowid"))
+
+_JOURNAL_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS txn_journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        txn_rowid INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_journal_insert AFTER INSERT ON txn BEGIN
+        INSERT INTO txn_journal (txn_rowid) VALUES (new.rowid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_journal_update AFTER UPDATE ON txn BEGIN
+        INSERT INTO txn_journal (txn_rowid) VALUES (old.rowid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_journal_delete AFTER DELETE ON txn BEGIN
+        INSERT INTO txn_journal (txn_rowid) VALUES (old.rowid);
+    END
+    """,
+]
+
+_snapshot_lock = threading.Lock()
+_snapshot = None
+
+
+def ensure_txn_journal(connection=None):
+    """Create txn_journal and the triggers that fill it, if missing."""
+    if connection is None:
+        with db.engine.begin() as connection:
+            return ensure_txn_journal(connection)
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in _JOURNAL_DDL:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Txn.__table__, "after_create")
+def _create_txn_journal(target, connection, **kw):
+    ensure_txn_journal(connection)
+
+
+@event.listens_for(Txn.__table__, "before_drop")
+def _drop_txn_journal(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS txn_journal"))
+
+
+def to_day(value) -> int:
+    """Days since 1970-01-01 for a date or datetime."""
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day: int) -> date:
+    return date.fromordinal(day + EPOCH_ORDINAL)
+
+
+class Vocabulary:
+    """Dense integer codes for string ids; MISSING stands for None."""
+
+    def __init__(self, values: list = None):
+        self.values = list(values or [])
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def value(self, code: int):
+        return None if code == MISSING else self.values[code]
+
+    def copy(self) -> "Vocabulary":
+        return Vocabulary(self.values)
+
+
+class TransactionSnapshot:
+    """
+    Columnar transactions as of a data version and journal position.
+
+    Snapshots are never modified once published; a refresh builds a new
+    one, so readers in other threads keep a consistent view.
+    """
+
+    def __init__(
+        self,
+        columns: dict,
+        vocabularies: dict,
+        version: int,
+        journal_seq: int,
+        database: str = None,
+        schema_version: int = 0,
+    ):
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.version = version
+        self.journal_seq = journal_seq
+        self.database = database
+        self.schema_version = schema_version
+
+    def __len__(self):
+        return len(self.columns["rowid"])
+
+    def column(self, name: str):
+        """The column as an ndarray view if NumPy is installed, else the array."""
+        values = self.columns[name]
+        if np is not None:
+            return np.frombuffer(values, dtype=NUMPY_TYPES[values.typecode])
+        return values
+
+    def nbytes(self) -> int:
+        return sum(values.itemsize * len(values) for values in self.columns.values())
+
+    def code(self, column_name: str, value):
+        """The code `value` has in `column_name`, None if no row has it."""
+        if value is None:
+            return None
+        if column_name not in VOCABULARY_COLUMNS:
+            return int(value)
+        return self.vocabularies[column_name].codes.get(value)
+
+    def key(self, column_name: str, code: int):
+        """The id for a code of `column_name`."""
+        if column_name not in VOCABULARY_COLUMNS:
+            return None if code == MISSING else int(code)
+        return self.vocabularies[column_name].value(int(code))
+
+
+def _empty_columns() -> dict:
+    return {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+
+def _append_rows(columns: dict, vocabularies: dict, rows: list):
+    if not rows:
+        return
+    rowids, days, amounts, categories, subcategories, accounts, merchants = zip(*rows)
+    columns["rowid"].extend(rowids)
+    columns["day"].extend(day if isinstance(day, int) else to_day(day) for day in days)
+    columns["amount"].extend(amount or 0.0 for amount in amounts)
+    columns["category"].extend(map(vocabularies["category"].code, categories))
+    columns["subcategory"].extend(map(vocabularies["subcategory"].code, subcategories))
+    columns["account"].extend(map(vocabularies["account"].code, accounts))
+    columns["merchant"].extend(
+        MISSING if merchant_id is None else merchant_id for merchant_id in merchants
+    )
+
+
+def _select_rows(sqlite: bool):
+    if sqlite:
+        # Days since the epoch computed by SQLite, not parsed into datetimes
+        rowid = literal_column("txn.rowid")
+        day = cast(func.julianday(Txn.date) - UNIX_EPOCH_JULIAN_DAY, Integer)
+    else:
+        rowid, day = literal(0), Txn.date
+    return select(
+        rowid,
+        day,
+        cast(Txn.amount, Float),
+        Txn.category_id,
+        Txn.subcategory_id,
+        Txn.account_id,
+        Txn.merchant_id,
+    ).where(Txn.date.is_not(None))
+
+
+def _journal_position(sqlite: bool) -> tuple:
+    if not sqlite:
+        return 0, 0
+    # The AUTOINCREMENT high-water mark survives pruning the whole journal
+    return db.session.execute(
+        text(
+            "SELECT (SELECT coalesce(min(seq), 0) FROM txn_journal), "
+            "coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'txn_journal'), 0)"
+        )
+    ).one()
+
+
+def _schema_version(sqlite: bool) -> int:
+    if not sqlite:
+        return 0
+    return db.session.execute(text("PRAGMA schema_version")).scalar()
+
+
+def load_snapshot() -> TransactionSnapshot:
+    """Read every dated transaction into a new snapshot."""
+    sqlite = db.session.connection().dialect.name == "sqlite"
+    version = get_data_version(BUDGET_DATA)
+    _, journal_seq = _journal_position(sqlite)
+    schema_version = _schema_version(sqlite)
+
+    columns = _empty_columns()
+    vocabularies = {name: Vocabulary() for name in VOCABULARY_COLUMNS}
+    # Core execution on the session's connection skips ORM row processing
+    rows = db.session.connection().execute(
+        _select_rows(sqlite).execution_options(yield_per=LOAD_BATCH_SIZE)
+    )
+    for batch in rows.partitions():
+        _append_rows(columns, vocabularies, batch)
+    return TransactionSnapshot(
+        columns, vocabularies, version, journal_seq, str(db.engine.url), schema_version
+    )
+
+
+def _without_rowids(snapshot: TransactionSnapshot, rowids: set) -> dict:
+    """Copies of the snapshot's columns without the rows in `rowids`."""
+    if np is not None:
+        keep = ~np.isin(snapshot.column("rowid"), np.fromiter(rowids, dtype=np.int64))
+        return {
+            name: array(COLUMNS[name], snapshot.column(name)[keep].tobytes())
+            for name in COLUMNS
+        }
+    keep = [
+        index
+        for index, rowid in enumerate(snapshot.columns["rowid"])
+        if rowid not in rowids
+    ]
+    return {
+        name: array(COLUMNS[name], (values[index] for index in keep))
+        for name, values in snapshot.columns.items()
+    }
+
+
+def refresh_snapshot(snapshot: TransactionSnapshot) -> TransactionSnapshot:
+    """
+    A snapshot at the current data version, built from `snapshot` and the
+    journaled changes when possible, otherwise loaded from scratch.
+    """
+    sqlite = db.session.connection().dialect.name == "sqlite"
+    version = get_data_version(BUDGET_DATA)
+    first_seq, last_seq = _journal_position(sqlite)
+    if (
+        not sqlite
+        or snapshot.database != str(db.engine.url)
+        # Changes were pruned before this process read them
+        or (first_seq and first_seq > snapshot.journal_seq + 1)
+        # A different or recreated database
+        or last_seq < snapshot.journal_seq
+        # Journaled rowids may not be the snapshot's after a VACUUM
+        or _schema_version(sqlite) != snapshot.schema_version
+    ):
+        return load_snapshot()
+
+    changed = set(
+        db.session.execute(
+            select(txn_journal.c.txn_rowid).where(
+                txn_journal.c.seq > snapshot.journal_seq,
+                txn_journal.c.seq <= last_seq,
+            )
+        ).scalars()
+    )
+    if len(changed) > max(len(snapshot) * FULL_RELOAD_SHARE, LOAD_BATCH_SIZE):
+        return load_snapshot()
+
+    if changed:
+        columns = _without_rowids(snapshot, changed)
+    else:
+        columns = {
+            name: array(values.typecode, values)
+            for name, values in snapshot.columns.items()
+        }
+    vocabularies = {
+        name: vocabulary.copy() for name, vocabulary in snapshot.vocabularies.items()
+    }
+    changed = list(changed)
+    for start in range(0, len(changed), LOAD_BATCH_SIZE):
+        batch = changed[start : start + LOAD_BATCH_SIZE]
+        _append_rows(
+            columns,
+            vocabularies,
+            db.session.connection()
+            .execute(_select_rows(sqlite).where(literal_column("txn.rowid").in_(batch)))
+            .all(),
+        )
+    logger.debug("Refreshed analytics snapshot with %d changed rows", len(changed))
+    return TransactionSnapshot(
+        columns,
+        vocabularies,
+        version,
+        last_seq,
+        snapshot.database,
+        snapshot.schema_version,
+    )
+
+
+def prune_txn_journal(keep: int = TXN_JOURNAL_MAX_ROWS):
+    """Delete all but the newest `keep` journal entries."""
+    if db.session.connection().dialect.name != "sqlite":
+        return
+    first_seq, last_seq = _journal_position(True)
+    if last_seq - first_seq < keep:
+        return
+    db.session.execute(txn_journal.delete().where(txn_journal.c.seq <= last_seq - keep))
+    db.session.commit()
+
+
+def get_snapshot() -> TransactionSnapshot:
+    """The process-wide snapshot, refreshed if transactions changed."""
+    global _snapshot
+    version = get_data_version(BUDGET_DATA)
+    database = str(db.engine.url)
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if (
+            snapshot is not None
+            and snapshot.version == version
+            and snapshot.database == database
+        ):
+            return snapshot
+        snapshot = load_snapshot() if snapshot is None else refresh_snapshot(snapshot)
+        _snapshot = snapshot
+    prune_txn_journal()
+    logger.info(
+        f"📊 Analytics snapshot: {len(snapshot)} transactions, "
+        f"{snapshot.nbytes() / 1_000_000:.1f} MB"
+    )
+    return snapshot
+
+
+def _selection(
+    snapshot: TransactionSnapshot,
+    start: date,
+    end: date,
+    filters: dict,
+    spending: bool = False,
+):
+    """
+    The rows between `start` and `end` (inclusive) that match `filters`
+    (column name -> id), only positive amounts if `spending`: a boolean
+    ndarray, or a list of row indexes without NumPy. None if a filter
+    value appears in no row.
+    """
+    codes = {}
+    for name, value in filters.items():
+        code = snapshot.code(name, value)
+        if code is None:
+            return None
+        codes[name] = code
+    first, last = to_day(start), to_day(end)
+
+    if np is not None:
+        days = snapshot.column("day")
+        mask = (days >= first) & (days <= last)
+        for name, code in codes.items():
+            mask &= snapshot.column(name) == code
+        if spending:
+            mask &= snapshot.column("amount") > 0
+        return mask
+
+    days = snapshot.columns["day"]
+    indexes = [index for index, day in enumerate(days) if first <= day <= last]
+    for name, code in codes.items():
+        values = snapshot.columns[name]
+        indexes = [index for index in indexes if values[index] == code]
+    if spending:
+        amounts = snapshot.columns["amount"]
+        indexes = [index for index in indexes if amounts[index] > 0]
+    return indexes
+
+
+def daily_totals(
+    snapshot: TransactionSnapshot, start: date, end: date, filters: dict
+) -> list:
+    """Spending (positive amounts) per day from `start` to `end` inclusive."""
+    length = to_day(end) - to_day(start) + 1
+    selection = _selection(snapshot, start, end, filters, spending=True)
+    if selection is None:
+        return [0.0] * length
+    if np is not None:
+        offsets = snapshot.column("day")[selection] - to_day(start)
+        weights = snapshot.column("amount")[selection]
+        return np.bincount(offsets, weights=weights, minlength=length).tolist()
+
+    totals = [0.0] * length
+    first = to_day(start)
+    days, amounts = snapshot.columns["day"], snapshot.columns["amount"]
+    for index in selection:
+        totals[days[index] - first] += amounts[index]
+    return totals
+
+
+def rolling_spend(
+    snapshot: TransactionSnapshot, start: date, end: date, window: int, filters: dict
+) -> dict:
+    """
+    Daily spending and its trailing `window`-day sums; income is left
+    out. The first sums include the days before `start`, so every value
+    covers a full window.
+
+    Returns:
+        dict: Parallel `dates`, `daily` and `rolling` arrays
+    """
+    daily = daily_totals(snapshot, start - timedelta(days=window - 1), end, filters)
+    if np is not None:
+        sums = np.cumsum(np.concatenate(([0.0], daily)))
+        rolling = (sums[window:] - sums[:-window]).tolist()
+    else:
+        rolling, running = [], 0.0
+        for index, total in enumerate(daily):
+            running += total
+            if index >= window:
+                running -= daily[index - window]
+            if index >= window - 1:
+                rolling.append(running)
+
+    days = (end - start).days + 1
+    return {
+        "window": window,
+        "dates": [(start + timedelta(days=offset)).isoformat() for offset in range(days)],
+        "daily": [round(total, 2) for total in daily[window - 1 :]],
+        "rolling": [round(total, 2) for total in rolling],
+    }
+
+
+def _month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def monthly_spend(
+    snapshot: TransactionSnapshot, start: date, end: date, filters: dict
+) -> dict:
+    """
+    Calendar month spending between the months of `start` and `end`, with
+    the change from the previous month; income is left out.
+
+    Returns:
+        dict: Parallel `months` (YYYY-MM), `totals`, `deltas` and
+        `percent_changes` arrays; the first delta is None
+    """
+    start = start.replace(day=1)
+    first_month, last_month = _month_index(start), _month_index(end)
+    length = last_month - first_month + 1
+    selection = _selection(snapshot, start, end, filters, spending=True)
+
+    if selection is None:
+        totals = [0.0] * length
+    elif np is not None:
+        days = snapshot.column("day")[selection].astype("datetime64[D]")
+        # Months since 1970-01, the epoch of the day column
+        months = days.astype("datetime64[M]").astype(np.int64) + 1970 * 12 - first_month
+        weights = snapshot.column("amount")[selection]
+        totals = np.bincount(months, weights=weights, minlength=length).tolist()
+    else:
+        totals = [0.0] * length
+        days, amounts = snapshot.columns["day"], snapshot.columns["amount"]
+        for index in selection:
+            totals[_month_index(from_day(days[index])) - first_month] += amounts[index]
+
+    deltas, percent_changes = [None], [None]
+    for previous, total in zip(totals, totals[1:]):
+        deltas.append(round(total - previous, 2))
+        percent_changes.append(
+            round((total - previous) / abs(previous) * 100, 1) if previous else None
+        )
+    return {
+        "months": [
+            f"{month // 12:04d}-{month % 12 + 1:02d}"
+            for month in range(first_month, last_month + 1)
+        ],
+        "totals": [round(total, 2) for total in totals],
+        "deltas": deltas,
+        "percent_changes": percent_changes,
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linear-interpolation percentile of sorted values, as numpy.percentile."""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        position - lower
+    )
+
+
+def amount_percentiles(
+    snapshot: TransactionSnapshot,
+    group_by: str,
+    start: date,
+    end: date,
+    percentiles: list,
+    filters: dict,
+) -> list:
+    """
+    Percentiles of transaction amounts per `group_by` group, largest
+    groups first.
+
+    Returns:
+        list[dict]: key, count and {percentile: amount} per group
+    """
+    selection = _selection(snapshot, start, end, filters)
+    if selection is None:
+        return []
+
+    if np is not None:
+        groups = snapshot.column(group_by)[selection]
+        amounts = snapshot.column("amount")[selection]
+        order = np.lexsort((amounts, groups))
+        groups, amounts = groups[order], amounts[order]
+        codes, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+        rows = [
+            (
+                code,
+                count,
+                np.percentile(amounts[first : first + count], percentiles).tolist(),
+            )
+            for code, first, count in zip(codes.tolist(), starts.tolist(), counts.tolist())
+        ]
+    else:
+        by_group = {}
+        groups, amounts = snapshot.columns[group_by], snapshot.columns["amount"]
+        for index in selection:
+            by_group.setdefault(groups[index], []).append(amounts[index])
+        rows = []
+        for code, values in by_group.items():
+            values.sort()
+            rows.append((code, len(values), [percentile(values, q) for q in percentiles]))
+
+    rows.sort(key=lambda row: (-row[1], row[0]))
+    return [
+        {
+            "key": snapshot.key(group_by, code),
+            "count": count,
+            "percentiles": {
+                f"{q:g}": round(value, 2) for q, value in zip(percentiles, values)
+            },
+        }
+        for code, count, values in rows
+    ]
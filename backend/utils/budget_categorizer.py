@@ -0,0 +1,468 @@
+"""
+Embedding-based categorization for transactions Plaid could not categorize.
+
+Categorization runs once per sync page rather than once per transaction:
+
+1. Transaction text (merchant and name) is normalized, so store numbers and
+   punctuation do not defeat caching, and deduplicated within the page.
+2. Embeddings are looked up in an in-process LRU, then in the
+   `text_embedding` table, so each distinct text is encoded only once ever.
+3. The remaining texts are encoded on the CPU in batches of
+   AI_CATEGORIZATION_BATCH_SIZE.
+4. All page vectors are scored against a precomputed matrix of category
+   embeddings with one matrix multiply.
+
+The matrix holds each category's name and description plus recent
+transactions already filed under it, so it learns from how the user
+categorizes. It is refreshed at most every AI_SIGNATURE_REFRESH_SECONDS.
+
+sentence-transformers and NumPy are optional. Without sentence-transformers
+texts are embedded with hashed character trigrams; without NumPy scoring
+falls back to pure Python.
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.budget.budget import Budget
+from models.embedding.text_embedding import TextEmbedding
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.cache import LRUCache
+from utils.data_version import BUDGET_DATA, get_data_version
+from utils.logger import get_logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = get_logger(__name__)
+
+AI_CATEGORIZATION = os.getenv("AI_CATEGORIZATION", "false").lower() == "true"
+AI_CATEGORIZATION_MODEL = os.getenv("AI_CATEGORIZATION_MODEL", "all-MiniLM-L6-v2")
+AI_CATEGORIZATION_BATCH_SIZE = int(os.getenv("AI_CATEGORIZATION_BATCH_SIZE", "64"))
+# Minimum cosine similarity for a match to be applied
+AI_CATEGORIZATION_THRESHOLD = float(os.getenv("AI_CATEGORIZATION_THRESHOLD", "0.7"))
+AI_EMBEDDING_CACHE_ENTRIES = int(os.getenv("AI_EMBEDDING_CACHE_ENTRIES", "10000"))
+AI_SIGNATURE_REFRESH_SECONDS = int(os.getenv("AI_SIGNATURE_REFRESH_SECONDS", "600"))
+
+# Plaid's catch-all category, the only one the categorizer overrides
+UNCATEGORIZED = "OTHER"
+# Recent transactions per category folded into its embedding
+SIGNATURE_SAMPLES = 20
+LOOKUP_BATCH_SIZE = 500
+MAX_TEXT_LENGTH = 255
+
+_NOT_LETTERS = re.compile(r"[^a-z&']+")
+
+_categorizer_lock = threading.Lock()
+_categorizer = None
+
+
+def normalize_text(name: str, merchant: str = None) -> str:
+    """
+    Lowercase merchant and name and drop digits and punctuation, so
+    "STARBUCKS #1234" and "Starbucks 0042" share one embedding.
+    """
+    parts = []
+    for part in (merchant, name):
+        part = " ".join(_NOT_LETTERS.sub(" ", (part or "").lower()).split())
+        if part and part not in parts:
+            parts.append(part)
+    return " ".join(parts)[:MAX_TEXT_LENGTH]
+
+
+def unit_vector(vector):
+    if np is not None:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    norm = math.sqrt(sum(value * value for value in vector))
+    return array("f", (value / norm for value in vector) if norm else vector)
+
+
+def pack_vector(vector) -> bytes:
+    if np is not None:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes):
+    if np is not None:
+        return np.frombuffer(blob, dtype=np.float32)
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector
+
+
+def best_matches(vectors: list, matrix) -> list[tuple]:
+    """
+    Score unit vectors against the rows of a label matrix.
+
+    Returns:
+        list[tuple]: (row index, cosine similarity) of the best row per vector
+    """
+    if np is not None:
+        scores = np.vstack(vectors) @ matrix.T
+        best = scores.argmax(axis=1)
+        return list(zip(best.tolist(), scores[np.arange(len(best)), best].tolist()))
+
+    results = []
+    for vector in vectors:
+        scores = [sum(a * b for a, b in zip(vector, row)) for row in matrix]
+        index = max(range(len(scores)), key=scores.__getitem__)
+        results.append((index, scores[index]))
+    return results
+
+
+class HashingEncoder:
+    """
+    Embeds text as hashed character trigrams. Needs no model download, but
+    only matches texts that share spelling, not meaning.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def encode(self, texts: list[str]) -> list:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimensions
+            padded = f" {text} "
+            for start in range(len(padded) - 2):
+                hashed = zlib.crc32(padded[start : start + 3].encode("utf-8"))
+                vector[hashed % self.dimensions] += -1.0 if hashed & 1 else 1.0
+            vectors.append(unit_vector(vector))
+        return vectors
+
+
+class SentenceTransformerEncoder:
+    """Embeds text with a sentence-transformers model, on the CPU."""
+
+    def __init__(self, model_name: str, batch_size: int = AI_CATEGORIZATION_BATCH_SIZE):
+        self.name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: list[str]) -> list:
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                logger.info(f"🧠 Loading embedding model {self.name}")
+                self._model = SentenceTransformer(self.name, device="cpu")
+        vectors = self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return list(vectors.astype("float32"))
+
+
+def create_encoder(model_name: str = AI_CATEGORIZATION_MODEL):
+    if model_name == HashingEncoder.name:
+        return HashingEncoder()
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        logger.error(
+            "❌ sentence-transformers is not installed, using hashed trigram embeddings"
+        )
+        return HashingEncoder()
+    return SentenceTransformerEncoder(model_name)
+
+
+@dataclass(frozen=True)
+class CategoryTarget:
+    """A category/subcategory a transaction can be filed under."""
+
+    category_id: str
+    subcategory_id: str
+    label: str
+    budget_id: str = None
+
+
+class BudgetCategorizer:
+    """
+    Batched embedding pipeline; see the module docstring.
+
+    Args:
+        encoder: Object with a `name` and `encode(texts)` returning unit vectors
+        batch_size: Texts per encoder call
+        cache_entries: Size of the in-process embedding LRU
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        batch_size: int = AI_CATEGORIZATION_BATCH_SIZE,
+        cache_entries: int = AI_EMBEDDING_CACHE_ENTRIES,
+    ):
+        self.encoder = encoder or create_encoder()
+        self.batch_size = batch_size
+        self.memory = LRUCache("embeddings", cache_entries)
+        self.encoded = 0
+        self._labels_lock = threading.Lock()
+        self._labels = None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.encoder.name}\n{text}".encode("utf-8")).hexdigest()
+
+    def embed(self, texts: list[str]) -> dict:
+        """
+        Embeddings of normalized texts, encoding only those never seen.
+
+        Returns:
+            dict: Text to unit vector
+        """
+        vectors = {}
+        keys = {}
+        for text in dict.fromkeys(texts):
+            key = self.key(text)
+            vector = self.memory.get(key, None)
+            if vector is None:
+                keys[key] = text
+            else:
+                vectors[text] = vector
+
+        key_list = list(keys)
+        table = TextEmbedding.__table__
+        for start in range(0, len(key_list), LOOKUP_BATCH_SIZE):
+            rows = db.session.execute(
+                select(table.c.key, table.c.vector).where(
+                    table.c.key.in_(key_list[start : start + LOOKUP_BATCH_SIZE])
+                )
+            )
+            for key, blob in rows:
+                vector = unpack_vector(blob)
+                self.memory.set(key, vector)
+                vectors[keys.pop(key)] = vector
+
+        missing = list(keys.items())
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start : start + self.batch_size]
+            encoded = self.encoder.encode([text for _, text in batch])
+            rows = []
+            for (key, text), vector in zip(batch, encoded):
+                self.memory.set(key, vector)
+                vectors[text] = vector
+                rows.append(
+                    {
+                        "key": key,
+                        "model": self.encoder.name,
+                        "text": text,
+                        "vector": pack_vector(vector),
+                    }
+                )
+            self._store(rows)
+            self.encoded += len(batch)
+        return vectors
+
+    def _store(self, rows: list[dict]):
+        # Written outside the caller's session so a conflict cannot roll it back
+        table = TextEmbedding.__table__
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table), rows)
+        except IntegrityError:
+            # Another process embedded some of the same texts first
+            for row in rows:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(table).values(**row))
+                except IntegrityError:
+                    pass
+
+    def category_targets(self) -> tuple[list, dict]:
+        """
+        Every category/subcategory except OTHER, plus categories budgeted
+        without a subcategory, with their label text and sample transactions.
+
+        Returns:
+            tuple: (targets, {(category_id, subcategory_id): [sample texts]})
+        """
+        budgets = {
+            (category_id, subcategory_id): budget_id
+            for budget_id, category_id, subcategory_id in db.session.execute(
+                select(Budget.id, Budget.category_id, Budget.subcategory_id)
+            )
+        }
+        rows = db.session.execute(
+            select(
+                TxnCategory.id,
+                TxnCategory.name,
+                TxnSubcategory.id,
+                TxnSubcategory.name,
+                TxnSubcategory.description,
+            )
+            .join(TxnSubcategory, TxnSubcategory.category_id == TxnCategory.id)
+            .where(
+                TxnCategory.name != UNCATEGORIZED, TxnSubcategory.name != UNCATEGORIZED
+            )
+        ).all()
+
+        targets = []
+        category_names = {}
+        for category_id, category, subcategory_id, subcategory, description in rows:
+            category_names[category_id] = category
+            label = normalize_text(f"{subcategory.replace('_', ' ')} {description or ''}")
+            targets.append(
+                CategoryTarget(
+                    category_id,
+                    subcategory_id,
+                    label,
+                    budgets.get((category_id, subcategory_id)),
+                )
+            )
+        for (category_id, subcategory_id), budget_id in budgets.items():
+            if subcategory_id is None and category_id in category_names:
+                label = normalize_text(category_names[category_id].replace("_", " "))
+                targets.append(CategoryTarget(category_id, None, label, budget_id))
+
+        ranked = select(
+            Txn.category_id,
+            Txn.subcategory_id,
+            Txn.name,
+            Txn.merchant,
+            func.row_number()
+            .over(
+                partition_by=(Txn.category_id, Txn.subcategory_id),
+                order_by=Txn.date.desc(),
+            )
+            .label("rank"),
+        ).subquery()
+        samples = {}
+        for category_id, subcategory_id, name, merchant in db.session.execute(
+            select(
+                ranked.c.category_id,
+                ranked.c.subcategory_id,
+                ranked.c.name,
+                ranked.c.merchant,
+            ).where(ranked.c.rank <= SIGNATURE_SAMPLES)
+        ):
+            text = normalize_text(name, merchant)
+            for key in ((category_id, subcategory_id), (category_id, None)):
+                samples.setdefault(key, set()).add(text)
+        return targets, samples
+
+    def labels(self) -> tuple[list, object]:
+        """
+        The label matrix: one row per category label and one per recent
+        transaction text filed under it, so a merchant the user already
+        categorized matches its category almost exactly.
+
+        Returns:
+            tuple: (CategoryTarget of each row, matrix of unit row vectors)
+        """
+        version = get_data_version(BUDGET_DATA)
+        with self._labels_lock:
+            if self._labels is not None:
+                built_version, built_at, row_targets, matrix = self._labels
+                fresh = time.monotonic() - built_at < AI_SIGNATURE_REFRESH_SECONDS
+                if built_version == version or fresh:
+                    return row_targets, matrix
+
+            targets, samples = self.category_targets()
+            row_targets, row_texts = [], []
+            for target in targets:
+                key = (target.category_id, target.subcategory_id)
+                for text in [target.label, *sorted(samples.get(key, ()))]:
+                    row_targets.append(target)
+                    row_texts.append(text)
+
+            vectors = self.embed(row_texts)
+            rows = [vectors[text] for text in row_texts]
+            matrix = np.vstack(rows) if np is not None and rows else rows
+            self._labels = (version, time.monotonic(), row_targets, matrix)
+            logger.info(
+                f"🧠 Built {len(rows)} label embeddings for {len(targets)} categories"
+            )
+            return row_targets, matrix
+
+    def categorize(self, txns: list[dict]) -> list:
+        """
+        Best category for each transaction dict (name and merchant).
+
+        Returns:
+            list: (CategoryTarget, similarity) per transaction, None when the
+                transaction has no text or there are no categories
+        """
+        texts = [normalize_text(txn.get("name"), txn.get("merchant")) for txn in txns]
+        unique = [text for text in dict.fromkeys(texts) if text]
+        if not unique:
+            return [None] * len(txns)
+        row_targets, matrix = self.labels()
+        if not row_targets:
+            return [None] * len(txns)
+
+        vectors = self.embed(unique)
+        matches = best_matches([vectors[text] for text in unique], matrix)
+        by_text = {
+            text: (row_targets[index], score)
+            for text, (index, score) in zip(unique, matches)
+        }
+        return [by_text.get(text) for text in texts]
+
+
+def get_categorizer() -> BudgetCategorizer:
+    global _categorizer
+    with _categorizer_lock:
+        if _categorizer is None:
+            _categorizer = BudgetCategorizer()
+        return _categorizer
+
+
+def apply_ai_categorization(
+    txn_dicts: list[dict],
+    threshold: float = AI_CATEGORIZATION_THRESHOLD,
+    categorizer: BudgetCategorizer = None,
+) -> int:
+    """
+    Re-categorize, in place, transaction dicts Plaid filed under OTHER when
+    the categorizer is confident enough.
+
+    Returns:
+        int: The number of transactions re-categorized
+    """
+    uncategorized = set(
+        db.session.execute(
+            select(TxnCategory.id).where(TxnCategory.name == UNCATEGORIZED)
+        ).scalars()
+    )
+    pending = [txn for txn in txn_dicts if txn.get("category_id") in uncategorized]
+    if not pending:
+        return 0
+
+    try:
+        matches = (categorizer or get_categorizer()).categorize(pending)
+    except Exception as e:
+        # A missing model must not fail the sync; Plaid's category stands
+        logger.error(f"❌ AI categorization failed, keeping Plaid categories: {e}")
+        return 0
+
+    applied = 0
+    for txn, match in zip(pending, matches):
+        if match and match[1] >= threshold:
+            target = match[0]
+            txn["category_id"] = target.category_id
+            txn["subcategory_id"] = target.subcategory_id
+            applied += 1
+    return applied
@@ -0,0 +1,166 @@
+"""
+Budget pace forecasting.
+
+Each budget's completed periods (up to BUDGET_FORECAST_HISTORY of them) are
+reduced to spend curves: for every point of a fixed grid over the period,
+how much was still spent between that point and the period end. The grid
+has one point per day of the longest period (7, 31 or 366), so months of
+different lengths line up by the share of the period elapsed.
+
+The curves are cached per budget and current period, transposed so the
+values needed for a forecast are one row. Forecasting the current period
+is then a lookup plus a mean and a count over at most
+BUDGET_FORECAST_HISTORY numbers: every historical remainder added to what
+was spent so far is one possible outcome.
+"""
+
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_frequency import BudgetFrequency
+from models.budget.budget_utils import (
+    get_daily_spent,
+    get_frequency_period_end_date,
+    get_frequency_period_start_date,
+    get_period_window,
+)
+from models.transaction.txn import Txn
+from utils.cache import VersionedCache, shared_backend
+
+BUDGET_FORECAST_HISTORY = int(os.getenv("BUDGET_FORECAST_HISTORY", "12"))
+
+# Days in the longest period of each frequency
+GRID_POINTS = {
+    BudgetFrequency.WEEKLY: 7,
+    BudgetFrequency.MONTHLY: 31,
+    BudgetFrequency.YEARLY: 366,
+}
+
+# Remaining-spend curves per (budget, current period)
+forecast_cache = VersionedCache("budget_forecast", shared=shared_backend())
+
+
+def grid_point(elapsed_days: int, total_days: int, points: int) -> int:
+    """The grid point reached after `elapsed_days` of a `total_days` period."""
+    return round(elapsed_days / total_days * points)
+
+
+def remaining_curve(daily: list[float], points: int) -> list[float]:
+    """
+    Spending still to come at each grid point of one period.
+
+    Args:
+        daily: Spending per day of the period
+        points: Grid points; the curve has points + 1 values, from the
+            whole period's total down to 0.0
+
+    Returns:
+        list: The remainder after each grid point
+    """
+    # Day `offset` counts as remaining until the grid reaches its end
+    steps = [0.0] * (points + 1)
+    for offset, amount in enumerate(daily):
+        steps[grid_point(offset + 1, len(daily), points)] += amount
+    curve, remaining = [], sum(daily)
+    for step in steps:
+        remaining -= step
+        curve.append(round(remaining, 2))
+    return curve
+
+
+def spend_curves(budget: Budget, period_start: datetime) -> list[list[float]]:
+    """
+    Remaining-spend curves of the completed periods before `period_start`.
+
+    Periods that began before the first transaction are left out, since
+    their spending is only partly known.
+
+    Returns:
+        list: One row per grid point, holding the remainder of every
+        historical period at that point; empty without history
+    """
+    first_txn_date = db.session.query(func.min(Txn.date)).scalar()
+    if not first_txn_date or first_txn_date >= period_start:
+        return []
+    first_day = first_txn_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    history = [
+        (start, end)
+        for start, end in get_period_window(
+            budget.frequency,
+            period_start - timedelta(days=1),
+            start=first_day,
+            limit=BUDGET_FORECAST_HISTORY,
+        )
+        if start >= first_day
+    ]
+    if not history:
+        return []
+
+    starts = [start for start, _ in history]
+    daily = [[0.0] * ((end - start).days + 1) for start, end in history]
+    for day, amount in get_daily_spent(budget, history[0][0], history[-1][1]):
+        index = bisect_right(starts, day) - 1
+        if index >= 0 and day <= history[index][1]:
+            daily[index][(day - starts[index]).days] += float(amount)
+
+    points = GRID_POINTS[budget.frequency]
+    curves = [remaining_curve(period, points) for period in daily]
+    return [list(row) for row in zip(*curves)]
+
+
+def get_spend_curves(budget: Budget, period_start: datetime) -> list[list[float]]:
+    """spend_curves, cached until transactions or budgets change."""
+    return forecast_cache.get_or_compute(
+        (budget.id, budget.frequency.value, period_start.date().isoformat()),
+        lambda: spend_curves(budget, period_start),
+    )
+
+
+def forecast_budget(budget: Budget, spent: float, today: datetime) -> dict:
+    """
+    Projected spending at the end of the period containing `today`.
+
+    Without history the spending so far is extrapolated linearly and the
+    overrun probability is unknown.
+
+    Args:
+        budget: The budget
+        spent: Spending against it so far this period
+        today: A date inside the current period
+
+    Returns:
+        dict: projected_spent_amount, overrun_probability (the share of
+        historical periods whose pace would exceed the limit) and
+        history_periods
+    """
+    today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = get_frequency_period_start_date(budget.frequency, today)
+    end = get_frequency_period_end_date(budget.frequency, start)
+    elapsed_days = (today - start).days + 1
+    total_days = (end - start).days + 1
+
+    curves = get_spend_curves(budget, start)
+    if not curves:
+        return {
+            "projected_spent_amount": round(spent / elapsed_days * total_days, 2),
+            "overrun_probability": None,
+            "history_periods": 0,
+        }
+
+    remaining = curves[
+        grid_point(elapsed_days, total_days, GRID_POINTS[budget.frequency])
+    ]
+    outcomes = [spent + value for value in remaining]
+    limit = float(budget.amount)
+    return {
+        "projected_spent_amount": round(sum(outcomes) / len(outcomes), 2),
+        "overrun_probability": round(
+            sum(outcome > limit for outcome in outcomes) / len(outcomes), 2
+        ),
+        "history_periods": len(outcomes),
+    }
@@ -0,0 +1,196 @@
+"""
+Versioned result caches.
+
+A VersionedCache memoizes JSON-serializable results keyed by the arguments
+and the current data version (see utils.data_version). Any write to the
+underlying data bumps the version, so stale entries are never returned and
+nothing has to be invalidated explicitly.
+
+Every process keeps a bounded in-memory LRU. With CACHE_BACKEND=database,
+misses also go through the `cache_entry` table, so server processes and job
+workers reuse each other's results without extra infrastructure.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.cache.cache_entry import CacheEntry
+from utils.data_version import BUDGET_DATA, get_data_version
+from utils.logger import get_logger
+from utils.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+logger = get_logger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+# "memory" (per process) or "database" (shared through the cache_entry table)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_SHARED_MAX_ENTRIES = int(os.getenv("CACHE_SHARED_MAX_ENTRIES", "2048"))
+
+_MISSING = object()
+# Every VersionedCache, so clear_caches() can reach them
+_caches = []
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry when full."""
+
+    def __init__(self, name: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache=self.name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DatabaseCacheBackend:
+    """Stores entries in the cache_entry table, outside the request session."""
+
+    name = "database"
+
+    def __init__(self, max_entries: int = CACHE_SHARED_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+    def get(self, key: str):
+        table = CacheEntry.__table__
+        with db.engine.connect() as conn:
+            value = conn.execute(
+                select(table.c.value).where(table.c.key == key)
+            ).scalar()
+        return _MISSING if value is None else json.loads(value)
+
+    def set(self, key: str, version: int, value):
+        table = CacheEntry.__table__
+        values = dict(
+            version=version,
+            value=json.dumps(value, default=str),
+            created_at=datetime.now(),
+        )
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table).values(key=key, **values))
+        except IntegrityError:
+            # Another process cached the same key first
+            with db.engine.begin() as conn:
+                conn.execute(update(table).where(table.c.key == key).values(**values))
+        self.prune(version)
+
+    def prune(self, version: int):
+        """Drop entries of older data versions and the oldest beyond max_entries."""
+        table = CacheEntry.__table__
+        overflow = (
+            select(table.c.key)
+            .order_by(table.c.created_at.desc())
+            .offset(self.max_entries)
+            .scalar_subquery()
+        )
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.version < version))
+            conn.execute(delete(table).where(table.c.key.in_(overflow)))
+
+
+def shared_backend():
+    if CACHE_BACKEND == "database":
+        return DatabaseCacheBackend()
+    if CACHE_BACKEND != "memory":
+        logger.warning(f"⚠️ Unknown CACHE_BACKEND '{CACHE_BACKEND}', using memory")
+    return None
+
+
+def clear_caches():
+    """Empty the in-memory LRU of every VersionedCache (used by benchmarks)."""
+    for cache in _caches:
+        cache.clear()
+
+
+class VersionedCache:
+    """
+    Memoizes results by (arguments, data version).
+
+    Args:
+        name: Cache name, used in keys and metric labels
+        data: The data version the results depend on
+        max_entries: Size of the in-memory LRU
+        shared: Optional backend shared between processes
+    """
+
+    def __init__(
+        self,
+        name: str,
+        data: str = BUDGET_DATA,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        shared=None,
+    ):
+        self.name = name
+        self.data = data
+        self.local = LRUCache(name, max_entries)
+        self.shared = shared
+        self._version = None
+        _caches.append(self)
+
+    def key(self, version: int, args: tuple) -> str:
+        return f"{self.name}:{version}:{json.dumps(args, default=str)}"
+
+    def get_or_compute(self, args: tuple, compute):
+        """
+        Return the cached result for `args`, calling `compute()` on a miss.
+
+        The result must be JSON-serializable and must not be mutated by
+        callers, since the same object is handed to every hit.
+        """
+        version = get_data_version(self.data)
+        if version != self._version:
+            # Entries of older versions can never hit again
+            self.local.clear()
+            self._version = version
+        key = self.key(version, args)
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            CACHE_HITS.inc(cache=self.name, backend="memory")
+            return value
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not _MISSING:
+                CACHE_HITS.inc(cache=self.name, backend=self.shared.name)
+                self.local.set(key, value)
+                return value
+
+        CACHE_MISSES.inc(cache=self.name)
+        value = compute()
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, version, value)
+        return value
+
+    def clear(self):
+        self.local.clear()
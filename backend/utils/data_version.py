@@ -0,0 +1,102 @@
+"""
+Data versions for cache invalidation.
+
+Session listeners bump the `budget_data` version whenever transactions,
+budgets or categories are written, `categorization_rules` whenever rules are
+and `merchants` whenever merchants or their aliases are, whether through ORM
+objects or bulk INSERT/UPDATE/DELETE statements. The bump runs on the writing
+transaction's connection, so it commits or rolls back together with the write.
+"""
+
+import time
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import db
+from models.budget.budget import Budget
+from models.data_version.data_version import DataVersion
+from models.merchant.merchant import Merchant
+from models.merchant.merchant_alias import MerchantAlias
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+
+BUDGET_DATA = "budget_data"
+CATEGORIZATION_RULES = "categorization_rules"
+MERCHANTS = "merchants"
+
+# Models whose writes invalidate results cached under each version
+TRACKED_MODELS = {
+    Txn: BUDGET_DATA,
+    Budget: BUDGET_DATA,
+    TxnCategory: BUDGET_DATA,
+    TxnSubcategory: BUDGET_DATA,
+    CategorizationRule: CATEGORIZATION_RULES,
+    Merchant: MERCHANTS,
+    MerchantAlias: MERCHANTS,
+}
+
+# Session.info key holding the versions already bumped in this transaction
+_BUMPED = "data_versions_bumped"
+
+
+def get_data_version(name: str = BUDGET_DATA) -> int:
+    """The committed version of `name`, 0 if it was never written."""
+    table = DataVersion.__table__
+    version = db.session.execute(
+        select(table.c.version).where(table.c.name == name)
+    ).scalar()
+    return version or 0
+
+
+def _bump(session: Session, names: set):
+    # Once per transaction is enough: readers only see the committed value
+    bumped = session.info.setdefault(_BUMPED, set())
+    table = DataVersion.__table__
+    connection = session.connection()
+    for name in names - bumped:
+        updated = connection.execute(
+            update(table)
+            .where(table.c.name == name)
+            .values(version=table.c.version + 1)
+        ).rowcount
+        if not updated:
+            # Start from the clock so a recreated database never reuses
+            # versions that processes may still have cached results for
+            connection.execute(
+                insert(table).values(name=name, version=int(time.time() * 1000))
+            )
+        bumped.add(name)
+
+
+def _tracked_names(objects) -> set:
+    return {
+        TRACKED_MODELS[type(obj)] for obj in objects if type(obj) in TRACKED_MODELS
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    changed = [obj for obj in session.dirty if session.is_modified(obj)]
+    names = _tracked_names(session.new) | _tracked_names(changed)
+    names |= _tracked_names(session.deleted)
+    if names:
+        _bump(session, names)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    name = TRACKED_MODELS.get(mapper.class_) if mapper else None
+    if name:
+        _bump(state.session, {name})
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_bumped(session):
+    session.info.pop(_BUMPED, None)
@@ -0,0 +1,281 @@
+"""
+Streaming exports of transactions and budget periods.
+
+Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time and
+each batch is encoded and handed to the response before the next one is
+fetched, so an export's memory does not grow with its length. CSV output
+can be gzipped on the fly. Parquet output needs pyarrow, which is
+optional; each batch becomes one row group.
+"""
+
+import csv
+import io
+import os
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from models import db
+from models.budget.budget import Budget
+from models.budget.budget_utils import (
+    bucket_by_period,
+    get_daily_spent,
+    get_period_window,
+)
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+FORMATS = ("csv", "parquet")
+COMPRESSIONS = ("gzip",)
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "gzip": "application/gzip",
+}
+
+# (name, kind) of each exported column; kinds map to Parquet types
+TXN_COLUMNS = [
+    ("id", "string"),
+    ("date", "date"),
+    ("name", "string"),
+    ("amount", "amount"),
+    ("merchant", "string"),
+    ("merchant_id", "integer"),
+    ("account_id", "string"),
+    ("category", "string"),
+    ("subcategory", "string"),
+    ("channel", "string"),
+]
+BUDGET_PERIOD_COLUMNS = [
+    ("budget_id", "string"),
+    ("frequency", "string"),
+    ("category", "string"),
+    ("subcategory", "string"),
+    ("start_date", "date"),
+    ("end_date", "date"),
+    ("spent_amount", "amount"),
+    ("limit_amount", "amount"),
+]
+
+
+def transaction_batches(
+    start: datetime = None,
+    end: datetime = None,
+    account_id: str = None,
+    category_id: str = None,
+    subcategory_id: str = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+):
+    """
+    Transactions as TXN_COLUMNS tuples, oldest first, in lists of
+    `batch_size`.
+
+    Args:
+        start, end: Optional inclusive date range
+        account_id, category_id, subcategory_id: Optional exact filters
+        batch_size: Rows fetched and yielded at a time
+    """
+    filters = []
+    if start:
+        filters.append(Txn.date >= start)
+    if end:
+        filters.append(Txn.date < end + timedelta(days=1))
+    if account_id:
+        filters.append(Txn.account_id == account_id)
+    if category_id:
+        filters.append(Txn.category_id == category_id)
+    if subcategory_id:
+        filters.append(Txn.subcategory_id == subcategory_id)
+
+    statement = (
+        select(
+            Txn.id,
+            Txn.date,
+            Txn.name,
+            Txn.amount,
+            Txn.merchant,
+            Txn.merchant_id,
+            Txn.account_id,
+            TxnCategory.name,
+            TxnSubcategory.name,
+            Txn.channel,
+        )
+        .outerjoin(TxnCategory, TxnCategory.id == Txn.category_id)
+        .outerjoin(TxnSubcategory, TxnSubcategory.id == Txn.subcategory_id)
+        .where(*filters)
+        .order_by(Txn.date)
+        .execution_options(yield_per=batch_size)
+    )
+    # Core rows on the session's connection, without ORM row processing
+    for batch in db.session.connection().execute(statement).partitions():
+        yield [
+            (
+                row.id,
+                row.date.date() if row.date else None,
+                *row[2:9],
+                row.channel.value if row.channel else None,
+            )
+            for row in batch
+        ]
+
+
+def budget_period_batches(
+    frequency=None,
+    start: datetime = None,
+    end: datetime = None,
+    account_id: str = None,
+    category_id: str = None,
+):
+    """
+    Budget periods as BUDGET_PERIOD_COLUMNS tuples, one list per budget.
+
+    Each budget's spending over the whole window is one query summed per
+    day and bucketed into periods. Periods before the first transaction
+    are left out.
+
+    Args:
+        frequency: Optional BudgetFrequency of the budgets exported
+        start, end: Dates inside the first and last periods; `end`
+            defaults to today
+        account_id: Only count spending from this account
+        category_id: Only export budgets of this category
+    """
+    first_txn_date = db.session.query(func.min(Txn.date)).scalar()
+    end = end or datetime.today()
+    if not first_txn_date or first_txn_date > end:
+        return
+    start = max(start, first_txn_date) if start else first_txn_date
+
+    statement = select(Budget).order_by(Budget.frequency, Budget.id)
+    if frequency:
+        statement = statement.where(Budget.frequency == frequency)
+    if category_id:
+        statement = statement.where(Budget.category_id == category_id)
+
+    windows = {}
+    for budget in db.session.execute(statement).scalars():
+        if budget.frequency not in windows:
+            windows[budget.frequency] = get_period_window(
+                budget.frequency, end, start=start
+            )
+        window = windows[budget.frequency]
+        spent = bucket_by_period(
+            get_daily_spent(budget, window[0][0], window[-1][1], account_id), window
+        )
+        yield [
+            (
+                budget.id,
+                budget.frequency.value,
+                budget.category.name,
+                budget.subcategory.name if budget.subcategory else None,
+                period_start.date(),
+                period_end.date(),
+                Decimal(f"{amount:.2f}"),
+                budget.amount,
+            )
+            for (period_start, period_end), amount in zip(window, spent)
+        ]
+
+
+def csv_chunks(columns: list, batches):
+    """A header line, then the CSV encoding of each batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """A write-only file that keeps what was written until it is taken."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_type(kind: str):
+    return {
+        "string": pa.string(),
+        "date": pa.date32(),
+        "integer": pa.int64(),
+        "amount": pa.decimal128(10, 2),
+    }[kind]
+
+
+def parquet_chunks(columns: list, batches):
+    """A Parquet file with one row group per batch, yielded as it is written."""
+    schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            if not batch:
+                continue
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(zip(*batch), schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.take()
+    yield sink.take()
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of chunks as they come."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(columns: list, batches, file_format: str, compression: str = None):
+    """
+    Encode `batches` of `columns` rows as `file_format` ("csv" or
+    "parquet"), gzipped if `compression` is "gzip".
+    """
+    if file_format == "parquet":
+        if pa is None:
+            raise RuntimeError("Parquet export requires pyarrow")
+        chunks = parquet_chunks(columns, batches)
+    else:
+        chunks = csv_chunks(columns, batches)
+    return gzip_chunks(chunks) if compression == "gzip" else chunks
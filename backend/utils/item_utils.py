@@ -0,0 +1,98 @@
+from sqlalchemy import delete, select
+
+from models import db
+from models.account.account import Account
+from models.item.item import Item
+from models.item.item_sync_lease import ItemSyncLease
+from models.recurring.recurring_series import RecurringSeries
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn import Txn
+from utils.job_queue import job_handler
+from utils.logger import get_logger
+from utils.token_backup import get_token_backup
+
+logger = get_logger(__name__)
+
+
+def bulk_delete_item(item_id: str) -> dict:
+    """
+    Delete an item together with its accounts, transactions, recurring series
+    and the categorization rules scoped to its accounts, using set-based
+    DELETE statements in a single database transaction.
+
+    Rows are removed directly in SQL instead of being loaded into the session
+    first, so the cost no longer depends on how much history the item has.
+
+    Args:
+        item_id: The Plaid item ID to delete
+
+    Returns:
+        dict: Number of deleted accounts and transactions
+    """
+    account_ids = select(Account.id).where(Account.item_id == item_id)
+
+    try:
+        deleted_txns = db.session.execute(
+            delete(Txn)
+            .where(Txn.account_id.in_(account_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.execute(
+            delete(RecurringSeries)
+            .where(RecurringSeries.account_id.in_(account_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(CategorizationRule)
+            .where(CategorizationRule.account_id.in_(account_ids))
+            .execution_options(synchronize_session=False)
+        )
+        deleted_accounts = db.session.execute(
+            delete(Account)
+            .where(Account.item_id == item_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        db.session.execute(
+            delete(ItemSyncLease)
+            .where(ItemSyncLease.item_id == item_id)
+            .execution_options(synchronize_session=False)
+        )
+
+        item = db.session.get(Item, item_id)
+        if item:
+            db.session.delete(item)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Objects already in the session may still reference deleted rows
+    db.session.expire_all()
+
+    logger.info(
+        f"🗑️ Bulk deleted item {item_id}: {deleted_accounts} accounts, "
+        f"{deleted_txns} transactions"
+    )
+    return {"accounts": deleted_accounts, "transactions": deleted_txns}
+
+
+@job_handler("backup_token")
+def backup_token_job(item_id: str, environment: str) -> dict:
+    """
+    Background job that backs up an item's access token to S3.
+
+    Args:
+        item_id: The item whose access token is backed up
+        environment: The Plaid environment (sandbox/production)
+
+    Returns:
+        dict: The backed up item ID
+    """
+    item = db.session.get(Item, item_id)
+    if not item:
+        raise LookupError(f"Item {item_id} not found")
+    # backup_token reports failure instead of raising; raise so the job retries
+    if not get_token_backup().backup_token(item.id, item.access_token, environment):
+        raise RuntimeError(f"Token backup for item {item_id} failed")
+    return {"item_id": item_id}
@@ -0,0 +1,341 @@
+"""
+Durable background jobs stored in the app database.
+
+Jobs are rows in the `job` table. Workers claim a job by setting a lease on
+it with a conditional UPDATE, which is safe on SQLite and uses
+SKIP LOCKED where the database supports it. Failed jobs are retried with
+exponential backoff until `max_attempts` is reached, and a job whose worker
+died is picked up again once its lease expires. Long jobs call
+`report_progress`, which shows how far they got and renews their lease.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.job.job import Job
+from models.job.job_state import JobState
+from utils.logger import get_logger
+from utils.metrics import JOB_DURATION, JOBS_ENQUEUED
+
+logger = get_logger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+MAX_RETRY_DELAY_SECONDS = 3600
+CLAIM_CANDIDATES = 5
+
+_handlers = {}
+# Set on enqueue so in-process workers pick new jobs up without polling
+_wakeup = threading.Event()
+# The (job id, lease owner) each worker thread is running
+_running = threading.local()
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for jobs of `kind`."""
+
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+
+    return decorator
+
+
+def enqueue_job(
+    kind: str,
+    payload: dict = None,
+    idempotency_key: str = None,
+    max_attempts: int = 3,
+) -> Job:
+    """
+    Persist a job for a background worker.
+
+    Args:
+        kind: Registered job kind, e.g. "sync_item"
+        payload: JSON-serializable keyword arguments for the handler
+        idempotency_key: Enqueuing again with the same key returns the
+            existing job instead of creating a new one
+        max_attempts: Runs before the job is marked failed
+
+    Returns:
+        Job: The new or existing job
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    if idempotency_key:
+        existing = Job.query.filter_by(idempotency_key=idempotency_key).one_or_none()
+        if existing:
+            return existing
+
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts,
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request enqueued the same key first
+        db.session.rollback()
+        return Job.query.filter_by(idempotency_key=idempotency_key).one()
+
+    JOBS_ENQUEUED.inc(kind=kind)
+    logger.info(f"📥 Enqueued {kind} job {job.id}")
+    _wakeup.set()
+    return job
+
+
+def _claimable(job_table, now):
+    return or_(
+        and_(job_table.c.state == JobState.QUEUED, job_table.c.next_run_at <= now),
+        and_(
+            job_table.c.state == JobState.RUNNING,
+            job_table.c.lease_expires_at < now,
+        ),
+    )
+
+
+def claim_job(owner: str) -> Job:
+    """
+    Lease the next due job to `owner`.
+
+    Returns:
+        Job: The claimed job, or None if nothing is due
+    """
+    job_table = Job.__table__
+    now = datetime.now()
+
+    with db.engine.begin() as conn:
+        candidates = conn.execute(
+            select(job_table.c.id)
+            .where(_claimable(job_table, now))
+            .order_by(job_table.c.next_run_at)
+            .limit(CLAIM_CANDIDATES)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        claimed_id = None
+        for job_id in candidates:
+            # Re-checking the condition makes the claim atomic without row locks
+            claimed = conn.execute(
+                update(job_table)
+                .where(job_table.c.id == job_id, _claimable(job_table, now))
+                .values(
+                    state=JobState.RUNNING,
+                    lease_owner=owner,
+                    lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    attempts=job_table.c.attempts + 1,
+                )
+            ).rowcount
+            if claimed:
+                claimed_id = job_id
+                break
+
+    if claimed_id is None:
+        return None
+    return db.session.get(Job, claimed_id, populate_existing=True)
+
+
+def retry_delay(attempts: int) -> float:
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+
+def _finish_job(job: Job, owner: str, **values):
+    job_table = Job.__table__
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(job_table)
+            .where(job_table.c.id == job.id, job_table.c.lease_owner == owner)
+            .values(lease_owner=None, lease_expires_at=None, **values)
+        )
+
+
+def report_progress(progress: dict) -> bool:
+    """
+    Store `progress` as the result of the job this thread is running, so
+    GET /api/job/<id> shows it, and renew the job's lease. Does nothing
+    outside a job.
+
+    Returns:
+        bool: True if a job's progress was stored
+    """
+    running = getattr(_running, "job", None)
+    if running is None:
+        return False
+    job_id, owner = running
+    job_table = Job.__table__
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(job_table)
+            .where(job_table.c.id == job_id, job_table.c.lease_owner == owner)
+            .values(
+                result=json.dumps(progress, default=str),
+                lease_expires_at=datetime.now() + timedelta(seconds=JOB_LEASE_SECONDS),
+            )
+        )
+    return True
+
+
+def run_job(job: Job, owner: str) -> bool:
+    """
+    Run a claimed job and record its outcome.
+
+    Returns:
+        bool: True if the job succeeded
+    """
+    handler = _handlers.get(job.kind)
+    started_at = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("Lease expired on every attempt")
+        _running.job = (job.id, owner)
+        result = handler(**json.loads(job.payload))
+    except Exception as e:
+        db.session.rollback()
+        JOB_DURATION.observe(time.perf_counter() - started_at, kind=job.kind, outcome="error")
+        if job.attempts < job.max_attempts and handler is not None:
+            delay = retry_delay(job.attempts)
+            logger.warning(
+                f"⚠️ Job {job.id} ({job.kind}) failed on attempt {job.attempts}, "
+                f"retrying in {delay:.0f}s: {e}"
+            )
+            _finish_job(
+                job,
+                owner,
+                state=JobState.QUEUED,
+                next_run_at=datetime.now() + timedelta(seconds=delay),
+                error=str(e),
+            )
+        else:
+            logger.error(f"❌ Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+            _finish_job(
+                job, owner, state=JobState.FAILED, error=str(e), finished_at=datetime.now()
+            )
+        return False
+    finally:
+        _running.job = None
+
+    JOB_DURATION.observe(time.perf_counter() - started_at, kind=job.kind, outcome="success")
+    _finish_job(
+        job,
+        owner,
+        state=JobState.SUCCEEDED,
+        result=json.dumps(result, default=str),
+        error=None,
+        finished_at=datetime.now(),
+    )
+    logger.info(f"✅ Job {job.id} ({job.kind}) succeeded")
+    return True
+
+
+def worker_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def run_next_job(owner: str = None) -> bool:
+    """
+    Claim and run one due job. Must be called inside an app context.
+
+    Returns:
+        bool: True if a job was run
+    """
+    owner = owner or worker_owner()
+    job = claim_job(owner)
+    if job is None:
+        return False
+    run_job(job, owner)
+    return True
+
+
+def run_pending_jobs(limit: int = None) -> int:
+    """Run due jobs until none are left, returning how many ran."""
+    owner = worker_owner()
+    count = 0
+    while (limit is None or count < limit) and run_next_job(owner):
+        count += 1
+    return count
+
+
+class JobWorker:
+    """Threads that poll the job table and run due jobs."""
+
+    def __init__(self, app, threads: int = JOB_WORKERS, poll_seconds: float = JOB_POLL_SECONDS):
+        self.app = app
+        self.threads = threads
+        self.poll_seconds = poll_seconds
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def _loop(self):
+        owner = worker_owner()
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    ran = run_next_job(owner)
+            except Exception as e:
+                logger.error(f"❌ Job worker error: {e}", exc_info=True)
+                ran = False
+            if not ran:
+                _wakeup.wait(self.poll_seconds)
+                _wakeup.clear()
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(
+                target=self._loop, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"👷 Started {self.threads} job worker thread(s)")
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_forever(self):
+        self.start()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(self.poll_seconds)
+        except KeyboardInterrupt:
+            self.stop()
+
+
+def init_job_queue(app):
+    """
+    Start in-process job workers with the first request the app serves.
+
+    Set JOB_WORKERS=0 to run jobs only in separate `python worker.py`
+    processes. Workers are never started for testing apps.
+    """
+    started = threading.Lock()
+    state = {"worker": None}
+
+    def start_workers():
+        if state["worker"] is not None or app.testing or JOB_WORKERS <= 0:
+            return
+        with started:
+            if state["worker"] is None:
+                state["worker"] = JobWorker(app)
+                state["worker"].start()
+
+    app.before_request(start_workers)
@@ -1,24 +1,165 @@
 # logger.py
+import atexit
+import itertools
+import json
 import logging
 import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s"
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as text lines or, with LOG_FORMAT=json, as JSON lines.
+
+    Structured fields are passed with `extra={"fields": {...}}` and appended
+    as key=value pairs in text mode.
+    """
+
+    def __init__(self, json_lines: bool = False):
+        super().__init__(TEXT_FORMAT)
+        self.json_lines = json_lines
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        if self.json_lines:
+            payload = {
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                payload["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(payload, default=str)
+
+        line = super().format(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class lazy:
+    """
+    Defers an expensive log argument until the record is actually formatted,
+    e.g. logger.debug("data: %s", lazy(pformat, data)).
+    """
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return str(self.fn(*self.args))
+
+
+class SampledLogger:
+    """
+    Passes through only every Nth call for high-volume per-row logs.
+
+    A rate of 1.0 logs everything, 0.01 logs one call in a hundred and 0
+    disables the logs. The level check happens first, so disabled levels
+    cost a single method call.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float):
+        self.logger = logger
+        self.every = int(round(1 / rate)) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def _log(self, level, msg, *args, **kwargs):
+        if not self.every or not self.logger.isEnabledFor(level):
+            return
+        if next(self._counter) % self.every == 0:
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, *args, **kwargs)
+
+
+def get_log_level() -> int:
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    return getattr(logging, log_level, logging.INFO)
+
+
+# Records are queued on the calling thread and written to stdout by a
+# background listener, so request threads never block on log I/O
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(
+    StructuredFormatter(json_lines=os.getenv("LOG_FORMAT", "text") == "json")
+)
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_log_queue, _stream_handler)
+            _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def flush_logs():
+    """Block until every queued record has been written."""
+    if _listener is not None:
+        _stop_listener()
+        _ensure_listener()
+
+
+def set_log_stream(stream):
+    """Redirect log output, e.g. to os.devnull in benchmarks."""
+    flush_logs()
+    try:
+        _stream_handler.setStream(stream)
+    except ValueError:
+        # The previous stream was already closed, so there is nothing to flush
+        _stream_handler.stream = stream
+
 
 def get_logger(name=__name__):
     logger = logging.getLogger(name)
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-    logger.setLevel(getattr(logging, log_level, logging.INFO))
+    logger.setLevel(get_log_level())
 
     if not logger.hasHandlers():
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        _ensure_listener()
+        logger.addHandler(_queue_handler)
 
     return logger
+
+
+def get_sampled_logger(name=__name__, rate: float = None) -> SampledLogger:
+    """Logger for per-row messages, sampled at LOG_SAMPLE_RATE by default."""
+    if rate is None:
+        rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    return SampledLogger(get_logger(name), rate)
@@ -0,0 +1,297 @@
+"""
+Canonical merchants for transactions.
+
+Plaid's merchant_name is kept on each transaction as received, and
+`merchant_id` points it at a row in `merchant`, which holds the logo once.
+Spellings resolve to merchants through `merchant_alias`, keyed by
+`merchant_key`. Ingestion resolves a whole page at once against an
+in-memory alias map that is reloaded only after the `merchants` data
+version changes, so a page costs one version check plus one INSERT for
+any merchants it introduces.
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import inspect, insert, literal_column, select, text, union, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.merchant.merchant import Merchant
+from models.merchant.merchant_alias import MerchantAlias
+from models.recurring.recurring_series import RecurringSeries
+from models.transaction.txn import Txn
+from utils.data_version import MERCHANTS, get_data_version
+from utils.job_queue import job_handler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+MAX_NAME_LENGTH = 120
+
+_NOT_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+_alias_lock = threading.Lock()
+_alias_map = {"version": None, "aliases": {}, "without_logo": set()}
+
+
+def merchant_key(name: str) -> str:
+    """
+    The alias key for a merchant spelling: case folded, with punctuation
+    and extra spaces collapsed, so "Trader Joe's" and "TRADER JOE'S" share
+    one merchant. None for an empty name.
+    """
+    if not name:
+        return None
+    key = " ".join(_NOT_ALPHANUMERIC.sub(" ", name.casefold()).split())
+    return key[:MAX_NAME_LENGTH] or None
+
+
+def get_alias_map() -> tuple[dict, set]:
+    """
+    The alias key -> merchant id map, and the ids of merchants without a
+    logo, reloaded after any merchant write.
+    """
+    version = get_data_version(MERCHANTS)
+    with _alias_lock:
+        if _alias_map["version"] == version:
+            return _alias_map["aliases"], _alias_map["without_logo"]
+
+    aliases = dict(
+        db.session.execute(select(MerchantAlias.alias, MerchantAlias.merchant_id)).all()
+    )
+    without_logo = set(
+        db.session.execute(select(Merchant.id).where(Merchant.logo_url.is_(None))).scalars()
+    )
+    with _alias_lock:
+        _alias_map.update(version=version, aliases=aliases, without_logo=without_logo)
+    return aliases, without_logo
+
+
+def _insert_ignoring_duplicates(model, rows: list[dict]):
+    # All at once; if another process inserted some first, one by one
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(model), rows)
+    except IntegrityError:
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(model), [row])
+            except IntegrityError:
+                pass
+
+
+def create_merchants(new: dict) -> dict:
+    """
+    Find or create the merchants for alias keys that have none yet.
+
+    Args:
+        new: Alias key -> {"name", "logo_url"} of the first spelling seen
+
+    Returns:
+        dict: Alias key -> merchant id
+    """
+    names = {key: merchant["name"] for key, merchant in new.items()}
+    by_name = {merchant["name"]: merchant for merchant in new.values()}
+    _insert_ignoring_duplicates(Merchant, list(by_name.values()))
+    ids = dict(
+        db.session.execute(
+            select(Merchant.name, Merchant.id).where(Merchant.name.in_(list(by_name)))
+        ).all()
+    )
+    _insert_ignoring_duplicates(
+        MerchantAlias,
+        [{"alias": key, "merchant_id": ids[name]} for key, name in names.items()],
+    )
+    # A concurrent sync may have claimed a key for its own merchant first
+    return dict(
+        db.session.execute(
+            select(MerchantAlias.alias, MerchantAlias.merchant_id).where(
+                MerchantAlias.alias.in_(list(names))
+            )
+        ).all()
+    )
+
+
+def resolve_merchants(txn_dicts: list[dict]) -> int:
+    """
+    Set merchant_id on a batch of transaction dicts in place.
+
+    Each dict's `merchant` is looked up in the alias map; spellings not
+    seen before get a new merchant. `logo_url` is removed from the dicts
+    and stored on merchants that have no logo yet.
+
+    Returns:
+        int: The number of merchants created
+    """
+    aliases, without_logo = get_alias_map()
+
+    new = {}
+    for txn in txn_dicts:
+        key = merchant_key(txn.get("merchant"))
+        if key and key not in aliases and key not in new:
+            new[key] = {
+                "name": txn["merchant"].strip()[:MAX_NAME_LENGTH],
+                "logo_url": txn.get("logo_url"),
+            }
+    if new:
+        aliases = {**aliases, **create_merchants(new)}
+
+    logos = {}
+    for txn in txn_dicts:
+        merchant_id = aliases.get(merchant_key(txn.get("merchant")))
+        txn["merchant_id"] = merchant_id
+        logo_url = txn.pop("logo_url", None)
+        if logo_url and merchant_id in without_logo:
+            logos.setdefault(merchant_id, logo_url)
+
+    for merchant_id, logo_url in logos.items():
+        db.session.execute(
+            update(Merchant)
+            .where(Merchant.id == merchant_id, Merchant.logo_url.is_(None))
+            .values(logo_url=logo_url)
+            .execution_options(synchronize_session=False)
+        )
+    return len(new)
+
+
+def ensure_merchant_schema(connection=None):
+    """
+    Add txn.merchant_id to databases created before merchants existed;
+    `backfill_merchants` fills it in.
+    """
+    if connection is None:
+        with db.engine.begin() as connection:
+            return ensure_merchant_schema(connection)
+
+    columns = {column["name"] for column in inspect(connection).get_columns("txn")}
+    if "merchant_id" in columns:
+        return
+    logger.info("🏪 Adding txn.merchant_id, run the merchant backfill to fill it")
+    connection.execute(
+        text("ALTER TABLE txn ADD COLUMN merchant_id INTEGER REFERENCES merchant (id)")
+    )
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_txn_merchant_id ON txn (merchant_id)")
+    )
+
+
+@job_handler("backfill_merchants")
+def backfill_merchants() -> dict:
+    """
+    Resolve merchant_id for every stored transaction that has a merchant
+    name but no merchant yet.
+
+    Transactions are read in id order, BACKFILL_BATCH_SIZE at a time, and
+    written with one UPDATE ... WHERE id IN (...) per merchant and batch.
+    Logos left in the legacy txn.logo_url column move to their merchants
+    and are cleared from the transactions.
+
+    Returns:
+        dict: Transactions scanned and updated, and merchants created
+    """
+    legacy_logo = "logo_url" in {
+        column["name"] for column in inspect(db.session.connection()).get_columns("txn")
+    }
+    columns = [Txn.id, Txn.merchant]
+    if legacy_logo:
+        columns.append(literal_column("txn.logo_url"))
+
+    scanned = updated = created = 0
+    last_id = ""
+    while True:
+        rows = db.session.execute(
+            select(*columns)
+            .where(Txn.merchant_id.is_(None), Txn.merchant.is_not(None), Txn.id > last_id)
+            .order_by(Txn.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+
+        txn_dicts = [
+            {"id": row[0], "merchant": row[1], "logo_url": row[2] if legacy_logo else None}
+            for row in rows
+        ]
+        created += resolve_merchants(txn_dicts)
+
+        by_merchant = defaultdict(list)
+        for txn in txn_dicts:
+            if txn["merchant_id"] is not None:
+                by_merchant[txn["merchant_id"]].append(txn["id"])
+        for merchant_id, txn_ids in by_merchant.items():
+            updated += db.session.execute(
+                update(Txn)
+                .where(Txn.id.in_(txn_ids))
+                .values(merchant_id=merchant_id)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.session.commit()
+
+    if legacy_logo:
+        db.session.execute(text("UPDATE txn SET logo_url = NULL WHERE logo_url IS NOT NULL"))
+        db.session.commit()
+
+    logger.info(
+        f"🏪 Merchant backfill: {scanned} scanned, {updated} updated, "
+        f"{created} merchants created"
+    )
+    return {"scanned": scanned, "updated": updated, "merchants_created": created}
+
+
+def merge_merchants(merchant: Merchant, others: list[Merchant]) -> int:
+    """
+    Fold duplicate merchants into `merchant`: their aliases and
+    transactions move to it and they are deleted. Recurring series of all
+    of them are rebuilt, so each account has one series for the merchant.
+
+    Returns:
+        int: The number of transactions moved
+    """
+    # utils.recurring imports this module for merchant_key
+    from utils.recurring import rescan_recurring_series
+
+    other_ids = [other.id for other in others if other.id != merchant.id]
+    if not other_ids:
+        return 0
+    moved = db.session.execute(
+        update(Txn)
+        .where(Txn.merchant_id.in_(other_ids))
+        .values(merchant_id=merchant.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.execute(
+        update(MerchantAlias)
+        .where(MerchantAlias.merchant_id.in_(other_ids))
+        .values(merchant_id=merchant.id)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Series of the merged merchants are left without transactions and
+    # deleted; the surviving merchant's series take them all in
+    keys = [f"m:{merchant_id}" for merchant_id in [merchant.id, *other_ids]]
+    account_ids = db.session.execute(
+        union(
+            select(Txn.account_id).where(Txn.merchant_id == merchant.id),
+            select(RecurringSeries.account_id).where(RecurringSeries.key.in_(keys)),
+        )
+    ).scalars()
+    rescan_recurring_series(
+        {(account_id, key) for account_id in account_ids for key in keys}, commit=False
+    )
+
+    for other in others:
+        if other.id == merchant.id:
+            continue
+        if not merchant.logo_url and other.logo_url:
+            merchant.logo_url = other.logo_url
+        db.session.expire(other, ["aliases"])
+        db.session.delete(other)
+    db.session.commit()
+    db.session.expire(merchant, ["aliases"])
+    return moved
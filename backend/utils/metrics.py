@@ -0,0 +1,323 @@
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+
+# Latency buckets in seconds, from sub-millisecond SQL to slow Plaid calls
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names, label_values, extra=None) -> str:
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get_count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "nett_http_request_duration_seconds",
+        "HTTP request latency by blueprint and route.",
+        ("blueprint", "route", "method", "status"),
+    )
+)
+SQL_STATEMENT_DURATION = REGISTRY.register(
+    Histogram(
+        "nett_sql_statement_duration_seconds",
+        "SQL statement latency by table and operation.",
+        ("table", "operation"),
+    )
+)
+PLAID_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "nett_plaid_request_duration_seconds",
+        "Plaid API call latency by operation.",
+        ("operation",),
+    )
+)
+PLAID_ERRORS = REGISTRY.register(
+    Counter(
+        "nett_plaid_errors_total",
+        "Failed Plaid API calls by operation.",
+        ("operation",),
+    )
+)
+PLAID_RETRIES = REGISTRY.register(
+    Counter(
+        "nett_plaid_retries_total",
+        "Plaid API calls retried after a transient failure, by operation.",
+        ("operation",),
+    )
+)
+PLAID_CIRCUIT_OPEN = REGISTRY.register(
+    Gauge(
+        "nett_plaid_circuit_open",
+        "1 while the circuit breaker for a Plaid operation is open.",
+        ("operation",),
+    )
+)
+PLAID_CIRCUIT_REJECTIONS = REGISTRY.register(
+    Counter(
+        "nett_plaid_circuit_rejections_total",
+        "Plaid API calls rejected by an open circuit breaker, by operation.",
+        ("operation",),
+    )
+)
+SYNC_DURATION = REGISTRY.register(
+    Histogram("nett_sync_duration_seconds", "Duration of item transaction syncs.")
+)
+SYNC_PAGES = REGISTRY.register(
+    Histogram(
+        "nett_sync_pages",
+        "transactions/sync pages fetched per item sync.",
+        buckets=COUNT_BUCKETS,
+    )
+)
+SYNC_ROWS = REGISTRY.register(
+    Counter(
+        "nett_sync_rows_total",
+        "Transactions added, modified and removed by syncs.",
+        ("change",),
+    )
+)
+SYNC_THROUGHPUT = REGISTRY.register(
+    Gauge(
+        "nett_sync_transactions_per_second",
+        "Transactions processed per second by the most recent sync.",
+    )
+)
+SYNC_COALESCED = REGISTRY.register(
+    Counter(
+        "nett_sync_coalesced_total",
+        "Sync requests merged into a sync already queued or running.",
+        ("source",),
+    )
+)
+WEBHOOKS_RECEIVED = REGISTRY.register(
+    Counter(
+        "nett_webhooks_total",
+        "Verified Plaid webhooks by type and code.",
+        ("webhook_type", "webhook_code"),
+    )
+)
+JOBS_ENQUEUED = REGISTRY.register(
+    Counter(
+        "nett_jobs_enqueued_total",
+        "Background jobs enqueued by kind.",
+        ("kind",),
+    )
+)
+JOB_DURATION = REGISTRY.register(
+    Histogram(
+        "nett_job_duration_seconds",
+        "Background job run time by kind and outcome.",
+        ("kind", "outcome"),
+    )
+)
+CACHE_HITS = REGISTRY.register(
+    Counter(
+        "nett_cache_hits_total",
+        "Cache hits by cache and the backend that served them.",
+        ("cache", "backend"),
+    )
+)
+CACHE_MISSES = REGISTRY.register(
+    Counter(
+        "nett_cache_misses_total",
+        "Cache misses that recomputed the value.",
+        ("cache",),
+    )
+)
+CACHE_EVICTIONS = REGISTRY.register(
+    Counter(
+        "nett_cache_evictions_total",
+        "Least recently used entries evicted from in-memory caches.",
+        ("cache",),
+    )
+)
+TOKEN_BACKUP_DURATION = REGISTRY.register(
+    Histogram(
+        "nett_token_backup_duration_seconds",
+        "Token backup latency by operation.",
+        ("operation",),
+    )
+)
+
+_TABLE_PATTERN = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|JOIN)\s+[\"`]?(\w+)", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
+def statement_table_and_operation(statement: str) -> tuple[str, str]:
+    """Best-effort (table, operation) labels for a SQL statement."""
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    match = _TABLE_PATTERN.search(statement)
+    return (match.group(1) if match else "none"), operation
+
+
+def observe_sql_statement(statement: str, seconds: float):
+    table, operation = statement_table_and_operation(statement)
+    SQL_STATEMENT_DURATION.observe(seconds, table=table, operation=operation)
+
+
+def observe_plaid_call(operation: str, seconds: float, error: bool = False):
+    PLAID_REQUEST_DURATION.observe(seconds, operation=operation)
+    if error:
+        PLAID_ERRORS.inc(operation=operation)
+
+
+def observe_sync(
+    seconds: float, pages: int, added: int, modified: int, removed: int
+):
+    SYNC_DURATION.observe(seconds)
+    SYNC_PAGES.observe(pages)
+    SYNC_ROWS.inc(added, change="added")
+    SYNC_ROWS.inc(modified, change="modified")
+    SYNC_ROWS.inc(removed, change="removed")
+    total = added + modified + removed
+    if seconds > 0:
+        SYNC_THROUGHPUT.set(total / seconds)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return REGISTRY.render()
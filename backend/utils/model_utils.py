@@ -2,7 +2,7 @@ from sqlite3 import IntegrityError
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from pprint import pformat
-from utils.logger import get_logger
+from utils.logger import get_logger, lazy
 from models import db
 
 logger = get_logger(__name__)
@@ -19,7 +19,7 @@ def get_required_fields(model):
         elif column.primary_key and not has_default:
             required_fields.append(column.name)
 
-    logger.debug(f"Required fields for {model.__name__}: {required_fields}")
+    logger.debug("Required fields for %s: %s", model.__name__, required_fields)
     return required_fields
 
 
@@ -41,14 +41,14 @@ def required_fields_for_model_str(model):
 def create_model_instance_from_dict(
     model_class, data: dict, fail_on_duplicate: bool = True
 ):
-    logger.info(f"📦 Creating instance of {model_class.__name__}")
+    logger.debug("📦 Creating instance of %s", model_class.__name__)
     mapper = inspect(model_class)
     model_columns = {column.key: column for column in mapper.columns}
     relationships = {rel.key: rel.mapper.class_ for rel in mapper.relationships}
 
-    logger.debug(f"📋 Model columns: {set(model_columns.keys())}")
-    logger.debug(f"🔗 Model relationships: {list(relationships.keys())}")
-    logger.debug(f"📨 Received data:\n{pformat(data)}")
+    logger.debug("📋 Model columns: %s", lazy(set, model_columns.keys()))
+    logger.debug("🔗 Model relationships: %s", lazy(list, relationships.keys()))
+    logger.debug("📨 Received data:\n%s", lazy(pformat, data))
 
     if not has_required_fields_for_model(data, model_class):
         required_msg = required_fields_for_model_str(model_class)
@@ -60,12 +60,15 @@ def create_model_instance_from_dict(
 
     # Check for exact primary key match
     if primary_key in data and data[primary_key] is not None:
-        logger.info(
-            f"🔍 Checking for existing {model_class.__name__} with {primary_key}={data[primary_key]}"
+        logger.debug(
+            "🔍 Checking for existing %s with %s=%s",
+            model_class.__name__,
+            primary_key,
+            data[primary_key],
         )
         existing = db.session.get(model_class, data[primary_key])
         if existing:
-            logger.debug(f"🔍 Existing instance: {existing}")
+            logger.debug("🔍 Existing instance: %s", existing)
             if fail_on_duplicate:
                 logger.error(
                     f"❌ Duplicate detected for {model_class.__name__} with {primary_key}={data[primary_key]}"
@@ -99,7 +102,7 @@ def create_model_instance_from_dict(
     # Build init kwargs from columns and relationships
     for key, value in data.items():
         if key in model_columns:
-            logger.debug(f"✅ Processing column field: {key} = {value}")
+            logger.debug("✅ Processing column field: %s = %s", key, value)
             try:
                 if isinstance(getattr(model_class, key, None), InstrumentedAttribute):
                     col_type = getattr(model_class, key).property.columns[0].type
@@ -110,7 +113,7 @@ def create_model_instance_from_dict(
             init_kwargs[key] = value
 
         elif key in relationships:
-            logger.debug(f"🔄 Resolving relationship: {key}")
+            logger.debug("🔄 Resolving relationship: %s", key)
             if value is None:
                 init_kwargs[key] = None
             elif isinstance(value, dict):
@@ -119,7 +122,9 @@ def create_model_instance_from_dict(
                 related_instance = db.session.get(related_model_class, related_id)
                 if related_instance:
                     logger.debug(
-                        f"✅ Found related {related_model_class.__name__} with id {related_id}"
+                        "✅ Found related %s with id %s",
+                        related_model_class.__name__,
+                        related_id,
                     )
                     init_kwargs[key] = related_instance
                 else:
@@ -131,13 +136,15 @@ def create_model_instance_from_dict(
                 f"⚠️ Unexpected key '{key}' not in {model_class.__name__}. Ignored."
             )
 
-    logger.debug(f"🛠 Init kwargs for {model_class.__name__}:\n{pformat(init_kwargs)}")
+    logger.debug(
+        "🛠 Init kwargs for %s:\n%s", model_class.__name__, lazy(pformat, init_kwargs)
+    )
 
     try:
         instance = model_class(**init_kwargs)
         db.session.add(instance)
         db.session.commit()
-        logger.info(f"✅ {model_class.__name__} instance created and added to session.")
+        logger.debug("✅ %s instance created and added to session.", model_class.__name__)
         return instance
     except IntegrityError as e:
         db.session.rollback()
@@ -166,7 +173,7 @@ def update_model_instance_from_dict(instance, data: dict):
     if instance is None:
         raise ValueError("Cannot update a non-existent instance (instance is None).")
 
-    logger.info(f"🔄 Updating instance of {instance.__class__.__name__}")
+    logger.debug("🔄 Updating instance of %s", instance.__class__.__name__)
     mapper = inspect(instance.__class__)
     model_columns = {column.key for column in mapper.columns}
     relationships = {rel.key: rel.mapper.class_ for rel in mapper.relationships}
@@ -183,7 +190,7 @@ def update_model_instance_from_dict(instance, data: dict):
             except Exception as e:
                 logger.warning(f"⚠️ Type conversion failed for '{key}': {e}")
             setattr(instance, key, value)
-            logger.debug(f"📝 Set {key} = {value}")
+            logger.debug("📝 Set %s = %s", key, value)
 
         elif key in relationships:
             if value is None:
@@ -194,7 +201,10 @@ def update_model_instance_from_dict(instance, data: dict):
                 if related_instance:
                     setattr(instance, key, related_instance)
                     logger.debug(
-                        f"🔗 Set relationship {key} to {related_model_class.__name__}({value.get('id')})"
+                        "🔗 Set relationship %s to %s(%s)",
+                        key,
+                        related_model_class.__name__,
+                        value.get("id"),
                     )
                 else:
                     logger.warning(
@@ -202,14 +212,14 @@ def update_model_instance_from_dict(instance, data: dict):
                     )
 
     db.session.commit()
-    logger.info(f"✅ {instance.__class__.__name__} instance updated.")
+    logger.debug("✅ %s instance updated.", instance.__class__.__name__)
     return instance
 
 
 def list_instances_of_model(model_class):
-    logger.info(f"📄 Listing all instances of {model_class.__name__}")
+    logger.info("📄 Listing all instances of %s", model_class.__name__)
     instances = db.session.query(model_class).all()
-    logger.debug(f"Found {len(instances)} instances.")
+    logger.debug("Found %d instances.", len(instances))
     return [instance.to_dict() for instance in instances]
 
 
@@ -220,7 +230,7 @@ def delete_model_instance(model_class, identifier):
     :param identifier: primary key value (e.g., id) or model instance
     :return: True if deleted, False otherwise
     """
-    logger.info(f"🗑️ Deleting instance of {model_class.__name__}")
+    logger.debug("🗑️ Deleting instance of %s", model_class.__name__)
 
     try:
         # Case 1: identifier is already an instance
@@ -235,10 +245,10 @@ def delete_model_instance(model_class, identifier):
             logger.warning(f"⚠️ No {model_class.__name__} found for {identifier}")
             return False
 
-        logger.debug(f"🗑️ Found {model_class.__name__}: {instance}")
+        logger.debug("🗑️ Found %s: %s", model_class.__name__, instance)
         db.session.delete(instance)
         db.session.commit()
-        logger.info(f"✅ {model_class.__name__} deleted successfully.")
+        logger.debug("✅ %s deleted successfully.", model_class.__name__)
         return True
 
     except IntegrityError as e:
@@ -0,0 +1,338 @@
+"""
+Resilience for Plaid API calls.
+
+ResilientPlaidClient wraps the generated PlaidApi. Every operation gets a
+timeout. Transient failures are retried with decorrelated-jitter backoff, as
+long as the shared retry budget allows it. Each operation also has its own
+circuit breaker, so a failing upstream endpoint is not called again while it
+is known to be down.
+"""
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+
+import plaid
+import urllib3
+from plaid import rest
+from urllib3.connection import HTTPConnection
+
+from utils.logger import get_logger
+from utils.metrics import PLAID_CIRCUIT_OPEN, PLAID_CIRCUIT_REJECTIONS, PLAID_RETRIES
+from utils.request_metrics import record_plaid_call
+
+logger = get_logger(__name__)
+
+PLAID_TIMEOUT_SECONDS = float(os.getenv("PLAID_TIMEOUT_SECONDS", "15"))
+PLAID_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PLAID_CONNECT_TIMEOUT_SECONDS", "5"))
+PLAID_MAX_RETRIES = int(os.getenv("PLAID_MAX_RETRIES", "3"))
+PLAID_RETRY_BASE_SECONDS = float(os.getenv("PLAID_RETRY_BASE_SECONDS", "0.2"))
+PLAID_RETRY_CAP_SECONDS = float(os.getenv("PLAID_RETRY_CAP_SECONDS", "5"))
+PLAID_BREAKER_FAILURES = int(os.getenv("PLAID_BREAKER_FAILURES", "5"))
+PLAID_BREAKER_RESET_SECONDS = float(os.getenv("PLAID_BREAKER_RESET_SECONDS", "30"))
+
+# HTTP connection pool: connections kept open per host, and the number of
+# host pools. Requests beyond the pool size wait for a free connection
+# rather than opening throwaway ones, so TLS sessions are reused.
+PLAID_POOL_MAXSIZE = int(os.getenv("PLAID_POOL_MAXSIZE", "10"))
+PLAID_POOL_HOSTS = int(os.getenv("PLAID_POOL_HOSTS", "2"))
+PLAID_POOL_BLOCK = os.getenv("PLAID_POOL_BLOCK", "true").lower() == "true"
+# Idle seconds before TCP keep-alive probes detect a dropped connection
+PLAID_KEEPALIVE_IDLE_SECONDS = int(os.getenv("PLAID_KEEPALIVE_IDLE_SECONDS", "60"))
+
+# Operations that page through or remove data get more time than lookups
+OPERATION_TIMEOUTS = {
+    "transactions_sync": 30.0,
+    "item_remove": 30.0,
+}
+
+# Retrying these after a timeout could repeat a side effect (a public token
+# can only be exchanged once, a removed item's token stops working), so
+# they are only retried on rate limits
+NON_IDEMPOTENT_OPERATIONS = {"item_public_token_exchange", "item_remove"}
+
+
+def keepalive_socket_options(idle_seconds: int = PLAID_KEEPALIVE_IDLE_SECONDS) -> list:
+    """urllib3's default options (TCP_NODELAY) plus TCP keep-alive probes."""
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # Probe tuning is platform specific (Linux names shown; macOS has TCP_KEEPALIVE)
+    for name, value in (
+        ("TCP_KEEPIDLE", idle_seconds),
+        ("TCP_KEEPINTVL", max(idle_seconds // 4, 1)),
+        ("TCP_KEEPCNT", 4),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+def create_plaid_api_client(
+    configuration: plaid.Configuration,
+    pool_maxsize: int = PLAID_POOL_MAXSIZE,
+    pool_hosts: int = PLAID_POOL_HOSTS,
+    block: bool = PLAID_POOL_BLOCK,
+    keepalive_idle_seconds: int = PLAID_KEEPALIVE_IDLE_SECONDS,
+) -> plaid.ApiClient:
+    """
+    Build the Plaid ApiClient with a sized, keep-alive connection pool.
+
+    The generated client defaults to 4 host pools, cpu_count * 5 connections
+    and no blocking, so bursts open extra connections that are closed right
+    after use and pay a new TLS handshake every time.
+
+    Args:
+        configuration: The Plaid configuration (host and credentials)
+        pool_maxsize: Connections kept open per host
+        pool_hosts: Number of per-host pools kept
+        block: Wait for a free connection instead of opening a new one
+        keepalive_idle_seconds: Idle time before TCP keep-alive probes
+
+    Returns:
+        plaid.ApiClient: The client to share for every Plaid call
+    """
+    configuration.connection_pool_maxsize = pool_maxsize
+    configuration.socket_options = keepalive_socket_options(keepalive_idle_seconds)
+
+    api_client = plaid.ApiClient(configuration)
+    api_client.rest_client = rest.RESTClientObject(configuration, pools_size=pool_hosts)
+    api_client.rest_client.pool_manager.connection_pool_kw["block"] = block
+    return api_client
+
+
+def pool_connection_count(api_client: plaid.ApiClient) -> int:
+    """Connections opened so far by the client's pools."""
+    pools = api_client.rest_client.pool_manager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Plaid while an operation's circuit is open."""
+
+    def __init__(self, operation: str, retry_in: float):
+        super().__init__(
+            f"Plaid {operation} is unavailable, circuit open for another {retry_in:.0f}s"
+        )
+        self.operation = operation
+        self.retry_in = retry_in
+
+
+def plaid_error_code(error: plaid.ApiException) -> str:
+    """The error_code in a Plaid error response, "" if the body has none."""
+    try:
+        return json.loads(error.body).get("error_code", "")
+    except (TypeError, ValueError):
+        return ""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, plaid.ApiException) and error.status == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """Rate limits, 5xx responses, timeouts and connection failures."""
+    if isinstance(error, plaid.ApiException):
+        # Status 0 is how the client reports SSL and connection errors
+        return error.status in (0, 429) or (error.status or 0) >= 500
+    return isinstance(error, (urllib3.exceptions.HTTPError, TimeoutError, ConnectionError))
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent calls, so a widespread outage does
+    not turn into a retry storm.
+
+    Every call deposits `ratio` tokens and every retry withdraws one.
+    `min_retries` tokens are always available so low traffic can retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.max_tokens = float(min_retries)
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures, rejects
+    calls for `reset_seconds`, then lets one trial call through (half-open).
+    A successful trial closes the circuit again; a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        failure_threshold: int = PLAID_BREAKER_FAILURES,
+        reset_seconds: float = PLAID_BREAKER_RESET_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.operation = operation
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            elapsed = self.clock() - self.opened_at
+            if elapsed < self.reset_seconds or self._trial_in_flight:
+                PLAID_CIRCUIT_REJECTIONS.inc(operation=self.operation)
+                raise CircuitOpenError(
+                    self.operation, max(self.reset_seconds - elapsed, 0)
+                )
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"✅ Plaid {self.operation} circuit closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+            PLAID_CIRCUIT_OPEN.set(0, operation=self.operation)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or (
+                self.opened_at is None and self.failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    f"⚠️ Plaid {self.operation} circuit opened after "
+                    f"{self.failures} failures"
+                )
+                self.opened_at = self.clock()
+                self._trial_in_flight = False
+                PLAID_CIRCUIT_OPEN.set(1, operation=self.operation)
+
+
+class ResilientPlaidClient:
+    """
+    Proxy around the PlaidApi adding timeouts, retries and circuit breakers.
+
+    Every attempt is recorded with record_plaid_call, so per-request timings
+    and the Prometheus latency histogram include retried calls.
+    """
+
+    def __init__(
+        self,
+        client,
+        timeout: float = PLAID_TIMEOUT_SECONDS,
+        connect_timeout: float = PLAID_CONNECT_TIMEOUT_SECONDS,
+        max_retries: int = PLAID_MAX_RETRIES,
+        base_delay: float = PLAID_RETRY_BASE_SECONDS,
+        max_delay: float = PLAID_RETRY_CAP_SECONDS,
+        retry_budget: RetryBudget = None,
+        breaker_failures: int = PLAID_BREAKER_FAILURES,
+        breaker_reset_seconds: float = PLAID_BREAKER_RESET_SECONDS,
+        sleep=time.sleep,
+        clock=time.monotonic,
+    ):
+        self._client = client
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self._sleep = sleep
+        self._clock = clock
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    def breaker(self, operation: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            if operation not in self._breakers:
+                self._breakers[operation] = CircuitBreaker(
+                    operation,
+                    self.breaker_failures,
+                    self.breaker_reset_seconds,
+                    self._clock,
+                )
+            return self._breakers[operation]
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: random between the base and 3x the last delay."""
+        return min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+
+    def _should_retry(self, operation: str, error: Exception, attempt: int) -> bool:
+        if attempt > self.max_retries or not is_transient(error):
+            return False
+        if operation in NON_IDEMPOTENT_OPERATIONS and not is_rate_limited(error):
+            return False
+        return self.retry_budget.try_spend()
+
+    def call(self, operation: str, *args, **kwargs):
+        method = getattr(self._client, operation)
+        breaker = self.breaker(operation)
+        kwargs.setdefault(
+            "_request_timeout",
+            (self.connect_timeout, OPERATION_TIMEOUTS.get(operation, self.timeout)),
+        )
+        self.retry_budget.record_call()
+        delay = self.base_delay
+        attempt = 0
+
+        while True:
+            attempt += 1
+            breaker.before_call()
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                record_plaid_call(operation, time.perf_counter() - start, error=True)
+                if not is_transient(e):
+                    # The upstream is healthy, the request itself was rejected
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if not self._should_retry(operation, e, attempt):
+                    raise
+                delay = self.next_delay(delay)
+                PLAID_RETRIES.inc(operation=operation)
+                logger.warning(
+                    f"🔁 Plaid {operation} failed (attempt {attempt}), "
+                    f"retrying in {delay:.2f}s: {str(e).splitlines()[0]}"
+                )
+                self._sleep(delay)
+                continue
+
+            record_plaid_call(operation, time.perf_counter() - start)
+            breaker.record_success()
+            return result
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def resilient(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return resilient
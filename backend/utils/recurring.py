@@ -0,0 +1,395 @@
+"""
+Recurring transaction detection.
+
+Transactions are grouped into series by account and merchant: the
+canonical merchant when one is resolved, otherwise the normalized name.
+Each series keeps running statistics (Welford's mean and sum of squared
+deviations) of its amounts and of the days between consecutive
+transactions, so a sync folds its new transactions into the series they
+belong to without reading older transactions. A series is recurring when
+its average interval matches a cadence, its intervals are regular and its
+amounts are stable.
+
+A series only has to be rebuilt from its own transactions when one of them
+is modified or removed, or a transaction older than its last one arrives.
+`rebuild_recurring_series` recomputes every series from the whole history.
+"""
+
+import math
+import os
+from calendar import monthrange
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import delete, insert, select
+
+from models import db
+from models.recurring.recurring_series import RecurringSeries
+from models.transaction.txn import Txn
+from utils.job_queue import job_handler
+from utils.logger import get_logger
+from utils.merchant_utils import merchant_key
+
+logger = get_logger(__name__)
+
+RECURRING_MIN_OCCURRENCES = int(os.getenv("RECURRING_MIN_OCCURRENCES", "3"))
+# Largest standard deviation of amounts, relative to their mean
+RECURRING_AMOUNT_TOLERANCE = float(os.getenv("RECURRING_AMOUNT_TOLERANCE", "0.2"))
+# Largest distance of the mean interval from a cadence, and largest standard
+# deviation of the intervals, relative to the cadence (months are 28-31 days)
+INTERVAL_TOLERANCE = 0.15
+# Series looked up per query
+LOOKUP_BATCH_SIZE = 500
+REBUILD_BATCH_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class Cadence:
+    """A billing cycle: its average length, and its step in calendar months."""
+
+    name: str
+    days: float
+    months: int = 0
+
+
+CADENCES = [
+    Cadence("weekly", 7),
+    Cadence("biweekly", 14),
+    Cadence("monthly", 30.44, months=1),
+    Cadence("quarterly", 91.31, months=3),
+    Cadence("yearly", 365.25, months=12),
+]
+
+
+def series_key(merchant_id: int, name: str) -> str:
+    """The series key of a transaction's merchant, None without merchant or name."""
+    if merchant_id is not None:
+        return f"m:{merchant_id}"
+    key = merchant_key(name)
+    return f"n:{key}" if key else None
+
+
+def add_months(day: date, months: int) -> date:
+    """`day` moved by whole months, clamped to the end of shorter months."""
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    return day.replace(
+        year=year, month=month + 1, day=min(day.day, monthrange(year, month + 1)[1])
+    )
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _series_values(account_id: str, key: str, merchant_id: int, name: str, day: date):
+    return dict(
+        account_id=account_id,
+        key=key,
+        merchant_id=merchant_id,
+        name=(name or key)[:120],
+        occurrences=0,
+        amount_mean=0.0,
+        amount_m2=0.0,
+        interval_mean=0.0,
+        interval_m2=0.0,
+        first_date=day,
+        last_date=day,
+        last_amount=Decimal(0),
+    )
+
+
+def _new_series(*args) -> RecurringSeries:
+    series = RecurringSeries(**_series_values(*args))
+    db.session.add(series)
+    return series
+
+
+def observe(series: RecurringSeries, day: date, amount):
+    """Fold one transaction, no older than the series' last, into its statistics."""
+    if series.occurrences:
+        interval = (day - series.last_date).days
+        delta = interval - series.interval_mean
+        series.interval_mean += delta / series.occurrences
+        series.interval_m2 += delta * (interval - series.interval_mean)
+    else:
+        series.first_date = day
+    series.occurrences += 1
+    value = float(amount)
+    delta = value - series.amount_mean
+    series.amount_mean += delta / series.occurrences
+    series.amount_m2 += delta * (value - series.amount_mean)
+    series.last_date = day
+    series.last_amount = amount
+
+
+def classify(series: RecurringSeries):
+    """
+    Set the cadence, next date and expected amount of a recurring series,
+    or clear them. The expected amount is the latest one, so a price
+    change shows up immediately.
+    """
+    series.cadence = series.next_date = series.expected_amount = None
+    if series.occurrences < RECURRING_MIN_OCCURRENCES:
+        return
+
+    intervals = series.occurrences - 1
+    cadence = next(
+        (
+            cadence
+            for cadence in CADENCES
+            if abs(series.interval_mean - cadence.days)
+            <= cadence.days * INTERVAL_TOLERANCE
+        ),
+        None,
+    )
+    if cadence is None:
+        return
+    interval_deviation = (
+        math.sqrt(series.interval_m2 / (intervals - 1)) if intervals > 1 else 0.0
+    )
+    amount_deviation = math.sqrt(series.amount_m2 / (series.occurrences - 1))
+    if interval_deviation > cadence.days * INTERVAL_TOLERANCE:
+        return
+    if amount_deviation > abs(series.amount_mean) * RECURRING_AMOUNT_TOLERANCE:
+        return
+
+    series.cadence = cadence.name
+    series.next_date = (
+        add_months(series.last_date, cadence.months)
+        if cadence.months
+        else series.last_date + timedelta(days=cadence.days)
+    )
+    series.expected_amount = series.last_amount
+
+
+def _fold(series_by_group: dict, rows, new_series=_new_series) -> set:
+    """
+    Fold (account_id, key, merchant_id, name, day, amount) rows, in date
+    order, into `series_by_group`, creating missing series with
+    `new_series`.
+
+    Returns:
+        set: The groups rows were folded into
+    """
+    touched = set()
+    for account_id, key, merchant_id, name, day, amount in rows:
+        group = (account_id, key)
+        series = series_by_group.get(group)
+        if series is None:
+            series = new_series(account_id, key, merchant_id, name, day)
+            series_by_group[group] = series
+        observe(series, day, amount)
+        touched.add(group)
+    return touched
+
+
+def _load_series(groups) -> dict:
+    """The stored series of (account_id, key) groups, by group."""
+    groups = list(groups)
+    found = {}
+    for index in range(0, len(groups), LOOKUP_BATCH_SIZE):
+        batch = set(groups[index : index + LOOKUP_BATCH_SIZE])
+        candidates = db.session.execute(
+            select(RecurringSeries).where(
+                RecurringSeries.account_id.in_({account for account, _ in batch}),
+                RecurringSeries.key.in_({key for _, key in batch}),
+            )
+        ).scalars()
+        for series in candidates:
+            group = (series.account_id, series.key)
+            if group in batch:
+                found[group] = series
+    return found
+
+
+def series_group(txn: Txn) -> tuple:
+    """The (account_id, key) group of a stored transaction, None if it has none."""
+    key = series_key(txn.merchant_id, txn.name)
+    return (txn.account_id, key) if key and txn.date else None
+
+
+def update_recurring_series(txn_dicts: list[dict]) -> int:
+    """
+    Fold newly added transactions into their series.
+
+    Only the new transactions and the series they belong to are read, so
+    the cost of a sync grows with the transactions it adds, not with the
+    history. A series receiving a transaction older than its last one is
+    rebuilt from its own transactions instead.
+
+    Args:
+        txn_dicts: The added transactions, as passed to Txn
+
+    Returns:
+        int: The number of series updated
+    """
+    rows_by_group = defaultdict(list)
+    for txn in txn_dicts:
+        key = series_key(txn.get("merchant_id"), txn.get("name"))
+        day = _as_date(txn.get("date"))
+        if key and day:
+            rows_by_group[(txn["account_id"], key)].append(
+                (
+                    txn["account_id"],
+                    key,
+                    txn.get("merchant_id"),
+                    txn.get("merchant") or txn.get("name"),
+                    day,
+                    txn["amount"],
+                )
+            )
+    if not rows_by_group:
+        return 0
+
+    series_by_group = _load_series(rows_by_group)
+    out_of_order = set()
+    rows = []
+    for group, group_rows in rows_by_group.items():
+        group_rows.sort(key=lambda row: row[4])
+        series = series_by_group.get(group)
+        if series is not None and group_rows[0][4] < series.last_date:
+            out_of_order.add(group)
+        else:
+            rows.extend(group_rows)
+
+    for group in _fold(series_by_group, rows):
+        classify(series_by_group[group])
+    if out_of_order:
+        rescan_recurring_series(out_of_order, commit=False)
+    db.session.commit()
+    return len(rows_by_group)
+
+
+def rescan_recurring_series(groups: set, commit: bool = True) -> int:
+    """
+    Rebuild (account_id, key) groups from their stored transactions, after
+    transactions in them were modified or removed. Series left without
+    transactions are deleted.
+
+    Returns:
+        int: The number of series rebuilt
+    """
+    groups = {group for group in groups if group is not None}
+    if not groups:
+        return 0
+    series_by_group = _load_series(groups)
+
+    # Each query returns its groups' rows in date order, which is all the
+    # fold needs, so rows are streamed and folded into plain namespaces,
+    # then copied to the stored series once
+    columns = (Txn.account_id, Txn.merchant_id, Txn.merchant, Txn.name, Txn.date, Txn.amount)
+    by_account = defaultdict(set)
+    for account_id, key in groups:
+        by_account[account_id].add(key)
+    stats = {}
+    for account_id, keys in by_account.items():
+        statements = []
+        merchant_ids = {int(key[2:]) for key in keys if key.startswith("m:")}
+        if merchant_ids:
+            statements.append(select(*columns).where(Txn.merchant_id.in_(merchant_ids)))
+        if any(key.startswith("n:") for key in keys):
+            # Name keys are normalized in Python, so read the account's
+            # transactions without a merchant and keep the matching ones
+            statements.append(select(*columns).where(Txn.merchant_id.is_(None)))
+        for statement in statements:
+            rows = db.session.execute(
+                statement.where(Txn.account_id == account_id, Txn.date.is_not(None))
+                .order_by(Txn.date)
+                .execution_options(yield_per=REBUILD_BATCH_SIZE)
+            )
+            for batch in rows.partitions():
+                _fold(
+                    stats,
+                    (
+                        (
+                            row.account_id,
+                            key,
+                            row.merchant_id,
+                            row.merchant or row.name,
+                            row.date.date(),
+                            row.amount,
+                        )
+                        for row in batch
+                        if (key := series_key(row.merchant_id, row.name)) in keys
+                    ),
+                    new_series=lambda *args: SimpleNamespace(**_series_values(*args)),
+                )
+    for group, values in stats.items():
+        classify(values)
+        series = series_by_group.get(group)
+        if series is None:
+            db.session.add(RecurringSeries(**vars(values)))
+        else:
+            for name, value in vars(values).items():
+                setattr(series, name, value)
+    for group, series in series_by_group.items():
+        if group not in stats:
+            db.session.delete(series)
+    if commit:
+        db.session.commit()
+    return len(stats)
+
+
+@job_handler("rebuild_recurring")
+def rebuild_recurring_series() -> dict:
+    """
+    Recompute every series from all stored transactions, in date order.
+
+    The statistics are folded into plain namespaces, since setting mapped
+    attributes once per transaction costs more than reading the rows, and
+    stored with one bulk INSERT.
+
+    Returns:
+        dict: Transactions scanned, series stored and series detected as
+        recurring
+    """
+    db.session.execute(delete(RecurringSeries))
+    series_by_group = {}
+    scanned = 0
+    rows = db.session.execute(
+        select(Txn.account_id, Txn.merchant_id, Txn.merchant, Txn.name, Txn.date, Txn.amount)
+        .where(Txn.date.is_not(None))
+        .order_by(Txn.date)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    for batch in rows.partitions():
+        scanned += len(batch)
+        _fold(
+            series_by_group,
+            (
+                (
+                    row.account_id,
+                    key,
+                    row.merchant_id,
+                    row.merchant or row.name,
+                    row.date.date(),
+                    row.amount,
+                )
+                for row in batch
+                if (key := series_key(row.merchant_id, row.name))
+            ),
+            new_series=lambda *args: SimpleNamespace(**_series_values(*args)),
+        )
+    for series in series_by_group.values():
+        classify(series)
+    if series_by_group:
+        db.session.execute(
+            insert(RecurringSeries),
+            [vars(series) for series in series_by_group.values()],
+        )
+    db.session.commit()
+
+    recurring = sum(1 for series in series_by_group.values() if series.cadence)
+    logger.info(
+        f"🔁 Recurring rebuild: {scanned} scanned, {len(series_by_group)} series, "
+        f"{recurring} recurring"
+    )
+    return {"scanned": scanned, "series": len(series_by_group), "recurring": recurring}
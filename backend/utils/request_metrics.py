@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.logger import get_logger
+from utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    observe_plaid_call,
+    observe_sql_statement,
+)
+
+logger = get_logger(__name__)
+
+REQUEST_LOG_SIZE = int(os.getenv("REQUEST_LOG_SIZE", "200"))
+TOP_STATEMENTS = 5
+MAX_STATEMENT_LENGTH = 500
+
+# Most recent requests, oldest dropped first
+_recent_requests = deque(maxlen=REQUEST_LOG_SIZE)
+_recent_requests_lock = threading.Lock()
+
+
+class RequestStats:
+    """Timings collected while a single request is handled."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = {}
+        self.plaid_count = 0
+        self.plaid_seconds = 0.0
+        self.plaid_errors = 0
+        self.json_seconds = 0.0
+
+    def record_statement(self, statement: str, seconds: float):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        # Aggregate identical statements so N+1 patterns stand out
+        count, total = self.statements.get(statement, (0, 0.0))
+        self.statements[statement] = (count + 1, total + seconds)
+
+    def top_statements(self, limit: int = TOP_STATEMENTS) -> list[dict]:
+        ranked = sorted(self.statements.items(), key=lambda s: s[1][1], reverse=True)
+        return [
+            {
+                "statement": statement[:MAX_STATEMENT_LENGTH],
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+            }
+            for statement, (count, total) in ranked[:limit]
+        ]
+
+
+def get_request_stats():
+    """Stats for the current request, or None outside an instrumented request."""
+    if not has_app_context():
+        return None
+    return g.get("request_stats")
+
+
+def record_plaid_call(operation: str, seconds: float, error: bool = False):
+    observe_plaid_call(operation, seconds, error)
+    stats = get_request_stats()
+    if stats is None:
+        return
+    stats.plaid_count += 1
+    stats.plaid_seconds += seconds
+    if error:
+        stats.plaid_errors += 1
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records time spent serializing responses."""
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().response(*args, **kwargs)
+        stats = get_request_stats()
+        if stats is not None:
+            stats.json_seconds += time.perf_counter() - start
+        return response
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+    observe_sql_statement(statement, seconds)
+    stats = get_request_stats()
+    if stats is not None:
+        stats.record_statement(statement, seconds)
+
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = get_request_stats()
+    if stats is None:
+        return response
+
+    wall_seconds = time.perf_counter() - stats.started_at
+    app_seconds = max(
+        wall_seconds - stats.sql_seconds - stats.plaid_seconds - stats.json_seconds, 0
+    )
+    response_bytes = None if response.is_streamed else response.content_length
+
+    HTTP_REQUEST_DURATION.observe(
+        wall_seconds,
+        blueprint=request.blueprint or "",
+        route=request.url_rule.rule if request.url_rule else "unmatched",
+        method=request.method,
+        status=response.status_code,
+    )
+
+    response.headers["Server-Timing"] = ", ".join(
+        [
+            f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.sql_count} queries"',
+            f'plaid;dur={stats.plaid_seconds * 1000:.2f};desc="{stats.plaid_count} calls"',
+            f"json;dur={stats.json_seconds * 1000:.2f}",
+            f"app;dur={app_seconds * 1000:.2f}",
+            f"total;dur={wall_seconds * 1000:.2f}",
+        ]
+    )
+
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status_code": response.status_code,
+        "wall_ms": round(wall_seconds * 1000, 3),
+        "db_ms": round(stats.sql_seconds * 1000, 3),
+        "sql_count": stats.sql_count,
+        "plaid_ms": round(stats.plaid_seconds * 1000, 3),
+        "plaid_count": stats.plaid_count,
+        "plaid_errors": stats.plaid_errors,
+        "json_ms": round(stats.json_seconds * 1000, 3),
+        "response_bytes": response_bytes,
+        "top_statements": stats.top_statements(),
+    }
+    with _recent_requests_lock:
+        _recent_requests.append(entry)
+    return response
+
+
+def get_recent_requests(limit: int = 20, slowest: bool = True) -> list[dict]:
+    """Recently handled requests, slowest first by default."""
+    with _recent_requests_lock:
+        entries = list(_recent_requests)
+    if slowest:
+        entries.sort(key=lambda entry: entry["wall_ms"], reverse=True)
+    else:
+        entries.reverse()
+    return entries[:limit]
+
+
+def clear_recent_requests():
+    with _recent_requests_lock:
+        _recent_requests.clear()
+
+
+def init_request_metrics(app):
+    """Record wall, SQL, Plaid and JSON time for every request of the app."""
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    logger.info(f"⏱️ Request instrumentation enabled (keeping last {REQUEST_LOG_SIZE})")
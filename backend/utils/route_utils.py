@@ -1,6 +1,7 @@
+from datetime import datetime
 from functools import wraps
 from http import HTTPStatus
-from flask import jsonify
+from flask import jsonify, request
 
 from utils.error_utils import error_response
 from utils.model_utils import (
@@ -8,6 +9,7 @@ from utils.model_utils import (
     update_model_instance_from_dict,
 )
 from utils.logger import get_logger
+from utils.plaid_client import CircuitOpenError
 from models import db
 
 logger = get_logger(__name__)
@@ -18,6 +20,9 @@ def safe_route(f):
     def wrapper(*args, **kwargs):
         try:
             return f(*args, **kwargs)
+        except CircuitOpenError as e:
+            db.session.rollback()
+            return error_response(HTTPStatus.SERVICE_UNAVAILABLE.value, str(e))
         except Exception as e:
             db.session.rollback()
             return error_response(
@@ -28,6 +33,28 @@ def safe_route(f):
     return wrapper
 
 
+def wants_background_job() -> bool:
+    """True when the client asked for the work to be queued (?async=true)."""
+    return request.args.get("async", "false").lower() == "true"
+
+
+def job_accepted_response(job):
+    response = jsonify({"job_id": job.id, "state": job.state.value})
+    response.headers["Location"] = f"/api/job/{job.id}"
+    return response, HTTPStatus.ACCEPTED
+
+
+def parse_date_arg(name: str) -> datetime:
+    """The `name` query parameter as a date, ValueError if it is not YYYY-MM-DD."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid {name} date '{value}', expected YYYY-MM-DD")
+
+
 def get_model_request(model, model_id):
     model_instance = db.session.get(model, model_id)
     if not model_instance:
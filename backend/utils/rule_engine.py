@@ -0,0 +1,335 @@
+"""
+User-defined categorization rules, compiled into one matcher.
+
+Rules are indexed by their most selective text predicate: exact merchants go
+into a dict, name substrings into an Aho-Corasick automaton and name regexes
+into one combined pattern. A regex hit on the combined pattern does not say
+which rule matched, so each regex is also indexed by the longest literal text
+every match of it contains, in a second automaton; only the regex rules whose
+literal occurs in the name are candidates. Matching a transaction walks its
+name once per index, so the cost stays flat as rules grow into the thousands. Only the candidate rules
+those indexes return (plus any rules without a text predicate) have their
+remaining predicates checked, in priority order.
+
+The compiled matcher is rebuilt only when the `categorization_rules` data
+version changes.
+"""
+
+import re
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, update
+
+from models import db
+from models.rule.categorization_rule import CategorizationRule
+from models.transaction.txn import Txn
+from utils.data_version import CATEGORIZATION_RULES, get_data_version
+from utils.job_queue import job_handler
+from utils.logger import get_logger
+
+# The regex parser is private and has moved before; without it every regex
+# rule is checked against every name
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    try:
+        import sre_constants
+        import sre_parse
+    except ImportError:
+        sre_constants = sre_parse = None
+
+logger = get_logger(__name__)
+
+REAPPLY_BATCH_SIZE = 500
+
+_matcher_lock = threading.Lock()
+_matcher = {"version": None, "matcher": None}
+
+
+class AhoCorasick:
+    """Finds every pattern occurring in a text in one pass over the text."""
+
+    def __init__(self, patterns: list[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        # Breadth-first, so a state's failure link is final before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = (
+                    self._output[child] + self._output[self._fail[child]]
+                )
+
+    def find(self, text: str) -> set:
+        """Indexes of the patterns found in `text`."""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.update(self._output[state])
+        return found
+
+
+def required_literal(pattern: str) -> str:
+    """
+    The longest run of ASCII characters that every match of `pattern`
+    contains, lowercased, or "" if it has none.
+
+    Only top-level literals count; anything inside a group, class,
+    repetition or alternation might not be part of a match. Always "" if
+    the regex parser cannot be imported.
+    """
+    if sre_parse is None:
+        return ""
+    best = run = ""
+    try:
+        for op, value in sre_parse.parse(pattern, re.IGNORECASE):
+            if op is sre_constants.LITERAL and value < 128:
+                run += chr(value).lower()
+                if len(run) > len(best):
+                    best = run
+            else:
+                run = ""
+    except Exception as e:
+        # A parser whose output has changed shape; match without a literal
+        logger.warning(f"⚠️ Could not find a literal in pattern {pattern!r}: {e}")
+        return ""
+    return best
+
+
+class CompiledRule:
+    def __init__(self, rule: CategorizationRule):
+        self.id = rule.id
+        self.category_id = rule.category_id
+        self.subcategory_id = rule.subcategory_id
+        self.merchant = rule.merchant.lower() if rule.merchant else None
+        self.name_contains = (
+            rule.name_contains.lower() if rule.name_contains else None
+        )
+        self.name_pattern = (
+            re.compile(rule.name_pattern, re.IGNORECASE) if rule.name_pattern else None
+        )
+        self.account_id = rule.account_id
+        self.min_amount = rule.min_amount
+        self.max_amount = rule.max_amount
+
+    def matches(self, name: str, merchant: str, account_id: str, amount) -> bool:
+        if self.merchant is not None and self.merchant != merchant:
+            return False
+        if self.name_contains is not None and self.name_contains not in name:
+            return False
+        if self.name_pattern is not None and not self.name_pattern.search(name):
+            return False
+        if self.account_id is not None and self.account_id != account_id:
+            return False
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        return True
+
+
+class RuleMatcher:
+    """Compiled form of a set of rules; see the module docstring."""
+
+    def __init__(self, rules: list[CategorizationRule]):
+        ordered = sorted(
+            rules, key=lambda rule: (rule.priority, rule.created_at or datetime.min)
+        )
+        self.rules = [CompiledRule(rule) for rule in ordered]
+
+        self._by_merchant = defaultdict(list)
+        substrings = defaultdict(list)
+        literals = defaultdict(list)
+        self._pattern_ranks = []
+        self._unfiltered_patterns = []
+        self._unindexed = []
+        for rank, rule in enumerate(self.rules):
+            if rule.merchant is not None:
+                self._by_merchant[rule.merchant].append(rank)
+            elif rule.name_contains is not None:
+                substrings[rule.name_contains].append(rank)
+            elif rule.name_pattern is not None:
+                self._pattern_ranks.append(rank)
+                literal = required_literal(rule.name_pattern.pattern)
+                if literal:
+                    literals[literal].append(rank)
+                else:
+                    self._unfiltered_patterns.append(rank)
+            else:
+                self._unindexed.append(rank)
+
+        self._substrings = list(substrings.values())
+        self._automaton = AhoCorasick(list(substrings.keys()))
+        self._literals = list(literals.values())
+        self._literal_automaton = AhoCorasick(list(literals.keys()))
+        self._combined_pattern = None
+        if self._pattern_ranks:
+            try:
+                self._combined_pattern = re.compile(
+                    "|".join(
+                        f"(?:{self.rules[rank].name_pattern.pattern})"
+                        for rank in self._pattern_ranks
+                    ),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                # Patterns with group references cannot be combined; check each
+                logger.warning("⚠️ Rule patterns could not be combined into one regex")
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, name: str, merchant: str, account_id: str, amount) -> CompiledRule:
+        """The highest priority rule matching the transaction, or None."""
+        if not self.rules:
+            return None
+        name = (name or "").lower()
+        merchant = merchant.lower() if merchant else None
+        amount = Decimal(str(amount)) if amount is not None else Decimal(0)
+
+        candidates = list(self._unindexed)
+        if merchant is not None:
+            candidates.extend(self._by_merchant.get(merchant, ()))
+        for index in self._automaton.find(name):
+            candidates.extend(self._substrings[index])
+        if self._pattern_ranks and (
+            self._combined_pattern is None or self._combined_pattern.search(name)
+        ):
+            # Case-insensitive regexes match some non-ASCII characters (like
+            # the long s) to ASCII letters, which lowercasing does not map
+            if name.isascii():
+                candidates.extend(self._unfiltered_patterns)
+                for index in self._literal_automaton.find(name):
+                    candidates.extend(self._literals[index])
+            else:
+                candidates.extend(self._pattern_ranks)
+
+        for rank in sorted(set(candidates)):
+            rule = self.rules[rank]
+            if rule.matches(name, merchant, account_id, amount):
+                return rule
+        return None
+
+
+def get_rule_matcher() -> RuleMatcher:
+    """The matcher for the active rules, recompiled after any rule write."""
+    version = get_data_version(CATEGORIZATION_RULES)
+    with _matcher_lock:
+        if _matcher["version"] == version:
+            return _matcher["matcher"]
+
+    rules = CategorizationRule.query.filter_by(active=True).all()
+    matcher = RuleMatcher(rules)
+    logger.info(f"🧩 Compiled {len(matcher)} categorization rules")
+    with _matcher_lock:
+        _matcher.update(version=version, matcher=matcher)
+    return matcher
+
+
+def apply_categorization_rules(txn_dicts: list[dict]) -> int:
+    """
+    Re-categorize a batch of transaction dicts in place.
+
+    Each dict needs name, merchant, account_id and amount; category_id and
+    subcategory_id are overwritten where a rule matches.
+
+    Returns:
+        int: The number of transactions a rule matched
+    """
+    matcher = get_rule_matcher()
+    if not len(matcher):
+        return 0
+
+    matched = 0
+    for txn in txn_dicts:
+        rule = matcher.match(
+            txn.get("name"),
+            txn.get("merchant"),
+            txn.get("account_id"),
+            txn.get("amount"),
+        )
+        if rule:
+            txn["category_id"] = rule.category_id
+            txn["subcategory_id"] = rule.subcategory_id
+            matched += 1
+    return matched
+
+
+@job_handler("apply_rules")
+def reapply_categorization_rules() -> dict:
+    """
+    Apply the current rules to every stored transaction.
+
+    Transactions are streamed through the matcher and the changes are written
+    with one UPDATE ... WHERE id IN (...) per target category and batch.
+
+    Returns:
+        dict: Transactions scanned, matched by a rule and updated
+    """
+    matcher = get_rule_matcher()
+    scanned = matched = 0
+    changes = defaultdict(list)
+
+    rows = db.session.execute(
+        select(
+            Txn.id,
+            Txn.name,
+            Txn.merchant,
+            Txn.account_id,
+            Txn.amount,
+            Txn.category_id,
+            Txn.subcategory_id,
+        ).execution_options(yield_per=5000)
+    )
+    for txn_id, name, merchant, account_id, amount, category_id, subcategory_id in rows:
+        scanned += 1
+        rule = matcher.match(name, merchant, account_id, amount)
+        if rule is None:
+            continue
+        matched += 1
+        if (rule.category_id, rule.subcategory_id) != (category_id, subcategory_id):
+            changes[(rule.category_id, rule.subcategory_id)].append(txn_id)
+
+    updated = 0
+    for (category_id, subcategory_id), txn_ids in changes.items():
+        for start in range(0, len(txn_ids), REAPPLY_BATCH_SIZE):
+            batch = txn_ids[start : start + REAPPLY_BATCH_SIZE]
+            updated += db.session.execute(
+                update(Txn)
+                .where(Txn.id.in_(batch))
+                .values(category_id=category_id, subcategory_id=subcategory_id)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+    db.session.commit()
+
+    logger.info(
+        f"🧩 Re-applied {len(matcher)} rules: {scanned} scanned, "
+        f"{matched} matched, {updated} updated"
+    )
+    return {"scanned": scanned, "matched": matched, "updated": updated}
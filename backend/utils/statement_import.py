@@ -0,0 +1,544 @@
+"""
+Bulk import of CSV and OFX bank statements.
+
+Statements are parsed as a stream and written IMPORT_BATCH_SIZE
+transactions at a time, each batch in one database transaction with one
+multi-row INSERT, so a file with hundreds of thousands of rows never has
+to fit in memory. Each batch goes through the same merchant,
+categorization-rule and AI steps as a Plaid sync.
+
+Transactions already stored are skipped by their fingerprint: a hash of
+the account, day, amount and normalized name, kept in the indexed
+txn.fingerprint column. Importing the same statement twice, or one that
+overlaps what Plaid synced, adds nothing the second time.
+"""
+
+import csv
+import hashlib
+import html
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import event, func, inspect, insert, select, text, update
+
+from models import db
+from models.account.account import Account
+from models.transaction.payment_channel import PaymentChannel
+from models.transaction.txn import Txn
+from models.transaction.txn_category import TxnCategory
+from models.transaction.txn_subcategory import TxnSubcategory
+from utils.budget_categorizer import AI_CATEGORIZATION, apply_ai_categorization
+from utils.job_queue import job_handler, report_progress
+from utils.logger import get_logger
+from utils.merchant_utils import merchant_key, resolve_merchants
+from utils.recurring import rescan_recurring_series, series_key
+from utils.rule_engine import apply_categorization_rules
+from utils.txn_utils import resolve_category_and_subcategory
+
+logger = get_logger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Uploads imported in the background are kept here until their job is done;
+# workers in other processes must see the same directory
+IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", "instance/imports")
+# How many unreadable rows are listed in an import's result
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = ("csv", "ofx")
+OFX_CHUNK_SIZE = 64 * 1024
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d")
+
+# Header names tried, case-insensitively, for columns that are not mapped
+COLUMN_ALIASES = {
+    "date": ("date", "posted date", "posting date", "transaction date", "post date"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawals"),
+    "credit": ("credit", "deposit", "deposits"),
+    "name": ("description", "name", "payee", "memo", "details"),
+    "merchant": ("merchant", "merchant name"),
+    "category": ("category",),
+}
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_PARENTHESES = re.compile(r"^\((.*)\)$")
+
+
+# Statements repeat the same payees; normalizing each once is a good part
+# of the per-row cost
+_name_key = lru_cache(maxsize=65536)(merchant_key)
+
+
+class StatementError(ValueError):
+    """A statement row that cannot be imported."""
+
+
+def txn_fingerprint(account_id: str, day, amount, name: str) -> str:
+    """
+    The dedup key of a transaction: its account, day, amount to the cent
+    and name as merchant_key normalizes it, hashed to 32 hex characters.
+    """
+    day = day.strftime("%Y-%m-%d") if hasattr(day, "strftime") else str(day or "")[:10]
+    key = "|".join(
+        [account_id or "", day, f"{Decimal(amount or 0):.2f}", _name_key(name) or ""]
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:32]
+
+
+@event.listens_for(Txn, "before_insert")
+@event.listens_for(Txn, "before_update")
+def _set_fingerprint(mapper, connection, target):
+    target.fingerprint = txn_fingerprint(
+        target.account_id, target.date, target.amount, target.name
+    )
+
+
+def ensure_fingerprint_schema(connection=None):
+    """
+    Add txn.fingerprint to databases created before statement imports;
+    rows without one are filled in by `backfill_fingerprints`.
+    """
+    if connection is None:
+        with db.engine.begin() as connection:
+            return ensure_fingerprint_schema(connection)
+
+    columns = {column["name"] for column in inspect(connection).get_columns("txn")}
+    if "fingerprint" in columns:
+        return
+    logger.info("🧾 Adding txn.fingerprint, it is filled in on the next import")
+    connection.execute(text("ALTER TABLE txn ADD COLUMN fingerprint VARCHAR(32)"))
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_txn_fingerprint ON txn (fingerprint)")
+    )
+
+
+def backfill_fingerprints(batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """
+    Fingerprint stored transactions that have none, such as rows written
+    with bulk INSERTs, which skip the ORM listener. Uses the fingerprint
+    index, so it costs next to nothing once every row has one.
+
+    Returns:
+        int: The number of transactions fingerprinted
+    """
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            select(Txn.id, Txn.account_id, Txn.date, Txn.amount, Txn.name)
+            .where(Txn.fingerprint.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(
+            update(Txn),
+            [
+                {"id": row.id, "fingerprint": txn_fingerprint(*row[1:])}
+                for row in rows
+            ],
+        )
+        db.session.commit()
+        updated += len(rows)
+    if updated:
+        logger.info(f"🧾 Fingerprinted {updated} stored transactions")
+    return updated
+
+
+@dataclass
+class CsvMapping:
+    """
+    Which CSV column holds each field. Unmapped fields are looked up by
+    the header names in COLUMN_ALIASES. Amounts come from `amount`, or
+    from separate `debit` and `credit` columns.
+
+    `debits_positive` says how the statement signs amounts: most banks
+    show money going out as negative, Plaid and this app as positive.
+    """
+
+    date: str = None
+    amount: str = None
+    debit: str = None
+    credit: str = None
+    name: str = None
+    merchant: str = None
+    category: str = None
+    date_format: str = None
+    debits_positive: bool = False
+
+    def resolve(self, fieldnames: list) -> "CsvMapping":
+        """A copy with every field that has a column set, ValueError if any is missing."""
+        if not fieldnames:
+            raise ValueError("The CSV file has no header row.")
+        by_name = {name.strip().casefold(): name for name in fieldnames if name}
+        resolved = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            column = getattr(self, field)
+            if column is not None:
+                if column not in fieldnames:
+                    raise ValueError(f"Column '{column}' is not in the CSV header.")
+                resolved[field] = column
+                continue
+            resolved[field] = next(
+                (by_name[alias] for alias in aliases if alias in by_name), None
+            )
+
+        if resolved["date"] is None or resolved["name"] is None:
+            raise ValueError("The CSV file needs a date and a description column.")
+        if resolved["amount"] is None and resolved["debit"] is None and resolved["credit"] is None:
+            raise ValueError("The CSV file needs an amount, or debit and credit columns.")
+        if resolved["amount"] is not None:
+            resolved["debit"] = resolved["credit"] = None
+        return CsvMapping(
+            **resolved,
+            date_format=self.date_format,
+            debits_positive=self.debits_positive,
+        )
+
+
+def parse_amount(value: str) -> Decimal:
+    """A statement amount such as "-1,234.50", "$12" or "(12.00)"."""
+    value = (value or "").strip().replace(",", "").replace("$", "").replace(" ", "")
+    negative = _PARENTHESES.match(value)
+    if negative:
+        value = "-" + negative.group(1)
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise StatementError(f"Invalid amount '{value}'")
+    if not amount.is_finite():
+        raise StatementError(f"Invalid amount '{value}'")
+    return amount
+
+
+def parse_date(value: str, date_format: str = None) -> datetime:
+    value = (value or "").strip()
+    for candidate in (date_format,) if date_format else DATE_FORMATS:
+        try:
+            return datetime.strptime(value, candidate)
+        except ValueError:
+            continue
+    raise StatementError(f"Invalid date '{value}'")
+
+
+def _cell(row: dict, column: str) -> str:
+    """A stripped CSV cell, None if the column is unmapped or the cell empty."""
+    return (row.get(column) or "").strip() or None if column else None
+
+
+def csv_records(stream, mapping: CsvMapping = None):
+    """
+    Statement rows of a CSV text stream as (line, record) pairs. A record
+    is a dict of date, amount (positive for money out), name, merchant
+    and category, or a StatementError for a row that cannot be read.
+    """
+    reader = csv.DictReader(stream)
+    mapping = (mapping or CsvMapping()).resolve(reader.fieldnames)
+    sign = 1 if mapping.debits_positive else -1
+    # A statement spans few distinct days, and strptime is slow
+    days = {}
+    for row in reader:
+        try:
+            if mapping.amount:
+                amount = sign * parse_amount(row[mapping.amount])
+            else:
+                # Debit and credit columns both hold unsigned amounts
+                debit = _cell(row, mapping.debit)
+                credit = _cell(row, mapping.credit)
+                amount = (abs(parse_amount(debit)) if debit else 0) - (
+                    abs(parse_amount(credit)) if credit else 0
+                )
+            name = _cell(row, mapping.name)
+            if not name:
+                raise StatementError("Missing description")
+            posted = row[mapping.date]
+            if posted not in days:
+                days[posted] = parse_date(posted, mapping.date_format)
+            record = {
+                "date": days[posted],
+                "amount": amount,
+                "name": name,
+                "merchant": _cell(row, mapping.merchant),
+                "category": _cell(row, mapping.category),
+            }
+        except StatementError as e:
+            record = e
+        yield reader.line_num, record
+
+
+def ofx_transactions(stream, chunk_size: int = OFX_CHUNK_SIZE):
+    """
+    The <STMTTRN> blocks of an OFX text stream as dicts of their fields.
+
+    Reads both SGML OFX 1.x, where fields have no closing tags, and XML
+    OFX 2.x, chunk by chunk.
+    """
+    buffer = ""
+    fields = None
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # A field's value runs to the next tag, so keep the last one for later
+        end = buffer.rfind("<") if chunk else len(buffer)
+        if end <= 0:
+            if chunk:
+                continue
+            break
+        for match in _OFX_TAG.finditer(buffer, 0, end):
+            closing, tag, value = match.groups()
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and fields is not None:
+                    yield fields
+                fields = None if closing else {}
+            elif fields is not None and not closing:
+                fields[tag] = html.unescape(value.strip())
+        buffer = buffer[end:]
+        if not chunk:
+            break
+
+
+def ofx_records(stream):
+    """Statement rows of an OFX text stream, as csv_records returns them."""
+    for index, fields in enumerate(ofx_transactions(stream), start=1):
+        try:
+            posted = fields.get("DTPOSTED", "")
+            try:
+                day = datetime.strptime(posted[:8], "%Y%m%d")
+            except ValueError:
+                raise StatementError(f"Invalid date '{posted}'")
+            name = fields.get("NAME") or fields.get("MEMO")
+            if not name:
+                raise StatementError("Missing NAME")
+            record = {
+                # OFX amounts are negative for money going out
+                "date": day,
+                "amount": -parse_amount(fields.get("TRNAMT")),
+                "name": name,
+                "merchant": None,
+                "category": None,
+            }
+        except StatementError as e:
+            record = e
+        yield index, record
+
+
+def get_category_map() -> dict:
+    """
+    Category and subcategory names, case folded, to (category_id,
+    subcategory_id) pairs. A category maps to its OTHER subcategory, if it
+    has one.
+    """
+    categories = {}
+    others = {}
+    for subcategory_id, name, category_id in db.session.execute(
+        select(TxnSubcategory.id, TxnSubcategory.name, TxnSubcategory.category_id)
+    ):
+        if name == "OTHER":
+            others[category_id] = subcategory_id
+        else:
+            categories.setdefault(name.casefold(), (category_id, subcategory_id))
+    for category_id, name in db.session.execute(select(TxnCategory.id, TxnCategory.name)):
+        categories[name.casefold()] = (category_id, others.get(category_id))
+    return categories
+
+
+def insert_batch(
+    account_id: str,
+    records: list,
+    categories: dict,
+    default: tuple,
+    counts: dict = None,
+) -> dict:
+    """
+    Store the records of one batch that are not stored yet, in one
+    transaction.
+
+    A fingerprint shared by several rows is imported as many times as it
+    appears, less the number stored before the import, so repeated
+    same-day purchases survive and re-imports add nothing. The counts
+    cover every batch of the file so far, so such rows may be anywhere in
+    an unsorted statement.
+
+    Args:
+        counts: Per fingerprint, the rows stored before the import and the
+            rows of the file seen so far; updated in place
+
+    Returns:
+        dict: The number of transactions imported and skipped as
+            duplicates, the (account_id, key) recurring groups touched,
+            and the updated `counts`
+    """
+    counts = {} if counts is None else counts
+    fingerprints = [
+        txn_fingerprint(account_id, record["date"], record["amount"], record["name"])
+        for record in records
+    ]
+    carried = set(fingerprints) & counts.keys()
+    stored = {fingerprint: counts[fingerprint][0] for fingerprint in carried}
+    stored.update(
+        db.session.execute(
+            select(Txn.fingerprint, func.count())
+            .where(Txn.fingerprint.in_(set(fingerprints) - carried))
+            .group_by(Txn.fingerprint)
+        ).all()
+    )
+
+    seen = Counter({fingerprint: counts[fingerprint][1] for fingerprint in carried})
+    txn_dicts = []
+    for record, fingerprint in zip(records, fingerprints):
+        seen[fingerprint] += 1
+        if seen[fingerprint] <= stored.get(fingerprint, 0):
+            continue
+        category_id, subcategory_id = categories.get(
+            (record["category"] or "").casefold(), default
+        )
+        txn_dicts.append(
+            {
+                "id": f"import_{uuid.uuid4().hex}",
+                "name": record["name"][:120],
+                "amount": record["amount"],
+                "category_id": category_id,
+                "subcategory_id": subcategory_id,
+                "date": record["date"],
+                "merchant": record["merchant"],
+                "channel": PaymentChannel.OTHER,
+                "account_id": account_id,
+                "fingerprint": fingerprint,
+            }
+        )
+
+    if txn_dicts:
+        resolve_merchants(txn_dicts)
+        if AI_CATEGORIZATION:
+            apply_ai_categorization(txn_dicts)
+        apply_categorization_rules(txn_dicts)
+        db.session.execute(insert(Txn), txn_dicts)
+    db.session.commit()
+
+    for fingerprint, count in seen.items():
+        counts[fingerprint] = (stored.get(fingerprint, 0), count)
+
+    groups = set()
+    for txn in txn_dicts:
+        key = series_key(txn["merchant_id"], txn["name"])
+        if key:
+            groups.add((account_id, key))
+    return {
+        "imported": len(txn_dicts),
+        "duplicates": len(records) - len(txn_dicts),
+        "groups": groups,
+        "counts": counts,
+    }
+
+
+def import_statement(
+    stream,
+    account_id: str,
+    file_format: str = "csv",
+    mapping: CsvMapping = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress=None,
+) -> dict:
+    """
+    Import the transactions of a CSV or OFX statement into an account.
+
+    Rows that cannot be read are counted and the first
+    MAX_REPORTED_ERRORS listed, and the rest of the file is still
+    imported. Recurring series of the imported transactions are rebuilt
+    once at the end.
+
+    Args:
+        stream: The statement as a text stream
+        account_id: The account the transactions belong to
+        file_format: "csv" or "ofx"
+        mapping: CSV column mapping; headers are guessed where not given
+        batch_size: Transactions inserted per database transaction
+        progress: Called with the running totals after each batch
+
+    Returns:
+        dict: Rows read, transactions imported, duplicates skipped, rows
+            that failed and the first failures
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}.")
+    if db.session.get(Account, account_id) is None:
+        raise ValueError(f"Account {account_id} not found.")
+
+    backfill_fingerprints()
+    categories = get_category_map()
+    category, subcategory = resolve_category_and_subcategory("OTHER", "OTHER")
+    default = (category.id, subcategory.id)
+
+    records = ofx_records(stream) if file_format == "ofx" else csv_records(stream, mapping)
+    totals = {"rows": 0, "imported": 0, "duplicates": 0, "failed": 0, "errors": []}
+    groups = set()
+    counts = {}
+    started_at = time.perf_counter()
+
+    def flush(batch):
+        result = insert_batch(account_id, batch, categories, default, counts)
+        totals["imported"] += result["imported"]
+        totals["duplicates"] += result["duplicates"]
+        groups.update(result["groups"])
+        logger.info(
+            f"📥 Imported {totals['imported']} of {totals['rows']} statement rows "
+            f"into {account_id} ({totals['duplicates']} duplicates)"
+        )
+        if progress:
+            progress(dict(totals))
+
+    batch = []
+    for line, record in records:
+        totals["rows"] += 1
+        if isinstance(record, StatementError):
+            totals["failed"] += 1
+            if len(totals["errors"]) < MAX_REPORTED_ERRORS:
+                totals["errors"].append({"row": line, "error": str(record)})
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    series = rescan_recurring_series(groups)
+    if series:
+        logger.info(f"🔁 Rebuilt {series} recurring series after the import")
+    logger.info(
+        f"✅ Statement import into {account_id} done in "
+        f"{time.perf_counter() - started_at:.1f}s: {totals['imported']} imported, "
+        f"{totals['duplicates']} duplicates, {totals['failed']} failed"
+    )
+    return totals
+
+
+@job_handler("import_statement")
+def import_statement_file(
+    path: str,
+    account_id: str,
+    file_format: str = "csv",
+    mapping: dict = None,
+    remove: bool = False,
+) -> dict:
+    """
+    Import a statement saved on disk, reporting progress on the job.
+    With `remove`, the file is deleted once the import succeeds.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        totals = import_statement(
+            stream,
+            account_id,
+            file_format,
+            CsvMapping(**(mapping or {})),
+            progress=report_progress,
+        )
+    if remove:
+        os.remove(path)
+    return totals
@@ -0,0 +1,541 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import plaid
+from flask import current_app
+from plaid.model.transactions_sync_request import TransactionsSyncRequest
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.account.account import Account
+from models.item.item import Item
+from models.item.item_sync_lease import ItemSyncLease
+from models.job.job import Job
+from models.job.job_state import JobState
+from models.transaction.payment_channel import PaymentChannel
+from models.transaction.txn import Txn
+from utils.budget_categorizer import AI_CATEGORIZATION, apply_ai_categorization
+from utils.job_queue import enqueue_job, job_handler
+from utils.logger import get_logger, get_sampled_logger
+from utils.merchant_utils import resolve_merchants
+from utils.metrics import SYNC_COALESCED, observe_sync
+from utils.model_utils import (
+    create_model_instance_from_dict,
+    delete_model_instance,
+    update_model_instance_from_dict,
+)
+from utils.plaid_client import plaid_error_code
+from utils.recurring import (
+    rescan_recurring_series,
+    series_group,
+    update_recurring_series,
+)
+from utils.rule_engine import apply_categorization_rules, get_rule_matcher
+from utils.txn_utils import resolve_category_and_subcategory
+
+logger = get_logger(__name__)
+# Per-transaction logs during sync, sampled at LOG_SAMPLE_RATE
+row_logger = get_sampled_logger(__name__)
+
+# Plaid asks clients to restart pagination from the original cursor when
+# the item changes mid-sync
+MUTATION_DURING_PAGINATION = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+MAX_PAGINATION_RESTARTS = 3
+# A lease outliving this is treated as abandoned by a crashed process
+SYNC_LEASE_SECONDS = int(os.getenv("SYNC_LEASE_SECONDS", "300"))
+SYNC_LEASE_POLL_SECONDS = 0.1
+
+
+def handle_added_transactions(transactions: list):
+    logger.info(f"Handling {len(transactions)} new transactions")
+
+    txn_dicts = []
+    for i, transaction in enumerate(transactions):
+        txn_id = transaction.get("transaction_id")
+        row_logger.debug(
+            "Processing transaction %d/%d: ID %s", i + 1, len(transactions), txn_id
+        )
+
+        # Skip if txn already exists
+        if db.session.get(Txn, txn_id):
+            row_logger.debug("Transaction %s already exists, skipping.", txn_id)
+            continue
+
+        # Ensure account exists
+        account = db.session.get(Account, transaction.get("account_id"))
+        if not account:
+            logger.warning(
+                f"Account {transaction['account_id']} not found, skipping transaction."
+            )
+            continue
+
+        # Resolve category + subcategory
+        # If category doesn't exist, default to OTHER/OTHER (don't auto-create deleted categories)
+        personal_finance = transaction.get("personal_finance_category", {})
+        primary_category = personal_finance.get("primary", "OTHER")
+        detailed_category = personal_finance.get("detailed", "OTHER")
+
+        category, subcategory = resolve_category_and_subcategory(
+            primary_category, detailed_category
+        )
+
+        # Safe payment channel enum parsing
+        try:
+            payment_channel = PaymentChannel(str(transaction.get("payment_channel")))
+        except ValueError:
+            logger.warning(
+                f"Invalid payment channel '{transaction.get('payment_channel')}', defaulting to OTHER"
+            )
+            payment_channel = PaymentChannel.OTHER
+
+        # Build txn dict; rules are applied to the whole batch below
+        txn_dict = {
+            "id": txn_id,
+            "name": transaction.get("name"),
+            "amount": Decimal(transaction.get("amount") or 0.0),
+            "category_id": category.id,
+            "subcategory_id": subcategory.id,
+            "date": transaction.get("date"),
+            "date_time": transaction.get("datetime"),
+            "merchant": transaction.get("merchant_name"),
+            "logo_url": transaction.get("logo_url"),
+            "channel": payment_channel,
+            "account_id": account.id,
+        }
+        txn_dicts.append(txn_dict)
+
+    created = resolve_merchants(txn_dicts)
+    if created:
+        logger.info(f"🏪 Created {created} merchants")
+
+    if AI_CATEGORIZATION:
+        suggested = apply_ai_categorization(txn_dicts)
+        if suggested:
+            logger.info(f"🧠 Categorized {suggested} uncategorized new transactions")
+
+    matched = apply_categorization_rules(txn_dicts)
+    if matched:
+        logger.info(f"🧩 Categorization rules matched {matched} new transactions")
+
+    for txn_dict in txn_dicts:
+        create_model_instance_from_dict(Txn, txn_dict, fail_on_duplicate=False)
+
+    series = update_recurring_series(txn_dicts)
+    if series:
+        logger.info(f"🔁 Updated {series} recurring series")
+
+    logger.info("All new transactions have been processed.")
+
+
+def handle_modified_transactions(transactions: list):
+    logger.info(f"Handling {len(transactions)} modified transactions")
+
+    matcher = get_rule_matcher()
+    # Recurring series of the transactions before and after the changes
+    affected = set()
+    merchants = [
+        {"merchant": transaction.get("merchant_name"), "logo_url": transaction.get("logo_url")}
+        for transaction in transactions
+    ]
+    resolve_merchants(merchants)
+
+    for i, transaction in enumerate(transactions):
+        txn_id = transaction.get("transaction_id")
+        row_logger.debug(
+            "Processing modified transaction %d/%d: ID %s",
+            i + 1,
+            len(transactions),
+            txn_id,
+        )
+
+        txn = db.session.get(Txn, txn_id)
+        if not txn:
+            logger.warning(f"Modified transaction {txn_id} not found, skipping.")
+            continue
+
+        # Handle category/subcategory updates if present
+        personal_finance = transaction.get("personal_finance_category", {})
+        primary_category = personal_finance.get("primary")
+        detailed_category = personal_finance.get("detailed")
+
+        update_data = {
+            "name": transaction.get("name"),
+            "amount": Decimal(transaction.get("amount") or txn.amount),
+            "date": transaction.get("date"),
+            "date_time": transaction.get("datetime"),
+            "merchant": transaction.get("merchant_name"),
+            "merchant_id": merchants[i]["merchant_id"],
+        }
+
+        # Ensure category exists if updated
+        # If category doesn't exist, default to OTHER (don't auto-create deleted categories)
+        if primary_category:
+            category, subcategory = resolve_category_and_subcategory(
+                primary_category, detailed_category or "OTHER"
+            )
+            update_data["category_id"] = category.id
+            update_data["subcategory_id"] = subcategory.id
+
+        # User rules take precedence over Plaid's category
+        rule = matcher.match(
+            update_data["name"] or txn.name,
+            update_data["merchant"],
+            txn.account_id,
+            update_data["amount"],
+        )
+        if rule:
+            update_data["category_id"] = rule.category_id
+            update_data["subcategory_id"] = rule.subcategory_id
+
+        # Safe payment channel update
+        if transaction.get("payment_channel"):
+            try:
+                update_data["channel"] = PaymentChannel(
+                    str(transaction.get("payment_channel"))
+                )
+            except ValueError:
+                logger.warning(
+                    f"Invalid payment channel '{transaction.get('payment_channel')}', keeping existing."
+                )
+
+        # Apply updates
+        affected.add(series_group(txn))
+        update_model_instance_from_dict(txn, update_data)
+        affected.add(series_group(txn))
+
+    rescan_recurring_series(affected)
+    logger.info("All modified transactions have been processed.")
+
+
+def handle_removed_transactions(transactions: list):
+    logger.info(f"Handling {len(transactions)} removed transactions")
+
+    affected = set()
+    for i, transaction in enumerate(transactions):
+        txn_id = transaction.get("transaction_id")
+        row_logger.debug(
+            "Processing removed transaction %d/%d: ID %s",
+            i + 1,
+            len(transactions),
+            txn_id,
+        )
+
+        txn = db.session.get(Txn, txn_id)
+        if txn:
+            affected.add(series_group(txn))
+        if delete_model_instance(Txn, txn_id):
+            row_logger.debug("Transaction %s successfully removed.", txn_id)
+        else:
+            logger.warning(
+                f"Transaction {txn_id} could not be removed (already gone or error)."
+            )
+
+    rescan_recurring_series(affected)
+    logger.info("All removed transactions have been processed.")
+
+
+def fetch_sync_pages(plaid_client, access_token: str, cursor: str) -> dict:
+    """
+    Page through transactions/sync once, starting from `cursor`.
+
+    Args:
+        plaid_client: The Plaid API client
+        access_token: The item's access token
+        cursor: The last cursor stored for the item ("" for a first sync)
+
+    Returns:
+        dict: added, modified and removed transactions, the next cursor and
+        the number of pages fetched
+    """
+    pages = 0
+    for _ in range(MAX_PAGINATION_RESTARTS + 1):
+        added, modified, removed = [], [], []
+        current_cursor = cursor
+        has_more = True
+        try:
+            while has_more:
+                response = plaid_client.transactions_sync(
+                    TransactionsSyncRequest(
+                        access_token=access_token, cursor=current_cursor
+                    )
+                ).to_dict()
+                pages += 1
+
+                added.extend(response["added"])
+                modified.extend(response["modified"])
+                removed.extend(response["removed"])
+
+                has_more = response["has_more"]
+                current_cursor = response["next_cursor"]
+        except plaid.ApiException as e:
+            if plaid_error_code(e) != MUTATION_DURING_PAGINATION:
+                raise
+            logger.info("🔁 Item changed during pagination, restarting sync")
+            continue
+
+        return {
+            "added": added,
+            "modified": modified,
+            "removed": removed,
+            "next_cursor": current_cursor,
+            "pages": pages,
+        }
+
+    raise RuntimeError(
+        f"Sync restarted {MAX_PAGINATION_RESTARTS} times due to concurrent updates"
+    )
+
+
+def sync_item(item: Item, plaid_client) -> dict:
+    """
+    Fetch and apply every pending transaction change for an item.
+
+    A single pass is made: when Plaid has nothing new yet the cursor is left
+    as is and the SYNC_UPDATES_AVAILABLE webhook triggers the next sync.
+
+    Args:
+        item: The item to sync
+        plaid_client: The Plaid API client
+
+    Returns:
+        dict: Counts of added, modified and removed transactions and pages
+    """
+    started_at = time.perf_counter()
+    changes = fetch_sync_pages(plaid_client, item.access_token, item.cursor)
+
+    handle_added_transactions(changes["added"])
+    handle_modified_transactions(changes["modified"])
+    handle_removed_transactions(changes["removed"])
+
+    # An empty cursor means Plaid is not ready yet, keep the previous one
+    if changes["next_cursor"] and changes["next_cursor"] != item.cursor:
+        item.cursor = changes["next_cursor"]
+        db.session.commit()
+
+    summary = {
+        "added": len(changes["added"]),
+        "modified": len(changes["modified"]),
+        "removed": len(changes["removed"]),
+        "pages": changes["pages"],
+    }
+    observe_sync(
+        time.perf_counter() - started_at,
+        summary["pages"],
+        summary["added"],
+        summary["modified"],
+        summary["removed"],
+    )
+    logger.info(f"🔄 Synced item {item.id}: {summary}")
+    return summary
+
+
+class _Flight:
+    """A sync in progress in this process that other threads can wait on."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def wait(self) -> dict:
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _try_acquire_lease(item_id: str, owner: str) -> bool:
+    """Take the item's lease if it is free or expired, in its own transaction."""
+    lease_table = ItemSyncLease.__table__
+    now = datetime.now()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(lease_table).values(item_id=item_id, generation=0))
+    except IntegrityError:
+        pass  # Row already exists
+
+    with db.engine.begin() as conn:
+        acquired = conn.execute(
+            update(lease_table)
+            .where(
+                lease_table.c.item_id == item_id,
+                or_(lease_table.c.owner.is_(None), lease_table.c.expires_at < now),
+            )
+            .values(owner=owner, expires_at=now + timedelta(seconds=SYNC_LEASE_SECONDS))
+        ).rowcount
+    return acquired == 1
+
+
+def _release_lease(item_id: str, owner: str, result: dict = None, error: str = None):
+    lease_table = ItemSyncLease.__table__
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(lease_table)
+            .where(lease_table.c.item_id == item_id, lease_table.c.owner == owner)
+            .values(
+                owner=None,
+                expires_at=None,
+                generation=lease_table.c.generation + 1,
+                result=json.dumps(result) if result is not None else None,
+                error=error,
+                finished_at=datetime.now(),
+            )
+        )
+
+
+def _read_lease(item_id: str):
+    lease_table = ItemSyncLease.__table__
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(lease_table).where(lease_table.c.item_id == item_id)
+        ).one_or_none()
+
+
+def _sync_under_lease(item_id: str, plaid_client, source: str) -> dict:
+    """
+    Sync an item while holding its DB lease, or wait for the process that
+    holds it and return the result of that sync instead.
+    """
+    owner = _lease_owner()
+    deadline = time.monotonic() + SYNC_LEASE_SECONDS
+    joined_generation = None
+
+    while True:
+        if joined_generation is not None:
+            lease = _read_lease(item_id)
+            if lease is None:
+                # Deleting the item removes its lease; the sync is moot
+                logger.info(f"ℹ️ Item {item_id} was deleted while its sync ran")
+                return None
+            if lease.generation > joined_generation:
+                if lease.error:
+                    raise RuntimeError(
+                        f"Joined sync of item {item_id} failed: {lease.error}"
+                    )
+                return json.loads(lease.result) if lease.result else None
+
+        if _try_acquire_lease(item_id, owner):
+            break
+
+        if joined_generation is None:
+            lease = _read_lease(item_id)
+            if lease is None:
+                continue  # Deleted with its item since; take a new lease
+            joined_generation = lease.generation
+            SYNC_COALESCED.inc(source=source)
+            logger.info(f"🔗 Joining sync of item {item_id} held by {lease.owner}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for sync of item {item_id}")
+        time.sleep(SYNC_LEASE_POLL_SECONDS)
+
+    try:
+        # Another process may have advanced the cursor while we waited
+        item = db.session.get(Item, item_id, populate_existing=True)
+        if not item:
+            logger.warning(f"⚠️ Item {item_id} not found, skipping sync")
+            summary = None
+        else:
+            summary = sync_item(item, plaid_client)
+    except Exception as e:
+        db.session.rollback()
+        _release_lease(item_id, owner, error=str(e))
+        raise
+
+    _release_lease(item_id, owner, result=summary)
+    return summary
+
+
+def sync_item_by_id(item_id: str, plaid_client, source: str = "request") -> dict:
+    """
+    Sync an item, joining a sync of the same item that is already running.
+
+    Concurrent callers in this process wait on the in-flight sync. Callers in
+    other processes are serialized by the item's ItemSyncLease row and also
+    receive the result of the sync they waited on.
+
+    Args:
+        item_id: The item to sync
+        plaid_client: The Plaid API client
+        source: Label for the coalesced-sync metric ("request" or "webhook")
+
+    Returns:
+        dict: The sync summary, or None if the item does not exist
+    """
+    with _flights_lock:
+        flight = _flights.get(item_id)
+        leader = flight is None
+        if leader:
+            flight = _flights[item_id] = _Flight()
+
+    if not leader:
+        SYNC_COALESCED.inc(source=source)
+        logger.info(f"🔗 Joining in-flight sync of item {item_id}")
+        return flight.wait()
+
+    try:
+        summary = _sync_under_lease(item_id, plaid_client, source)
+    except Exception as e:
+        flight.finish(error=e)
+        raise
+    else:
+        flight.finish(result=summary)
+        return summary
+    finally:
+        with _flights_lock:
+            _flights.pop(item_id, None)
+
+
+@job_handler("sync_item")
+def sync_item_job(item_id: str) -> dict:
+    """Background job that syncs one item."""
+    return sync_item_by_id(item_id, current_app.config["plaid_client"], source="job")
+
+
+def enqueue_webhook_sync(item_id: str) -> tuple:
+    """
+    Queue a sync_item job for a webhook notification, coalescing bursts.
+
+    The job's idempotency key is the lease generation its sync will end:
+    the current one while the item is idle, the next one while a sync is
+    running. Notifications for an item with a sync queued share that job,
+    and one arriving mid-sync queues a single follow-up for changes the
+    running sync may have missed.
+
+    Returns:
+        tuple: The job, and True if the notification joined a pending job
+    """
+    lease = _read_lease(item_id)
+    generation = 0
+    if lease is not None:
+        generation = lease.generation + (1 if lease.owner else 0)
+    key = f"webhook-sync:{item_id}:{generation}"
+
+    job = Job.query.filter_by(idempotency_key=key).one_or_none()
+    if job is not None and job.state in (JobState.QUEUED, JobState.RUNNING):
+        SYNC_COALESCED.inc(source="webhook")
+        return job, True
+    # A job that ended without taking the lease leaves its key behind
+    job = enqueue_job(
+        "sync_item", {"item_id": item_id}, idempotency_key=None if job else key
+    )
+    return job, False
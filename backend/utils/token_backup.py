@@ -1,8 +1,10 @@
 import os
 import json
+import time
 import boto3
 from botocore.exceptions import ClientError
 from utils.logger import get_logger
+from utils.metrics import TOKEN_BACKUP_DURATION
 
 logger = get_logger(__name__)
 
@@ -181,6 +183,7 @@ class TokenBackup:
                 "S3 backup not properly configured. Cannot backup token."
             )
 
+        start = time.perf_counter()
         try:
             # Read existing backup
             backup_data = self._read_from_s3(environment)
@@ -205,6 +208,10 @@ class TokenBackup:
                 f"❌ Error backing up token for item {item_id}: {e}", exc_info=True
             )
             return False
+        finally:
+            TOKEN_BACKUP_DURATION.observe(
+                time.perf_counter() - start, operation="backup"
+            )
 
     def restore_token(self, item_id, environment: str = None):
         """
@@ -222,6 +229,7 @@ class TokenBackup:
             logger.warning("⚠️ S3 backup not configured, cannot restore token")
             return None
 
+        start = time.perf_counter()
         try:
             # If environment not specified, try both
             environments_to_try = (
@@ -245,6 +253,10 @@ class TokenBackup:
                 f"❌ Error restoring token for item {item_id}: {e}", exc_info=True
             )
             return None
+        finally:
+            TOKEN_BACKUP_DURATION.observe(
+                time.perf_counter() - start, operation="restore"
+            )
 
 # Global instance
 _token_backup = None
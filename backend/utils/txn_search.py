@@ -0,0 +1,236 @@
+"""
+Full-text search over transaction names and merchants.
+
+On SQLite, `txn_fts` is an external-content FTS5 table over txn.name and
+txn.merchant: it stores only the index and reads text from `txn`. Triggers
+keep it in sync with every insert, update and delete on txn, whether it
+comes from the ORM, a bulk INSERT or raw SQL, so the ingestion and update
+paths need no changes.
+
+TXN_SEARCH_TOKENIZER=trigram indexes character trigrams instead of words,
+so any substring of three or more characters matches ("bucks" finds
+STARBUCKS) at the cost of a larger index. The index is rebuilt from txn
+whenever the configured tokenizer changes. Other databases fall back to
+LIKE matching.
+
+The index is keyed on txn.rowid, and txn has no INTEGER PRIMARY KEY (its
+id is a string), so VACUUM is free to renumber its rowids. The index is
+checked against txn at startup and rebuilt if their rowids differ.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import joinedload
+
+from models import db
+from models.transaction.txn import Txn
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TXN_SEARCH_TOKENIZER = os.getenv("TXN_SEARCH_TOKENIZER", "unicode61").lower()
+TOKENIZERS = {
+    "unicode61": "unicode61 remove_diacritics 2",
+    "trigram": "trigram",
+}
+# bm25 weights for (name, merchant): a merchant hit ranks higher
+NAME_WEIGHT = 1.0
+MERCHANT_WEIGHT = 2.0
+TRIGRAM_MIN_LENGTH = 3
+
+txn_fts = table("txn_fts", column("rowid"))
+
+_WORD = re.compile(r"\w+")
+
+_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_fts_insert AFTER INSERT ON txn BEGIN
+        INSERT INTO txn_fts(rowid, name, merchant)
+        VALUES (new.rowid, new.name, new.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_fts_delete AFTER DELETE ON txn BEGIN
+        INSERT INTO txn_fts(txn_fts, rowid, name, merchant)
+        VALUES ('delete', old.rowid, old.name, old.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS txn_fts_update AFTER UPDATE OF name, merchant ON txn
+    BEGIN
+        INSERT INTO txn_fts(txn_fts, rowid, name, merchant)
+        VALUES ('delete', old.rowid, old.name, old.merchant);
+        INSERT INTO txn_fts(rowid, name, merchant)
+        VALUES (new.rowid, new.name, new.merchant);
+    END
+    """,
+]
+
+
+def supported_tokenizer(tokenizer: str) -> str:
+    if tokenizer not in TOKENIZERS:
+        logger.warning(f"⚠️ Unknown TXN_SEARCH_TOKENIZER '{tokenizer}', using unicode61")
+        return "unicode61"
+    if tokenizer == "trigram" and sqlite3.sqlite_version_info < (3, 34, 0):
+        logger.warning(
+            f"⚠️ SQLite {sqlite3.sqlite_version} has no trigram tokenizer, using unicode61"
+        )
+        return "unicode61"
+    return tokenizer
+
+
+def index_tokenizer(connection) -> str:
+    """The tokenizer txn_fts was built with, None if there is no index."""
+    if connection.dialect.name != "sqlite":
+        return None
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'txn_fts'")
+    ).scalar()
+    if sql is None:
+        return None
+    for name, tokenize in TOKENIZERS.items():
+        if f"tokenize='{tokenize}'" in sql:
+            return name
+    return "unicode61"
+
+
+def search_index_in_sync(connection) -> bool:
+    """
+    True if txn_fts indexes the rowids txn has.
+
+    VACUUM copies rows in rowid order and closes the gaps, so renumbered
+    rowids show up as a different count, lowest or highest rowid.
+    """
+    txn_rowids = connection.execute(
+        text("SELECT count(*), min(rowid), max(rowid) FROM txn")
+    ).one()
+    index_rowids = connection.execute(
+        text("SELECT count(*), min(id), max(id) FROM txn_fts_docsize")
+    ).one()
+    return tuple(txn_rowids) == tuple(index_rowids)
+
+
+def ensure_search_index(connection=None, tokenizer: str = TXN_SEARCH_TOKENIZER):
+    """
+    Create txn_fts and its triggers if missing, or rebuild them when the
+    tokenizer changed or txn's rowids no longer match the index. A new
+    index is filled from the existing transactions.
+    """
+    if connection is None:
+        with db.engine.begin() as connection:
+            return ensure_search_index(connection, tokenizer)
+    if connection.dialect.name != "sqlite":
+        return
+
+    tokenizer = supported_tokenizer(tokenizer)
+    current = index_tokenizer(connection)
+    if current != tokenizer:
+        if current is not None:
+            logger.info(f"🔎 Rebuilding transaction search index with {tokenizer}")
+            connection.execute(text("DROP TABLE txn_fts"))
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE txn_fts USING fts5("
+                "name, merchant, content='txn', content_rowid='rowid', "
+                f"tokenize='{TOKENIZERS[tokenizer]}')"
+            )
+        )
+        connection.execute(text("INSERT INTO txn_fts(txn_fts) VALUES ('rebuild')"))
+    elif not search_index_in_sync(connection):
+        logger.warning("⚠️ Transaction rowids changed (VACUUM?), rebuilding search index")
+        connection.execute(text("INSERT INTO txn_fts(txn_fts) VALUES ('rebuild')"))
+    for trigger in _TRIGGERS:
+        connection.execute(text(trigger))
+
+
+@event.listens_for(Txn.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+
+@event.listens_for(Txn.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    # The triggers go with txn, the index would outlive it
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS txn_fts"))
+
+
+def match_expression(query: str, tokenizer: str) -> str:
+    """
+    An FTS5 query that matches every term of `query`, with FTS5 syntax
+    characters quoted away. Word terms are prefix matches; trigram terms
+    are substrings and must be at least three characters long.
+
+    Returns:
+        str: The MATCH expression, empty if no term is searchable
+    """
+    if tokenizer == "trigram":
+        terms = [term for term in query.split() if len(term) >= TRIGRAM_MIN_LENGTH]
+        return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    return " ".join(f'"{term}"*' for term in _WORD.findall(query))
+
+
+def search_transactions(
+    query: str,
+    account_id: str = None,
+    category_id: str = None,
+    subcategory_id: str = None,
+    start: datetime = None,
+    end: datetime = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> list[Txn]:
+    """
+    Transactions whose name or merchant match `query`, best match first.
+    With FTS5 every match is ranked by bm25, so pages split one ordering.
+
+    Args:
+        query: Search text; every term must match
+        account_id, category_id, subcategory_id: Optional exact filters
+        start, end: Optional inclusive date range
+        limit, offset: Page of results
+
+    Returns:
+        list[Txn]: Matching transactions with category and subcategory loaded
+    """
+    filters = []
+    if account_id:
+        filters.append(Txn.account_id == account_id)
+    if category_id:
+        filters.append(Txn.category_id == category_id)
+    if subcategory_id:
+        filters.append(Txn.subcategory_id == subcategory_id)
+    if start:
+        filters.append(Txn.date >= start)
+    if end:
+        filters.append(Txn.date < end + timedelta(days=1))
+
+    statement = select(Txn).options(
+        joinedload(Txn.category), joinedload(Txn.subcategory)
+    )
+    tokenizer = index_tokenizer(db.session.connection())
+    if tokenizer is None:
+        # No FTS5 index on this database
+        for term in query.split():
+            pattern = f"%{term}%"
+            filters.append(or_(Txn.name.ilike(pattern), Txn.merchant.ilike(pattern)))
+        statement = statement.order_by(Txn.date.desc(), Txn.id)
+    else:
+        match = match_expression(query, tokenizer)
+        if not match:
+            return []
+        fts = literal_column("txn_fts")
+        statement = (
+            statement.join(txn_fts, txn_fts.c.rowid == literal_column("txn.rowid"))
+            .where(fts.op("MATCH")(match))
+            .order_by(
+                func.bm25(fts, NAME_WEIGHT, MERCHANT_WEIGHT), Txn.date.desc(), Txn.id
+            )
+        )
+
+    statement = statement.where(*filters).limit(limit).offset(offset)
+    return list(db.session.execute(statement).scalars().unique())
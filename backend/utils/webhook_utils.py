@@ -0,0 +1,152 @@
+import base64
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+
+import plaid
+from plaid.model.webhook_verification_key_get_request import (
+    WebhookVerificationKeyGetRequest,
+)
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Plaid signs webhooks with a JWT in the Plaid-Verification header
+VERIFICATION_HEADER = "Plaid-Verification"
+# Reject webhooks signed more than 5 minutes ago to prevent replays
+MAX_WEBHOOK_AGE_SECONDS = 5 * 60
+
+_verification_keys = {}
+_verification_keys_lock = threading.Lock()
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def get_verification_key(plaid_client, key_id: str) -> dict:
+    """
+    Fetch the JWK Plaid signed webhooks with, caching it by key id.
+
+    Args:
+        plaid_client: The Plaid API client
+        key_id: The `kid` from the JWT header
+
+    Returns:
+        dict: The JWK, or None if it has expired
+    """
+    with _verification_keys_lock:
+        key = _verification_keys.get(key_id)
+    if key is None or key.get("expired_at"):
+        # Expired keys are re-fetched once in case Plaid rotated them
+        try:
+            response = plaid_client.webhook_verification_key_get(
+                WebhookVerificationKeyGetRequest(key_id=key_id)
+            )
+        except plaid.ApiException as e:
+            logger.warning(f"⚠️ Could not fetch webhook verification key {key_id}: {e}")
+            return None
+        key = response.to_dict()["key"]
+        with _verification_keys_lock:
+            _verification_keys[key_id] = key
+    return None if key.get("expired_at") else key
+
+
+def _verify_es256(signing_input: bytes, signature: bytes, jwk: dict) -> bool:
+    try:
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import (
+            encode_dss_signature,
+        )
+    except ImportError:
+        logger.error("❌ cryptography is required to verify Plaid webhook signatures")
+        return False
+
+    if len(signature) != 64:
+        return False
+    public_key = ec.EllipticCurvePublicNumbers(
+        int.from_bytes(_b64url_decode(jwk["x"]), "big"),
+        int.from_bytes(_b64url_decode(jwk["y"]), "big"),
+        ec.SECP256R1(),
+    ).public_key()
+    try:
+        public_key.verify(
+            encode_dss_signature(
+                int.from_bytes(signature[:32], "big"),
+                int.from_bytes(signature[32:], "big"),
+            ),
+            signing_input,
+            ec.ECDSA(hashes.SHA256()),
+        )
+    except InvalidSignature:
+        return False
+    return True
+
+
+def verify_webhook(
+    body: bytes, token: str, plaid_client, secret: str = None, now: float = None
+) -> bool:
+    """
+    Verify a Plaid webhook against its Plaid-Verification JWT.
+
+    Plaid signs with ES256 and a key fetched from the verification key
+    endpoint. When `secret` is set, HS256 tokens signed with it are also
+    accepted so the local webhook simulator can be used.
+
+    Args:
+        body: The raw request body
+        token: The Plaid-Verification header value
+        plaid_client: The Plaid API client
+        secret: Shared secret for locally signed (HS256) webhooks
+        now: Current time as a UNIX timestamp, for tests
+
+    Returns:
+        bool: True if the signature, body hash and age are all valid
+    """
+    if not token:
+        return False
+
+    try:
+        header_segment, claims_segment, signature_segment = token.split(".")
+        header = json.loads(_b64url_decode(header_segment))
+        claims = json.loads(_b64url_decode(claims_segment))
+        signature = _b64url_decode(signature_segment)
+    except (ValueError, TypeError):
+        return False
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        return False
+
+    signing_input = f"{header_segment}.{claims_segment}".encode()
+    algorithm = header.get("alg")
+
+    if algorithm == "ES256":
+        jwk = get_verification_key(plaid_client, header.get("kid", ""))
+        if jwk is None or not _verify_es256(signing_input, signature, jwk):
+            return False
+    elif algorithm == "HS256" and secret:
+        expected = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, signature):
+            return False
+    else:
+        return False
+
+    # iat comes from the token; anything but a finite number is unverified
+    issued_at = claims.get("iat")
+    if (
+        isinstance(issued_at, bool)
+        or not isinstance(issued_at, (int, float))
+        or not math.isfinite(issued_at)
+    ):
+        return False
+    now = time.time() if now is None else now
+    if now - issued_at > MAX_WEBHOOK_AGE_SECONDS:
+        return False
+
+    body_hash = hashlib.sha256(body).hexdigest()
+    return hmac.compare_digest(body_hash, str(claims.get("request_body_sha256", "")))
@@ -0,0 +1,26 @@
+"""
+Run background jobs in a dedicated process:
+
+    python worker.py --threads 2
+
+Start the web server with JOB_WORKERS=0 to leave all jobs to worker
+processes. Any number of workers can share the database.
+"""
+
+import argparse
+
+from server import app
+from utils.job_queue import JOB_POLL_SECONDS, JOB_WORKERS, JobWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs.")
+    parser.add_argument("--threads", type=int, default=max(JOB_WORKERS, 1))
+    parser.add_argument("--poll-seconds", type=float, default=JOB_POLL_SECONDS)
+    args = parser.parse_args()
+
+    JobWorker(app, threads=args.threads, poll_seconds=args.poll_seconds).run_forever()
+
+
+if __name__ == "__main__":
+    main()